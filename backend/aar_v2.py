@@ -16,6 +16,8 @@ import os
 from datetime import datetime, timezone
 from typing import Dict, List, Any, Optional, Tuple, Callable
 
+from llm_usage_ledger import LLMBudgetExceeded
+
 
 VERSION = "aar_v2_raw_results"
 
@@ -130,6 +132,8 @@ def run_aar_v2_search(
                     if verbose and rejected:
                         print(f"      ⚠️ Topic validation rejected {len(rejected)} candidates")
                 
+                except LLMBudgetExceeded:
+                    raise
                 except Exception as e:
                     if verbose:
                         print(f"      ⚠️ Topic validation failed: {e}")
@@ -157,6 +161,9 @@ def run_aar_v2_search(
             if verbose:
                 print(f"      → {len(candidates)} candidates")
         
+        except LLMBudgetExceeded:
+            # Rozpočet epizody vyčerpán → zastav AAR, nepokračuj dalšími queries bez validace
+            raise
         except Exception as e:
             if verbose:
                 print(f"      ⚠️ Search failed: {e}")
@@ -1,11 +1,10 @@
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, request, jsonify, send_file, Response, stream_with_context
 from flask_cors import CORS
 import os
 import json
 from datetime import datetime, timezone
 from werkzeug.utils import secure_filename
 from werkzeug.exceptions import RequestEntityTooLarge
-import numpy as np
 import threading
 import requests  # For Google TTS REST API calls
 import base64    # For decoding audioContent
@@ -32,11 +31,28 @@ except Exception as e:
 
 # Import DALL-E funkcí
 from gpt_utils import generate_dalle_images, download_image_from_url, call_openai
+from ken_burns import KenBurnsRenderer
+from llm_http_client import llm_client
+from llm_usage_ledger import get_usage_ledger
+from kenburns_slideshow import probe_duration, render_kenburns_slideshow
+from motion_clip_cache import MotionClipCache, motion_cache_enabled
 
 # Script pipeline (Research -> Narrative -> Validation -> Composer)
-from project_store import ProjectStore
+from project_store import ProjectStore, UNLOADED_SHARDS_KEY
+from progress_events import progress_bus
 from script_pipeline import ScriptPipelineService
 from settings_store import SettingsStore
+from tts_cache import TTSCache
+from thumbnail_cache import get_thumbnail_cache, thumbnail_proxy_url
+from tts_synthesis import (
+    TTS_API_URL,
+    build_tts_request_body,
+    get_access_token_with_refresh as get_gcp_access_token,
+    tts_max_qps,
+    tts_settings_from_env,
+    wait_for_prewarm,
+    wait_for_qps_slot,
+)
 from visual_assistant import run_visual_assistant
 from music_store import (
     load_music_manifest,
@@ -106,109 +122,28 @@ print(f"📁 Output folder: {OUTPUT_FOLDER}")
 project_store = ProjectStore(PROJECTS_FOLDER)
 script_pipeline_service = ScriptPipelineService(project_store)
 settings_store = SettingsStore(BASE_DIR, os.path.dirname(os.path.abspath(__file__)))
+tts_cache = TTSCache(BASE_DIR)
+motion_clip_cache = MotionClipCache(BASE_DIR)
 
-def create_ken_burns_effect(image_path, duration, target_width, target_height, effect_type=0):
+def create_ken_burns_effect(image_path, duration, target_width, target_height, effect_type=0, fps=24):
     """
-    Vytvoří skutečný Ken Burns efekt s animací
+    Vytvoří skutečný Ken Burns efekt s animací (plné rozlišení, smoothstep easing)
     effect_type: 0=zoom_in, 1=zoom_out, 2=pan_left, 3=pan_right
+
+    Crop/scale plán pro všechny snímky se spočítá předem (ken_burns.KenBurnsRenderer),
+    každý snímek = jeden resample připraveného obrázku.
     """
     if not MOVIEPY_AVAILABLE:
         raise Exception("MoviePy není dostupné")
     
     try:
         print(f"🎬 Vytvářím animovaný Ken Burns efekt pro {image_path}, duration={duration}s, efekt={effect_type}")
-        
-        # Vytvoř základní ImageClip
-        base_clip = ImageClip(image_path)
-        
-        # Získej původní rozměry obrázku
-        img_width, img_height = base_clip.size
-        print(f"📐 Původní rozměry: {img_width}x{img_height}")
-        
-        # OPTIMALIZACE: Předřež obrázek na rozumnou velikost pro Ken Burns
-        # Maximální velikost 2x target rozměry pro Ken Burns efekt
-        max_work_width = target_width * 2
-        max_work_height = target_height * 2
-        
-        if img_width > max_work_width or img_height > max_work_height:
-            # Změň velikost obrázku před Ken Burns pro rychlost
-            base_clip = base_clip.resized((max_work_width, max_work_height))
-            print(f"🔧 OPTIMALIZACE: Obrázek zmenšen na {max_work_width}x{max_work_height} pro rychlost")
-        
-        # Spočítej poměr pro Ken Burns efekt
-        scale_factor = 1.3  # Kolik zvětšit/zmenšit
-        
-        def make_frame(t):
-            """Vytvoří snímek pro čas t"""
-            # Normalizuj čas (0 až 1)
-            progress = t / duration
-            
-            # PLYNULÉ EASING - pro odstranění "cukání"
-            # Použij smooth S-křivku místo lineární interpolace
-            progress = progress * progress * (3.0 - 2.0 * progress)  # Smoothstep funkce
-            
-            if effect_type == 0:  # Zoom In
-                # Začni větší a postupně zmenšuj
-                current_scale = scale_factor - (scale_factor - 1.0) * progress
-                new_width = int(target_width * current_scale)
-                new_height = int(target_height * current_scale)
-                x_center = (new_width - target_width) // 2
-                y_center = (new_height - target_height) // 2
-                
-            elif effect_type == 1:  # Zoom Out  
-                # Začni menší a postupně zvětšuj
-                current_scale = 1.0 + (scale_factor - 1.0) * progress
-                new_width = int(target_width * current_scale)
-                new_height = int(target_height * current_scale)
-                x_center = (new_width - target_width) // 2
-                y_center = (new_height - target_height) // 2
-                
-            elif effect_type == 2:  # Pan Left
-                # Posouvej zleva doprava
-                new_width = int(target_width * scale_factor)
-                new_height = int(target_height * scale_factor)
-                x_center = int((new_width - target_width) * progress)
-                y_center = (new_height - target_height) // 2
-                
-            else:  # Pan Right (effect_type == 3)
-                # Posouvej zprava doleva
-                new_width = int(target_width * scale_factor)
-                new_height = int(target_height * scale_factor)
-                x_center = int((new_width - target_width) * (1 - progress))
-                y_center = (new_height - target_height) // 2
-            
-            # Změň velikost obrázku
-            try:
-                resized_clip = base_clip.resized((new_width, new_height))
-            except:
-                try:
-                    resized_clip = base_clip.resized(newsize=(new_width, new_height))
-                except:
-                    # Fallback - použij původní velikost
-                    resized_clip = base_clip.resized((target_width, target_height))
-                    return resized_clip.get_frame(0)
-            
-            # Získej snímek a ořízni ho
-            frame = resized_clip.get_frame(0)
-            
-            # Ořízni na požadovanou velikost
-            if x_center < 0:
-                x_center = 0
-            if y_center < 0:
-                y_center = 0
-            if x_center + target_width > new_width:
-                x_center = new_width - target_width
-            if y_center + target_height > new_height:
-                y_center = new_height - target_height
-                
-            cropped_frame = frame[y_center:y_center+target_height, x_center:x_center+target_width]
-            
-            return cropped_frame
-        
-        # Vytvoř animovaný klip
-        animated_clip = VideoClip(make_frame, duration=duration)
-        
-        print(f"✅ Ken Burns efekt úspěšně vytvořen: {duration}s")
+        renderer = KenBurnsRenderer(
+            image_path, duration, target_width, target_height,
+            effect_type=effect_type, fps=fps, easing="smoothstep",
+        )
+        animated_clip = VideoClip(renderer.frame_at, duration=duration)
+        print(f"✅ Ken Burns efekt úspěšně vytvořen: {duration}s ({renderer.n_frames} snímků @ {target_width}x{target_height})")
         return animated_clip
         
     except Exception as e:
@@ -226,112 +161,26 @@ def create_ken_burns_effect(image_path, duration, target_width, target_height, e
             print(f"❌ I fallback selhal: {fallback_error}")
             raise Exception(f"Nelze vytvořit ani základní klip: {fallback_error}")
 
-def create_fast_ken_burns_effect(image_path, duration, target_width, target_height, effect_type=0):
+def create_fast_ken_burns_effect(image_path, duration, target_width, target_height, effect_type=0, fps=15):
     """
-    ⚡ SUPER RYCHLÁ verze Ken Burns efektů - skutečně optimalizováno!
+    ⚡ Rychlá verze Ken Burns efektů – stejný předpočítaný renderer jako create_ken_burns_effect
+    (plné rozlišení, žádný 360p render + upscale), jen cosine easing a nižší fps endpointů.
     """
     if not MOVIEPY_AVAILABLE:
         raise Exception("MoviePy není dostupné")
     
     try:
-        print(f"⚡ Vytvářím SUPER RYCHLÝ Ken Burns efekt pro {image_path}, duration={duration}s, efekt={effect_type}")
-        
-        # SUPER NÍZKÉ rozlišení pro rychlost - 360p max
-        work_width = min(target_width, 360)  # Max 360p pro super rychlost
-        work_height = int(work_width * target_height / target_width)
-        
-        print(f"🔧 RYCHLÁ OPTIMALIZACE: Pracovní rozlišení {work_width}x{work_height}")
-        
-        # Načti obrázek jednou a předzpracuj ho
-        base_clip = ImageClip(image_path)
-        
-        # PŘEDEM zmenši na pracovní rozlišení s rezervou pro efekty
-        work_scale = 1.3  # Menší rezerva pro rychlost
-        pre_width = int(work_width * work_scale)
-        pre_height = int(work_height * work_scale)
-        
-        # Předem připrav obrázek v správné velikosti
-        prepared_clip = base_clip.resized((pre_width, pre_height))
-        prepared_frame = prepared_clip.get_frame(0)
-        
-        print(f"🚀 PŘEDPŘIPRAVENÝ frame: {pre_width}x{pre_height}")
-        
-        # STATICKÉ pozice místo animace - rychlejší
-        def make_fast_frame(t):
-            """Rychlá verze s méně výpočty"""
-            # Normalizuj čas (0 až 1)
-            progress = t / duration
-            
-            # Jednoduchý smoothing - levnější než smoothstep
-            progress = 0.5 * (1 - np.cos(np.pi * progress))
-            
-            if effect_type == 0:  # Zoom In
-                # Start větší, end menší
-                scale = work_scale - (work_scale - 1.0) * progress
-                crop_w = int(work_width * scale)
-                crop_h = int(work_height * scale)
-                x_start = (pre_width - crop_w) // 2
-                y_start = (pre_height - crop_h) // 2
-                
-            elif effect_type == 1:  # Zoom Out
-                # Start menší, end větší
-                scale = 1.0 + (work_scale - 1.0) * progress
-                crop_w = int(work_width * scale)
-                crop_h = int(work_height * scale)
-                x_start = (pre_width - crop_w) // 2
-                y_start = (pre_height - crop_h) // 2
-                
-            elif effect_type == 2:  # Pan Left (zleva doprava)
-                crop_w = work_width
-                crop_h = work_height
-                x_start = int((pre_width - crop_w) * progress)
-                y_start = (pre_height - crop_h) // 2
-                
-            else:  # Pan Right (zprava doleva)
-                crop_w = work_width
-                crop_h = work_height
-                x_start = int((pre_width - crop_w) * (1 - progress))
-                y_start = (pre_height - crop_h) // 2
-            
-            # Zajisti že nepřekročíme hranice
-            x_start = max(0, min(x_start, pre_width - crop_w))
-            y_start = max(0, min(y_start, pre_height - crop_h))
-            x_end = min(x_start + crop_w, pre_width)
-            y_end = min(y_start + crop_h, pre_height)
-            
-            # Vyřízni region
-            cropped = prepared_frame[y_start:y_end, x_start:x_end]
-            
-            # Zajisti správnou velikost (resize když je potřeba)
-            if cropped.shape[:2] != (work_height, work_width):
-                from moviepy.video.fx.Resize import resize
-                temp_clip = ImageClip(cropped, duration=0.1)
-                resized_clip = temp_clip.resized((work_width, work_height))
-                cropped = resized_clip.get_frame(0)
-                temp_clip.close()
-                resized_clip.close()
-            
-            return cropped
-        
-        # Vytvoř rychlý animovaný klip
-        fast_clip = VideoClip(make_fast_frame, duration=duration)
-        
-        # Upscale na finální rozlišení pouze jednou na konci
-        if work_width != target_width or work_height != target_height:
-            final_clip = fast_clip.resized((target_width, target_height))
-            fast_clip.close()  # Uvolni memory
-        else:
-            final_clip = fast_clip
-        
-        # Zavři přípravné klipy
-        base_clip.close()
-        prepared_clip.close()
-        
-        print(f"✅ SUPER RYCHLÝ Ken Burns efekt s ANIMACÍ vytvořen za {duration}s")
-        return final_clip
+        print(f"⚡ Vytvářím RYCHLÝ Ken Burns efekt pro {image_path}, duration={duration}s, efekt={effect_type}")
+        renderer = KenBurnsRenderer(
+            image_path, duration, target_width, target_height,
+            effect_type=effect_type, fps=fps, easing="cosine",
+        )
+        fast_clip = VideoClip(renderer.frame_at, duration=duration)
+        print(f"✅ RYCHLÝ Ken Burns efekt vytvořen: {duration}s ({renderer.n_frames} snímků @ {target_width}x{target_height})")
+        return fast_clip
         
     except Exception as e:
-        print(f"❌ Chyba při vytváření super rychlého Ken Burns efektu: {e}")
+        print(f"❌ Chyba při vytváření rychlého Ken Burns efektu: {e}")
         # Fallback na statický obrázek
         print("🔄 Fallback na statický obrázek...")
         try:
@@ -1233,27 +1082,23 @@ def generate_video_kenburns_with_audio():
             # Fallback na původní metodu
             return generate_video()
         
-        # Načti audio soubory a spočítej jejich délky
-        audio_clips = []
+        # Délky audio souborů (ffprobe; spojení řeší až finální FFmpeg mux)
+        audio_paths = []
         total_audio_duration = 0
         
         for audio_file in narrator_files:
-            try:
-                audio_path = os.path.join(UPLOAD_FOLDER, audio_file)
-                audio_clip = AudioFileClip(audio_path)
-                audio_clips.append(audio_clip)
-                total_audio_duration += audio_clip.duration
-                print(f"📄 {audio_file}: {audio_clip.duration:.2f}s")
-            except Exception as e:
-                print(f"❌ Chyba při načítání {audio_file}: {e}")
+            audio_path = os.path.join(UPLOAD_FOLDER, audio_file)
+            audio_duration = probe_duration(audio_path)
+            if not audio_duration:
+                print(f"❌ Chyba při načítání {audio_file}")
                 continue
+            audio_paths.append(audio_path)
+            total_audio_duration += audio_duration
+            print(f"📄 {audio_file}: {audio_duration:.2f}s")
         
         print(f"🎵 Celková délka audio: {total_audio_duration:.2f}s ({total_audio_duration/60:.1f} minut)")
         
-        # Spoj všechna audio dohromady
-        if audio_clips:
-            final_audio = concatenate_audioclips(audio_clips)
-        else:
+        if not audio_paths:
             print("❌ Žádné audio se nepodařilo načíst")
             return jsonify({'success': False, 'error': 'Nepodařilo se načíst žádné audio soubory'}), 500
         
@@ -1265,9 +1110,10 @@ def generate_video_kenburns_with_audio():
         width = video_settings.get('width', 1280)
         height = video_settings.get('height', 720)
         
-        # VYTVOŘENÍ VIDEO KLIPŮ s Ken Burns efekty
-        video_clips = []
+        # PLÁN KLIPŮ s Ken Burns efekty (render: FFmpeg zoompan, paralelně)
+        render_items = []
         effect_types = [0, 1, 2, 3]  # zoom_in, zoom_out, pan_left, pan_right
+        effect_names = ['Zoom In', 'Zoom Out', 'Pan Left', 'Pan Right']
         
         for i, image_info in enumerate(images):
             filename = image_info.get('filename')
@@ -1293,51 +1139,30 @@ def generate_video_kenburns_with_audio():
             else:
                 # Výchozí střídání efektů
                 effect_type = effect_types[i % len(effect_types)]
-                
-            effect_names = ['Zoom In', 'Zoom Out', 'Pan Left', 'Pan Right']
-            
-            print(f"🎭 Ken Burns: Vytvářím {effect_names[effect_type]} pro {filename} ({duration_per_image:.2f}s)")
             
-            try:
-                # POUŽITÍ Ken Burns efektů s délkou podle audio
-                clip = create_ken_burns_effect(image_path, duration_per_image, width, height, effect_type)
-                video_clips.append(clip)
-                print(f"✅ Ken Burns klip {i+1} vytvořen")
-                
-            except Exception as e:
-                print(f"❌ Chyba při vytváření Ken Burns klipu {i+1}: {e}")
-                continue
+            print(f"🎭 Ken Burns: {effect_names[effect_type]} pro {filename} ({duration_per_image:.2f}s)")
+            render_items.append((image_path, effect_type))
         
-        if not video_clips:
+        if not render_items:
             print("❌ Žádné video klipy se nepodařilo vytvořit")
             return jsonify({
                 'success': False,
                 'error': 'Nepodařilo se vytvořit žádné video klipy'
             }), 500
         
-        print(f"🎬 Spojuji {len(video_clips)} video klipů s Ken Burns efekty")
-        
         try:
-            # Spoj video klipy
-            final_video = concatenate_videoclips(video_clips)
-            
-            # Přidej audio stopu k videu
-            final_video_with_audio = final_video.with_audio(final_audio)
-            
-            # Export finálního videa
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
             output_filename = f'final_kenburns_with_audio_{timestamp}.mp4'
             output_path = os.path.join(OUTPUT_FOLDER, output_filename)
             
             print(f"🎭 Exportuji Ken Burns video s audio do {output_path}")
-            print(f"📊 Video délka: {final_video.duration:.2f}s, Audio délka: {final_audio.duration:.2f}s")
-            
-            # Export s audio
-            final_video_with_audio.write_videofile(
-                output_path, 
-                fps=24, 
-                codec='libx264',
-                audio_codec='aac'
+            render = render_kenburns_slideshow(
+                render_items, duration_per_image, audio_paths, output_path,
+                width=width, height=height, fps=24,
+                workers=video_settings.get('render_workers'),
+                threads=video_settings.get('threads'),
+                preset=video_settings.get('preset'),
+                motion_cache=motion_clip_cache if motion_cache_enabled() else None,
             )
             
             file_size = os.path.getsize(output_path)
@@ -1347,12 +1172,12 @@ def generate_video_kenburns_with_audio():
                 'success': True,
                 'message': f'Ken Burns video s audio úspěšně vygenerováno',
                 'total_videos': 1,
-                'successful_clips': len(video_clips),
+                'successful_clips': render['successful_clips'],
                 'file_size': file_size,
                 'filename': output_filename,
                 'download_url': f'/api/download/{output_filename}',
-                'duration': final_video.duration,
-                'audio_duration': final_audio.duration,
+                'duration': render['duration'],
+                'audio_duration': total_audio_duration,
                 'total_mp3_files': len(narrator_files),
                 'duration_per_image': duration_per_image
             })
@@ -1363,7 +1188,7 @@ def generate_video_kenburns_with_audio():
                 'success': False,
                 'error': f'Chyba při exportu Ken Burns videa s audio: {str(e)}',
                 'total_videos': 0,
-                'successful_clips': len(video_clips)
+                'successful_clips': 0
             }), 500
             
     except Exception as e:
@@ -1431,27 +1256,23 @@ def generate_video_fast_kenburns_with_audio():
             # Fallback na rychlou metodu
             return generate_video_with_audio()
         
-        # Načti audio soubory a spočítej jejich délky
-        audio_clips = []
+        # Délky audio souborů (ffprobe; spojení řeší až finální FFmpeg mux)
+        audio_paths = []
         total_audio_duration = 0
         
         for audio_file in narrator_files:
-            try:
-                audio_path = os.path.join(UPLOAD_FOLDER, audio_file)
-                audio_clip = AudioFileClip(audio_path)
-                audio_clips.append(audio_clip)
-                total_audio_duration += audio_clip.duration
-                print(f"📄 {audio_file}: {audio_clip.duration:.2f}s")
-            except Exception as e:
-                print(f"❌ Chyba při načítání {audio_file}: {e}")
+            audio_path = os.path.join(UPLOAD_FOLDER, audio_file)
+            audio_duration = probe_duration(audio_path)
+            if not audio_duration:
+                print(f"❌ Chyba při načítání {audio_file}")
                 continue
+            audio_paths.append(audio_path)
+            total_audio_duration += audio_duration
+            print(f"📄 {audio_file}: {audio_duration:.2f}s")
         
         print(f"🎵 Celková délka audio: {total_audio_duration:.2f}s ({total_audio_duration/60:.1f} minut)")
         
-        # Spoj všechna audio dohromady
-        if audio_clips:
-            final_audio = concatenate_audioclips(audio_clips)
-        else:
+        if not audio_paths:
             print("❌ Žádné audio se nepodařilo načíst")
             return jsonify({'success': False, 'error': 'Nepodařilo se načíst žádné audio soubory'}), 500
         
@@ -1490,9 +1311,10 @@ def generate_video_fast_kenburns_with_audio():
         width = video_settings.get('width', 1280)
         height = video_settings.get('height', 720)
         
-        # VYTVOŘENÍ VIDEO KLIPŮ s RYCHLÝMI Ken Burns efekty
-        video_clips = []
+        # PLÁN KLIPŮ s RYCHLÝMI Ken Burns efekty (render: FFmpeg zoompan, paralelně)
+        render_items = []
         effect_types = [0, 1, 2, 3]  # zoom_in, zoom_out, pan_left, pan_right
+        effect_names = ['Zoom In', 'Zoom Out', 'Pan Left', 'Pan Right']
         
         for i, image_info in enumerate(images):
             filename = image_info.get('filename')
@@ -1510,52 +1332,31 @@ def generate_video_fast_kenburns_with_audio():
             # VŽDY STŘÍDEJ VŠECHNY EFEKTY pro rychlou verzi - ignoruj uživatelské nastavení
             # Zajisti kontinuitu přes loopy - každý klip má jiný efekt
             effect_type = effect_types[i % len(effect_types)]
-                
-            effect_names = ['Zoom In', 'Zoom Out', 'Pan Left', 'Pan Right']
             
             loop_suffix = f" (loop {loop_iteration + 1})" if loop_iteration > 0 else ""
-            print(f"⚡ Rychlé Ken Burns: Vytvářím {effect_names[effect_type]} pro {original_filename}{loop_suffix} ({duration_per_image:.2f}s)")
-            
-            try:
-                # POUŽITÍ RYCHLÝCH Ken Burns efektů s délkou podle audio
-                clip = create_fast_ken_burns_effect(image_path, duration_per_image, width, height, effect_type)
-                video_clips.append(clip)
-                print(f"✅ Rychlý Ken Burns klip {i+1} vytvořen")
-                
-            except Exception as e:
-                print(f"❌ Chyba při vytváření rychlého Ken Burns klipu {i+1}: {e}")
-                continue
+            print(f"⚡ Rychlé Ken Burns: {effect_names[effect_type]} pro {original_filename}{loop_suffix} ({duration_per_image:.2f}s)")
+            render_items.append((image_path, effect_type))
         
-        if not video_clips:
+        if not render_items:
             print("❌ Žádné video klipy se nepodařilo vytvořit")
             return jsonify({
                 'success': False,
                 'error': 'Nepodařilo se vytvořit žádné video klipy'
             }), 500
         
-        print(f"🎬 Spojuji {len(video_clips)} video klipů s rychlými Ken Burns efekty")
-        
         try:
-            # Spoj video klipy
-            final_video = concatenate_videoclips(video_clips)
-            
-            # Přidej audio stopu k videu
-            final_video_with_audio = final_video.with_audio(final_audio)
-            
-            # Export finálního videa s nízkými FPS pro rychlost
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
             output_filename = f'final_fast_kenburns_with_audio_{timestamp}.mp4'
             output_path = os.path.join(OUTPUT_FOLDER, output_filename)
             
             print(f"⚡ Exportuji rychlé Ken Burns video s audio do {output_path}")
-            print(f"📊 Video délka: {final_video.duration:.2f}s, Audio délka: {final_audio.duration:.2f}s")
-            
-            # Export s audio - nižší FPS pro rychlost
-            final_video_with_audio.write_videofile(
-                output_path, 
-                fps=15,  # Nižší FPS pro rychlost
-                codec='libx264',
-                audio_codec='aac'
+            render = render_kenburns_slideshow(
+                render_items, duration_per_image, audio_paths, output_path,
+                width=width, height=height, fps=15,  # Nižší FPS pro rychlost
+                workers=video_settings.get('render_workers'),
+                threads=video_settings.get('threads'),
+                preset=video_settings.get('preset') or 'ultrafast',
+                motion_cache=motion_clip_cache if motion_cache_enabled() else None,
             )
             
             file_size = os.path.getsize(output_path)
@@ -1565,12 +1366,12 @@ def generate_video_fast_kenburns_with_audio():
                 'success': True,
                 'message': f'Rychlé Ken Burns video s audio úspěšně vygenerováno',
                 'total_videos': 1,
-                'successful_clips': len(video_clips),
+                'successful_clips': render['successful_clips'],
                 'file_size': file_size,
                 'filename': output_filename,
                 'download_url': f'/api/download/{output_filename}',
-                'duration': final_video.duration,
-                'audio_duration': final_audio.duration,
+                'duration': render['duration'],
+                'audio_duration': total_audio_duration,
                 'total_mp3_files': len(narrator_files),
                 'duration_per_image': duration_per_image
             })
@@ -1581,7 +1382,7 @@ def generate_video_fast_kenburns_with_audio():
                 'success': False,
                 'error': f'Chyba při exportu rychlého Ken Burns videa s audio: {str(e)}',
                 'total_videos': 0,
-                'successful_clips': len(video_clips)
+                'successful_clips': 0
             }), 500
             
     except Exception as e:
@@ -1951,9 +1752,15 @@ def script_generate():
 def script_state(episode_id):
     """
     Vrátí script_state.json pro dané episode_id (source of truth pro reload UI)
+
+    Query: ?parts=shot_plan,metadata → jen lehké klíče + vybrané shardy (polling progressu: ?parts=)
     """
     try:
-        state = project_store.read_script_state(episode_id)
+        parts = request.args.get('parts')
+        if parts is not None:
+            parts = [p.strip() for p in parts.split(',') if p.strip()]
+        state = project_store.read_script_state(episode_id, parts=parts, readonly=True)
+        state.pop(UNLOADED_SHARDS_KEY, None)
         return jsonify({'success': True, 'data': state})
     except FileNotFoundError:
         return jsonify({'success': False, 'error': 'episode_id nenalezen'}), 404
@@ -1961,6 +1768,55 @@ def script_state(episode_id):
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+@app.route('/api/script/events/<episode_id>', methods=['GET'])
+def script_events(episode_id):
+    """
+    SSE stream průběhu pipeline (nahrazuje polling /api/script/state).
+
+    Events (data: JSON):
+      - {"type": "state", "state": {...lehké klíče: steps, script_status, paths...}} – přechody kroků / full write
+      - {"type": "progress", "step"?, "step_fields"?, "fields"?} – AAR/CB progress (CB bez rate-limitu)
+    První event je vždy aktuální "state" snapshot. Keepalive komentář každých ~15 s.
+    """
+    import queue as _queue
+
+    episode_id = (episode_id or '').strip()
+    if not project_store.exists(episode_id):
+        return jsonify({'success': False, 'error': 'episode_id nenalezen'}), 404
+
+    q = progress_bus.subscribe(episode_id)
+
+    def _snapshot():
+        cached = progress_bus.last_state(episode_id)
+        if cached:
+            return cached
+        state = project_store.read_script_state(episode_id, parts=[], readonly=True)
+        state.pop(UNLOADED_SHARDS_KEY, None)
+        return json.dumps({'type': 'state', 'state': state, 'episode_id': episode_id}, ensure_ascii=False, default=str)
+
+    def _stream():
+        try:
+            try:
+                yield f"data: {_snapshot()}\n\n"
+            except Exception as e:
+                print(f"⚠️  SSE snapshot failed for {episode_id}: {e}")
+            while True:
+                try:
+                    payload = q.get(timeout=15.0)
+                except _queue.Empty:
+                    yield ": ping\n\n"
+                    continue
+                yield f"data: {payload}\n\n"
+        finally:
+            progress_bus.unsubscribe(episode_id, q)
+
+    return Response(
+        stream_with_context(_stream()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
+
 @app.route('/api/video/generate-aar-queries/<episode_id>', methods=['POST', 'OPTIONS'])
 def generate_aar_queries(episode_id):
     """
@@ -2328,7 +2184,7 @@ def get_project_details(episode_id):
 
         # Pokud existuje state a obsahuje seznam vygenerovaných souborů, použij ho jako source of truth
         try:
-            state = project_store.read_script_state(episode_id)
+            state = project_store.read_script_state(episode_id, parts=[], readonly=True)
         except Exception:
             state = None
 
@@ -3137,6 +2993,51 @@ def openai_status():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+@app.route('/api/llm/metrics', methods=['GET'])
+def llm_http_metrics():
+    """
+    Per-provider LLM/Vision HTTP metrics since process start
+    (requests, errors, retries, latency avg/max ms, prompt/completion tokens).
+    """
+    try:
+        return jsonify({'success': True, 'providers': llm_client.metrics_snapshot()})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@app.route('/api/llm/usage', methods=['GET'])
+def llm_usage_aggregate():
+    """
+    Host-level LLM usage across all episode ledgers (projects/*/llm_usage.json):
+    totals, per step, per model, top episodes by estimated cost (?limit=20).
+    """
+    try:
+        limit = int(request.args.get('limit', 20))
+        return jsonify({'success': True, **get_usage_ledger().aggregate(limit_episodes=limit)})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@app.route('/api/projects/<episode_id>/llm-usage', methods=['GET'])
+def llm_usage_episode(episode_id):
+    """
+    Per-episode LLM usage ledger (tokens, latency, estimated cost per step/model) + budget limits.
+    """
+    try:
+        if not project_store.exists(episode_id):
+            return jsonify({'success': False, 'error': 'Projekt neexistuje'}), 404
+        return jsonify({
+            'success': True,
+            'usage': get_usage_ledger().episode_usage(episode_id),
+            'budget': {
+                'usd': float(os.getenv('LLM_EPISODE_BUDGET_USD', '0') or 0),
+                'tokens': int(float(os.getenv('LLM_EPISODE_BUDGET_TOKENS', '0') or 0)),
+            },
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
 @app.route('/api/settings/openai_key', methods=['POST', 'OPTIONS'])
 def save_openai_key():
     """
@@ -3253,6 +3154,44 @@ def save_openrouter_key():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+# Jak dlouho zůstává dokončený (done/failed) TTS běh v /api/tts/progress
+TTS_PROGRESS_KEEP_SEC = 3600
+
+
+def _tts_progress_update(key: str, **fields):
+    """
+    In-memory progress pro /api/tts/generate (čte /api/tts/progress/<key> během běhu).
+    status='running' začíná nový záznam; dokončené běhy starší než TTS_PROGRESS_KEEP_SEC se zahodí.
+    """
+    guard = app.config.setdefault("_tts_progress_guard", threading.Lock())
+    with guard:
+        progress = app.config.setdefault("_tts_progress", {})
+        now = time.time()
+        for old_key in [
+            k for k, e in progress.items()
+            if e.get("status") in ("done", "failed") and now - float(e.get("updated_at") or 0) > TTS_PROGRESS_KEEP_SEC
+        ]:
+            del progress[old_key]
+        entry = {} if fields.get("status") == "running" else progress.get(key, {})
+        entry.update(fields)
+        entry["updated_at"] = now
+        progress[key] = entry
+
+
+@app.route('/api/tts/progress/<episode_id>', methods=['GET'])
+def get_tts_progress(episode_id):
+    """
+    Průběh běžícího /api/tts/generate pro epizodu (total/done/failed/status).
+    Pro generování bez episode_id použijte klíč '_uploads'.
+    """
+    guard = app.config.setdefault("_tts_progress_guard", threading.Lock())
+    with guard:
+        entry = dict((app.config.get("_tts_progress") or {}).get(episode_id) or {})
+    if not entry:
+        return jsonify({'success': False, 'error': 'Žádné TTS generování pro tuto epizodu'}), 404
+    return jsonify({'success': True, 'episode_id': episode_id, **entry})
+
+
 @app.route('/api/tts/generate', methods=['POST', 'OPTIONS'])
 def generate_tts():
     """
@@ -3266,6 +3205,7 @@ def generate_tts():
         response.headers.add('Access-Control-Allow-Methods', 'POST')
         return response
     
+    progress_key = None
     try:
         # Import pro REST API
         import time
@@ -3316,14 +3256,15 @@ def generate_tts():
         
         print(f"🎤 TTS GENERATE: Začínám generování {len(narration_blocks)} bloků")
         
-        # Načti ENV konfiguraci
-        voice_name = os.getenv('GCP_TTS_VOICE_NAME', 'en-US-Neural2-D')
-        language_code = os.getenv('GCP_TTS_LANGUAGE_CODE', 'en-US')
-        speaking_rate = float(os.getenv('GCP_TTS_SPEAKING_RATE', '1.0'))
-        pitch = float(os.getenv('GCP_TTS_PITCH', '0.0'))
+        # Načti ENV konfiguraci (sdílené s early-start TTS v script pipeline)
+        tts_settings = tts_settings_from_env()
+        voice_name = tts_settings["voice_name"]
+        language_code = tts_settings["language_code"]
+        speaking_rate = tts_settings["speaking_rate"]
+        pitch = tts_settings["pitch"]
         
         # Validace GOOGLE_APPLICATION_CREDENTIALS
-        credentials_path = os.getenv('GOOGLE_APPLICATION_CREDENTIALS')
+        credentials_path = tts_settings["credentials_path"]
         if not credentials_path:
             return jsonify({
                 'success': False,
@@ -3338,210 +3279,18 @@ def generate_tts():
                 'hint': 'Zkontrolujte cestu v GOOGLE_APPLICATION_CREDENTIALS'
             }), 500
         
-        # SSML enhancement settings (pro přirozenější výstup)
-        use_ssml = os.getenv('GCP_TTS_USE_SSML', 'true').lower() == 'true'
-        # Audio effects profile pro lepší kvalitu (headphone-class-device, large-home-entertainment-class-device, etc.)
-        effects_profile = os.getenv('GCP_TTS_EFFECTS_PROFILE', 'headphone-class-device')
+        use_ssml = tts_settings["use_ssml"]
+        effects_profile = tts_settings["effects_profile"]
+        use_tts_cache = tts_settings["use_tts_cache"]
         
         print(f"🔧 TTS CONFIG: voice={voice_name}, language={language_code}, rate={speaking_rate}, pitch={pitch}, ssml={use_ssml}, effects={effects_profile}")
         
         # Google Cloud TTS REST API endpoint
-        tts_api_url = "https://texttospeech.googleapis.com/v1/text:synthesize"
-        
-        # ============================================================
-        # SSML Pre-processing pro přirozenější TTS výstup
-        # ============================================================
-        def normalize_text_for_tts(text: str, lang_code: str) -> str:
-            """
-            Normalizuje text pro lepší TTS výslovnost:
-            - Expanduje běžné zkratky
-            - Formátuje čísla pro správnou výslovnost
-            - Odstraňuje problematické znaky
-            """
-            import re
-            
-            if not text:
-                return text
-            
-            result = text.strip()
-            
-            # Odstranění více mezer za sebou
-            result = re.sub(r'\s+', ' ', result)
-            
-            # Expandování běžných zkratek (case-insensitive)
-            abbreviations_en = {
-                r'\bDr\.': 'Doctor',
-                r'\bMr\.': 'Mister',
-                r'\bMrs\.': 'Missus',
-                r'\bMs\.': 'Miss',
-                r'\bSt\.': 'Saint',
-                r'\bvs\.': 'versus',
-                r'\betc\.': 'etcetera',
-                r'\be\.g\.': 'for example',
-                r'\bi\.e\.': 'that is',
-                r'\bU\.S\.A\.': 'United States of America',
-                r'\bU\.S\.': 'United States',
-                r'\bU\.K\.': 'United Kingdom',
-                r'\bWWII': 'World War Two',
-                r'\bWWI': 'World War One',
-                r'\bSSR': 'Soviet Socialist Republic',
-                r'\bUSSR': 'U S S R',
-                r'\bNATO': 'NATO',  # already readable
-                r'\bCEO': 'C E O',
-                r'\bFBI': 'F B I',
-                r'\bCIA': 'C I A',
-                r'\bNASA': 'NASA',  # already readable
-            }
-            
-            if lang_code.startswith('en'):
-                for pattern, replacement in abbreviations_en.items():
-                    result = re.sub(pattern, replacement, result, flags=re.IGNORECASE)
-            
-            # Formátování roků pro lepší výslovnost (1945 → nineteen forty-five)
-            # Pouze 4-místná čísla začínající 1 nebo 2 (pravděpodobně roky)
-            def year_to_words(match):
-                year = int(match.group(0))
-                if 1000 <= year <= 2099:
-                    if year < 2000:
-                        century = year // 100
-                        decade = year % 100
-                        century_words = {10: 'ten', 11: 'eleven', 12: 'twelve', 13: 'thirteen',
-                                         14: 'fourteen', 15: 'fifteen', 16: 'sixteen', 17: 'seventeen',
-                                         18: 'eighteen', 19: 'nineteen'}
-                        decade_words = {0: 'hundred', 1: 'oh one', 2: 'oh two', 3: 'oh three',
-                                        4: 'oh four', 5: 'oh five', 6: 'oh six', 7: 'oh seven',
-                                        8: 'oh eight', 9: 'oh nine', 10: 'ten', 11: 'eleven',
-                                        12: 'twelve', 13: 'thirteen', 14: 'fourteen', 15: 'fifteen',
-                                        16: 'sixteen', 17: 'seventeen', 18: 'eighteen', 19: 'nineteen',
-                                        20: 'twenty', 21: 'twenty-one', 22: 'twenty-two', 23: 'twenty-three',
-                                        24: 'twenty-four', 25: 'twenty-five', 26: 'twenty-six', 27: 'twenty-seven',
-                                        28: 'twenty-eight', 29: 'twenty-nine', 30: 'thirty', 31: 'thirty-one',
-                                        32: 'thirty-two', 33: 'thirty-three', 34: 'thirty-four', 35: 'thirty-five',
-                                        36: 'thirty-six', 37: 'thirty-seven', 38: 'thirty-eight', 39: 'thirty-nine',
-                                        40: 'forty', 41: 'forty-one', 42: 'forty-two', 43: 'forty-three',
-                                        44: 'forty-four', 45: 'forty-five', 46: 'forty-six', 47: 'forty-seven',
-                                        48: 'forty-eight', 49: 'forty-nine', 50: 'fifty', 51: 'fifty-one',
-                                        52: 'fifty-two', 53: 'fifty-three', 54: 'fifty-four', 55: 'fifty-five',
-                                        56: 'fifty-six', 57: 'fifty-seven', 58: 'fifty-eight', 59: 'fifty-nine',
-                                        60: 'sixty', 61: 'sixty-one', 62: 'sixty-two', 63: 'sixty-three',
-                                        64: 'sixty-four', 65: 'sixty-five', 66: 'sixty-six', 67: 'sixty-seven',
-                                        68: 'sixty-eight', 69: 'sixty-nine', 70: 'seventy', 71: 'seventy-one',
-                                        72: 'seventy-two', 73: 'seventy-three', 74: 'seventy-four', 75: 'seventy-five',
-                                        76: 'seventy-six', 77: 'seventy-seven', 78: 'seventy-eight', 79: 'seventy-nine',
-                                        80: 'eighty', 81: 'eighty-one', 82: 'eighty-two', 83: 'eighty-three',
-                                        84: 'eighty-four', 85: 'eighty-five', 86: 'eighty-six', 87: 'eighty-seven',
-                                        88: 'eighty-eight', 89: 'eighty-nine', 90: 'ninety', 91: 'ninety-one',
-                                        92: 'ninety-two', 93: 'ninety-three', 94: 'ninety-four', 95: 'ninety-five',
-                                        96: 'ninety-six', 97: 'ninety-seven', 98: 'ninety-eight', 99: 'ninety-nine'}
-                        if century in century_words and decade in decade_words:
-                            return f"{century_words[century]} {decade_words[decade]}"
-                    elif 2000 <= year <= 2009:
-                        ones = ['', 'one', 'two', 'three', 'four', 'five', 'six', 'seven', 'eight', 'nine']
-                        return f"two thousand {ones[year - 2000]}".strip()
-                    elif 2010 <= year <= 2099:
-                        decade = year - 2000
-                        decade_words = {10: 'ten', 11: 'eleven', 12: 'twelve', 13: 'thirteen',
-                                        14: 'fourteen', 15: 'fifteen', 16: 'sixteen', 17: 'seventeen',
-                                        18: 'eighteen', 19: 'nineteen', 20: 'twenty', 21: 'twenty-one',
-                                        22: 'twenty-two', 23: 'twenty-three', 24: 'twenty-four', 25: 'twenty-five'}
-                        if decade in decade_words:
-                            return f"twenty {decade_words[decade]}"
-                return match.group(0)  # fallback - keep original
-            
-            # Pouze roky v kontextu (ne všechna 4-místná čísla)
-            result = re.sub(r'\b(1[0-9]{3}|20[0-2][0-9])\b', year_to_words, result)
-            
-            # Odstranění markdown formátování
-            result = re.sub(r'\*\*([^*]+)\*\*', r'\1', result)  # **bold**
-            result = re.sub(r'\*([^*]+)\*', r'\1', result)      # *italic*
-            result = re.sub(r'__([^_]+)__', r'\1', result)      # __bold__
-            result = re.sub(r'_([^_]+)_', r'\1', result)        # _italic_
-            
-            # Nahrazení problematických znaků
-            result = result.replace('—', ', ')  # em-dash → čárka s pauzou
-            result = result.replace('–', ', ')  # en-dash → čárka s pauzou
-            result = result.replace('…', '.')    # ellipsis → tečka
-            result = result.replace('"', '')     # smart quotes
-            result = result.replace('"', '')
-            result = result.replace(''', "'")
-            result = result.replace(''', "'")
-            
-            return result.strip()
-        
-        def text_to_ssml(text: str, lang_code: str) -> str:
-            """
-            Konvertuje plain text na SSML pro Google TTS.
-            Přidává přirozené pauzy a prosodické značky.
-            """
-            import re
-            
-            if not text:
-                return '<speak></speak>'
-            
-            # Nejdřív normalizuj text
-            normalized = normalize_text_for_tts(text, lang_code)
-            
-            # Escape XML special characters
-            normalized = normalized.replace('&', '&amp;')
-            normalized = normalized.replace('<', '&lt;')
-            normalized = normalized.replace('>', '&gt;')
-            
-            # Přidej pauzy po větách (. ! ?)
-            # Krátká pauza po běžné větě
-            normalized = re.sub(r'\.(\s+)', r'.<break time="400ms"/>\1', normalized)
-            # Delší pauza po otázce/vykřičníku
-            normalized = re.sub(r'\?(\s+)', r'?<break time="500ms"/>\1', normalized)
-            normalized = re.sub(r'!(\s+)', r'!<break time="450ms"/>\1', normalized)
-            
-            # Kratší pauza po čárce
-            normalized = re.sub(r',(\s+)', r',<break time="200ms"/>\1', normalized)
-            
-            # Pauza po středníku a dvojtečce
-            normalized = re.sub(r';(\s+)', r';<break time="350ms"/>\1', normalized)
-            normalized = re.sub(r':(\s+)', r':<break time="300ms"/>\1', normalized)
-            
-            # Obal do <speak> tagu
-            ssml = f'<speak>{normalized}</speak>'
-            
-            return ssml
+        tts_api_url = TTS_API_URL
         
         # Helper funkce pro získání access token (s explicitním refresh)
         def get_access_token_with_refresh():
-            """
-            Získej a refreshni access token z service account JSON.
-            Returns: (token_string, error_message_or_none)
-            """
-            try:
-                from google.oauth2 import service_account
-                import google.auth.transport.requests
-                
-                # Load credentials
-                credentials = service_account.Credentials.from_service_account_file(
-                    credentials_path,
-                    scopes=['https://www.googleapis.com/auth/cloud-platform']
-                )
-                
-                # CRITICAL: Explicitně refreshni token před použitím
-                auth_req = google.auth.transport.requests.Request()
-                credentials.refresh(auth_req)
-                
-                # Teď token existuje a není None
-                if not credentials.token:
-                    return None, "Token refresh proběhl, ale token je stále None"
-                
-                print(f"🔑 Access token úspěšně vygenerován (expires: {credentials.expiry})")
-                return credentials.token, None
-                
-            except FileNotFoundError:
-                return None, f"TTS_AUTH_REFRESH_FAILED: Service account soubor nenalezen: {credentials_path}"
-            except ValueError as e:
-                return None, f"TTS_AUTH_REFRESH_FAILED: Neplatný JSON v service account: {str(e)}"
-            except Exception as e:
-                error_str = str(e)
-                if "Permission denied" in error_str or "forbidden" in error_str.lower():
-                    return None, f"TTS_AUTH_REFRESH_FAILED: Permissions chyba - zkontrolujte service account role: {error_str}"
-                else:
-                    return None, f"TTS_AUTH_REFRESH_FAILED: {error_str}"
+            return get_gcp_access_token(credentials_path)
         
         # Vyber output dir:
         # - prefer per-episode folder: projects/<episode_id>/voiceover/
@@ -3602,35 +3351,75 @@ def generate_tts():
         except Exception as e:
             print(f"  ⚠️ Nepodařilo se projít složku {tts_output_dir}: {e}")
         
-        # Headers pro REST API
-        headers = {
-            'Authorization': f'Bearer {access_token}',
-            'Content-Type': 'application/json'
-        }
-        
-        # Generování per-block s retry
-        generated_blocks = []
-        failed_blocks = []
-        
-        for i, block in enumerate(narration_blocks, start=1):
+        # Paralelní syntéza (bounded concurrency + QPS limit podle kvóty Google TTS).
+        # Výsledky se skládají podle indexu bloku, takže pořadí Narrator_XXXX.mp3 je stejné jako sekvenčně.
+        try:
+            max_workers = max(1, int(os.getenv('GCP_TTS_MAX_CONCURRENCY', '4')))
+        except Exception:
+            max_workers = 4
+        # QPS limiter je sdílený s TTS early start (tts_synthesis.wait_for_qps_slot)
+        max_qps = tts_max_qps()
+
+        token_lock = threading.Lock()
+
+        def refresh_token_shared(stale_token):
+            """Refresh jen jednou pro všechny workery (ostatní dostanou už nový token)."""
+            with token_lock:
+                if access_token != stale_token:
+                    return access_token
+                return refresh_token_if_needed()
+
+        progress_key = episode_id or '_uploads'
+        total_blocks = len(narration_blocks)
+        _tts_progress_update(progress_key, status='running', total=total_blocks, done=0, failed=0)
+        progress_lock = threading.Lock()
+        progress_counts = {'done': 0, 'failed': 0}
+
+        def report_progress(ok):
+            with progress_lock:
+                progress_counts['done' if ok else 'failed'] += 1
+                done, failed = progress_counts['done'], progress_counts['failed']
+            _tts_progress_update(progress_key, done=done, failed=failed)
+            print(f"📈 TTS progress: {done + failed}/{total_blocks} ({failed} failů)")
+
+        def synthesize_block(i, block):
+            """Vygeneruje jeden blok (s retry). Returns: ('ok', info) nebo ('failed', info)."""
             block_id = block.get('block_id', f'unknown_{i}')
             text_tts = block.get('text_tts', '')
             
             # Validace bloku
             if not text_tts or text_tts.strip() == '':
                 print(f"⚠️ Block {i} ({block_id}): text_tts je prázdný, přeskakuji")
-                failed_blocks.append({
+                return 'failed', {
                     'index': i,
                     'block_id': block_id,
                     'error': 'text_tts je prázdný'
-                })
-                continue
+                }
             
             # Filename s fixed-width číslováním
             filename = f'Narrator_{i:04d}.mp3'
             file_path = os.path.join(tts_output_dir, filename)
             
-            print(f"🎤 Block {i}/{len(narration_blocks)} ({block_id}): Generuji '{text_tts[:50]}...'")
+            print(f"🎤 Block {i}/{total_blocks} ({block_id}): Generuji '{text_tts[:50]}...'")
+            
+            # Google TTS request body (deterministický → zároveň klíč TTS cache)
+            request_body = build_tts_request_body(text_tts, tts_settings)
+
+            # TTS cache: nezměněné bloky (a opakované intro/outro napříč epizodami) se nesyntetizují znovu
+            cache_key = TTSCache.key_for(request_body) if use_tts_cache else None
+            if cache_key:
+                # Early-start TTS mohl blok právě syntetizovat → počkej místo druhého requestu
+                wait_for_prewarm(cache_key)
+                cached_size = tts_cache.copy_to(cache_key, file_path)
+                if cached_size:
+                    print(f"  ♻️ Block {i} z TTS cache: {filename} ({cached_size} bytes)")
+                    return 'ok', {
+                        'index': i,
+                        'block_id': block_id,
+                        'filename': filename,
+                        'size_bytes': cached_size,
+                        'cached': True
+                    }
             
             # Retry logika (max 3 pokusy)
             max_retries = 3
@@ -3638,39 +3427,16 @@ def generate_tts():
             success = False
             last_error = None
             token_refreshed = False  # Track jestli už byl token refreshnut pro tento block
+            result_info = None
             
             for attempt in range(1, max_retries + 1):
                 try:
-                    # Google TTS REST API call
-                    # Použij SSML pro přirozenější výstup (pokud je povoleno)
-                    if use_ssml:
-                        ssml_text = text_to_ssml(text_tts, language_code)
-                        input_payload = {"ssml": ssml_text}
-                    else:
-                        # Fallback na plain text (s normalizací)
-                        normalized_text = normalize_text_for_tts(text_tts, language_code)
-                        input_payload = {"text": normalized_text}
-                    
-                    # Audio config s effects profile pro lepší kvalitu
-                    audio_config = {
-                        "audioEncoding": "MP3",
-                        "speakingRate": speaking_rate,
-                        "pitch": pitch
+                    request_token = access_token
+                    headers = {
+                        'Authorization': f'Bearer {request_token}',
+                        'Content-Type': 'application/json'
                     }
-                    
-                    # Přidej effects profile pokud je nastaven (optimalizuje audio)
-                    if effects_profile:
-                        audio_config["effectsProfileId"] = [effects_profile]
-                    
-                    request_body = {
-                        "input": input_payload,
-                        "voice": {
-                            "languageCode": language_code,
-                            "name": voice_name
-                        },
-                        "audioConfig": audio_config
-                    }
-                    
+                    wait_for_qps_slot()
                     response = requests.post(
                         tts_api_url,
                         headers=headers,
@@ -3684,8 +3450,7 @@ def generate_tts():
                         if not token_refreshed:
                             print(f"  ⚠️ Block {i} attempt {attempt}: 401 Unauthorized, refreshuji token...")
                             try:
-                                new_token = refresh_token_if_needed()
-                                headers['Authorization'] = f'Bearer {new_token}'
+                                refresh_token_shared(request_token)
                                 token_refreshed = True
                                 # Retry s novým tokenem (nezvyšuj attempt counter)
                                 continue
@@ -3729,14 +3494,16 @@ def generate_tts():
                     # Ulož MP3 binárně
                     with open(file_path, 'wb') as out:
                         out.write(audio_bytes)
+                    if cache_key:
+                        tts_cache.put(cache_key, audio_bytes)
                     
                     print(f"  ✅ Block {i} uložen: {filename} ({len(audio_bytes)} bytes)")
-                    generated_blocks.append({
+                    result_info = {
                         'index': i,
                         'block_id': block_id,
                         'filename': filename,
                         'size_bytes': len(audio_bytes)
-                    })
+                    }
                     success = True
                     break  # Success, exit retry loop
                     
@@ -3776,18 +3543,40 @@ def generate_tts():
             
             if not success:
                 print(f"  ❌ Block {i} ({block_id}): FAILED po {max_retries} pokusech: {last_error}")
-                failed_blocks.append({
+                return 'failed', {
                     'index': i,
                     'block_id': block_id,
                     'error': last_error
-                })
+                }
+            return 'ok', result_info
+
+        def run_block(i, block):
+            try:
+                outcome = synthesize_block(i, block)
+            except Exception as e:
+                outcome = ('failed', {'index': i, 'block_id': block.get('block_id', f'unknown_{i}'), 'error': str(e)})
+            report_progress(outcome[0] == 'ok')
+            return outcome
+
+        # Generování per-block s retry (paralelně, výsledky seřazené podle indexu)
+        generated_blocks = []
+        failed_blocks = []
+
+        from concurrent.futures import ThreadPoolExecutor
+        print(f"⚡ TTS: {total_blocks} bloků, concurrency={max_workers}, max_qps={max_qps}")
+        with ThreadPoolExecutor(max_workers=min(max_workers, total_blocks)) as executor:
+            outcomes = list(executor.map(lambda args: run_block(*args), enumerate(narration_blocks, start=1)))
+
+        for kind, info in outcomes:
+            (generated_blocks if kind == 'ok' else failed_blocks).append(info)
+        _tts_progress_update(progress_key, status='done')
         
         # Souhrn
-        total_blocks = len(narration_blocks)
         generated_count = len(generated_blocks)
         failed_count = len(failed_blocks)
+        cached_count = sum(1 for b in generated_blocks if b.get('cached'))
         
-        print(f"📊 TTS GENERATE: Hotovo! {generated_count}/{total_blocks} úspěšných, {failed_count} failů")
+        print(f"📊 TTS GENERATE: Hotovo! {generated_count}/{total_blocks} úspěšných ({cached_count} z cache), {failed_count} failů")
         
         # Persist do script_state, pokud máme episode_id
         if episode_id:
@@ -3821,6 +3610,7 @@ def generate_tts():
             'success': generated_count > 0,
             'total_blocks': total_blocks,
             'generated_blocks': generated_count,
+            'cached_blocks': cached_count,
             'failed_blocks_count': failed_count,
             'failed_blocks': failed_blocks,
             'episode_id': episode_id or None,
@@ -3832,6 +3622,8 @@ def generate_tts():
         
     except Exception as e:
         print(f"❌ TTS GENERATE: Kritická chyba: {e}")
+        if progress_key:
+            _tts_progress_update(progress_key, status='failed', error=str(e)[:500])
         import traceback
         traceback.print_exc()
         return jsonify({
@@ -4023,22 +3815,14 @@ def get_episode_pool(episode_id):
         return response
     
     try:
-        from project_store import ProjectStore
-        import json as json_lib
-        
-        store = ProjectStore(PROJECTS_FOLDER)
-        episode_dir = store.episode_dir(episode_id)
-        manifest_path = os.path.join(episode_dir, 'archive_manifest.json')
-        
-        if not os.path.exists(manifest_path):
+        try:
+            manifest = project_store.read_manifest(episode_id)
+        except FileNotFoundError:
             return jsonify({
                 'success': False,
                 'error': 'Archive manifest neexistuje - spusť nejdřív Preview Videa (AAR).',
             }), 404
         
-        with open(manifest_path, 'r', encoding='utf-8') as f:
-            manifest = json_lib.load(f)
-        
         # Extract episode pool data (transparency-first schema)
         episode_pool = manifest.get('episode_pool') or {}
         queries_used = episode_pool.get('queries_used') or []
@@ -4073,8 +3857,9 @@ def get_episode_pool(episode_id):
             all_assets = list(all_assets_map.values())
             sel_videos = [a for a in all_assets if a.get('media_type') == 'video']
             sel_images = [a for a in all_assets if a.get('media_type') == 'image']
-        videos = sel_videos
-        images = sel_images
+        # Copies: manifest objects are shared with the ProjectStore cache
+        videos = [dict(a) for a in sel_videos if isinstance(a, dict)]
+        images = [dict(a) for a in sel_images if isinstance(a, dict)]
         
         # Add thumbnail URLs
         def _split_source(aid: str) -> tuple:
@@ -4158,14 +3943,12 @@ def get_archive_stats(episode_id):
         return response
     
     try:
-        from project_store import ProjectStore
-        import json as json_lib
+        manifest_path = project_store.manifest_path(episode_id)
         
-        store = ProjectStore(PROJECTS_FOLDER)
-        episode_dir = store.episode_dir(episode_id)
-        manifest_path = os.path.join(episode_dir, 'archive_manifest.json')
-        
-        if not os.path.exists(manifest_path):
+        # Parse manifest (cached, read-only)
+        try:
+            manifest = project_store.read_manifest(episode_id)
+        except FileNotFoundError:
             return jsonify({
                 'success': False,
                 'error': 'Archive manifest neexistuje - spusťte nejdřív AAR (Preview Videa)',
@@ -4175,10 +3958,6 @@ def get_archive_stats(episode_id):
                 }
             }), 404
         
-        # Parse manifest
-        with open(manifest_path, 'r') as f:
-            manifest = json_lib.load(f)
-        
         # Check if we have episode_pool data (from step-by-step workflow)
         episode_pool = manifest.get('episode_pool')
         if episode_pool and isinstance(episode_pool, dict):
@@ -4407,30 +4186,24 @@ def get_visual_candidates(episode_id):
         return response
 
     try:
-        from project_store import ProjectStore
-        import json as json_lib
         import requests as req
 
-        store = ProjectStore(PROJECTS_FOLDER)
-        episode_dir = store.episode_dir(episode_id)
-        manifest_path = os.path.join(episode_dir, 'archive_manifest.json')
-        state_path = os.path.join(episode_dir, 'script_state.json')
-
-        if not os.path.exists(manifest_path):
+        manifest_path = project_store.manifest_path(episode_id)
+        try:
+            manifest = project_store.read_manifest(episode_id)
+        except FileNotFoundError:
             return jsonify({
                 "success": False,
                 "error": "Archive manifest neexistuje - spusťte nejdřív Preview Videa (AAR).",
             }), 404
 
-        with open(manifest_path, "r") as f:
-            manifest = json_lib.load(f)
-
         # Load script_state (optional) to get full narration text per block_id
         state = {}
-        if os.path.exists(state_path):
+        if project_store.exists(episode_id):
             try:
-                with open(state_path, "r") as sf:
-                    state = json_lib.load(sf) or {}
+                state = project_store.read_script_state(
+                    episode_id, parts=["metadata", "tts_ready_package"], readonly=True
+                ) or {}
             except Exception:
                 state = {}
 
@@ -4553,6 +4326,7 @@ def get_visual_candidates(episode_id):
             assistant_metadata = None
 
         scenes_out = []
+        prefetch_urls = []
         for scene in (manifest.get("scenes") or []):
             if not isinstance(scene, dict):
                 continue
@@ -4579,10 +4353,14 @@ def get_visual_candidates(episode_id):
                         continue
                     ainfo = by_id.get(aid, {})
                     src, thumb = _thumb_for(aid)
+                    proxy = thumbnail_proxy_url(thumb) if thumb else ""
+                    if proxy:
+                        prefetch_urls.append(thumb)
                     cand_out.append({
                         "archive_item_id": aid,
                         "source": src,
                         "thumbnail_url": thumb,
+                        "thumbnail_proxy_url": proxy,
                         "title": (ainfo.get("title") or "")[:160] if isinstance(ainfo, dict) else "",
                         "description": (ainfo.get("description") or "")[:400] if isinstance(ainfo, dict) else "",
                         "asset_url": (ainfo.get("asset_url") or "") if isinstance(ainfo, dict) else "",
@@ -4609,6 +4387,12 @@ def get_visual_candidates(episode_id):
                 "beats": beats_out,
             })
 
+        # Zahřej thumbnail cache na pozadí (paralelně), ať grid v UI načítá z disku
+        if prefetch_urls:
+            threading.Thread(
+                target=get_thumbnail_cache().prefetch, args=(prefetch_urls,), daemon=True
+            ).start()
+
         return jsonify({
             "success": True,
             "episode_id": episode_id,
@@ -4620,6 +4404,29 @@ def get_visual_candidates(episode_id):
         return jsonify({"success": False, "error": str(e)}), 500
 
 
+@app.route('/api/thumbnails/<key>.jpg', methods=['GET'])
+def serve_cached_thumbnail(key):
+    """
+    Normalizovaný thumbnail kandidáta ze sdílené disk cache (thumbnail_cache.py).
+    Klíč vzniká v /api/video/visual-candidates (thumbnail_proxy_url); při cache miss se stáhne lazy.
+    Obsah pro daný klíč se nemění → dlouhé cache hlavičky + ETag.
+    """
+    key = str(key or "").strip().lower()
+    if len(key) != 64 or any(ch not in "0123456789abcdef" for ch in key):
+        return jsonify({'error': 'Invalid thumbnail key'}), 400
+    if request.headers.get('If-None-Match', '').strip('"') == key:
+        response = Response(status=304)
+    else:
+        path = get_thumbnail_cache().get_path_by_key(key)
+        if not path:
+            return jsonify({'error': 'Thumbnail not available'}), 404
+        response = send_file(path, mimetype='image/jpeg', conditional=False)
+    response.headers['Cache-Control'] = 'public, max-age=604800, immutable'
+    response.headers['ETag'] = f'"{key}"'
+    response.headers['Access-Control-Allow-Origin'] = '*'
+    return response
+
+
 @app.route('/api/video/manifest/select-asset/<episode_id>', methods=['POST', 'OPTIONS'])
 def select_manifest_asset(episode_id):
     """
@@ -4718,6 +4525,8 @@ def compile_video():
     - episode_id: ID projektu
     - mode (optional): "full" (default) | "cb_only" | "aar_only"
     - music_bg_gain_db (optional): hlasitost hudebního podkresu v dB (např. -24). Uloží se do script_state a použije se při mixu.
+    - encoder_profile (optional): "draft" | "preview" | "final" (default: CB_ENCODER_PROFILE / "final").
+      Draft/preview = rychlejší x264 preset, nižší rozlišení/FPS (náhledy); profil se uloží do metadat výstupu.
     
     Modes:
     - "full": spustí AAR + CB (default)
@@ -4765,14 +4574,15 @@ def compile_video():
         return response
     
     try:
-        from script_pipeline import _run_asset_resolver, _run_compilation_builder
+        from script_pipeline import _run_asset_resolver, _run_compilation_builder, _pipelined_prefetch_enabled
+        from compilation_builder import AssetPrefetcher
         from project_store import ProjectStore
-        import json as json_lib
         
         data = request.get_json() or {}
         episode_id = (data.get('episode_id') or '').strip()
         mode = (data.get('mode') or 'full').strip().lower()
         requested_music_bg_gain_db = data.get("music_bg_gain_db", None)
+        encoder_profile = (str(data.get('encoder_profile') or '').strip().lower() or None)
 
         # #region agent log (hypothesis C)
         try:
@@ -4800,6 +4610,13 @@ def compile_video():
         
         if not episode_id:
             return jsonify({'success': False, 'error': 'episode_id je povinný'}), 400
+
+        from encoder_profiles import ENCODER_PROFILES
+        if encoder_profile and encoder_profile not in ENCODER_PROFILES:
+            return jsonify({
+                'success': False,
+                'error': f"encoder_profile musí být jeden z: {', '.join(ENCODER_PROFILES)}",
+            }), 400
         
         # Load state
         store = ProjectStore(PROJECTS_FOLDER)
@@ -4808,8 +4625,7 @@ def compile_video():
         if not os.path.exists(state_path):
             return jsonify({'success': False, 'error': f'Projekt {episode_id} neexistuje'}), 404
         
-        with open(state_path, 'r') as f:
-            state = json_lib.load(f)
+        state = store.read_script_state(episode_id)
         
         # Check prerequisites
         if not state.get('shot_plan'):
@@ -4903,6 +4719,10 @@ def compile_video():
                 print(f"⚠️ compile_video: failed to persist music_bg_gain_db: {e}")
 
         def run_compilation():
+            # Full mode: AAR hands resolved scenes to the prefetcher so CB downloads overlap with AAR.
+            prefetcher = None
+            if mode == 'full' and _pipelined_prefetch_enabled():
+                prefetcher = AssetPrefetcher(os.path.join(store.episode_dir(episode_id), 'assets'))
             try:
                 # Reload freshest state inside the background thread to avoid stale snapshot overwrites.
                 try:
@@ -4915,7 +4735,7 @@ def compile_video():
                     cache_dir = os.path.join(store.episode_dir(episode_id), 'archive_cache')
                     # Preview mode (aar_only) skips FDA validation for quick results
                     skip_validation = (mode == 'aar_only')
-                    _run_asset_resolver(fresh_state, episode_id, store, cache_dir, skip_validation=skip_validation)
+                    _run_asset_resolver(fresh_state, episode_id, store, cache_dir, skip_validation=skip_validation, prefetcher=prefetcher)
                 else:
                     # Ensure manifest path exists for CB
                     if not fresh_state.get("archive_manifest_path"):
@@ -4931,13 +4751,19 @@ def compile_video():
                 if mode != 'aar_only':
                     storage_dir = os.path.join(store.episode_dir(episode_id), 'assets')
                     output_dir = OUTPUT_FOLDER
-                    _run_compilation_builder(fresh_state, episode_id, store, storage_dir, output_dir)
+                    _run_compilation_builder(
+                        fresh_state, episode_id, store, storage_dir, output_dir,
+                        prefetcher=prefetcher, music_only=(mode == 'cb_only'),
+                        encoder_profile=encoder_profile,
+                    )
                 
             except Exception as e:
                 print(f"❌ Video compilation failed: {e}")
                 import traceback
                 traceback.print_exc()
             finally:
+                if prefetcher:
+                    prefetcher.shutdown(wait=False)
                 try:
                     ep_lock.release()
                 except Exception:
@@ -4960,6 +4786,7 @@ def compile_video():
             'message': message,
             'episode_id': episode_id,
             'mode': mode,
+            'encoder_profile': encoder_profile or os.getenv('CB_ENCODER_PROFILE', 'final'),
             'note': 'Check /api/script/state/<episode_id> for progress'
         })
         
@@ -20,7 +20,13 @@ import os
 import hashlib
 import re
 import subprocess
+import threading
 import math
+
+from env_utils import env_int
+from llm_http_client import llm_client
+from llm_usage_ledger import LLMBudgetExceeded
+
 # ========================================================================
 # AAR hard-fail exception with structured details (for script_state.error.details)
 # ========================================================================
@@ -68,6 +74,14 @@ except ImportError as e:
 # v14: LLM-based topic relevance validation (prevents off-topic contamination)
 AAR_CACHE_VERSION = "v14_topic_relevance"
 
+# Episode pool: how many of the episode queries are also run as image searches.
+EPISODE_POOL_IMAGE_QUERIES = 8
+
+
+def search_cache_ttl_sec() -> int:
+    """Max stáří multi-source search cache (AAR_SEARCH_CACHE_TTL_SEC, default 7 dní, 0 = bez expirace)."""
+    return env_int("AAR_SEARCH_CACHE_TTL_SEC", 7 * 24 * 3600, minimum=0)
+
 # ============================================================================
 # LLM-BASED TOPIC RELEVANCE VALIDATOR
 # ============================================================================
@@ -243,8 +257,6 @@ Each object must have: index (1-N), relevant (bool), confidence (0.0-1.0), reaso
 Evaluate EACH candidate (index 1 to {len(batch)}) and return JSON array with your decisions."""
 
     try:
-        import requests as req
-        
         # Build headers based on provider
         headers = {
             "Authorization": f"Bearer {api_key}",
@@ -288,7 +300,7 @@ Evaluate EACH candidate (index 1 to {len(batch)}) and return JSON array with you
             if verbose:
                 print(f"🔍 AAR Topic Validation: Using {provider} ({model}) text-only")
         
-        resp = req.post(
+        resp = llm_client.post(
             api_url,
             headers=headers,
             json={
@@ -297,7 +309,8 @@ Evaluate EACH candidate (index 1 to {len(batch)}) and return JSON array with you
                 "temperature": 0.1,
                 "max_tokens": 2000
             },
-            timeout=60  # Longer timeout for vision
+            timeout=60,  # Longer timeout for vision
+            provider=provider,
         )
         resp.raise_for_status()
         
@@ -508,6 +521,9 @@ Evaluate EACH candidate (index 1 to {len(batch)}) and return JSON array with you
         
         return relevant, rejected, report
         
+    except LLMBudgetExceeded:
+        # Rozpočet epizody vyčerpán → AAR krok selže (žádný tichý heuristický fallback)
+        raise
     except json.JSONDecodeError as e:
         # Should be rare due to robust parsing above, but keep a safe fallback.
         if verbose:
@@ -1269,16 +1285,23 @@ class ArchiveAssetResolver:
         query_hash = hashlib.md5(q.encode("utf-8")).hexdigest()[:16]
         return f"archive_search_{AAR_CACHE_VERSION}_{pass_name}_{query_hash}.json"
     
-    def _get_cached_results(self, query: str, pass_name: str) -> Optional[Dict[str, Any]]:
+    def _get_cached_results(self, query: str, pass_name: str, max_age_sec: int = 0) -> Optional[Dict[str, Any]]:
         """
         A: Cache = raw search results (standardized items) + response metadata.
         Topic gates se aplikují až po načtení (při výpočtu after_gates).
+
+        Args:
+            max_age_sec: >0 → starší záznam (podle cached_at) se bere jako miss
         """
         cache_file = os.path.join(self.cache_dir, self._cache_key(query, pass_name))
         if os.path.exists(cache_file):
             try:
                 with open(cache_file, 'r', encoding='utf-8') as f:
                     data = json.load(f)
+                    if max_age_sec and max_age_sec > 0:
+                        cached_at = datetime.fromisoformat(str(data.get("cached_at") or "").replace("Z", "+00:00"))
+                        if (datetime.now(timezone.utc) - cached_at).total_seconds() > max_age_sec:
+                            return None
                     self.cache_hit_count += 1
                     return {
                         "query_text": data.get("query") or query,
@@ -1310,8 +1333,11 @@ class ArchiveAssetResolver:
                 "docs_returned": payload.get("docs_returned"),
                 "results": payload.get("results", []) or [],
             }
-            with open(cache_file, 'w', encoding='utf-8') as f:
+            # Atomic write: prefetch thread and AAR may touch the same cache file concurrently.
+            tmp_file = f"{cache_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_file, 'w', encoding='utf-8') as f:
                 json.dump(cache_data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_file, cache_file)
         except Exception as e:
             print(f"⚠️  AAR: Cache write error for {query[:50]}: {e}")
     
@@ -1492,6 +1518,19 @@ class ArchiveAssetResolver:
         if not self.enable_multi_source or not self.video_sources:
             # Fallback to legacy single-source
             return self.search_archive_org(query, max_results, mediatype_filter=ARCHIVE_VIDEO_MEDIATYPE_FILTER, media_label="video")
+
+        mode = str(getattr(self, "multi_source_mode", "cascade") or "cascade").strip().lower()
+
+        # Disk cache (same store as search_archive_org) - lets speculative prefetch after FDA
+        # turn the real AAR run into cache hits. Key includes mode + enabled sources, so
+        # config changes (e.g. a new Europeana key) are not answered from old entries.
+        source_names = "+".join(sorted(str(s.source_name) for s in self.video_sources))
+        cache_pass = f"multi_source_video_{mode}_{source_names}_{int(max_results)}"
+        cached_payload = self._get_cached_results(query, cache_pass, max_age_sec=search_cache_ttl_sec())
+        if cached_payload is not None:
+            return list(cached_payload.get("results") or [])[:max_results]
+        # Skipped (cooldown) / failed / throttled source → partial result, never cached.
+        degraded = False
         
         def _in_cooldown(name: str) -> bool:
             try:
@@ -1510,7 +1549,6 @@ class ArchiveAssetResolver:
 
         all_results: List[Dict[str, Any]] = []
 
-        mode = str(getattr(self, "multi_source_mode", "cascade") or "cascade").strip().lower()
         max_providers = int(getattr(self, "multi_source_max_providers_per_query", 2) or 2)
         min_results = int(getattr(self, "multi_source_min_results_per_query", 4) or 4)
 
@@ -1538,6 +1576,7 @@ class ArchiveAssetResolver:
                 
                 try:
                     if _in_cooldown(source.source_name):
+                        degraded = True
                         continue
                     source_results = source.search(query, max_results=max_results)
                     if self.verbose:
@@ -1566,6 +1605,7 @@ class ArchiveAssetResolver:
                     # Circuit breaker on HTTP outages (429/5xx)
                     st = getattr(source, "last_http_status", None)
                     if isinstance(st, int) and (st == 429 or 500 <= st <= 599):
+                        degraded = True
                         _mark_cooldown(source.source_name, reason=f"http:{st}")
                 except Exception as e:
                     # #region agent log
@@ -1589,6 +1629,7 @@ class ArchiveAssetResolver:
                         pass
                     # #endregion
                     
+                    degraded = True
                     if self.verbose:
                         print(f"⚠️  AAR: {source.source_name} search failed: {e}")
             if not all_results:
@@ -1602,6 +1643,8 @@ class ArchiveAssetResolver:
             legacy_format = []
             for score, item in scored[:max_results]:
                 legacy_format.append(self._convert_to_aar_format(item))
+            if legacy_format and not degraded:
+                self._save_to_cache(query, cache_pass, {"results": legacy_format, "docs_returned": len(legacy_format)})
             return legacy_format
 
         # Default: "cascade" (priority + early exit)
@@ -1610,6 +1653,7 @@ class ArchiveAssetResolver:
             if providers_tried >= max_providers:
                 break
             if _in_cooldown(source.source_name):
+                degraded = True
                 continue
             try:
                 source_results = source.search(query, max_results=max_results)
@@ -1643,6 +1687,7 @@ class ArchiveAssetResolver:
                 providers_tried += 1
                 st = getattr(source, "last_http_status", None)
                 if isinstance(st, int) and (st == 429 or 500 <= st <= 599):
+                    degraded = True
                     _mark_cooldown(source.source_name, reason=f"http:{st}")
                 # Early exit once we have enough candidates
                 if len(all_results) >= max(min_results, max_results):
@@ -1651,6 +1696,7 @@ class ArchiveAssetResolver:
                     break
             except Exception as e:
                 providers_tried += 1
+                degraded = True
                 _mark_cooldown(source.source_name, reason=f"exception:{type(e).__name__}")
                 if self.verbose:
                     print(f"⚠️  AAR(cascade): {source.source_name} search failed: {e}")
@@ -1689,10 +1735,12 @@ class ArchiveAssetResolver:
                     all_results.extend(source_results)
                     st = getattr(source, "last_http_status", None)
                     if isinstance(st, int) and (st == 429 or 500 <= st <= 599):
+                        degraded = True
                         _mark_cooldown(source.source_name, reason=f"http:{st}")
                     if all_results:
                         break
                 except Exception as e:
+                    degraded = True
                     _mark_cooldown(source.source_name, reason=f"exception:{type(e).__name__}")
                     continue
         
@@ -1714,6 +1762,10 @@ class ArchiveAssetResolver:
         legacy_format = []
         for score, item in scored[:max_results]:
             legacy_format.append(self._convert_to_aar_format(item))
+
+        # Only cache complete, non-empty results (empty usually means cooldown/network trouble, not "no footage").
+        if legacy_format and not degraded:
+            self._save_to_cache(query, cache_pass, {"results": legacy_format, "docs_returned": len(legacy_format)})
         
         return legacy_format
 
@@ -1868,6 +1920,7 @@ class ArchiveAssetResolver:
 
             return out[:max_results]
         except Exception as e:
+            self.network_error_count += 1
             if self.verbose:
                 print(f"⚠️  AAR: Wikimedia image search failed: {e}")
             return []
@@ -1877,7 +1930,15 @@ class ArchiveAssetResolver:
         Multi-source IMAGE search.
         Today: Archive.org (images) + Wikimedia Commons (images).
         """
+        cache_pass = f"multi_source_image_{int(max_results)}"
+        cached_payload = self._get_cached_results(query, cache_pass, max_age_sec=search_cache_ttl_sec())
+        if cached_payload is not None:
+            return list(cached_payload.get("results") or [])[:max_results]
+
         results: List[Dict[str, Any]] = []
+        # Both sources swallow their own network errors and bump network_error_count.
+        network_errors_before = self.network_error_count
+        degraded = False
 
         # Archive.org images (legacy)
         try:
@@ -1897,13 +1958,14 @@ class ArchiveAssetResolver:
                             it["thumbnail_url"] = f"https://archive.org/services/img/{aid}"
             results.extend(r)
         except Exception:
-            pass
+            degraded = True
 
         # Wikimedia images (fast + reliable)
         try:
             results.extend(self.search_wikimedia_images(query, max_results=max_results))
         except Exception:
-            pass
+            degraded = True
+        degraded = degraded or self.network_error_count != network_errors_before
 
         # Dedupe by archive_item_id
         seen: set = set()
@@ -1916,7 +1978,10 @@ class ArchiveAssetResolver:
                 continue
             seen.add(aid)
             uniq.append(it)
-        return uniq[:max_results]
+        uniq = uniq[:max_results]
+        if uniq and not degraded:
+            self._save_to_cache(query, cache_pass, {"results": uniq, "docs_returned": len(uniq)})
+        return uniq
     
     def _deduplicate_by_title(self, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
@@ -4272,59 +4337,11 @@ def _extract_episode_queries(
     return out_queries
 
 
-def resolve_episode_pool(
-    shot_plan: Dict[str, Any],
-    cache_dir: str,
-    max_videos: int = 8,      # STABILITY: More videos for better variety and video priority
-    max_images: int = 15,     # Reduced to balance ratio - videos have priority
-    episode_topic: Optional[str] = None,
-    verbose: bool = False,
-    progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
-) -> Dict[str, Any]:
+def _episode_pool_queries(scenes: List[Dict[str, Any]], episode_topic: Optional[str] = None) -> Tuple[List[str], List[str]]:
     """
-    EPISODE-FIRST MODE: Resolve materials for entire episode at once.
-    
-    Instead of per-scene resolution (300+ API calls), we:
-    1. Extract TOP 12 queries from entire episode
-    2. Search once (12 API calls)
-    3. Select TOP 5 videos + TOP 10 images = EPISODE POOL
-    
-    EFFICIENCY:
-    - 12 API calls instead of 300+
-    - 15 downloads instead of 100+
-    - Same output quality
-    
-    Args:
-        shot_plan: Shot plan from FDA
-        cache_dir: Cache directory for search results
-        max_videos: Max unique video sources (default 5)
-        max_images: Max unique image sources (default 10)
-        episode_topic: Main episode topic for relevance
-        verbose: Enable debug logging
-        progress_callback: Optional progress callback
-    
-    Returns:
-        {
-            "videos": [...],  # List of video assets
-            "images": [...],  # List of image assets
-            "queries_used": [...],  # Queries that were executed
-            "stats": {...}  # Pool statistics
-        }
+    Returns (forced_queries, episode_queries) exactly as resolve_episode_pool() will run them.
+    Shared with prefetch_episode_pool_searches() so the speculative warm-up hits the same cache keys.
     """
-    print(f"🎯 AAR: EPISODE-FIRST POOL MODE enabled")
-    print(f"   Target: {max_videos} videos + {max_images} images for entire episode")
-    
-    # Extract scenes
-    scenes = []
-    if isinstance(shot_plan, dict) and isinstance(shot_plan.get("scenes"), list):
-        scenes = shot_plan.get("scenes") or []
-    elif isinstance(shot_plan, dict) and isinstance(shot_plan.get("shot_plan"), dict):
-        scenes = shot_plan["shot_plan"].get("scenes") or []
-    
-    if not scenes:
-        print("⚠️  AAR: No scenes in shot_plan, cannot build episode pool")
-        return {"videos": [], "images": [], "queries_used": [], "stats": {"error": "no_scenes"}}
-    
     # Collect stable "global" search queries from scenes.
     # IMPORTANT: only use the FIRST query per scene (this is where we prepend user_search_queries overrides).
     # Do NOT pull arbitrary per-scene queries here; those can be noisy and create off-topic episode pool results.
@@ -4400,6 +4417,64 @@ def resolve_episode_pool(
     except Exception:
         pass
 
+    return forced_queries, episode_queries
+
+
+def resolve_episode_pool(
+    shot_plan: Dict[str, Any],
+    cache_dir: str,
+    max_videos: int = 8,      # STABILITY: More videos for better variety and video priority
+    max_images: int = 15,     # Reduced to balance ratio - videos have priority
+    episode_topic: Optional[str] = None,
+    verbose: bool = False,
+    progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    """
+    EPISODE-FIRST MODE: Resolve materials for entire episode at once.
+    
+    Instead of per-scene resolution (300+ API calls), we:
+    1. Extract TOP 12 queries from entire episode
+    2. Search once (12 API calls)
+    3. Select TOP 5 videos + TOP 10 images = EPISODE POOL
+    
+    EFFICIENCY:
+    - 12 API calls instead of 300+
+    - 15 downloads instead of 100+
+    - Same output quality
+    
+    Args:
+        shot_plan: Shot plan from FDA
+        cache_dir: Cache directory for search results
+        max_videos: Max unique video sources (default 5)
+        max_images: Max unique image sources (default 10)
+        episode_topic: Main episode topic for relevance
+        verbose: Enable debug logging
+        progress_callback: Optional progress callback
+    
+    Returns:
+        {
+            "videos": [...],  # List of video assets
+            "images": [...],  # List of image assets
+            "queries_used": [...],  # Queries that were executed
+            "stats": {...}  # Pool statistics
+        }
+    """
+    print(f"🎯 AAR: EPISODE-FIRST POOL MODE enabled")
+    print(f"   Target: {max_videos} videos + {max_images} images for entire episode")
+    
+    # Extract scenes
+    scenes = []
+    if isinstance(shot_plan, dict) and isinstance(shot_plan.get("scenes"), list):
+        scenes = shot_plan.get("scenes") or []
+    elif isinstance(shot_plan, dict) and isinstance(shot_plan.get("shot_plan"), dict):
+        scenes = shot_plan["shot_plan"].get("scenes") or []
+    
+    if not scenes:
+        print("⚠️  AAR: No scenes in shot_plan, cannot build episode pool")
+        return {"videos": [], "images": [], "queries_used": [], "stats": {"error": "no_scenes"}}
+    
+    forced_queries, episode_queries = _episode_pool_queries(scenes, episode_topic)
+
     print(f"📝 AAR: Episode queries: {episode_queries}")
 
     # #region agent log (hypothesis A)
@@ -4461,7 +4536,7 @@ def resolve_episode_pool(
     
     # Search for images (multi-source: Archive + Wikimedia)
     all_image_candidates = []
-    for i, query in enumerate(episode_queries[:8]):  # Fewer image queries
+    for i, query in enumerate(episode_queries[:EPISODE_POOL_IMAGE_QUERIES]):  # Fewer image queries
         results = resolver.search_images_multi_source(query, max_results=10)
         for r in results:
             r["_source_query"] = query
@@ -4781,6 +4856,56 @@ def resolve_episode_pool(
     }
 
 
+def prefetch_episode_pool_searches(
+    shot_plan: Dict[str, Any],
+    cache_dir: str,
+    episode_topic: Optional[str] = None,
+    verbose: bool = False,
+) -> Dict[str, Any]:
+    """
+    Speculative cache warm-up for the episode pool (run right after FDA).
+
+    Runs the same video/image searches resolve_episode_pool() will run later, so the
+    results land in the on-disk search cache while FDA validation / user review happen.
+    No LLM calls, no downloads, no manifest writes - safe to abandon at any point.
+
+    Returns:
+        {"queries": [...], "video_searches": int, "image_searches": int, "cache_hits": int}
+    """
+    scenes = []
+    if isinstance(shot_plan, dict) and isinstance(shot_plan.get("scenes"), list):
+        scenes = shot_plan.get("scenes") or []
+    elif isinstance(shot_plan, dict) and isinstance(shot_plan.get("shot_plan"), dict):
+        scenes = shot_plan["shot_plan"].get("scenes") or []
+    if not scenes:
+        return {"queries": [], "video_searches": 0, "image_searches": 0, "cache_hits": 0}
+
+    _forced, episode_queries = _episode_pool_queries(scenes, episode_topic)
+    resolver = ArchiveAssetResolver(cache_dir, throttle_delay_sec=0.3, verbose=verbose)
+
+    video_searches = 0
+    image_searches = 0
+    for query in episode_queries:
+        try:
+            resolver.search_multi_source(query, max_results=10)
+            video_searches += 1
+        except Exception as e:
+            print(f"⚠️  AAR prefetch: video search failed for '{query[:40]}': {e}")
+    for query in episode_queries[:EPISODE_POOL_IMAGE_QUERIES]:
+        try:
+            resolver.search_images_multi_source(query, max_results=10)
+            image_searches += 1
+        except Exception as e:
+            print(f"⚠️  AAR prefetch: image search failed for '{query[:40]}': {e}")
+
+    return {
+        "queries": episode_queries,
+        "video_searches": video_searches,
+        "image_searches": image_searches,
+        "cache_hits": int(resolver.cache_hit_count or 0),
+    }
+
+
 def _distribute_pool_to_scenes(
     pool: Dict[str, Any],
     scenes: List[Dict[str, Any]],
@@ -4973,6 +5098,7 @@ def resolve_shot_plan_assets(
     progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
     preview_mode: bool = False,
     episode_topic: Optional[str] = None,
+    scene_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
 ) -> Tuple[Dict[str, Any], str]:
     """
     Hlavní entry point pro AAR krok v pipeline.
@@ -4983,6 +5109,8 @@ def resolve_shot_plan_assets(
         manifest_output_path: Cesta kde uložit archive_manifest.json
         throttle_delay_sec: Delay mezi API calls
         episode_topic: Main episode topic for LLM-based relevance validation
+        scene_callback: Optional hook called with each manifest scene (in timeline order) as soon as
+                        its beats have candidates - lets CB start downloading before AAR finishes.
     
     Returns:
         (manifest_dict, manifest_file_path)
@@ -5084,6 +5212,15 @@ def resolve_shot_plan_assets(
     # Prefer actual MP3 durations when voiceover_dir is provided (video/compile guarantees voiceover exists)
     audio_durations_by_block: Dict[str, float] = {}
     if voiceover_dir and os.path.exists(voiceover_dir) and narration_blocks:
+        # Fast path: cached per-block PCM timeline (decodes only new/changed blocks, shared with CB)
+        try:
+            from voiceover_assembly import block_durations_by_id, voiceover_timeline
+            vo_timeline = voiceover_timeline(voiceover_dir)
+            if vo_timeline:
+                audio_durations_by_block = block_durations_by_id(vo_timeline, narration_blocks)
+        except Exception as e:
+            print(f"⚠️  AAR: voiceover timeline unavailable, probing MP3s: {e}")
+    if voiceover_dir and os.path.exists(voiceover_dir) and narration_blocks and not audio_durations_by_block:
         try:
             mp3s = sorted([f for f in os.listdir(voiceover_dir) if f.startswith("Narrator_") and f.endswith(".mp3")])
             # Narrator_0001.mp3 aligns with narration_blocks order (TTS endpoint)
@@ -5474,6 +5611,14 @@ def resolve_shot_plan_assets(
                     audio_durations_by_block=audio_durations_by_block,
                 )
                 
+                # Streaming hand-off: emit scenes in timeline order before the manifest is finalized.
+                if scene_callback:
+                    for ms in manifest_scenes:
+                        try:
+                            scene_callback(ms)
+                        except Exception as e:
+                            print(f"⚠️  AAR: scene_callback failed: {e}")
+
                 manifest["scenes"] = manifest_scenes
                 manifest["episode_pool"] = {
                     "mode": "episode_first",
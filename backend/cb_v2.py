@@ -13,6 +13,8 @@ import json
 import os
 from typing import Dict, List, Any, Optional, Tuple
 
+from project_store import load_script_state_file
+
 
 def convert_source_pack_to_manifest(
     source_pack: Dict[str, Any],
@@ -173,8 +175,12 @@ def build_compilation_from_source_pack(
     if not os.path.exists(shot_plan_path):
         return None, {"error": f"Shot plan not found: {shot_plan_path}"}
     
-    with open(shot_plan_path, "r", encoding="utf-8") as f:
-        shot_plan_data = json.load(f)
+    if os.path.basename(shot_plan_path) == "script_state.json":
+        # Sharded state: shot plan lives in state/shot_plan.json (+ metadata shard)
+        shot_plan_data = load_script_state_file(shot_plan_path, parts=["shot_plan", "metadata"])
+    else:
+        with open(shot_plan_path, "r", encoding="utf-8") as f:
+            shot_plan_data = json.load(f)
     
     # Extract shot_plan (tolerant)
     if isinstance(shot_plan_data.get("shot_plan"), dict):
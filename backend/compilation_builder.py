@@ -12,6 +12,7 @@ import json
 import os
 import time
 import hashlib
+import shutil
 import subprocess
 from collections import deque
 from typing import Dict, List, Any, Tuple, Optional, Callable
@@ -21,6 +22,9 @@ import random
 from werkzeug.utils import secure_filename
 
 from asset_quality import probe_media_info, should_reject_media, sample_and_classify
+from encoder_profiles import profile_fps, profile_resolution, profile_summary, resolve_encoder_profile
+from motion_clip_cache import MotionClipCache, duration_bucket
+from voiceover_assembly import assemble_voiceover, voiceover_timeline
 
 
 def _now_iso() -> str:
@@ -60,6 +64,109 @@ def has_video_stream(path: str) -> bool:
         return False
 
 
+# Ken Burns zoompan varianty pro obrázky
+KEN_BURNS_VARIANTS = 6
+# Bump při změně filtrů/encodingu subclipů (mění klíče render plánu)
+RENDER_PLAN_VERSION = "rp1"
+
+
+def stable_effect_variant(*parts: Any) -> int:
+    """
+    Deterministic Ken Burns variant (0..5) from stable identifiers (asset id, block id, ...).
+    Unlike hash(), the result does not depend on PYTHONHASHSEED, so re-renders are reproducible.
+    """
+    payload = "|".join(str(p) for p in parts)
+    return int(hashlib.sha1(payload.encode("utf-8")).hexdigest()[:8], 16) % KEN_BURNS_VARIANTS
+
+
+def kenburns_zoompan_filter(duration: float, target_fps: int, target_w: int, target_h: int, variant: int) -> str:
+    """
+    Zoompan filter for a still image (rendered at 2x FPS internally, then resampled to target_fps).
+    Variants: 0=zoom in, 1=zoom out, 2=pan L→R, 3=pan R→L, 4/5=diagonals with slight zoom.
+    """
+    internal_fps = target_fps * 2  # 60 FPS internal for 30 FPS output
+    internal_frames = int(duration * internal_fps)
+
+    # Zoom amount per frame: total zoom is ~15% over full duration
+    # Formula: zoom_per_frame = (1.15 - 1.0) / internal_frames = 0.15 / frames
+    zoom_per_frame = 0.15 / max(1, internal_frames)
+
+    variant = int(variant) % KEN_BURNS_VARIANTS
+    if variant == 0:
+        # ZOOM IN center (1.0 → 1.15)
+        zoom_expr = f"min(1+on*{zoom_per_frame:.8f},1.15)"
+        x_expr = f"iw/2-(iw/zoom/2)"
+        y_expr = f"ih/2-(ih/zoom/2)"
+    elif variant == 1:
+        # ZOOM OUT center (1.15 → 1.0)
+        zoom_expr = f"max(1.15-on*{zoom_per_frame:.8f},1.0)"
+        x_expr = f"iw/2-(iw/zoom/2)"
+        y_expr = f"ih/2-(ih/zoom/2)"
+    elif variant == 2:
+        # PAN LEFT→RIGHT (constant zoom 1.15, use full visible range)
+        zoom_expr = "1.15"
+        x_expr = f"(iw-iw/zoom)*(on/{internal_frames})"
+        y_expr = f"(ih-ih/zoom)/2"
+    elif variant == 3:
+        # PAN RIGHT→LEFT (constant zoom 1.15)
+        zoom_expr = "1.15"
+        x_expr = f"(iw-iw/zoom)*(1-on/{internal_frames})"
+        y_expr = f"(ih-ih/zoom)/2"
+    elif variant == 4:
+        # DIAGONAL TOP-LEFT → BOTTOM-RIGHT with slight zoom
+        zoom_expr = f"min(1+on*{zoom_per_frame*0.7:.8f},1.10)"
+        x_expr = f"(iw-iw/zoom)*(on/{internal_frames})"
+        y_expr = f"(ih-ih/zoom)*(on/{internal_frames})"
+    else:
+        # DIAGONAL BOTTOM-RIGHT → TOP-LEFT with slight zoom
+        zoom_expr = f"min(1+on*{zoom_per_frame*0.7:.8f},1.10)"
+        x_expr = f"(iw-iw/zoom)*(1-on/{internal_frames})"
+        y_expr = f"(ih-ih/zoom)*(1-on/{internal_frames})"
+
+    return (
+        f"zoompan=z='{zoom_expr}':x='{x_expr}':y='{y_expr}':"
+        f"d={internal_frames}:s={target_w}x{target_h}:fps={internal_fps},"
+        f"fps={target_fps},setsar=1"
+    )
+
+
+def video_master_enabled() -> bool:
+    """Silent video master + narration stem for audio-only remixes (CB_VIDEO_MASTER, default on)."""
+    return (os.getenv("CB_VIDEO_MASTER", "1") or "").strip().lower() in ("1", "true", "yes")
+
+
+def _file_sha1(path: str) -> Optional[str]:
+    try:
+        h = hashlib.sha1()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                h.update(chunk)
+        return h.hexdigest()
+    except OSError:
+        return None
+
+
+def _narration_fingerprint(vo_timeline: Optional[Dict[str, Any]]) -> Optional[str]:
+    """Identity of the voiceover from per-block PCM hashes (None if unknown)."""
+    blocks = (vo_timeline or {}).get("blocks") or []
+    if not blocks or any(not b.get("sha1") for b in blocks):
+        return None
+    return hashlib.sha1("|".join(str(b["sha1"]) for b in blocks).encode("utf-8")).hexdigest()
+
+
+def beat_cache_enabled() -> bool:
+    """Per-beat intermediates keyed by render-plan clip_key (CB_BEAT_CACHE, default on)."""
+    return (os.getenv("CB_BEAT_CACHE", "1") or "").strip().lower() in ("1", "true", "yes")
+
+
+def video_subclip_filter(target_w: int, target_h: int) -> str:
+    """Standard scale/crop for video sources."""
+    return (
+        f"scale={target_w}:{target_h}:force_original_aspect_ratio=increase,"
+        f"crop={target_w}:{target_h},setsar=1"
+    )
+
+
 class CompilationBuilder:
     """
     Builder pro kompilaci videa z archive.org assetů.
@@ -69,17 +176,37 @@ class CompilationBuilder:
     - Real-time progress tracking
     """
     
-    def __init__(self, storage_dir: str, output_dir: str, progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None):
+    def __init__(
+        self,
+        storage_dir: str,
+        output_dir: str,
+        progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+        prefetcher: Optional["AssetPrefetcher"] = None,
+        motion_cache: Optional[MotionClipCache] = None,
+        encoder_profile: Optional[str] = None,
+    ):
         """
         Args:
             storage_dir: Složka pro stažené soubory (cache)
             output_dir: Složka pro finální výstupy
             progress_callback: Optional callback for real-time progress updates
                                Called with: {"phase": str, "message": str, "percent": float, "details": dict}
+            prefetcher: Optional AssetPrefetcher already downloading manifest assets in the background
+                        (fed by AAR). CB awaits its results instead of downloading the same asset again.
+            motion_cache: Optional MotionClipCache – Ken Burns clips of still images are rendered once
+                          per (image, effect, duration bucket, resolution, fps) and reused.
+            encoder_profile: "draft" | "preview" | "final" (None = CB_ENCODER_PROFILE, default "final");
+                             x264 preset/crf per phase + resolution/fps caps, see encoder_profiles.py
         """
         self.storage_dir = storage_dir
         self.output_dir = output_dir
         self.progress_callback = progress_callback
+        self.prefetcher = prefetcher
+        self.motion_cache = motion_cache
+        self.encoder_profile = resolve_encoder_profile(encoder_profile)
+        # Re-render cache: <storage_dir>/beat_cache/<clip_key>.mp4 (+ .json s resolved in/out)
+        self.beat_cache_dir = os.path.join(self.storage_dir, "beat_cache")
+        self._beat_cache_stats = {"hits": 0, "misses": 0, "pruned": 0}
         
         # Progress tracking state
         self._progress_state = {
@@ -549,7 +676,10 @@ class CompilationBuilder:
             start_time = time.time()
             last_progress_time = start_time
             
-            with open(output_file, 'wb') as f:
+            # Write to a sibling .part file and rename on completion, so a concurrent reader
+            # (AssetPrefetcher vs. CB main loop) never sees a half-written file as a cache hit.
+            part_file = output_file + ".part"
+            with open(part_file, 'wb') as f:
                 for chunk in response.iter_content(chunk_size=65536):  # Increased chunk size
                     f.write(chunk)
                     downloaded += len(chunk)
@@ -575,10 +705,11 @@ class CompilationBuilder:
                         last_progress_time = now
             
             # Kontrola velikosti
-            if os.path.getsize(output_file) == 0:
-                os.remove(output_file)
+            if os.path.getsize(part_file) == 0:
+                os.remove(part_file)
                 print(f"❌ CB: Downloaded file is empty: {archive_item_id}")
                 return None
+            os.replace(part_file, output_file)
             
             # Update completed downloads counter
             self._progress_state["completed_downloads"] += 1
@@ -620,6 +751,11 @@ class CompilationBuilder:
         output_file: str,
         target_fps: int = 30,
         resolution: str = "1920x1080",
+        effect_variant: Optional[int] = None,
+        preset: Optional[str] = None,
+        threads: Optional[int] = None,
+        use_motion_cache: bool = True,
+        crf: Optional[int] = None,
     ) -> bool:
         """
         Vytvoří subclip pomocí FFmpeg.
@@ -629,6 +765,13 @@ class CompilationBuilder:
             in_sec: Start time v sekundách
             out_sec: End time v sekundách
             output_file: Výstupní soubor
+            effect_variant: Ken Burns varianta pro obrázky (0=zoom in, 1=zoom out, 2=pan L→R,
+                            3=pan R→L, 4/5=diagonály); None = stabilní hash názvu output_file
+            preset: libx264 preset (None = encoder profile, phase "subclip")
+            crf: libx264 CRF (None = encoder profile, phase "subclip")
+            threads: libx264 threads (None = FFmpeg default); callers rendering in parallel
+                     split the cores between workers
+            use_motion_cache: Obrázky: použij self.motion_cache (pokud je nastavená)
         
         Returns:
             True při úspěchu, False při chybě
@@ -637,6 +780,19 @@ class CompilationBuilder:
         if duration <= 0:
             print(f"❌ CB: Invalid subclip duration: {duration}s")
             return False
+        preset = preset or self.encoder_profile["subclip"]["preset"]
+        crf = int(crf if crf is not None else self.encoder_profile["subclip"]["crf"])
+        
+        if (
+            use_motion_cache
+            and self.motion_cache is not None
+            and source_file.lower().endswith((".jpg", ".jpeg", ".png"))
+        ):
+            cached = self._create_image_subclip_cached(
+                source_file, duration, output_file, target_fps, resolution, effect_variant, preset, threads, crf
+            )
+            if cached is not None:
+                return cached
         
         try:
             # Normalize all clips to target resolution/fps to make concat demuxer reliable.
@@ -675,59 +831,17 @@ class CompilationBuilder:
                 #   - Render at 2x FPS internally (60) for smoother interpolation
                 #   - All expressions use internal_frames for proper timing
                 #   - Downsample to target FPS at the end
-                internal_fps = target_fps * 2  # 60 FPS internal for 30 FPS output
-                internal_frames = int(duration * internal_fps)
-                
-                # Randomize effect type based on output filename hash for variety
-                effect_hash = hash(output_file) % 6  # 6 variants
-                
-                # Zoom amount per frame: total zoom is ~15% over full duration
-                # Formula: zoom_per_frame = (1.15 - 1.0) / internal_frames = 0.15 / frames
-                zoom_per_frame = 0.15 / max(1, internal_frames)
-                
-                if effect_hash == 0:
-                    # ZOOM IN center (1.0 → 1.15)
-                    zoom_expr = f"min(1+on*{zoom_per_frame:.8f},1.15)"
-                    x_expr = f"iw/2-(iw/zoom/2)"
-                    y_expr = f"ih/2-(ih/zoom/2)"
-                elif effect_hash == 1:
-                    # ZOOM OUT center (1.15 → 1.0)
-                    zoom_expr = f"max(1.15-on*{zoom_per_frame:.8f},1.0)"
-                    x_expr = f"iw/2-(iw/zoom/2)"
-                    y_expr = f"ih/2-(ih/zoom/2)"
-                elif effect_hash == 2:
-                    # PAN LEFT→RIGHT (constant zoom 1.15, use full visible range)
-                    zoom_expr = "1.15"
-                    x_expr = f"(iw-iw/zoom)*(on/{internal_frames})"
-                    y_expr = f"(ih-ih/zoom)/2"
-                elif effect_hash == 3:
-                    # PAN RIGHT→LEFT (constant zoom 1.15)
-                    zoom_expr = "1.15"
-                    x_expr = f"(iw-iw/zoom)*(1-on/{internal_frames})"
-                    y_expr = f"(ih-ih/zoom)/2"
-                elif effect_hash == 4:
-                    # DIAGONAL TOP-LEFT → BOTTOM-RIGHT with slight zoom
-                    zoom_expr = f"min(1+on*{zoom_per_frame*0.7:.8f},1.10)"
-                    x_expr = f"(iw-iw/zoom)*(on/{internal_frames})"
-                    y_expr = f"(ih-ih/zoom)*(on/{internal_frames})"
-                else:
-                    # DIAGONAL BOTTOM-RIGHT → TOP-LEFT with slight zoom
-                    zoom_expr = f"min(1+on*{zoom_per_frame*0.7:.8f},1.10)"
-                    x_expr = f"(iw-iw/zoom)*(1-on/{internal_frames})"
-                    y_expr = f"(ih-ih/zoom)*(1-on/{internal_frames})"
-                
-                vf = (
-                    f"zoompan=z='{zoom_expr}':x='{x_expr}':y='{y_expr}':"
-                    f"d={internal_frames}:s={target_w}x{target_h}:fps={internal_fps},"
-                    f"fps={target_fps},setsar=1"
+                # Variant: explicit (render plan) or stable hash of the output name (never hash(),
+                # which changes per process via PYTHONHASHSEED).
+                variant = (
+                    int(effect_variant) if effect_variant is not None
+                    else stable_effect_variant(os.path.basename(output_file))
                 )
+                vf = kenburns_zoompan_filter(duration, target_fps, target_w, target_h, variant)
             else:
                 cmd.extend(["-ss", str(in_sec), "-i", source_file, "-t", str(duration)])
                 # Standard scale/crop for videos
-                vf = (
-                    f"scale={target_w}:{target_h}:force_original_aspect_ratio=increase,"
-                    f"crop={target_w}:{target_h},setsar=1"
-                )
+                vf = video_subclip_filter(target_w, target_h)
 
             cmd.extend(
                 [
@@ -740,12 +854,14 @@ class CompilationBuilder:
                     "-c:v",
                     "libx264",
                     "-preset",
-                    "fast",
+                    preset,
                     "-crf",
-                    "23",
+                    str(crf),
                     "-an",  # keep subclips silent; final audio is added in concat step
                 ]
             )
+            if threads:
+                cmd.extend(["-threads", str(int(threads))])
 
             cmd.extend(
                 [
@@ -774,8 +890,617 @@ class CompilationBuilder:
             print(f"❌ CB: FFmpeg subclip timeout")
             return False
         except Exception as e:
-            print(f"❌ CB: Subclip creation error: {e}")
-            return False
+            print(f"❌ CB: Subclip creation error: {e}")
+            return False
+
+    def _create_image_subclip_cached(
+        self,
+        source_file: str,
+        duration: float,
+        output_file: str,
+        target_fps: int,
+        resolution: str,
+        effect_variant: Optional[int],
+        preset: str,
+        threads: Optional[int],
+        crf: int = 23,
+    ) -> Optional[bool]:
+        """
+        Ken Burns clip přes MotionClipCache: master se renderuje jednou na délku bucketu,
+        výstup = kopie (nebo stream-copy ořez na přesnou délku). Ořezaný klip nedojede do koncové
+        pozice zoomu/panu (chybí max. jeden bucket pohybu) – vědomý trade-off za sdílení masterů.
+
+        Returns:
+            True/False jako create_subclip, None = cache nepoužitelná (volající renderuje přímo)
+        """
+        try:
+            variant = (
+                int(effect_variant) if effect_variant is not None
+                else stable_effect_variant(os.path.basename(output_file))
+            ) % KEN_BURNS_VARIANTS
+            master_duration = duration_bucket(duration)
+            key = self.motion_cache.key_for(
+                self.motion_cache.image_hash(source_file), variant, master_duration, resolution, target_fps,
+                f"{preset}/crf{crf}",
+            )
+        except Exception as e:
+            print(f"⚠️  CB: Motion cache key failed for {source_file}: {e}")
+            return None
+
+        if self.motion_cache.get(key) is None:
+            tmp_path = self.motion_cache.tmp_path_for(key)
+            try:
+                ok = self.create_subclip(
+                    source_file, 0.0, master_duration, tmp_path,
+                    target_fps=target_fps, resolution=resolution,
+                    effect_variant=variant, preset=preset, threads=threads,
+                    use_motion_cache=False, crf=crf,
+                )
+                if not ok:
+                    return False
+                if not self.motion_cache.put_file(key, tmp_path):
+                    return None
+            finally:
+                try:
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)
+                except Exception:
+                    pass
+        else:
+            print(f"♻️  CB: Motion cache hit {os.path.basename(source_file)} (variant {variant}, {master_duration:.2f}s)")
+
+        if abs(master_duration - duration) < 1e-3:
+            return self.motion_cache.copy_to(key, output_file)
+        # Ořez konce = stream copy (žádný re-encode; začátek klipu je keyframe)
+        try:
+            result = subprocess.run(
+                ["ffmpeg", "-y", "-v", "error", "-i", self.motion_cache.path_for(key),
+                 "-t", f"{duration:.3f}", "-c", "copy", "-an", output_file],
+                capture_output=True, text=True, timeout=120,
+            )
+            if result.returncode != 0 or not os.path.exists(output_file) or os.path.getsize(output_file) == 0:
+                print(f"⚠️  CB: Motion cache trim failed: {(result.stderr or '')[-300:]}")
+                return None
+            return True
+        except Exception as e:
+            print(f"⚠️  CB: Motion cache trim error: {e}")
+            return None
+
+    def render_plan_entry(
+        self,
+        source_file: str,
+        asset_id: str,
+        in_sec: float,
+        out_sec: float,
+        target_fps: int,
+        resolution: str,
+        effect_variant: Optional[int] = None,
+        preset: Optional[str] = None,
+        crf: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Deterministic description of one subclip render (inputs only) + its clip_key.
+        The same entry ⇒ byte-identical FFmpeg command ⇒ the rendered clip can be reused.
+        preset/crf default to the encoder profile's "subclip" phase (same as create_subclip).
+        Images require an explicit effect_variant: create_subclip's fallback hashes the output
+        file name, which the plan does not know, so the entry would describe a different render.
+
+        Raises:
+            ValueError: image source without effect_variant
+        """
+        preset = preset or self.encoder_profile["subclip"]["preset"]
+        crf = int(crf if crf is not None else self.encoder_profile["subclip"]["crf"])
+        try:
+            w, h = resolution.lower().split("x", 1)
+            target_w, target_h = int(w), int(h)
+        except Exception:
+            target_w, target_h = 1920, 1080
+        is_image = source_file.lower().endswith((".jpg", ".jpeg", ".png"))
+        if is_image and effect_variant is None:
+            raise ValueError(f"render_plan_entry: effect_variant is required for image {os.path.basename(source_file)}")
+        duration = float(out_sec) - float(in_sec)
+        try:
+            source_bytes = os.path.getsize(source_file)
+        except OSError:
+            source_bytes = None
+        entry = {
+            "asset_id": str(asset_id or ""),
+            "source": os.path.basename(source_file),
+            "source_bytes": source_bytes,
+            "media_type": "image" if is_image else "video",
+            "in_sec": round(float(in_sec), 3),
+            "out_sec": round(float(out_sec), 3),
+            "effect_variant": int(effect_variant) if is_image else None,
+            "filter": (
+                kenburns_zoompan_filter(duration, target_fps, target_w, target_h, int(effect_variant))
+                if is_image else video_subclip_filter(target_w, target_h)
+            ),
+            "target_fps": int(target_fps),
+            "resolution": f"{target_w}x{target_h}",
+            "preset": preset,
+            "crf": crf,
+        }
+        payload = json.dumps({"v": RENDER_PLAN_VERSION, **entry}, sort_keys=True, separators=(",", ":"))
+        entry["clip_key"] = hashlib.sha1(payload.encode("utf-8")).hexdigest()
+        return entry
+
+    def write_render_plan(self, episode_id: str, target_fps: int, resolution: str, entries: List[Dict[str, Any]]) -> Optional[str]:
+        """
+        Writes <storage_dir>/render_plan.json (stable, no timestamps → diffable between renders).
+        Returns the path, or None on failure.
+        """
+        digest = hashlib.sha1(
+            json.dumps([e.get("clip_key") for e in entries], separators=(",", ":")).encode("utf-8")
+        ).hexdigest()
+        plan = {
+            "version": RENDER_PLAN_VERSION,
+            "episode_id": episode_id,
+            "target_fps": int(target_fps),
+            "resolution": resolution,
+            "plan_digest": digest,
+            "beats": entries,
+        }
+        path = os.path.join(self.storage_dir, f"render_plan{self._profile_suffix()}.json")
+        tmp_path = path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(plan, f, ensure_ascii=False, indent=2, sort_keys=True)
+                f.write("\n")
+            os.replace(tmp_path, path)
+            self._render_plan_digest = digest
+            return path
+        except Exception as e:
+            print(f"⚠️  CB: Failed to write render plan: {e}")
+            return None
+
+    def beat_cache_lookup(self, clip_key: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns the sidecar of a cached beat intermediate ({"in_sec", "out_sec", ...}) or None.
+        """
+        clip_path = os.path.join(self.beat_cache_dir, f"{clip_key}.mp4")
+        meta_path = os.path.join(self.beat_cache_dir, f"{clip_key}.json")
+        try:
+            if os.path.getsize(clip_path) <= 0:
+                return None
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if not isinstance(meta, dict) or "in_sec" not in meta or "out_sec" not in meta:
+                return None
+            meta["clip_path"] = clip_path
+            return meta
+        except (OSError, ValueError):
+            return None
+
+    def beat_cache_restore(self, clip_key: str, dest_path: str) -> Optional[Dict[str, Any]]:
+        """
+        Materializes a cached beat intermediate at dest_path (hardlink, fallback copy).
+        Returns the sidecar dict on success, None on miss.
+        """
+        meta = self.beat_cache_lookup(clip_key)
+        if not meta:
+            return None
+        try:
+            if os.path.lexists(dest_path):
+                os.remove(dest_path)
+            try:
+                os.link(meta["clip_path"], dest_path)
+            except OSError:
+                shutil.copyfile(meta["clip_path"], dest_path)
+            return meta if os.path.getsize(dest_path) > 0 else None
+        except Exception as e:
+            print(f"⚠️  CB: beat cache restore failed for {clip_key[:12]}: {e}")
+            return None
+
+    def beat_cache_store(self, clip_key: str, clip_path: str, in_sec: float, out_sec: float) -> bool:
+        """
+        Stores a freshly rendered beat intermediate. The sidecar is written last,
+        so a half-written entry is never treated as a hit.
+        """
+        try:
+            os.makedirs(self.beat_cache_dir, exist_ok=True)
+            cached = os.path.join(self.beat_cache_dir, f"{clip_key}.mp4")
+            meta_path = os.path.join(self.beat_cache_dir, f"{clip_key}.json")
+            tmp = cached + ".tmp"
+            if os.path.lexists(tmp):
+                os.remove(tmp)
+            try:
+                os.link(clip_path, tmp)
+            except OSError:
+                shutil.copyfile(clip_path, tmp)
+            os.replace(tmp, cached)
+            with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump({"in_sec": float(in_sec), "out_sec": float(out_sec), "stored_at": _now_iso()}, f)
+            os.replace(meta_path + ".tmp", meta_path)
+            return True
+        except Exception as e:
+            print(f"⚠️  CB: beat cache store failed for {clip_key[:12]}: {e}")
+            return False
+
+    def _profile_suffix(self) -> str:
+        """Per-profile artifact suffix ("" for final) – draft/preview renders never evict the final ones."""
+        name = self.encoder_profile.get("name")
+        return "" if name == "final" else f"_{name}"
+
+    def prune_beat_cache(self, keep_keys: List[str]) -> int:
+        """
+        Removes beat intermediates not referenced by the current render plan
+        (nor by the plans of the other encoder profiles). Returns removed count.
+        """
+        keep = set(keep_keys or [])
+        try:
+            other_plans = [
+                n for n in os.listdir(self.storage_dir)
+                if n.startswith("render_plan") and n.endswith(".json")
+                and n != f"render_plan{self._profile_suffix()}.json"
+            ]
+        except OSError:
+            other_plans = []
+        for name in other_plans:
+            try:
+                with open(os.path.join(self.storage_dir, name), "r", encoding="utf-8") as f:
+                    keep.update(e.get("clip_key") for e in (json.load(f).get("beats") or []) if isinstance(e, dict))
+            except Exception:
+                pass
+        removed = 0
+        try:
+            names = os.listdir(self.beat_cache_dir)
+        except OSError:
+            return 0
+        for name in names:
+            key = name.split(".", 1)[0]
+            if key in keep:
+                continue
+            try:
+                os.remove(os.path.join(self.beat_cache_dir, name))
+                if name.endswith(".mp4"):
+                    removed += 1
+            except OSError:
+                pass
+        return removed
+
+    def _video_master_paths(self) -> Tuple[str, str]:
+        return (
+            os.path.join(self.storage_dir, f"video_master{self._profile_suffix()}.mp4"),
+            os.path.join(self.storage_dir, f"video_master{self._profile_suffix()}.json"),
+        )
+
+    def read_video_master(self) -> Optional[Dict[str, Any]]:
+        """Sidecar of the silent video master (None if missing/incomplete)."""
+        master_path, sidecar_path = self._video_master_paths()
+        try:
+            if os.path.getsize(master_path) <= 0:
+                return None
+            with open(sidecar_path, "r", encoding="utf-8") as f:
+                side = json.load(f)
+            return side if isinstance(side, dict) and side.get("master_key") else None
+        except (OSError, ValueError):
+            return None
+
+    def write_video_master_sidecar(self, sidecar: Dict[str, Any]) -> None:
+        _, sidecar_path = self._video_master_paths()
+        try:
+            with open(sidecar_path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(sidecar, f, ensure_ascii=False, indent=2)
+            os.replace(sidecar_path + ".tmp", sidecar_path)
+        except Exception as e:
+            print(f"⚠️  CB: Failed to write video master sidecar: {e}")
+
+    def mux_audio_onto_master(self, master_path: str, audio_file: Optional[str], output_file: str) -> bool:
+        """
+        Final mux: video master (stream copy, no re-encode) + narration/music mix (AAC).
+        """
+        cmd = ["ffmpeg", "-y", "-i", master_path]
+        if audio_file and os.path.exists(audio_file):
+            cmd.extend(["-i", audio_file, "-map", "0:v:0", "-map", "1:a:0",
+                        "-c:a", "aac", "-b:a", "128k", "-shortest"])
+        else:
+            cmd.append("-an")
+        cmd.extend(["-c:v", "copy", "-movflags", "+faststart", output_file])
+        try:
+            r = subprocess.run(cmd, capture_output=True, text=True, timeout=600)
+        except subprocess.TimeoutExpired:
+            self._last_concat_error = {"attempt": "master_mux", "returncode": 124, "stderr": "FFmpeg timeout"}
+            return False
+        if r.returncode != 0 or not os.path.exists(output_file) or os.path.getsize(output_file) == 0:
+            print(f"❌ CB: Audio mux onto video master failed (rc={r.returncode}): {(r.stderr or '')[:500]}")
+            self._last_concat_error = {
+                "attempt": "master_mux",
+                "returncode": int(r.returncode),
+                "stderr": (r.stderr or "")[:2000],
+            }
+            return False
+        print(f"✅ CB: Muxed audio onto video master → {output_file}")
+        return True
+
+    def remix_music(self, manifest_path: str, episode_id: str) -> Tuple[Optional[str], Dict[str, Any]]:
+        """
+        Music-only remix (music_bg_gain_db / selected track changed): re-mixes the narration stem
+        with the current music settings and re-muxes it onto the existing video master (-c:v copy).
+        
+        Returns:
+            (output_video_path, metadata), or (None, {"error": ...}) when the master is missing or
+            stale (manifest / voiceover changed) – the caller then runs the full build.
+        """
+        side = self.read_video_master()
+        if not side:
+            return None, {"error": "video_master_missing"}
+        if side.get("manifest_sha1") != _file_sha1(manifest_path):
+            return None, {"error": "manifest_changed"}
+        narration = side.get("narration_audio")
+        voiceover_dir = os.path.join(os.path.dirname(self.storage_dir), "voiceover")
+        if not narration or not os.path.exists(narration):
+            return None, {"error": "narration_stem_missing"}
+        fingerprint = side.get("narration_fingerprint")
+        if not fingerprint or fingerprint != _narration_fingerprint(voiceover_timeline(voiceover_dir)):
+            return None, {"error": "narration_changed"}
+
+        master_path, _ = self._video_master_paths()
+        self._progress_state["phase"] = "assembly"
+        self._emit_progress("assembly", "🎵 Remix hudby: míchám audio nad hotovým videem...", 50.0)
+        scenes = [{"emotion": e} for e in (side.get("scene_emotions") or [])]
+        audio_file, music_report = self.mix_background_music(narration, scenes, side.get("duration_sec"))
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        output_path = os.path.join(self.output_dir, f"episode_{episode_id}_compilation_{timestamp}.mp4")
+        if not self.mux_audio_onto_master(master_path, audio_file, output_path):
+            return None, {"error": "Music remix mux failed", "details": getattr(self, "_last_concat_error", None)}
+
+        metadata = dict(side.get("metadata") or {})
+        report = dict(metadata.get("compilation_report") or {})
+        report["music"] = music_report
+        metadata.update({
+            "timestamp": _now_iso(),
+            "episode_id": episode_id,
+            "output_file": output_path,
+            "output_size_bytes": os.path.getsize(output_path),
+            "remix": "music_only",
+            "compilation_report": report,
+        })
+        report_path = os.path.join(os.path.dirname(output_path), f"compilation_report_{episode_id}_{timestamp}.json")
+        try:
+            with open(report_path, "w", encoding="utf-8") as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+        except Exception as e:
+            print(f"⚠️  CB: Failed to save compilation report: {e}")
+
+        self._progress_state["phase"] = "done"
+        self._emit_progress("done", "✅ Remix hudby hotový", 100.0, output_file=output_path)
+        print(f"✅ CB: Music-only remix complete → {output_path}")
+        return output_path, metadata
+
+    def mix_background_music(
+        self,
+        audio_file: Optional[str],
+        scenes: List[Dict[str, Any]],
+        voiceover_duration_sec: Optional[float] = None,
+    ) -> Tuple[Optional[str], Dict[str, Any]]:
+        """
+        Mixes background music under the voiceover (selection + gain from script_state / preferences).
+        
+        Args:
+            audio_file: Voiceover (narration stem)
+            scenes: Manifest scenes (only "emotion" is used for mood selection)
+            voiceover_duration_sec: Known narration length (skips ffprobe)
+        
+        Returns:
+            (audio file to mux – mixed or the original voiceover, music_report)
+        """
+        # Background music (priority: selected_global_music > per-episode > auto-select global)
+        # Voiceover is reference (0 dB). Background music gain is configurable via script_state.json.
+        # Load default from global preferences (persists across sessions)
+        music_gain_db = -18.0  # fallback if settings_store unavailable
+        try:
+            from settings_store import SettingsStore
+            settings_store = SettingsStore(
+                base_dir=os.path.dirname(os.path.dirname(self.storage_dir)),  # podcasts/
+                backend_dir=os.path.join(os.path.dirname(os.path.dirname(self.storage_dir)), "backend")
+            )
+            music_gain_db = settings_store.get_music_bg_gain_db()
+            print(f"🎵 CB: Loaded default music gain from global preferences: {music_gain_db} dB")
+        except Exception as e:
+            print(f"⚠️  CB: Could not load global music gain preference, using fallback: {e}")
+        
+        music_report = {"enabled": False, "selected_track": None}
+        try:
+            from global_music_store import load_global_music_manifest, get_music_file_path, select_music_auto
+            
+            episode_dir = os.path.dirname(self.storage_dir)  # projects/ep_xxx/
+            
+            # 1) Check if user selected global music via script_state
+            selected_global = None
+            state_path = os.path.join(episode_dir, "script_state.json")
+            if os.path.exists(state_path):
+                try:
+                    with open(state_path, "r", encoding="utf-8") as f:
+                        state = json.load(f)
+                        selected_global = state.get("selected_global_music")
+                        # Optional: background music gain (in dB). Typical safe range: -40..-6
+                        raw_gain = state.get("music_bg_gain_db")
+                        if raw_gain is not None:
+                            try:
+                                g = float(raw_gain)
+                                # Clamp to avoid extreme values; UI typically limits further.
+                                g = max(-60.0, min(0.0, g))
+                                music_gain_db = g
+                                # Save to global preferences for future projects
+                                try:
+                                    settings_store.set_music_bg_gain_db(g)
+                                    print(f"🎵 CB: Saved music gain {g} dB to global preferences")
+                                except Exception as save_err:
+                                    print(f"⚠️  CB: Could not save gain to global prefs: {save_err}")
+                            except Exception:
+                                pass
+                except Exception:
+                    pass
+            
+            chosen = None
+            music_path = None
+            
+            # Priority 1: User-selected global music
+            if selected_global and isinstance(selected_global, dict):
+                chosen = selected_global
+                music_path = get_music_file_path(secure_filename(chosen.get("filename")))
+                if music_path and os.path.exists(music_path):
+                    print(f"🎵 CB: Using user-selected global music: {chosen.get('filename')}")
+                else:
+                    chosen = None
+                    music_path = None
+            
+            # Priority 2: Per-episode music (legacy)
+            if not chosen:
+                music_manifest_path = os.path.join(episode_dir, "assets", "music", "music_manifest.json")
+                if os.path.exists(music_manifest_path):
+                    with open(music_manifest_path, "r", encoding="utf-8") as f:
+                        mm = json.load(f)
+                    tracks = mm.get("tracks") if isinstance(mm, dict) else None
+                    tracks = tracks if isinstance(tracks, list) else []
+                    active_tracks = [t for t in tracks if isinstance(t, dict) and t.get("active") is True and t.get("filename")]
+
+                    if active_tracks:
+                        # Choose by predominant emotion if possible (MVP heuristic)
+                        emotion_counts = {}
+                        for sc in scenes:
+                            emo = sc.get("emotion")
+                            if isinstance(emo, str) and emo.strip():
+                                emotion_counts[emo.strip().lower()] = emotion_counts.get(emo.strip().lower(), 0) + 1
+                        predominant = None
+                        if emotion_counts:
+                            predominant = sorted(emotion_counts.items(), key=lambda x: x[1], reverse=True)[0][0]
+                        tag_pref = "neutral"
+                        if predominant in ("tension", "tragedy", "mystery"):
+                            tag_pref = "dark"
+                        elif predominant in ("hope", "victory"):
+                            tag_pref = "hopeful"
+
+                        tagged = [t for t in active_tracks if str(t.get("tag") or "").strip().lower() == tag_pref]
+                        pool = tagged if tagged else active_tracks
+                        chosen = random.choice(pool)
+
+                        music_path = os.path.join(episode_dir, "assets", "music", secure_filename(chosen.get("filename")))
+                        if os.path.exists(music_path):
+                            print(f"🎵 CB: Using per-episode music: {chosen.get('filename')}")
+                        else:
+                            chosen = None
+                            music_path = None
+            
+            # Priority 3: Auto-select from global library
+            if not chosen:
+                print(f"🎵 CB: No per-episode music found, trying auto-select from global library")
+                # Determine mood from scenes
+                emotion_counts = {}
+                for sc in scenes:
+                    emo = sc.get("emotion")
+                    if isinstance(emo, str) and emo.strip():
+                        emotion_counts[emo.strip().lower()] = emotion_counts.get(emo.strip().lower(), 0) + 1
+                
+                preferred_mood = "neutral"
+                preferred_tags = []
+                
+                if emotion_counts:
+                    predominant = sorted(emotion_counts.items(), key=lambda x: x[1], reverse=True)[0][0]
+                    if predominant in ("tension", "tragedy", "mystery"):
+                        preferred_mood = "dark"
+                        preferred_tags = ["cinematic", "dramatic"]
+                    elif predominant in ("hope", "victory"):
+                        preferred_mood = "uplifting"
+                        preferred_tags = ["ambient", "electronic"]
+                    else:
+                        preferred_mood = "peaceful"
+                        preferred_tags = ["ambient", "minimal"]
+                
+                print(f"   Preferred mood: {preferred_mood}, tags: {preferred_tags}")
+                chosen = select_music_auto(
+                    preferred_mood=preferred_mood,
+                    preferred_tags=preferred_tags,
+                    # IMPORTANT: do NOT filter by duration.
+                    # We loop background music with FFmpeg (-stream_loop -1), so even short tracks work.
+                    min_duration_sec=None
+                )
+                
+                if chosen:
+                    music_path = get_music_file_path(secure_filename(chosen.get("filename")))
+                    if music_path and os.path.exists(music_path):
+                        print(f"🎵 CB: Auto-selected global music: {chosen.get('filename')} (mood={preferred_mood})")
+                    else:
+                        chosen = None
+                        music_path = None
+                        print(f"⚠️  CB: Auto-selected music file not found: {chosen.get('filename') if chosen else 'N/A'}")
+                else:
+                    print(f"⚠️  CB: No global music found for mood={preferred_mood}")
+            
+            if not chosen:
+                print(f"⚠️  CB: No background music available - video will have voiceover only")
+            
+            # Mix music if chosen
+            if chosen and music_path and os.path.exists(music_path):
+                print(f"🎵 CB: Attempting to mix background music...")
+                print(f"   Music file: {music_path}")
+                print(f"   Audio file (voiceover): {audio_file}")
+                
+                # Compute voiceover duration (already known when assembled from the VO timeline)
+                vo_dur = voiceover_duration_sec
+                try:
+                    if vo_dur:
+                        print(f"   Voiceover duration: {vo_dur:.2f}s (timeline)")
+                    else:
+                        r = subprocess.run(
+                            ["ffprobe", "-v", "error", "-show_entries", "format=duration",
+                             "-of", "default=noprint_wrappers=1:nokey=1", audio_file],
+                            capture_output=True, text=True, timeout=10
+                        )
+                        if r.returncode == 0 and (r.stdout or "").strip():
+                            vo_dur = float((r.stdout or "").strip())
+                            print(f"   Voiceover duration: {vo_dur:.2f}s")
+                except Exception as e:
+                    print(f"   ⚠️  Failed to probe voiceover duration: {e}")
+                    vo_dur = None
+
+                if vo_dur and vo_dur > 0:
+                    fade = 1.5
+                    if vo_dur < 6:
+                        fade = 1.0
+                    fade = max(1.0, min(2.0, fade))
+                    fade_out_start = max(0.0, vo_dur - fade)
+                    mixed_audio_path = os.path.join(self.storage_dir, "combined_voiceover_with_music.m4a")
+
+                    # Voiceover is reference (0 dB). Music at configurable dB, with fade-in/out.
+                    cmd = [
+                        "ffmpeg", "-y", "-i", audio_file,
+                        "-stream_loop", "-1", "-i", music_path,
+                        "-filter_complex",
+                        (f"[1:a]volume={music_gain_db}dB,"
+                         f"afade=t=in:st=0:d={fade},"
+                         f"afade=t=out:st={fade_out_start}:d={fade}[bg];"
+                         f"[0:a][bg]amix=inputs=2:duration=first:dropout_transition=0[a]"),
+                        "-map", "[a]", "-vn", "-c:a", "aac", "-b:a", "192k",
+                        "-t", str(vo_dur), mixed_audio_path
+                    ]
+                    print(f"   Running FFmpeg command: {' '.join(cmd[:5])}...")
+                    result = subprocess.run(cmd, capture_output=True, text=True, timeout=120)
+                    if result.returncode == 0 and os.path.exists(mixed_audio_path) and os.path.getsize(mixed_audio_path) > 0:
+                        audio_file = mixed_audio_path
+                        music_report = {
+                            "enabled": True,
+                            "selected_track": {
+                                "filename": chosen.get("filename"),
+                                "mood": chosen.get("mood", chosen.get("tag")),  # Fallback to tag for legacy
+                                "tags": chosen.get("tags", []),
+                                "gain_db": music_gain_db,
+                                "fade_in_sec": fade,
+                                "fade_out_sec": fade,
+                            },
+                        }
+                        print(f"🎵 CB: Background music mixed in: {chosen.get('filename')}")
+                    else:
+                        # FFmpeg mixing failed
+                        print(f"❌ CB: FFmpeg music mixing failed (return code: {result.returncode})")
+                        print(f"   stderr: {result.stderr[:500]}")
+                        print(f"   Audio file will NOT have background music")
+        except Exception as e:
+            print(f"⚠️  CB: Background music mix skipped: {e}")
+            import traceback
+            traceback.print_exc()
+        return audio_file, music_report
 
     def create_color_clip(
         self,
@@ -804,7 +1529,8 @@ class CompilationBuilder:
         output_file: str,
         target_fps: int = 30,
         resolution: str = "1920x1080",
-        audio_file: Optional[str] = None
+        audio_file: Optional[str] = None,
+        max_duration_sec: Optional[float] = None,
     ) -> bool:
         """
         Spojí klipy do jednoho videa pomocí FFmpeg concat.
@@ -815,6 +1541,8 @@ class CompilationBuilder:
             target_fps: Target FPS
             resolution: Target resolution
             audio_file: Cesta k audio souboru (voiceover MP3)
+            max_duration_sec: Silent output only – pad (clone last frame) and cut to this length
+                              (video master matching the narration length)
         
         Returns:
             True při úspěchu
@@ -944,15 +1672,17 @@ class CompilationBuilder:
                 )
             else:
                 fc_cmd.extend(["-an"])
+                if max_duration_sec and float(max_duration_sec) > 0:
+                    fc_cmd.extend(["-t", f"{float(max_duration_sec):.3f}"])
 
             fc_cmd.extend(
                 [
                     "-c:v",
                     "libx264",
                     "-preset",
-                    "medium",
+                    self.encoder_profile["assembly"]["preset"],
                     "-crf",
-                    "23",
+                    str(self.encoder_profile["assembly"]["crf"]),
                     "-movflags",
                     "+faststart",
                     output_file,
@@ -1046,6 +1776,14 @@ class CompilationBuilder:
         # Extrakce compile_plan parametrů
         target_fps = compile_plan.get("target_fps", 30)
         resolution = compile_plan.get("resolution", "1920x1080")
+        # Encoder profile caps (draft/preview render fewer pixels/frames)
+        target_fps = profile_fps(self.encoder_profile, target_fps)
+        resolution = profile_resolution(self.encoder_profile, resolution)
+        encoder_report = profile_summary(self.encoder_profile, resolution, target_fps)
+        print(
+            f"🎛️  CB: Encoder profile '{encoder_report['name']}' → {resolution} @ {target_fps}fps "
+            f"(subclip {encoder_report['subclip']}, assembly {encoder_report['assembly']})"
+        )
         
         # Výstupní soubor
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -1055,6 +1793,8 @@ class CompilationBuilder:
         print(f"🎬 CB: Building compilation for {len(scenes)} scenes...")
         
         all_clips = []
+        render_plan_path: Optional[str] = None
+        self._render_plan_digest = None
         clips_metadata = []  # Global metadata pro všechny subclips
         scenes_metadata = []
         # Count "no-visual" situations (used for diagnostics + hard validation logging).
@@ -1434,7 +2174,12 @@ class CompilationBuilder:
                     aobj = _find_asset_by_id(beat.get("assets") or [], aid)
                     if not aobj:
                         continue
-                    source_file = self.download_asset(aobj)
+                    # Pipelined path: the prefetcher may already have downloaded + gated this asset.
+                    prefetched = self.prefetcher.result(aobj) if self.prefetcher else None
+                    if prefetched is not None:
+                        source_file, technical_ok = prefetched
+                    else:
+                        source_file, technical_ok = self.download_asset(aobj), None
                     if not source_file:
                         quality_debug["attempts"].append(
                             {"archive_item_id": aid, "accepted": False, "reason": "download_failed"}
@@ -1442,7 +2187,9 @@ class CompilationBuilder:
                         continue
 
                     is_image = source_file.lower().endswith((".jpg", ".jpeg", ".png", ".webp", ".gif"))
-                    if not is_image and not has_video_stream(source_file):
+                    if technical_ok is None:
+                        technical_ok = is_image or has_video_stream(source_file)
+                    if not technical_ok:
                         quality_debug["attempts"].append(
                             {"archive_item_id": aid, "accepted": False, "reason": "no_video_stream"}
                         )
@@ -1484,6 +2231,20 @@ class CompilationBuilder:
                     )
                 return out
 
+            # Pipelined downloads: queue every beat's leading candidates so downloads of later
+            # beats run while earlier beats are being cut (no-op for assets AAR already queued).
+            if self.prefetcher:
+                for beat in beats:
+                    for cand in (beat.get("asset_candidates") or [])[:2]:
+                        if isinstance(cand, dict):
+                            aobj = _find_asset_by_id(beat.get("assets") or [], str(cand.get("archive_item_id") or ""))
+                            if aobj:
+                                self.prefetcher.submit(aobj)
+
+            render_plan_entries: List[Dict[str, Any]] = []
+            use_beat_cache = beat_cache_enabled()
+            self._beat_cache_stats = {"hits": 0, "misses": 0, "pruned": 0}
+
             # Initialize progress tracking for cutting phase
             self._progress_state["total_clips"] = len(beats)
             self._progress_state["completed_clips"] = 0
@@ -1583,9 +2344,14 @@ class CompilationBuilder:
                         used_subclip_ranges[asset_id], media_dur
                     )
                     
+                    is_image_source = source_file.lower().endswith((".jpg", ".jpeg", ".png"))
                     # Create each subclip
                     for sub_idx, spec in enumerate(subclip_specs):
                         clip_counter = len(all_clips) + 1
+                        # Deterministic Ken Burns variant per (asset, beat, subclip) – reproducible re-renders
+                        effect_variant = (
+                            stable_effect_variant(asset_id, block_id, sub_idx + 1) if is_image_source else None
+                        )
                         subclip_filename = f"beat_{clip_counter:05d}_{scene_id}_{block_id}_sub{sub_idx+1}.mp4"
                         subclip_path = os.path.join(self.storage_dir, subclip_filename)
                         
@@ -1618,11 +2384,29 @@ class CompilationBuilder:
                                     votes += 1
                             return total > 0 and votes >= max(1, int(round(total * 0.66)))
 
+                        # Render-plan entry over the *requested* inputs → clip_key identifies the render.
+                        plan_entry = self.render_plan_entry(
+                            source_file, asset_id, in0, out0,
+                            target_fps, resolution, effect_variant=effect_variant,
+                        )
+                        clip_key = plan_entry["clip_key"]
+
                         success = False
                         final_in = in0
                         final_out = out0
+                        cached_meta = (
+                            self.beat_cache_restore(clip_key, subclip_path) if use_beat_cache else None
+                        )
+                        if cached_meta:
+                            # Unchanged beat → reuse the intermediate (already passed the black-intro gate)
+                            success = True
+                            final_in = float(cached_meta["in_sec"])
+                            final_out = float(cached_meta["out_sec"])
+                            self._beat_cache_stats["hits"] += 1
+                        elif use_beat_cache:
+                            self._beat_cache_stats["misses"] += 1
                         # Try shifts (sec) to escape long black intros
-                        for shift in (0.0, 1.0, 3.0, 7.0, 12.0):
+                        for shift in (() if cached_meta else (0.0, 1.0, 3.0, 7.0, 12.0)):
                             in_try = float(in0) + float(shift)
                             out_try = _clamp_out(in_try, desired_len, media_dur)
                             if (out_try - in_try) < 3.0:
@@ -1639,6 +2423,7 @@ class CompilationBuilder:
                                 subclip_path,
                                 target_fps=target_fps,
                                 resolution=resolution,
+                                effect_variant=effect_variant,
                             )
                             if not ok:
                                 continue
@@ -1647,6 +2432,8 @@ class CompilationBuilder:
                             success = True
                             final_in = in_try
                             final_out = out_try
+                            if use_beat_cache:
+                                self.beat_cache_store(clip_key, subclip_path, final_in, final_out)
                             break
 
                         # Update spec for metadata if succeeded
@@ -1680,12 +2467,25 @@ class CompilationBuilder:
                                 "duration": round(spec["duration"], 3),
                                 "mode": "multi_clip",
                                 "quality_gate": quality_dbg,
+                                "clip_key": clip_key,
+                                "effect_variant": effect_variant,
                             }
                             # C2: Add override info if present
                             if override_info:
                                 subclip_meta["override_info"] = override_info
                             clips_metadata.append(subclip_meta)
                             beat_subclipy.append(subclip_meta)
+
+                            render_plan_entries.append({
+                                "scene_id": scene_id,
+                                "block_id": block_id,
+                                "block_index": beat.get("block_index"),
+                                "subclip_index": sub_idx + 1,
+                                "subclip_file": os.path.basename(subclip_path),
+                                "resolved_in_sec": round(float(spec["in_sec"]), 3),
+                                "resolved_out_sec": round(float(spec["out_sec"]), 3),
+                                **plan_entry,
+                            })
                     
                     if beat_subclipy:
                         # Track last used asset to avoid immediate repetition on next beat
@@ -1728,6 +2528,19 @@ class CompilationBuilder:
                     }
                 )
 
+            # Render plan artifact (per-beat source, in/out, effect, filter) – stable across re-renders
+            render_plan_path = self.write_render_plan(episode_id, target_fps, resolution, render_plan_entries)
+            if render_plan_path:
+                print(f"🗺️  CB: Render plan saved ({len(render_plan_entries)} clips) → {render_plan_path}")
+            if use_beat_cache:
+                self._beat_cache_stats["pruned"] = self.prune_beat_cache(
+                    [e["clip_key"] for e in render_plan_entries]
+                )
+                print(
+                    f"♻️  CB: Beat cache – reused {self._beat_cache_stats['hits']}, "
+                    f"rendered {self._beat_cache_stats['misses']}, pruned {self._beat_cache_stats['pruned']}"
+                )
+
             # Proceed to audio stage below (shared)
 
         if not use_beats:
@@ -1952,6 +2765,8 @@ class CompilationBuilder:
         
         # Najdi MP3 soubory pro voiceover (per-episode: projects/<ep>/voiceover/*.mp3)
         audio_file = None
+        voiceover_duration_sec: Optional[float] = None  # known from VO timeline (skips ffprobe)
+        narration_fingerprint: Optional[str] = None
         episode_dir = os.path.dirname(self.storage_dir)  # projects/ep_xxx/
         import glob
         voiceover_dir = os.path.join(episode_dir, "voiceover")
@@ -1959,7 +2774,20 @@ class CompilationBuilder:
         
         if mp3_files:
             print(f"🎤 CB: Found {len(mp3_files)} MP3 files for voiceover")
-            # Spojit MP3 soubory do jednoho (re-encode to AAC for reliability)
+            # Incremental assembly: per-block PCM cache → only changed blocks are decoded/re-spliced.
+            # (Final AAC encode happens once in the mux step.)
+            try:
+                vo = assemble_voiceover(voiceover_dir, os.path.join(self.storage_dir, "combined_voiceover.wav"))
+                if vo:
+                    audio_file = vo["audio_path"]
+                    voiceover_duration_sec = float(vo.get("total_duration_sec") or 0) or None
+                    narration_fingerprint = _narration_fingerprint(vo)
+                    print(f"✅ CB: Combined audio ready ({vo['mode']}): {audio_file}")
+            except Exception as e:
+                print(f"⚠️  CB: Incremental voiceover assembly failed, falling back to concat: {e}")
+
+        if mp3_files and not audio_file:
+            # Fallback: spojit MP3 soubory do jednoho (re-encode to AAC for reliability)
             combined_audio_path = os.path.join(self.storage_dir, "combined_voiceover.m4a")
             
             try:
@@ -1992,7 +2820,7 @@ class CompilationBuilder:
                     print(f"⚠️  CB: Failed to combine audio: {result.stderr}")
             except Exception as e:
                 print(f"⚠️  CB: Error combining audio: {e}")
-        else:
+        elif not mp3_files:
             print(f"⚠️  CB: No MP3 files found in {voiceover_dir} - will create minimal silent video (NO ERROR)")
             audio_file = None
 
@@ -2045,218 +2873,9 @@ class CompilationBuilder:
         if coverage_percent >= MIN_COVERAGE_PERCENT:
             print(f"✅ CB: Visual coverage validation passed ({coverage_percent:.1f}% >= {MIN_COVERAGE_PERCENT}%)")
 
-        # Background music (priority: selected_global_music > per-episode > auto-select global)
-        # Voiceover is reference (0 dB). Background music gain is configurable via script_state.json.
-        # Load default from global preferences (persists across sessions)
-        music_gain_db = -18.0  # fallback if settings_store unavailable
-        try:
-            from settings_store import SettingsStore
-            settings_store = SettingsStore(
-                base_dir=os.path.dirname(os.path.dirname(self.storage_dir)),  # podcasts/
-                backend_dir=os.path.join(os.path.dirname(os.path.dirname(self.storage_dir)), "backend")
-            )
-            music_gain_db = settings_store.get_music_bg_gain_db()
-            print(f"🎵 CB: Loaded default music gain from global preferences: {music_gain_db} dB")
-        except Exception as e:
-            print(f"⚠️  CB: Could not load global music gain preference, using fallback: {e}")
-        
-        music_report = {"enabled": False, "selected_track": None}
-        try:
-            from global_music_store import load_global_music_manifest, get_music_file_path, select_music_auto
-            
-            episode_dir = os.path.dirname(self.storage_dir)  # projects/ep_xxx/
-            
-            # 1) Check if user selected global music via script_state
-            selected_global = None
-            state_path = os.path.join(episode_dir, "script_state.json")
-            if os.path.exists(state_path):
-                try:
-                    with open(state_path, "r", encoding="utf-8") as f:
-                        state = json.load(f)
-                        selected_global = state.get("selected_global_music")
-                        # Optional: background music gain (in dB). Typical safe range: -40..-6
-                        raw_gain = state.get("music_bg_gain_db")
-                        if raw_gain is not None:
-                            try:
-                                g = float(raw_gain)
-                                # Clamp to avoid extreme values; UI typically limits further.
-                                g = max(-60.0, min(0.0, g))
-                                music_gain_db = g
-                                # Save to global preferences for future projects
-                                try:
-                                    settings_store.set_music_bg_gain_db(g)
-                                    print(f"🎵 CB: Saved music gain {g} dB to global preferences")
-                                except Exception as save_err:
-                                    print(f"⚠️  CB: Could not save gain to global prefs: {save_err}")
-                            except Exception:
-                                pass
-                except Exception:
-                    pass
-            
-            chosen = None
-            music_path = None
-            
-            # Priority 1: User-selected global music
-            if selected_global and isinstance(selected_global, dict):
-                chosen = selected_global
-                music_path = get_music_file_path(secure_filename(chosen.get("filename")))
-                if music_path and os.path.exists(music_path):
-                    print(f"🎵 CB: Using user-selected global music: {chosen.get('filename')}")
-                else:
-                    chosen = None
-                    music_path = None
-            
-            # Priority 2: Per-episode music (legacy)
-            if not chosen:
-                music_manifest_path = os.path.join(episode_dir, "assets", "music", "music_manifest.json")
-                if os.path.exists(music_manifest_path):
-                    with open(music_manifest_path, "r", encoding="utf-8") as f:
-                        mm = json.load(f)
-                    tracks = mm.get("tracks") if isinstance(mm, dict) else None
-                    tracks = tracks if isinstance(tracks, list) else []
-                    active_tracks = [t for t in tracks if isinstance(t, dict) and t.get("active") is True and t.get("filename")]
-
-                    if active_tracks:
-                        # Choose by predominant emotion if possible (MVP heuristic)
-                        emotion_counts = {}
-                        for sc in scenes:
-                            emo = sc.get("emotion")
-                            if isinstance(emo, str) and emo.strip():
-                                emotion_counts[emo.strip().lower()] = emotion_counts.get(emo.strip().lower(), 0) + 1
-                        predominant = None
-                        if emotion_counts:
-                            predominant = sorted(emotion_counts.items(), key=lambda x: x[1], reverse=True)[0][0]
-                        tag_pref = "neutral"
-                        if predominant in ("tension", "tragedy", "mystery"):
-                            tag_pref = "dark"
-                        elif predominant in ("hope", "victory"):
-                            tag_pref = "hopeful"
-
-                        tagged = [t for t in active_tracks if str(t.get("tag") or "").strip().lower() == tag_pref]
-                        pool = tagged if tagged else active_tracks
-                        chosen = random.choice(pool)
-
-                        music_path = os.path.join(episode_dir, "assets", "music", secure_filename(chosen.get("filename")))
-                        if os.path.exists(music_path):
-                            print(f"🎵 CB: Using per-episode music: {chosen.get('filename')}")
-                        else:
-                            chosen = None
-                            music_path = None
-            
-            # Priority 3: Auto-select from global library
-            if not chosen:
-                print(f"🎵 CB: No per-episode music found, trying auto-select from global library")
-                # Determine mood from scenes
-                emotion_counts = {}
-                for sc in scenes:
-                    emo = sc.get("emotion")
-                    if isinstance(emo, str) and emo.strip():
-                        emotion_counts[emo.strip().lower()] = emotion_counts.get(emo.strip().lower(), 0) + 1
-                
-                preferred_mood = "neutral"
-                preferred_tags = []
-                
-                if emotion_counts:
-                    predominant = sorted(emotion_counts.items(), key=lambda x: x[1], reverse=True)[0][0]
-                    if predominant in ("tension", "tragedy", "mystery"):
-                        preferred_mood = "dark"
-                        preferred_tags = ["cinematic", "dramatic"]
-                    elif predominant in ("hope", "victory"):
-                        preferred_mood = "uplifting"
-                        preferred_tags = ["ambient", "electronic"]
-                    else:
-                        preferred_mood = "peaceful"
-                        preferred_tags = ["ambient", "minimal"]
-                
-                print(f"   Preferred mood: {preferred_mood}, tags: {preferred_tags}")
-                chosen = select_music_auto(
-                    preferred_mood=preferred_mood,
-                    preferred_tags=preferred_tags,
-                    # IMPORTANT: do NOT filter by duration.
-                    # We loop background music with FFmpeg (-stream_loop -1), so even short tracks work.
-                    min_duration_sec=None
-                )
-                
-                if chosen:
-                    music_path = get_music_file_path(secure_filename(chosen.get("filename")))
-                    if music_path and os.path.exists(music_path):
-                        print(f"🎵 CB: Auto-selected global music: {chosen.get('filename')} (mood={preferred_mood})")
-                    else:
-                        chosen = None
-                        music_path = None
-                        print(f"⚠️  CB: Auto-selected music file not found: {chosen.get('filename') if chosen else 'N/A'}")
-                else:
-                    print(f"⚠️  CB: No global music found for mood={preferred_mood}")
-            
-            if not chosen:
-                print(f"⚠️  CB: No background music available - video will have voiceover only")
-            
-            # Mix music if chosen
-            if chosen and music_path and os.path.exists(music_path):
-                print(f"🎵 CB: Attempting to mix background music...")
-                print(f"   Music file: {music_path}")
-                print(f"   Audio file (voiceover): {audio_file}")
-                
-                # Compute voiceover duration
-                vo_dur = None
-                try:
-                    r = subprocess.run(
-                        ["ffprobe", "-v", "error", "-show_entries", "format=duration",
-                         "-of", "default=noprint_wrappers=1:nokey=1", audio_file],
-                        capture_output=True, text=True, timeout=10
-                    )
-                    if r.returncode == 0 and (r.stdout or "").strip():
-                        vo_dur = float((r.stdout or "").strip())
-                        print(f"   Voiceover duration: {vo_dur:.2f}s")
-                except Exception as e:
-                    print(f"   ⚠️  Failed to probe voiceover duration: {e}")
-                    vo_dur = None
-
-                if vo_dur and vo_dur > 0:
-                    fade = 1.5
-                    if vo_dur < 6:
-                        fade = 1.0
-                    fade = max(1.0, min(2.0, fade))
-                    fade_out_start = max(0.0, vo_dur - fade)
-                    mixed_audio_path = os.path.join(self.storage_dir, "combined_voiceover_with_music.m4a")
-
-                    # Voiceover is reference (0 dB). Music at configurable dB, with fade-in/out.
-                    cmd = [
-                        "ffmpeg", "-y", "-i", audio_file,
-                        "-stream_loop", "-1", "-i", music_path,
-                        "-filter_complex",
-                        (f"[1:a]volume={music_gain_db}dB,"
-                         f"afade=t=in:st=0:d={fade},"
-                         f"afade=t=out:st={fade_out_start}:d={fade}[bg];"
-                         f"[0:a][bg]amix=inputs=2:duration=first:dropout_transition=0[a]"),
-                        "-map", "[a]", "-vn", "-c:a", "aac", "-b:a", "192k",
-                        "-t", str(vo_dur), mixed_audio_path
-                    ]
-                    print(f"   Running FFmpeg command: {' '.join(cmd[:5])}...")
-                    result = subprocess.run(cmd, capture_output=True, text=True, timeout=120)
-                    if result.returncode == 0 and os.path.exists(mixed_audio_path) and os.path.getsize(mixed_audio_path) > 0:
-                        audio_file = mixed_audio_path
-                        music_report = {
-                            "enabled": True,
-                            "selected_track": {
-                                "filename": chosen.get("filename"),
-                                "mood": chosen.get("mood", chosen.get("tag")),  # Fallback to tag for legacy
-                                "tags": chosen.get("tags", []),
-                                "gain_db": music_gain_db,
-                                "fade_in_sec": fade,
-                                "fade_out_sec": fade,
-                            },
-                        }
-                        print(f"🎵 CB: Background music mixed in: {chosen.get('filename')}")
-                    else:
-                        # FFmpeg mixing failed
-                        print(f"❌ CB: FFmpeg music mixing failed (return code: {result.returncode})")
-                        print(f"   stderr: {result.stderr[:500]}")
-                        print(f"   Audio file will NOT have background music")
-        except Exception as e:
-            print(f"⚠️  CB: Background music mix skipped: {e}")
-            import traceback
-            traceback.print_exc()
+        # Narration stem (before music) – reused by music-only remixes together with the video master
+        narration_audio_file = audio_file
+        audio_file, music_report = self.mix_background_music(audio_file, scenes, voiceover_duration_sec)
         
         # ========================================================================
         # FINAL GUARD: Verify all clips have valid video streams before concat
@@ -2294,8 +2913,46 @@ class CompilationBuilder:
             has_audio=bool(audio_file),
         )
         
-        # Concatenate všechny klipy s audio
-        success = self.concatenate_clips(all_clips, output_path, target_fps, resolution, audio_file)
+        # Video master (silent, narration length) + audio mux with -c:v copy.
+        # Music-only remixes (remix_music) then re-mux audio without touching the video.
+        master_sidecar = None
+        if (
+            video_master_enabled()
+            and self._render_plan_digest
+            and narration_fingerprint
+            and voiceover_duration_sec
+            and narration_audio_file
+        ):
+            master_path, _ = self._video_master_paths()
+            master_key = hashlib.sha1(
+                f"{self._render_plan_digest}|{narration_fingerprint}|{target_fps}|{resolution}|"
+                f"{voiceover_duration_sec:.3f}|{json.dumps(encoder_report['assembly'], sort_keys=True)}".encode("utf-8")
+            ).hexdigest()
+            prev_master = self.read_video_master()
+            if prev_master and prev_master.get("master_key") == master_key:
+                print("♻️  CB: Render plan + narration unchanged → reusing video master (no video encode)")
+                success = True
+            else:
+                success = self.concatenate_clips(
+                    all_clips, master_path, target_fps, resolution, None, max_duration_sec=voiceover_duration_sec
+                )
+            if success:
+                success = self.mux_audio_onto_master(master_path, audio_file, output_path)
+            if success:
+                master_sidecar = {
+                    "master_key": master_key,
+                    "render_plan_digest": self._render_plan_digest,
+                    "narration_fingerprint": narration_fingerprint,
+                    "narration_audio": narration_audio_file,
+                    "manifest_sha1": _file_sha1(manifest_path),
+                    "duration_sec": voiceover_duration_sec,
+                    "target_fps": target_fps,
+                    "resolution": resolution,
+                    "scene_emotions": [sc.get("emotion") for sc in scenes if isinstance(sc, dict) and sc.get("emotion")],
+                }
+        else:
+            # Concatenate všechny klipy s audio
+            success = self.concatenate_clips(all_clips, output_path, target_fps, resolution, audio_file)
         
         if not success:
             return None, {
@@ -2331,6 +2988,8 @@ class CompilationBuilder:
             "clips_used": len(all_clips),
             "compile_plan": compile_plan,
             "output_size_bytes": os.path.getsize(output_path) if os.path.exists(output_path) else 0,
+            "render_plan_path": render_plan_path,
+            "encoder_profile": encoder_report,
             "compilation_report": {
                 "scenes": scenes_metadata,
                 "total_target_duration_sec": sum((s.get("scene_target_duration_sec") or 0) for s in scenes_metadata),
@@ -2346,9 +3005,15 @@ class CompilationBuilder:
                 "reuse_ratio": round(reuse_ratio, 2),
                 "avg_subclips_per_beat": round(avg_subclips_per_beat, 2),
                 "subclips_per_beat_distribution": subclips_per_beat_list,
+                "render_plan_digest": self._render_plan_digest,
+                "beat_cache": dict(self._beat_cache_stats),
+                "encoder_profile": encoder_report,
             }
         }
         
+        if master_sidecar:
+            self.write_video_master_sidecar({**master_sidecar, "metadata": metadata})
+        
         # Save compilation_report.json
         report_path = os.path.join(os.path.dirname(output_path), f"compilation_report_{episode_id}_{timestamp}.json")
         try:
@@ -2378,13 +3043,100 @@ class CompilationBuilder:
         return output_path, metadata
 
 
+class AssetPrefetcher:
+    """
+    Background download + technical gate for manifest assets (AAR → CB hand-off).
+
+    AAR submits each scene's beat candidates as soon as the scene is distributed;
+    CB later calls result() for the same asset and either gets the finished
+    (path, technical_ok) tuple or blocks on the in-flight download instead of
+    starting a second one. Downloads land in the regular CB storage cache, so a
+    prefetcher that is never consulted still leaves useful cache hits behind.
+    """
+
+    def __init__(self, storage_dir: str, max_workers: Optional[int] = None):
+        from concurrent.futures import ThreadPoolExecutor
+        import threading
+
+        if max_workers is None:
+            try:
+                max_workers = int(os.getenv("CB_PREFETCH_WORKERS", "3"))
+            except Exception:
+                max_workers = 3
+        # Separate builder instance: prefetch downloads must not touch CB's progress state.
+        self._builder = CompilationBuilder(storage_dir, storage_dir)
+        self._executor = ThreadPoolExecutor(max_workers=max(1, int(max_workers)), thread_name_prefix="cb_prefetch")
+        self._futures: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._closed = False
+
+    @staticmethod
+    def _key(asset: Dict[str, Any]) -> str:
+        # Mirrors download_asset() cache identity (asset_url, else archive_item_id).
+        return str(asset.get("asset_url") or asset.get("archive_item_id") or "").strip()
+
+    def _fetch(self, asset: Dict[str, Any]) -> Tuple[Optional[str], bool]:
+        path = self._builder.download_asset(asset)
+        if not path:
+            return None, False
+        is_image = path.lower().endswith((".jpg", ".jpeg", ".png", ".webp", ".gif"))
+        return path, bool(is_image or has_video_stream(path))
+
+    def submit(self, asset: Dict[str, Any]) -> None:
+        """Queue one asset (idempotent per cache key)."""
+        if not isinstance(asset, dict):
+            return
+        key = self._key(asset)
+        if not key or key.startswith("fallback_"):
+            return
+        with self._lock:
+            if self._closed or key in self._futures:
+                return
+            self._futures[key] = self._executor.submit(self._fetch, dict(asset))
+
+    def submit_scene(self, scene: Dict[str, Any], per_beat: int = 2) -> None:
+        """Queue the leading candidates of every beat in a manifest scene (AAR scene_callback)."""
+        if not isinstance(scene, dict):
+            return
+        for beat in scene.get("visual_beats") or []:
+            if not isinstance(beat, dict):
+                continue
+            for cand in (beat.get("asset_candidates") or [])[:per_beat]:
+                self.submit(cand)
+
+    def result(self, asset: Dict[str, Any], timeout: Optional[float] = None) -> Optional[Tuple[Optional[str], bool]]:
+        """
+        Returns (path, technical_ok) for a submitted asset, waiting for it if still in flight.
+        Returns None when the asset was never submitted (caller downloads it itself).
+        """
+        key = self._key(asset) if isinstance(asset, dict) else ""
+        with self._lock:
+            fut = self._futures.get(key)
+        if fut is None:
+            return None
+        try:
+            return fut.result(timeout=timeout)
+        except Exception as e:
+            print(f"⚠️  CB prefetch: {key[:60]} failed: {e}")
+            return None
+
+    def shutdown(self, wait: bool = False) -> None:
+        with self._lock:
+            self._closed = True
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
+
+
 def build_episode_compilation(
     manifest_path: str,
     episode_id: str,
     storage_dir: str,
     output_dir: str,
     target_duration_sec: Optional[float] = None,
-    progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None
+    progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+    prefetcher: Optional[AssetPrefetcher] = None,
+    motion_cache: Optional[MotionClipCache] = None,
+    music_only: bool = False,
+    encoder_profile: Optional[str] = None,
 ) -> Tuple[Optional[str], Dict[str, Any]]:
     """
     Entry point pro CB krok v pipeline.
@@ -2396,10 +3148,23 @@ def build_episode_compilation(
         output_dir: Output složka pro finální video
         target_duration_sec: Target délka (optional)
         progress_callback: Optional callback for real-time progress updates
+        prefetcher: Optional AssetPrefetcher shared with AAR (pipelined downloads)
+        motion_cache: Optional MotionClipCache (Ken Burns clips of stills reused across beats/episodes)
+        music_only: Try the audio-only remix onto the existing video master first
+                    (falls back to the full build when the master is missing or stale)
+        encoder_profile: "draft" | "preview" | "final" (None = CB_ENCODER_PROFILE / "final")
     
     Returns:
         (output_video_path, metadata)
     """
-    builder = CompilationBuilder(storage_dir, output_dir, progress_callback=progress_callback)
+    builder = CompilationBuilder(
+        storage_dir, output_dir, progress_callback=progress_callback, prefetcher=prefetcher,
+        motion_cache=motion_cache, encoder_profile=encoder_profile,
+    )
+    if music_only:
+        output_video, metadata = builder.remix_music(manifest_path, episode_id)
+        if output_video:
+            return output_video, metadata
+        print(f"ℹ️  CB: Music-only remix not possible ({metadata.get('error')}) → full build")
     return builder.build_compilation(manifest_path, episode_id, target_duration_sec)
 
@@ -0,0 +1,88 @@
+"""
+Named libx264 encoder profiles for CB (draft / preview / final).
+
+- "subclip" phase = per-beat cuts + Ken Burns renders (create_subclip)
+- "assembly" phase = final concat / video master (concatenate_clips)
+- draft/preview also cap resolution + fps (fewer pixels = most of the speed-up)
+
+Software x264 only (same output on every machine; no GPU encoder dependency).
+"""
+
+import copy
+import os
+from typing import Any, Dict, Optional
+
+ENCODER_PROFILES: Dict[str, Dict[str, Any]] = {
+    "draft": {
+        "subclip": {"preset": "ultrafast", "crf": 32},
+        "assembly": {"preset": "ultrafast", "crf": 32},
+        "max_height": 480,
+        "max_fps": 24,
+    },
+    "preview": {
+        "subclip": {"preset": "veryfast", "crf": 27},
+        "assembly": {"preset": "veryfast", "crf": 26},
+        "max_height": 720,
+        "max_fps": 30,
+    },
+    "final": {
+        "subclip": {"preset": "fast", "crf": 23},
+        "assembly": {"preset": "medium", "crf": 23},
+        "max_height": None,
+        "max_fps": None,
+    },
+}
+
+DEFAULT_ENCODER_PROFILE = "final"
+
+
+def resolve_encoder_profile(name: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Returns a copy of the named profile with "name" set.
+    None → CB_ENCODER_PROFILE env (default "final"); unknown names fall back to "final".
+    """
+    key = str(name or os.getenv("CB_ENCODER_PROFILE", DEFAULT_ENCODER_PROFILE) or "").strip().lower()
+    if key not in ENCODER_PROFILES:
+        if key:
+            print(f"⚠️  CB: Unknown encoder profile '{key}', using '{DEFAULT_ENCODER_PROFILE}'")
+        key = DEFAULT_ENCODER_PROFILE
+    profile = copy.deepcopy(ENCODER_PROFILES[key])
+    profile["name"] = key
+    return profile
+
+
+def profile_resolution(profile: Dict[str, Any], resolution: str) -> str:
+    """Caps "WxH" to the profile's max_height (aspect kept, even dimensions for yuv420p)."""
+    try:
+        w_s, h_s = str(resolution).lower().split("x", 1)
+        w, h = int(w_s), int(h_s)
+    except Exception:
+        return resolution
+    max_h = profile.get("max_height")
+    if not max_h or h <= int(max_h):
+        return f"{w}x{h}"
+    new_h = int(max_h)
+    new_w = int(round(w * new_h / float(h)))
+    new_w -= new_w % 2
+    new_h -= new_h % 2
+    return f"{new_w}x{new_h}"
+
+
+def profile_fps(profile: Dict[str, Any], fps: int) -> int:
+    max_fps = profile.get("max_fps")
+    try:
+        fps = int(fps)
+    except Exception:
+        fps = 30
+    return min(fps, int(max_fps)) if max_fps else fps
+
+
+def profile_summary(profile: Dict[str, Any], resolution: str, fps: int) -> Dict[str, Any]:
+    """Compact record of the profile for output metadata / compilation_report."""
+    return {
+        "name": profile.get("name"),
+        "subclip": dict(profile.get("subclip") or {}),
+        "assembly": dict(profile.get("assembly") or {}),
+        "resolution": resolution,
+        "target_fps": int(fps),
+    }
@@ -0,0 +1,22 @@
+"""
+Sdílené čtení číselných env proměnných (worker counts, cache limity, batch size).
+"""
+
+import os
+from typing import Optional
+
+
+def env_int(name: str, default: int, minimum: Optional[int] = None) -> int:
+    """
+    Integer z env proměnné ("16" i "16.0"); chybějící/nevalidní hodnota → default.
+
+    Args:
+        name: název env proměnné
+        default: hodnota při chybějící/nevalidní proměnné (neclampuje se)
+        minimum: volitelná spodní mez pro hodnotu z env
+    """
+    try:
+        value = int(float(os.getenv(name, str(default))))
+    except Exception:
+        return default
+    return value if minimum is None else max(minimum, value)
@@ -11,10 +11,15 @@ POUZE JSON plánování
 """
 
 import json
+import os
 import re
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime, timezone
 
+from env_utils import env_int
+from llm_usage_ledger import LLMBudgetExceeded, bind_scope
+
 # Pre-FDA Sanitizer (deterministická jazyková disciplína)
 try:
     from pre_fda_sanitizer import sanitize_and_log
@@ -1860,6 +1865,52 @@ def _build_narration_summary(narration_blocks: List[Dict[str, Any]], words_per_m
     return "\n".join(summary_lines)
 
 
+def fda_prompt_compaction_enabled() -> bool:
+    """FDA/sceneplan prompt compaction (env FDA_PROMPT_COMPACT, default on)."""
+    return (os.getenv("FDA_PROMPT_COMPACT", "1") or "").strip().lower() in ("1", "true", "yes")
+
+
+def _compact_block_summary(text: str, max_chars: int = 90) -> str:
+    """První věta bloku, zkrácená na hranici slova (verbatim slovník nesou ANCHOR_TERMS)."""
+    t = re.sub(r"\s+", " ", str(text or "")).strip()
+    m = re.match(r"(.+?[.!?])(\s|$)", t)
+    if m:
+        t = m.group(1)
+    if len(t) > max_chars:
+        t = t[:max_chars].rsplit(" ", 1)[0].rstrip(",;:") + "…"
+    return t
+
+
+def _compact_narration_index(narration_blocks: List[Dict[str, Any]], words_per_minute: int = 150) -> str:
+    """Všechny bloky jako 'b_0001 ~12s: první věta…' (místo plného textu / prvních 10 bloků)."""
+    lines = []
+    total = 0
+    for b in narration_blocks:
+        if not isinstance(b, dict):
+            continue
+        txt = str(b.get("text_tts") or "")
+        duration = estimate_speech_duration_seconds(txt, words_per_minute)
+        total += duration
+        lines.append(f"{b.get('block_id')} ~{duration}s: {_compact_block_summary(txt)}")
+    return f"NARRATION_INDEX ({len(lines)} blocks, ~{int(total)}s; block_id ~duration: opening sentence):\n" + "\n".join(lines)
+
+
+def _estimate_prompt_tokens(chars: int) -> int:
+    """Hrubý odhad tokenů (~4 znaky/token) pro měření compaction; skutečné tokeny jsou v llm_usage ledgeru."""
+    return (max(0, int(chars)) + 3) // 4
+
+
+def _prompt_compaction_stats(chars_before: int, chars_after: int, prompts: int = 1) -> Dict[str, Any]:
+    return {
+        "prompts": prompts,
+        "chars_before": chars_before,
+        "chars_after": chars_after,
+        "est_tokens_before": _estimate_prompt_tokens(chars_before),
+        "est_tokens_after": _estimate_prompt_tokens(chars_after),
+        "reduction_pct": round(100.0 * (chars_before - chars_after) / chars_before, 1) if chars_before else 0.0,
+    }
+
+
 # ============================================================================
 # TEXT_TTS-FIRST EXTRACTION (HOTFIX: beat-lock podle narration)
 # ============================================================================
@@ -2229,9 +2280,80 @@ def _fix_unanchored_queries(
 # LLM PROMPT
 # ============================================================================
 
-def _prompt_footage_director(narration_blocks: List[Dict[str, Any]], words_per_minute: int = 150, episode_id: Optional[str] = None) -> str:
+# Legacy query-writing guidance (non-compact FDA prompt only). keywords/search_queries/narration_summary
+# are regenerated by apply_deterministic_generators_v27, so the compact prompt drops this section.
+_FDA_LEGACY_QUERY_GUIDANCE = """QUERY GENERATOR (TEMPORAL ANCHOR MANDATORY):
+**CRITICAL: Every search_query MUST contain a TEMPORAL ANCHOR (date/century/era/person name)**
+**EVERY QUERY MISSING AN ANCHOR WILL BE AUTOMATICALLY REJECTED - NO FALLBACKS**
+
+TEMPORAL ANCHOR TYPES (use at least ONE per query):
+1. Explicit date/year (e.g., "1812", "1940s", "1917")
+2. Era/period (e.g., "Napoleonic", "Victorian", "WWII", "Cold War")
+3. Proper noun - person (e.g., "Napoleon", "Churchill", "Stalin")
+4. Proper noun - specific event (e.g., "D-Day", "Pearl Harbor")
+
+MANDATORY QUERY FORMAT:
+**<ANCHOR> + <TERM>** (e.g., "Napoleon Moscow", "1812 fires", "Grande Armée looting")
+**KEEP QUERIES SHORT: 2-4 words maximum!** (Archive.org favors broad queries)
+NEVER write generic terms alone (e.g., "looting", "supplies", "occupation")
+
+QUERY STRUCTURE (2-tier mix):
+- Generate 1-2 BROAD queries: <ANCHOR> + place (e.g., "Napoleon Moscow", "1812 Russia")
+  * 2-3 words ONLY
+  * Simple and direct
+- Generate 2-4 SPECIFIC queries: <ANCHOR> + object/action (e.g., "Napoleon retreat", "Moscow fires 1812")
+  * 2-4 words ONLY
+  * One key concept per query
+- Deduplicate case-insensitively
+- NEVER generate queries without temporal anchors (prevents matching modern conflicts)
+- **CRITICAL: Archive.org finds MORE results with SHORTER queries!**
+
+EXAMPLES (anchored to narration "Napoleon's main strategic goal in 1812..."):
+  ✅ EXCELLENT (short & broad): 
+    - "Napoleon Moscow" (2 words)
+    - "1812 Russia" (2 words)
+    - "Napoleonic Wars" (2 words)
+    - "Moscow 1812" (2 words)
+  ✅ GOOD (specific but short):
+    - "Napoleon retreat 1812" (3 words)
+    - "Moscow fires 1812" (3 words)
+    - "Grande Armée 1812" (3 words)
+  ❌ FORBIDDEN (too long/specific):
+    - "archival photograph abandoned Moscow street" (5 words → too specific!)
+    - "Napoleon nineteenth century Russian government building" (6 words → too long!)
+    - "looting contributing to fire spread" (NO anchor → REJECTED)
+  ❌ FORBIDDEN: "Russian army withdrawal Moscow" (NO temporal anchor → can match 2022 Ukraine!)
+  ❌ FORBIDDEN: "civilian population fleeing" (NO temporal anchor → can match Syria 2017!)
+  ❌ FORBIDDEN: "military strategies" (generic, no anchor)
+
+QUALITY RULES (IMPORTANT):
+- Prefer archival footage/photographs without large on-screen text.
+- Avoid screen recordings, platform UI overlays (e.g., YouTube player), and footage with burned-in subtitles/captions.
+- Avoid "trailer"/"promo" style queries; prefer descriptive archival terms (places, people, events, documents, maps).
+- **MANDATORY: EVERY query must have temporal context (date/era/person) to prevent modern conflict matching**
+- NEVER repeat the same query twice (no duplicates, case-insensitive dedup)
+- Each query must be UNIQUE and SPECIFIC to what is ACTUALLY mentioned in narration text_tts
+
+"""
+
+_FDA_COMPACT_QUERY_NOTE = (
+    "KEYWORDS / SEARCH_QUERIES / NARRATION_SUMMARY:\n"
+    "- Satisfy the HARD FORMAT GUARD counts; these fields are re-derived deterministically from narration text_tts\n"
+    "  after your output, so focus on scene grouping, emotion, shot_types and cut_rhythm.\n\n"
+)
+
+
+def _prompt_footage_director(
+    narration_blocks: List[Dict[str, Any]],
+    words_per_minute: int = 150,
+    episode_id: Optional[str] = None,
+    compact: bool = False,
+) -> str:
     """
     Vytvoří prompt pro LLM Footage Director Assistant.
+
+    compact=True: prompt neobsahuje narraci (je v NARRATION_INDEX na konci, viz _build_fda_prompt),
+    takže je stejný pro všechny chunky i repair pokusy (provider prefix cache).
     
     Raises:
         RuntimeError: s prefixem FDA_TEXT_TTS_MISSING pokud text_tts chybí
@@ -2254,8 +2376,19 @@ def _prompt_footage_director(narration_blocks: List[Dict[str, Any]], words_per_m
             )
         total_duration += estimate_speech_duration_seconds(text_tts, words_per_minute)
     
+    if compact:
+        query_guidance = _FDA_COMPACT_QUERY_NOTE
+        generic_filler_rule = "- NEVER use generic fillers (see BANNED_TERMS)"
+    else:
+        query_guidance = _FDA_LEGACY_QUERY_GUIDANCE
+        generic_filler_rule = '- NEVER use generic fillers: "history", "events", "situation", "conflict", "things", "background", "context", "footage", "montage", "strategic importance", "impact", "support"'
+
     # Vytvoř přehled bloků
-    narration_summary = _build_narration_summary(narration_blocks, words_per_minute, episode_id)
+    if compact:
+        narration_section = "NARRATION BLOCKS: listed in NARRATION_INDEX at the end of this prompt."
+    else:
+        narration_summary = _build_narration_summary(narration_blocks, words_per_minute, episode_id)
+        narration_section = f"NARRATION BLOCKS ({len(narration_blocks)} total, ~{int(total_duration)}s):\n{narration_summary}"
     
     return f"""
 You are a Footage Director Assistant (FDA).
@@ -2346,7 +2479,7 @@ TEXT_TTS-FIRST EXTRACTION (MANDATORY - HOTFIX):
 - keywords MUST contain at least 2 terms that appear in the narration text (case-insensitive)
 - keywords MUST contain at least 1 concrete visual noun (documents, buildings, streets, ruins, etc.)
 - search_queries MUST contain at least 1 query anchored to narration text
-- NEVER use generic fillers: "history", "events", "situation", "conflict", "things", "background", "context", "footage", "montage", "strategic importance", "impact", "support"
+{generic_filler_rule}
 - **CRITICAL: NEVER include shot type names in keywords/search_queries (e.g., "troop movement", "battle footage", "archival documents")**
 - **Keywords are OBJECTS ONLY: map, letter, manuscript, palace, city street, engraving, soldiers, wagons, roads**
 - If narration mentions "Napoleon", "Moscow", "surrender", "fires" → use these exact terms
@@ -2362,59 +2495,7 @@ SHOT TYPES MAPPING (content-based - MUST match narration):
 - "retreat", "winter approaching", "supplies running low" → troop_movement + maps_context
 - industry_war_effort ONLY if narration explicitly mentions factories/production/industry (NOT inferred)
 
-QUERY GENERATOR (TEMPORAL ANCHOR MANDATORY):
-**CRITICAL: Every search_query MUST contain a TEMPORAL ANCHOR (date/century/era/person name)**
-**EVERY QUERY MISSING AN ANCHOR WILL BE AUTOMATICALLY REJECTED - NO FALLBACKS**
-
-TEMPORAL ANCHOR TYPES (use at least ONE per query):
-1. Explicit date/year (e.g., "1812", "1940s", "1917")
-2. Era/period (e.g., "Napoleonic", "Victorian", "WWII", "Cold War")
-3. Proper noun - person (e.g., "Napoleon", "Churchill", "Stalin")
-4. Proper noun - specific event (e.g., "D-Day", "Pearl Harbor")
-
-MANDATORY QUERY FORMAT:
-**<ANCHOR> + <TERM>** (e.g., "Napoleon Moscow", "1812 fires", "Grande Armée looting")
-**KEEP QUERIES SHORT: 2-4 words maximum!** (Archive.org favors broad queries)
-NEVER write generic terms alone (e.g., "looting", "supplies", "occupation")
-
-QUERY STRUCTURE (2-tier mix):
-- Generate 1-2 BROAD queries: <ANCHOR> + place (e.g., "Napoleon Moscow", "1812 Russia")
-  * 2-3 words ONLY
-  * Simple and direct
-- Generate 2-4 SPECIFIC queries: <ANCHOR> + object/action (e.g., "Napoleon retreat", "Moscow fires 1812")
-  * 2-4 words ONLY
-  * One key concept per query
-- Deduplicate case-insensitively
-- NEVER generate queries without temporal anchors (prevents matching modern conflicts)
-- **CRITICAL: Archive.org finds MORE results with SHORTER queries!**
-
-EXAMPLES (anchored to narration "Napoleon's main strategic goal in 1812..."):
-  ✅ EXCELLENT (short & broad): 
-    - "Napoleon Moscow" (2 words)
-    - "1812 Russia" (2 words)
-    - "Napoleonic Wars" (2 words)
-    - "Moscow 1812" (2 words)
-  ✅ GOOD (specific but short):
-    - "Napoleon retreat 1812" (3 words)
-    - "Moscow fires 1812" (3 words)
-    - "Grande Armée 1812" (3 words)
-  ❌ FORBIDDEN (too long/specific):
-    - "archival photograph abandoned Moscow street" (5 words → too specific!)
-    - "Napoleon nineteenth century Russian government building" (6 words → too long!)
-    - "looting contributing to fire spread" (NO anchor → REJECTED)
-  ❌ FORBIDDEN: "Russian army withdrawal Moscow" (NO temporal anchor → can match 2022 Ukraine!)
-  ❌ FORBIDDEN: "civilian population fleeing" (NO temporal anchor → can match Syria 2017!)
-  ❌ FORBIDDEN: "military strategies" (generic, no anchor)
-
-QUALITY RULES (IMPORTANT):
-- Prefer archival footage/photographs without large on-screen text.
-- Avoid screen recordings, platform UI overlays (e.g., YouTube player), and footage with burned-in subtitles/captions.
-- Avoid "trailer"/"promo" style queries; prefer descriptive archival terms (places, people, events, documents, maps).
-- **MANDATORY: EVERY query must have temporal context (date/era/person) to prevent modern conflict matching**
-- NEVER repeat the same query twice (no duplicates, case-insensitive dedup)
-- Each query must be UNIQUE and SPECIFIC to what is ACTUALLY mentioned in narration text_tts
-
-SCENE GROUPING RULES:
+{query_guidance}SCENE GROUPING RULES:
 - One scene = 20-35 seconds OR 3-8 blocks (whichever comes first)
 - Group blocks by thematic continuity
 - Balance between too short (jarring) and too long (boring)
@@ -2424,8 +2505,7 @@ TIMING CALCULATION:
 - Use narration text length to estimate duration
 - start_sec of scene N+1 MUST equal end_sec of scene N
 
-NARRATION BLOCKS ({len(narration_blocks)} total, ~{int(total_duration)}s):
-{narration_summary}
+{narration_section}
 
 IMPORTANT:
 - Return ONLY valid JSON matching the schema above
@@ -4267,87 +4347,26 @@ def validate_fda_hard_v27(
 # PUBLIC API (pro integration do pipeline)
 # ============================================================================
 
-def run_fda_llm(
-    script_state: Dict[str, Any],
-    provider_api_keys: Dict[str, str],
-    config: Optional[Dict[str, Any]] = None,
+def _build_fda_prompt(
+    narration_blocks: List[Dict[str, Any]],
+    episode_id: Optional[str] = None,
+    prompt_template: Optional[str] = None,
     repair_hint: Optional[str] = None,
-    attempt: int = 1,
-) -> Tuple[Dict[str, Any], str, Dict[str, Any]]:
+    compact: Optional[bool] = None,
+) -> str:
     """
-    Hlavní entry point pro LLM-assisted FDA.
-    
-    Args:
-        script_state: script_state obsahující tts_ready_package
-        provider_api_keys: dict s API klíči (openai, openrouter)
-        config: optional config (provider, model, temperature, prompt_template)
-    
-    Returns:
-        (raw_llm_json, raw_llm_output_text, metadata)
-    
-    Raises:
-        ValueError: pokud chybí požadovaná data
-        RuntimeError: pokud LLM call selže
+    FDA prompt = hard guards (coverage, anchors, keyword pool, generic ban, repair) + base prompt.
+    Guards are derived only from the given narration_blocks (whole episode or one chunk).
+
+    compact (default: FDA_PROMPT_COMPACT): same rules, fewer tokens –
+    - block-independent text first (base prompt + ban guard), chunk data + repair hint last,
+      so chunks and repair attempts share a long identical prefix (provider prompt cache)
+    - anchor terms as one line per block instead of JSON; keyword pool lists only what the anchors don't
+    - narration as NARRATION_INDEX (every block: ~duration + opening sentence) instead of 10 raw previews
     """
-    # Default config
-    cfg = {
-        "provider": "openrouter",
-        "model": "openai/gpt-4o-mini",
-        "temperature": 0.2,
-        "prompt_template": None,
-    }
-    if config:
-        cfg.update(config)
-    
-    # Extrakce tts_ready_package
-    tts_pkg = script_state.get("tts_ready_package")
-    if not tts_pkg:
-        raise ValueError("FDA_INPUT_MISSING: script_state.tts_ready_package is missing")
-    
-    # Extrakce narration_blocks
-    narration_blocks = None
-    
-    episode_id = script_state.get("episode_id", None)
-    
-    if "narration_blocks" in tts_pkg:
-        narration_blocks = tts_pkg["narration_blocks"]
-    elif "tts_segments" in tts_pkg:
-        # Převeď tts_segments na narration_blocks
-        narration_blocks = []
-        for seg in tts_pkg["tts_segments"]:
-            # HOTFIX: text_tts-only, žádný fallback na text
-            text_tts = seg.get("tts_formatted_text")
-            if not text_tts or not isinstance(text_tts, str) or not text_tts.strip():
-                block_id = seg.get("block_id", seg.get("segment_id", "unknown"))
-                has_text = "text" in seg
-                text_type = type(seg.get("text")).__name__ if has_text else "N/A"
-                text_len = len(str(seg.get("text", ""))) if has_text else 0
-                
-                diagnostic = {
-                    "episode_id": episode_id,
-                    "block_id": block_id,
-                    "has_text_field": has_text,
-                    "text_type": text_type,
-                    "text_length": text_len,
-                    "tts_formatted_text_present": "tts_formatted_text" in seg,
-                    "tts_formatted_text_type": type(seg.get("tts_formatted_text")).__name__ if "tts_formatted_text" in seg else "N/A",
-                }
-                raise RuntimeError(
-                    f"FDA_TEXT_TTS_MISSING: tts_segment {block_id} nemá validní tts_formatted_text. "
-                    f"Diagnostic: {diagnostic}"
-                )
-            
-            narration_blocks.append({
-                "block_id": seg.get("block_id", seg.get("segment_id", "")),
-                "text_tts": text_tts,
-                "claim_ids": [],
-            })
-    
-    if not narration_blocks or not isinstance(narration_blocks, list):
-        raise ValueError("FDA_INPUT_MISSING: narration_blocks[] not found in tts_ready_package")
-    
-    # Vytvoř prompt (s episode_id pro diagnostiku)
-    prompt = cfg.get("prompt_template") or _prompt_footage_director(narration_blocks, episode_id=episode_id)
+    if compact is None:
+        compact = fda_prompt_compaction_enabled()
+    prompt = prompt_template or _prompt_footage_director(narration_blocks, episode_id=episode_id, compact=compact)
 
     # HARD COVERAGE GUARD (dynamic, applies even when prompt_template is provided):
     # LLM MUST include ALL block_ids exactly once, in the same order.
@@ -4388,6 +4407,12 @@ def run_fda_llm(
     except Exception:
         anchor_terms_map = {}
 
+    if compact:
+        anchor_terms_text = "(derived from text_tts; one line per block_id, terms separated by \" | \"):\n" + "\n".join(
+            f"{bid}: {' | '.join(terms)}" for bid, terms in anchor_terms_map.items()
+        )
+    else:
+        anchor_terms_text = f"(derived from text_tts): {json.dumps(anchor_terms_map, ensure_ascii=False)}"
     anchor_guard = (
         "HARD ANCHOR TERMS GUARD (must obey):\n"
         "- For each scene, your keywords MUST include at least 2 EXACT anchored terms that appear verbatim in the narration text.\n"
@@ -4395,7 +4420,7 @@ def run_fda_llm(
         "- To make this easy: use only terms from ANCHOR_TERMS_PER_BLOCK_ID for that scene’s narration_block_ids.\n"
         "- At least 2 keywords must be SINGLE-WORD tokens that appear literally in narration text.\n"
         "- For search_queries: at least 1 query must include at least 1 exact anchor term from narration.\n\n"
-        f"ANCHOR_TERMS_PER_BLOCK_ID (derived from text_tts): {json.dumps(anchor_terms_map, ensure_ascii=False)}\n\n"
+        f"ANCHOR_TERMS_PER_BLOCK_ID {anchor_terms_text}\n\n"
     )
 
     # Provide a conservative allowed pool for keywords to reduce generic filler leaks.
@@ -4419,11 +4444,18 @@ def run_fda_llm(
     except Exception:
         allowed_pool = []
 
+    anchor_lower = {t.lower() for terms in anchor_terms_map.values() for t in terms if isinstance(t, str)}
+    if compact and anchor_lower and anchor_lower <= {t.lower() for t in allowed_pool}:
+        # Pool = všechny anchor termy (už vypsané výše) + zbytek → neopakujeme je
+        extras = [t for t in allowed_pool if t.lower() not in anchor_lower]
+        pool_text = f"every term in ANCHOR_TERMS_PER_BLOCK_ID, plus: {' | '.join(extras)}"
+    else:
+        pool_text = json.dumps(allowed_pool, ensure_ascii=False)
     pool_guard = (
         "HARD KEYWORD POOL (must obey):\n"
         "- All keywords MUST be chosen from ALLOWED_KEYWORD_POOL.\n"
         "- If you cannot find enough, pick more terms from narration text (verbatim).\n"
-        f"ALLOWED_KEYWORD_POOL: {json.dumps(allowed_pool, ensure_ascii=False)}\n\n"
+        f"ALLOWED_KEYWORD_POOL: {pool_text}\n\n"
     )
 
     repair_section = ""
@@ -4435,35 +4467,340 @@ def run_fda_llm(
             f"REPAIR_HINT: {repair_hint}\n\n"
         )
 
-    prompt = coverage_guard + anchor_guard + pool_guard + generic_ban_guard + repair_section + prompt
-    
-    # LLM call
+    if not compact:
+        return coverage_guard + anchor_guard + pool_guard + generic_ban_guard + repair_section + prompt
+
+    narration_index = "" if prompt_template else _compact_narration_index(narration_blocks) + "\n\n"
+    return (prompt + "\n\n" + generic_ban_guard + coverage_guard + anchor_guard + pool_guard + narration_index + repair_section).strip()
+
+
+def fda_prompt_compaction_stats(chunks: List[List[Dict[str, Any]]], episode_id: Optional[str] = None) -> Dict[str, Any]:
+    """Velikost FDA promptů (všechny chunky, první pokus) bez a s compaction."""
+    before = sum(len(_build_fda_prompt(c, episode_id=episode_id, compact=False)) for c in chunks)
+    after = sum(len(_build_fda_prompt(c, episode_id=episode_id, compact=True)) for c in chunks)
+    return _prompt_compaction_stats(before, after, prompts=len(chunks))
+
+
+def _fda_llm_call(
+    prompt: str,
+    cfg: Dict[str, Any],
+    api_key: str,
+    timeout_s: int = 600,
+) -> Tuple[str, Dict[str, Any], Dict[str, Any]]:
+    """Jeden FDA LLM call. Returns (raw_text, parsed, meta); raises RuntimeError on invalid JSON."""
     from script_pipeline import _llm_chat_json_raw
-    
-    provider = cfg["provider"].strip().lower()
-    model = cfg["model"].strip()
-    api_key = provider_api_keys.get(provider, "").strip()
-    
-    if not api_key:
-        raise RuntimeError(f"Chybí API key pro provider '{provider}' (FDA)")
-    
+
     raw_text, parsed, meta = _llm_chat_json_raw(
-        provider=provider,
+        provider=cfg["provider"].strip().lower(),
         prompt=prompt,
         api_key=api_key,
-        model=model,
+        model=cfg["model"].strip(),
         temperature=float(cfg.get("temperature", 0.2)),
-        timeout_s=600,
+        timeout_s=timeout_s,
+        cache_step="fda",
+        bypass_cache=bool(cfg.get("bypass_llm_cache")),
     )
-    
+
     if parsed is None:
         fr = (meta or {}).get("finish_reason")
         src = (meta or {}).get("response_text_source")
         raise RuntimeError(f"FDA: LLM vrátil nevalidní JSON (source={src}, finish_reason={fr})")
+    return raw_text, parsed, meta or {}
+
+
+def fda_chunk_size(cfg: Optional[Dict[str, Any]] = None) -> int:
+    """Max narration blocks per FDA chunk (config "chunk_blocks" or env FDA_CHUNK_BLOCKS; 0 = no chunking)."""
+    if isinstance(cfg, dict) and cfg.get("chunk_blocks") is not None:
+        try:
+            return max(0, int(cfg["chunk_blocks"]))
+        except Exception:
+            pass
+    return max(0, env_int("FDA_CHUNK_BLOCKS", 16))
+
+
+def split_fda_chunks(narration_blocks: List[Dict[str, Any]], chunk_size: int) -> List[List[Dict[str, Any]]]:
+    """
+    Rozdělí bloky do souvislých chunků o podobné velikosti (pořadí zachováno).
+    Např. 33 bloků / chunk_size 16 → 11 + 11 + 11 (ne 16 + 16 + 1).
+    """
+    n = len(narration_blocks)
+    if chunk_size <= 0 or n <= chunk_size:
+        return [list(narration_blocks)]
+    n_chunks = -(-n // chunk_size)
+    return [narration_blocks[i * n // n_chunks:(i + 1) * n // n_chunks] for i in range(n_chunks)]
+
+
+def _fda_chunk_coverage_errors(parsed: Any, expected_block_ids: List[str]) -> List[str]:
+    """
+    Levná per-chunk validace: scenes[] existují a jejich narration_block_ids pokrývají
+    EXPECTED_BLOCK_IDS přesně jednou, ve stejném pořadí.
+    """
+    sp = parsed.get("shot_plan") if isinstance(parsed, dict) and isinstance(parsed.get("shot_plan"), dict) else parsed
+    scenes = sp.get("scenes") if isinstance(sp, dict) else None
+    if not isinstance(scenes, list) or not scenes:
+        return ["shot_plan.scenes[] is missing or empty"]
+    got: List[str] = []
+    for sc in scenes:
+        if not isinstance(sc, dict) or not isinstance(sc.get("narration_block_ids"), list):
+            return ["every scene must have narration_block_ids[]"]
+        got.extend(str(b).strip() for b in sc["narration_block_ids"])
+    if got == expected_block_ids:
+        return []
+    errors: List[str] = []
+    missing = [b for b in expected_block_ids if b not in got]
+    extra = [b for b in got if b not in expected_block_ids]
+    dupes = sorted({b for b in got if got.count(b) > 1})
+    if missing:
+        errors.append(f"missing block_ids: {missing}")
+    if extra:
+        errors.append(f"unknown block_ids: {extra}")
+    if dupes:
+        errors.append(f"duplicate block_ids: {dupes}")
+    if not errors:
+        errors.append("block_ids are out of order")
+    return errors
+
+
+def _run_fda_llm_chunked(
+    chunks: List[List[Dict[str, Any]]],
+    cfg: Dict[str, Any],
+    api_key: str,
+    episode_id: Optional[str] = None,
+    repair_hint: Optional[str] = None,
+    cache_commits: Optional[List[Tuple[str, Dict[str, Any]]]] = None,
+) -> Tuple[Dict[str, Any], str, Dict[str, Any], str]:
+    """
+    Spustí FDA LLM paralelně po chuncích, každý chunk validuje (coverage) a případně
+    opraví jen ten chunk, pak scény spojí v pořadí do jednoho shot_plan. Nevalidní JSON
+    nebo HTTP chyba chunku se také opakuje jen pro ten chunk (LLMBudgetExceeded se propaguje).
+    Odpovědi chunků, které prošly coverage, se přidají do cache_commits jako (raw_text, meta)
+    (do LLM response cache je uloží volající až po validaci celého plánu).
+
+    Env:
+        FDA_CHUNK_WORKERS (4), FDA_CHUNK_REPAIR_ATTEMPTS (1), FDA_CHUNK_TIMEOUT_S (300)
+
+    Returns:
+        (merged_raw_json, merged_raw_text, chunk_meta, first_chunk_prompt)
+    """
+    workers = max(1, min(len(chunks), env_int("FDA_CHUNK_WORKERS", 4)))
+    repair_attempts = max(0, env_int("FDA_CHUNK_REPAIR_ATTEMPTS", 1))
+    timeout_s = max(60, env_int("FDA_CHUNK_TIMEOUT_S", 300))
+    total = len(chunks)
+
+    def _run_chunk(idx: int, blocks: List[Dict[str, Any]]) -> Dict[str, Any]:
+        expected = [str(b.get("block_id") or "").strip() for b in blocks if isinstance(b, dict) and str(b.get("block_id") or "").strip()]
+        hint = repair_hint
+        errors: List[str] = []
+        prompt = ""
+        raw_text, parsed, meta = "", None, {}
+        llm_metas: List[Dict[str, Any]] = []
+        for chunk_attempt in range(1, repair_attempts + 2):
+            prompt = _build_fda_prompt(blocks, episode_id=episode_id, repair_hint=hint)
+            try:
+                raw_text, parsed, meta = _fda_llm_call(prompt, cfg, api_key, timeout_s=timeout_s)
+            except LLMBudgetExceeded:
+                raise
+            except Exception as e:
+                parsed, meta = None, {}
+                errors = [f"LLM call failed: {e}"]
+                llm_metas.append({"error": str(e)[:300]})
+                hint = f"Previous response was unusable ({str(e)[:200]}). Return ONLY one valid JSON object."
+            else:
+                llm_metas.append(meta)
+                errors = _fda_chunk_coverage_errors(parsed, expected)
+                if not errors:
+                    break
+                hint = "Chunk coverage check failed: " + "; ".join(errors)
+            print(f"⚠️  FDA chunk {idx + 1}/{total} ({expected[0]}..{expected[-1]}) attempt {chunk_attempt}: {'; '.join(errors)}")
+        if parsed is None:
+            raise RuntimeError(
+                f"FDA chunk {idx + 1}/{total} ({expected[0]}..{expected[-1]}) failed after {len(llm_metas)} attempts: {'; '.join(errors)}"
+            )
+        return {
+            "index": idx,
+            "block_ids": expected,
+            "parsed": parsed,
+            "raw_text": raw_text,
+            "llm_meta": meta,
+            "prompt": prompt,
+            "attempts": len(llm_metas),
+            "coverage_ok": not errors,
+            "llm_metas": llm_metas,
+        }
+
+    print(f"🧩 FDA: {sum(len(c) for c in chunks)} blocks → {total} chunks (workers={workers})")
+    if workers == 1:
+        results = [_run_chunk(i, c) for i, c in enumerate(chunks)]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(bind_scope(_run_chunk), i, c) for i, c in enumerate(chunks)]
+            results = [f.result() for f in futures]
+
+    # Merge v pořadí chunků; scene_id přečíslujeme (každý chunk začíná od sc_0001).
+    # Časování scén přepočítá apply_deterministic_generators_v27 nad celým plánem.
+    scenes: List[Dict[str, Any]] = []
+    for r in results:
+        parsed = r["parsed"]
+        sp = parsed.get("shot_plan") if isinstance(parsed.get("shot_plan"), dict) else parsed
+        for sc in sp.get("scenes") or []:
+            if isinstance(sc, dict):
+                sc = dict(sc)
+                sc["scene_id"] = f"sc_{len(scenes) + 1:04d}"
+                scenes.append(sc)
+    merged = {
+        "shot_plan": {
+            "version": FDA_V27_VERSION,
+            "source": "tts_ready_package",
+            "assumptions": {"words_per_minute": 150},
+            "scenes": scenes,
+        }
+    }
+
+    chunk_meta = {
+        "chunks": [
+            {
+                "index": r["index"],
+                "first_block_id": r["block_ids"][0] if r["block_ids"] else None,
+                "last_block_id": r["block_ids"][-1] if r["block_ids"] else None,
+                "blocks": len(r["block_ids"]),
+                "attempts": r["attempts"],
+                "coverage_ok": r["coverage_ok"],
+                "llm_meta": r["llm_metas"][-1] if r["llm_metas"] else {},
+            }
+            for r in results
+        ],
+        "repairs": sum(r["attempts"] - 1 for r in results),
+        "cache": {"hit": all(((m or {}).get("cache") or {}).get("hit") for r in results for m in r["llm_metas"])},
+    }
+    if cache_commits is not None:
+        cache_commits.extend((r["raw_text"], r["llm_meta"]) for r in results if r["coverage_ok"])
+    raw_text = json.dumps(merged, ensure_ascii=False)
+    return merged, raw_text, chunk_meta, results[0]["prompt"] if results else ""
+
+
+def run_fda_llm(
+    script_state: Dict[str, Any],
+    provider_api_keys: Dict[str, str],
+    config: Optional[Dict[str, Any]] = None,
+    repair_hint: Optional[str] = None,
+    attempt: int = 1,
+    cache_commits: Optional[List[Tuple[str, Dict[str, Any]]]] = None,
+) -> Tuple[Dict[str, Any], str, Dict[str, Any]]:
+    """
+    Hlavní entry point pro LLM-assisted FDA.
+    
+    Args:
+        script_state: script_state obsahující tts_ready_package
+        provider_api_keys: dict s API klíči (openai, openrouter)
+        config: optional config (provider, model, temperature, prompt_template, chunk_blocks,
+                bypass_llm_cache = explicitní retry, neber odpověď z LLM response cache)
+        cache_commits: pokud je zadán, čerstvé LLM odpovědi (raw_text, meta) se sem přidají a volající
+                je uloží přes script_pipeline.commit_llm_cache až po hard gate; jinak se uloží
+                hned po validate_and_fix_shot_plan
+    
+    Returns:
+        (raw_llm_json, raw_llm_output_text, metadata)
+    
+    Raises:
+        ValueError: pokud chybí požadovaná data
+        RuntimeError: pokud LLM call selže
+    """
+    # Default config
+    cfg = {
+        "provider": "openrouter",
+        "model": "openai/gpt-4o-mini",
+        "temperature": 0.2,
+        "prompt_template": None,
+    }
+    if config:
+        cfg.update(config)
+    
+    # Extrakce tts_ready_package
+    tts_pkg = script_state.get("tts_ready_package")
+    if not tts_pkg:
+        raise ValueError("FDA_INPUT_MISSING: script_state.tts_ready_package is missing")
+    
+    # Extrakce narration_blocks
+    narration_blocks = None
+    
+    episode_id = script_state.get("episode_id", None)
+    
+    if "narration_blocks" in tts_pkg:
+        narration_blocks = tts_pkg["narration_blocks"]
+    elif "tts_segments" in tts_pkg:
+        # Převeď tts_segments na narration_blocks
+        narration_blocks = []
+        for seg in tts_pkg["tts_segments"]:
+            # HOTFIX: text_tts-only, žádný fallback na text
+            text_tts = seg.get("tts_formatted_text")
+            if not text_tts or not isinstance(text_tts, str) or not text_tts.strip():
+                block_id = seg.get("block_id", seg.get("segment_id", "unknown"))
+                has_text = "text" in seg
+                text_type = type(seg.get("text")).__name__ if has_text else "N/A"
+                text_len = len(str(seg.get("text", ""))) if has_text else 0
+                
+                diagnostic = {
+                    "episode_id": episode_id,
+                    "block_id": block_id,
+                    "has_text_field": has_text,
+                    "text_type": text_type,
+                    "text_length": text_len,
+                    "tts_formatted_text_present": "tts_formatted_text" in seg,
+                    "tts_formatted_text_type": type(seg.get("tts_formatted_text")).__name__ if "tts_formatted_text" in seg else "N/A",
+                }
+                raise RuntimeError(
+                    f"FDA_TEXT_TTS_MISSING: tts_segment {block_id} nemá validní tts_formatted_text. "
+                    f"Diagnostic: {diagnostic}"
+                )
+            
+            narration_blocks.append({
+                "block_id": seg.get("block_id", seg.get("segment_id", "")),
+                "text_tts": text_tts,
+                "claim_ids": [],
+            })
+    
+    if not narration_blocks or not isinstance(narration_blocks, list):
+        raise ValueError("FDA_INPUT_MISSING: narration_blocks[] not found in tts_ready_package")
+    
+    provider = cfg["provider"].strip().lower()
+    model = cfg["model"].strip()
+    api_key = provider_api_keys.get(provider, "").strip()
+    
+    if not api_key:
+        raise RuntimeError(f"Chybí API key pro provider '{provider}' (FDA)")
+    
+    # Dlouhé epizody: paralelní chunky (custom prompt_template pokrývá celou epizodu → bez chunků)
+    chunks = split_fda_chunks(narration_blocks, fda_chunk_size(cfg)) if not cfg.get("prompt_template") else [narration_blocks]
+    fda_chunking = None
+    prompt_compaction = None
+    if fda_prompt_compaction_enabled() and not cfg.get("prompt_template"):
+        try:
+            prompt_compaction = fda_prompt_compaction_stats(chunks, episode_id=episode_id)
+            print(
+                f"🗜️  FDA prompt compaction: {prompt_compaction['est_tokens_before']} → "
+                f"{prompt_compaction['est_tokens_after']} est. tokens (-{prompt_compaction['reduction_pct']}%)"
+            )
+        except Exception as e:
+            print(f"⚠️  FDA prompt compaction stats failed: {e}")
+    pending_cache: List[Tuple[str, Dict[str, Any]]] = []
+    if len(chunks) > 1:
+        parsed, raw_text, meta, prompt = _run_fda_llm_chunked(
+            chunks, cfg, api_key, episode_id=episode_id, repair_hint=repair_hint, cache_commits=pending_cache
+        )
+        fda_chunking = {k: meta[k] for k in ("chunks", "repairs")}
+    else:
+        prompt = _build_fda_prompt(
+            narration_blocks,
+            episode_id=episode_id,
+            prompt_template=cfg.get("prompt_template"),
+            repair_hint=repair_hint,
+        )
+        raw_text, parsed, meta = _fda_llm_call(prompt, cfg, api_key, timeout_s=600)
+        pending_cache.append((raw_text, meta))
 
     # Required tag: did this raw draft come from cache or a fresh LLM call?
-    # run_fda_llm always performs a fresh LLM call.
-    print(f"FDA_LLM_SOURCE episode_id={episode_id} source=fresh_llm")
+    llm_source = "llm_response_cache" if ((meta or {}).get("cache") or {}).get("hit") else "fresh_llm"
+    print(f"FDA_LLM_SOURCE episode_id={episode_id} source={llm_source}")
 
     # ========================================================================
     # DIAGNOSTIC LOG: Raw LLM version (před sanitizerem a postprocessingem)
@@ -4583,6 +4920,13 @@ def run_fda_llm(
         # Coverage fix failed - tento error propagujeme
         print(f"❌ validate_and_fix_shot_plan failed: {e}")
         raise RuntimeError(f"FDA_AUTOFIX_FAILED: {str(e)}")
+
+    if cache_commits is not None:
+        cache_commits.extend(pending_cache)
+    else:
+        from script_pipeline import commit_llm_cache
+        for entry_text, entry_meta in pending_cache:
+            commit_llm_cache(entry_text, entry_meta)
     
     # ========================================================================
     # DIAGNOSTIC LOG: Version po deterministic generators
@@ -4618,7 +4962,11 @@ def run_fda_llm(
         metadata["raw_llm_version"] = raw_llm_version
     except Exception:
         pass
-    if meta:
+    if fda_chunking:
+        metadata["chunking"] = fda_chunking
+    if prompt_compaction:
+        metadata["prompt_compaction"] = prompt_compaction
+    elif meta:
         metadata["llm_meta"] = meta
     
     return parsed, raw_text, metadata
@@ -4628,18 +4976,27 @@ def run_fda_llm(
 # ScenePlan v3 (LLM output) - best effort, no strict counted constraints
 # ============================================================================
 
-def _prompt_sceneplan_v3(narration_blocks: List[Dict[str, Any]], episode_id: Optional[str] = None) -> str:
+def _prompt_sceneplan_v3(
+    narration_blocks: List[Dict[str, Any]],
+    episode_id: Optional[str] = None,
+    compact: Optional[bool] = None,
+) -> str:
     """
     ScenePlan v3 prompt: creative planning only.
     No counted constraints (keywords_count/query_count/word_count/object_type_count).
     Compiler will generate canonical ShotPlan v3 deterministically.
+    compact (default: FDA_PROMPT_COMPACT): opening sentence per block instead of 180-char previews.
     """
+    if compact is None:
+        compact = fda_prompt_compaction_enabled()
     # Compact input (avoid token blow-up)
     lines: List[str] = []
     for i, b in enumerate(narration_blocks[:30], start=1):
         bid = str(b.get("block_id") or f"b_{i:04d}").strip()
         txt = str(b.get("text_tts") or "").strip()
-        if len(txt) > 180:
+        if compact:
+            txt = _compact_block_summary(txt)
+        elif len(txt) > 180:
             txt = txt[:180] + "…"
         lines.append(f"- {bid}: {txt}")
     if len(narration_blocks) > 30:
@@ -4684,10 +5041,12 @@ def run_sceneplan_llm(
     script_state: Dict[str, Any],
     provider_api_keys: Dict[str, str],
     config: Optional[Dict[str, Any]] = None,
+    cache_commits: Optional[List[Tuple[str, Dict[str, Any]]]] = None,
 ) -> Tuple[Dict[str, Any], str, Dict[str, Any]]:
     """
     Best-effort LLM call producing ScenePlan v3 (not ShotPlan).
     No retries, no strict validators, no sanitizer hard-dependency.
+    cache_commits: same contract as run_fda_llm (caller stores the response after compiling the plan).
     """
     cfg = {
         "provider": "openrouter",
@@ -4727,12 +5086,19 @@ def run_sceneplan_llm(
         model=model,
         temperature=float(cfg.get("temperature", 0.2)),
         timeout_s=600,
+        cache_step="fda_sceneplan",
+        bypass_cache=bool(cfg.get("bypass_llm_cache")),
     )
 
     if parsed is None:
         fr = (meta or {}).get("finish_reason")
         src = (meta or {}).get("response_text_source")
         raise RuntimeError(f"FDA_SCENEPLAN_PARSE_FAIL: LLM returned invalid JSON (source={src}, finish_reason={fr})")
+    if cache_commits is not None:
+        cache_commits.append((raw_text, meta))
+    else:
+        from script_pipeline import commit_llm_cache
+        commit_llm_cache(raw_text, meta)
 
     metadata = {
         "provider": provider,
@@ -4743,6 +5109,9 @@ def run_sceneplan_llm(
     }
     if meta:
         metadata["llm_meta"] = meta
+    if fda_prompt_compaction_enabled() and not cfg.get("prompt_template"):
+        before = len(_prompt_sceneplan_v3(narration_blocks, episode_id=episode_id, compact=False))
+        metadata["prompt_compaction"] = _prompt_compaction_stats(before, len(prompt))
 
     return parsed, raw_text, metadata
 
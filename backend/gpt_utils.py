@@ -1,6 +1,7 @@
 import os
 import json
 import requests
+from llm_http_client import llm_client
 from dotenv import load_dotenv
 
 # Načte environment variables z .env souboru
@@ -57,8 +58,8 @@ def call_openai(prompt: str, model: str = "gpt-4o") -> dict:
         print(f"🤖 Volám OpenAI API s modelem: {model}")
         print(f"📝 Prompt délka: {len(prompt)} znaků")
         
-        # Volání OpenAI API s timeoutem
-        response = requests.post(url, json=data, headers=headers, timeout=60)
+        # Volání OpenAI API s timeoutem (sdílený pooled klient s retry/backoff)
+        response = llm_client.post(url, json=data, headers=headers, timeout=60, provider="openai")
         
         if response.status_code == 200:
             # Parsuje odpověď
@@ -173,7 +174,7 @@ def generate_dalle_images(prompt: str, n: int = 1, size: str = "1792x1024", mode
         
         # Volání OpenAI API
         print(f"🔄 Odesílám požadavek na DALL-E API...")
-        response = requests.post(url, headers=headers, json=data, timeout=60)
+        response = llm_client.post(url, headers=headers, json=data, timeout=60, provider="openai")
         
         if response.status_code == 200:
             result = response.json()
@@ -0,0 +1,91 @@
+"""
+Incremental JSON parsing for streamed LLM output.
+
+Finds the first array under one of the watched keys (e.g. "tts_segments", "narration_blocks",
+"scenes") and emits each object in it as soon as its closing brace arrives — before the
+whole document is complete. Tolerates markdown fences / prose before the JSON.
+"""
+
+import json
+import re
+from typing import Any, Dict, Iterable, List, Optional
+
+DEFAULT_STREAM_KEYS = ("tts_segments", "narration_blocks", "scenes")
+
+
+class IncrementalArrayParser:
+    """
+    feed(text_delta) -> newly completed items (dicts) of the watched array, in order.
+
+    Only the first matching array is tracked (by position in the text); nested arrays
+    with the same key inside its items are part of the item, not separate streams.
+    """
+
+    def __init__(self, keys: Iterable[str] = DEFAULT_STREAM_KEYS):
+        self.keys = tuple(keys)
+        self._key_re = re.compile(r'"(' + "|".join(re.escape(k) for k in self.keys) + r')"\s*:\s*\[')
+        self.key: Optional[str] = None
+        self.count = 0
+        self.done = False
+        self._buf = ""
+        self._pos = 0           # next char to scan (after the array was found)
+        self._depth = 0         # nesting depth inside the array (0 = between items)
+        self._item_start = -1
+        self._in_str = False
+        self._escape = False
+
+    def feed(self, delta: str) -> List[Dict[str, Any]]:
+        if self.done or not delta:
+            return []
+        self._buf += delta
+        if self.key is None:
+            m = self._key_re.search(self._buf)
+            if not m:
+                return []
+            self.key = m.group(1)
+            self._pos = m.end()
+        return self._scan()
+
+    def _scan(self) -> List[Dict[str, Any]]:
+        out: List[Dict[str, Any]] = []
+        buf = self._buf
+        i = self._pos
+        while i < len(buf):
+            ch = buf[i]
+            if self._in_str:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_str = False
+            elif ch == '"':
+                self._in_str = True
+            elif ch in "{[":
+                if self._depth == 0 and ch == "{":
+                    self._item_start = i
+                self._depth += 1
+            elif ch in "}]":
+                if self._depth == 0:
+                    # "]" closing the watched array
+                    self.done = True
+                    i += 1
+                    break
+                self._depth -= 1
+                if self._depth == 0 and self._item_start >= 0:
+                    try:
+                        item = json.loads(buf[self._item_start:i + 1])
+                    except ValueError:
+                        item = None
+                    if isinstance(item, dict):
+                        out.append(item)
+                        self.count += 1
+                    self._item_start = -1
+            i += 1
+        self._pos = i
+        return out
+
+
+def iter_array_items(text: str, keys: Iterable[str] = DEFAULT_STREAM_KEYS) -> List[Dict[str, Any]]:
+    """Same items the streaming parser would emit for the complete text (e.g. replay of a cached response)."""
+    return IncrementalArrayParser(keys).feed(text or "")
@@ -0,0 +1,128 @@
+"""
+Ken Burns renderer for still images (legacy MoviePy slideshow endpoints).
+
+The whole crop schedule (one sub-pixel box per output frame) is computed up front
+with NumPy; each frame is then a single C-level resample of one prepared high-res
+image (Pillow resize with a float `box`), i.e. no per-frame MoviePy clip
+construction and no low-res render + upscale.
+"""
+
+from typing import Optional
+
+import numpy as np
+from PIL import Image
+
+# effect_type: 0=zoom_in, 1=zoom_out, 2=pan_left (zleva doprava), 3=pan_right (zprava doleva)
+KEN_BURNS_EFFECTS = ("zoom_in", "zoom_out", "pan_left", "pan_right")
+DEFAULT_SCALE_FACTOR = 1.3
+
+
+def _ease(progress: np.ndarray, easing: str) -> np.ndarray:
+    if easing == "cosine":
+        return 0.5 * (1.0 - np.cos(np.pi * progress))
+    if easing == "linear":
+        return progress
+    # smoothstep (default) – plynulý start i konec, bez "cukání"
+    return progress * progress * (3.0 - 2.0 * progress)
+
+
+def crop_schedule(
+    n_frames: int,
+    src_width: int,
+    src_height: int,
+    effect_type: int = 0,
+    scale_factor: float = DEFAULT_SCALE_FACTOR,
+    easing: str = "smoothstep",
+) -> np.ndarray:
+    """
+    Returns float boxes (left, top, right, bottom) in source pixels, shape (n_frames, 4).
+
+    The source is expected to be the prepared image (target size * scale_factor), so the
+    tightest window (1/scale_factor of the source) maps 1:1 onto the output.
+    """
+    n_frames = max(1, int(n_frames))
+    if n_frames == 1:
+        progress = np.zeros(1)
+    else:
+        progress = _ease(np.linspace(0.0, 1.0, n_frames), easing)
+
+    tight = 1.0 / float(scale_factor)
+    effect_type = int(effect_type) % len(KEN_BURNS_EFFECTS)
+    if effect_type == 0:  # Zoom In: celý obrázek → výřez
+        frac = 1.0 - (1.0 - tight) * progress
+        cx = np.full(n_frames, 0.5)
+    elif effect_type == 1:  # Zoom Out: výřez → celý obrázek
+        frac = tight + (1.0 - tight) * progress
+        cx = np.full(n_frames, 0.5)
+    elif effect_type == 2:  # Pan Left (zleva doprava)
+        frac = np.full(n_frames, tight)
+        cx = tight / 2.0 + (1.0 - tight) * progress
+    else:  # Pan Right (zprava doleva)
+        frac = np.full(n_frames, tight)
+        cx = tight / 2.0 + (1.0 - tight) * (1.0 - progress)
+
+    w = frac * src_width
+    h = frac * src_height
+    left = np.clip(cx * src_width - w / 2.0, 0.0, src_width - w)
+    top = np.clip(0.5 * src_height - h / 2.0, 0.0, src_height - h)
+    return np.stack([left, top, left + w, top + h], axis=1)
+
+
+def prepare_image(image_path: str, target_width: int, target_height: int, scale_factor: float = DEFAULT_SCALE_FACTOR) -> Image.Image:
+    """Loads the image once and cover-fits it (aspect-preserving center crop) to target * scale_factor."""
+    work_w = int(round(target_width * scale_factor))
+    work_h = int(round(target_height * scale_factor))
+    with Image.open(image_path) as im:
+        im = im.convert("RGB")
+        src_w, src_h = im.size
+        target_ratio = work_w / float(work_h)
+        if src_w / float(src_h) > target_ratio:
+            crop_w = src_h * target_ratio
+            box = ((src_w - crop_w) / 2.0, 0.0, (src_w + crop_w) / 2.0, float(src_h))
+        else:
+            crop_h = src_w / target_ratio
+            box = (0.0, (src_h - crop_h) / 2.0, float(src_w), (src_h + crop_h) / 2.0)
+        return im.resize((work_w, work_h), Image.LANCZOS, box=box)
+
+
+class KenBurnsRenderer:
+    """
+    Precomputed Ken Burns animation for one still image.
+
+    Usage with MoviePy: VideoClip(renderer.frame_at, duration=renderer.duration)
+    """
+
+    def __init__(
+        self,
+        image_path: str,
+        duration: float,
+        target_width: int,
+        target_height: int,
+        effect_type: int = 0,
+        fps: float = 24,
+        scale_factor: float = DEFAULT_SCALE_FACTOR,
+        easing: str = "smoothstep",
+    ):
+        self.duration = float(duration)
+        self.fps = float(fps)
+        self.size = (int(target_width), int(target_height))
+        self.prepared = prepare_image(image_path, target_width, target_height, scale_factor)
+        self.n_frames = max(1, int(round(self.duration * self.fps)))
+        self.boxes = crop_schedule(
+            self.n_frames, self.prepared.width, self.prepared.height,
+            effect_type=effect_type, scale_factor=scale_factor, easing=easing,
+        )
+        self._last_index: Optional[int] = None
+        self._last_frame: Optional[np.ndarray] = None
+
+    def frame(self, index: int) -> np.ndarray:
+        index = min(max(int(index), 0), self.n_frames - 1)
+        if index == self._last_index and self._last_frame is not None:
+            return self._last_frame
+        box = tuple(float(v) for v in self.boxes[index])
+        out = np.asarray(self.prepared.resize(self.size, Image.BILINEAR, box=box))
+        self._last_index, self._last_frame = index, out
+        return out
+
+    def frame_at(self, t: float) -> np.ndarray:
+        return self.frame(int(round(float(t) * self.fps)))
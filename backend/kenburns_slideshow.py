@@ -0,0 +1,147 @@
+"""
+FFmpeg renderer for the legacy Ken Burns slideshow endpoints (images + Narrator MP3s).
+
+- every image → CompilationBuilder.create_subclip (zoompan, same path as CB), rendered in parallel
+- clips are uniform (resolution/fps/codec), so they are joined with the concat demuxer (stream copy)
+  and muxed with the concatenated narration in one final FFmpeg pass
+- libx264 threads/preset are configurable (env or per request)
+"""
+
+import os
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from compilation_builder import CompilationBuilder
+from env_utils import env_int
+from motion_clip_cache import MotionClipCache
+
+
+def kenburns_encoder_settings(
+    workers: Optional[int] = None,
+    threads: Optional[int] = None,
+    preset: Optional[str] = None,
+) -> Tuple[int, int, str]:
+    """
+    Returns (parallel render jobs, libx264 threads per job, preset).
+    Defaults: KENBURNS_RENDER_WORKERS (min(4, CPU)), KENBURNS_X264_THREADS (CPU / jobs),
+    KENBURNS_X264_PRESET ("veryfast").
+    """
+    cpu = os.cpu_count() or 2
+    workers = int(workers or env_int("KENBURNS_RENDER_WORKERS", min(4, cpu), minimum=1))
+    threads = int(threads or env_int("KENBURNS_X264_THREADS", max(1, cpu // max(1, workers)), minimum=1))
+    preset = str(preset or os.getenv("KENBURNS_X264_PRESET", "veryfast")).strip() or "veryfast"
+    return max(1, workers), max(1, threads), preset
+
+
+def probe_duration(path: str) -> Optional[float]:
+    """Media duration in seconds via ffprobe (None on failure)."""
+    try:
+        r = subprocess.run(
+            ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "csv=p=0", path],
+            capture_output=True, text=True, timeout=30,
+        )
+        if r.returncode != 0:
+            return None
+        value = float((r.stdout or "").strip())
+        return value if value > 0 else None
+    except Exception:
+        return None
+
+
+def _write_concat_list(path: str, files: Sequence[str]) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        for p in files:
+            escaped = os.path.abspath(p).replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+
+
+def render_kenburns_slideshow(
+    items: Sequence[Tuple[str, int]],
+    duration_per_image: float,
+    audio_files: Sequence[str],
+    output_path: str,
+    width: int = 1280,
+    height: int = 720,
+    fps: int = 24,
+    workers: Optional[int] = None,
+    threads: Optional[int] = None,
+    preset: Optional[str] = None,
+    motion_cache: Optional[MotionClipCache] = None,
+) -> Dict[str, Any]:
+    """
+    Renders a Ken Burns slideshow with narration to output_path.
+
+    Args:
+        items: [(image_path, effect_type)] in timeline order; effect_type 0=zoom_in, 1=zoom_out,
+               2=pan_left, 3=pan_right (same numbering as CB zoompan variants)
+        duration_per_image: Seconds per image
+        audio_files: Narrator MP3s in order (empty = silent video)
+        motion_cache: Optional MotionClipCache (repeated images/loops become a copy instead of an encode)
+
+    Returns:
+        {"successful_clips": int, "failed_clips": int, "duration": float, "preset": str, "threads": int, "workers": int}
+
+    Raises:
+        RuntimeError: when no clip could be rendered or the final mux fails
+    """
+    workers, threads, preset = kenburns_encoder_settings(workers, threads, preset)
+    out_dir = os.path.dirname(os.path.abspath(output_path))
+    os.makedirs(out_dir, exist_ok=True)
+    work_dir = tempfile.mkdtemp(prefix="kenburns_", dir=out_dir)
+    try:
+        builder = CompilationBuilder(storage_dir=work_dir, output_dir=out_dir, motion_cache=motion_cache)
+        resolution = f"{int(width)}x{int(height)}"
+        print(
+            f"🎞️  Ken Burns FFmpeg: {len(items)} obrázků × {duration_per_image:.2f}s @ {resolution}/{fps}fps "
+            f"({workers} jobs × {threads} threads, preset={preset})"
+        )
+
+        def _render(index: int, image_path: str, effect_type: int) -> Optional[str]:
+            clip_path = os.path.join(work_dir, f"clip_{index:05d}.mp4")
+            ok = builder.create_subclip(
+                image_path, 0.0, float(duration_per_image), clip_path,
+                target_fps=int(fps), resolution=resolution,
+                effect_variant=int(effect_type), preset=preset, threads=threads,
+            )
+            return clip_path if ok else None
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_render, i, img, eff) for i, (img, eff) in enumerate(items)]
+            results = [f.result() for f in futures]
+        clips = [c for c in results if c]
+        failed = len(results) - len(clips)
+        if failed:
+            print(f"⚠️  Ken Burns FFmpeg: {failed} klipů se nepodařilo vyrenderovat")
+        if not clips:
+            raise RuntimeError("Nepodařilo se vytvořit žádné video klipy")
+
+        video_list = os.path.join(work_dir, "video_list.txt")
+        _write_concat_list(video_list, clips)
+        cmd = ["ffmpeg", "-y", "-v", "error", "-f", "concat", "-safe", "0", "-i", video_list]
+        audio_files = [a for a in audio_files if a and os.path.exists(a)]
+        if audio_files:
+            audio_list = os.path.join(work_dir, "audio_list.txt")
+            _write_concat_list(audio_list, audio_files)
+            cmd.extend(["-f", "concat", "-safe", "0", "-i", audio_list,
+                        "-map", "0:v:0", "-map", "1:a:0", "-c:a", "aac", "-b:a", "192k", "-shortest"])
+        else:
+            cmd.append("-an")
+        cmd.extend(["-c:v", "copy", "-movflags", "+faststart", output_path])
+
+        r = subprocess.run(cmd, capture_output=True, text=True, timeout=1800)
+        if r.returncode != 0 or not os.path.exists(output_path) or os.path.getsize(output_path) == 0:
+            raise RuntimeError(f"FFmpeg mux failed: {(r.stderr or '')[-500:]}")
+
+        return {
+            "successful_clips": len(clips),
+            "failed_clips": failed,
+            "duration": probe_duration(output_path) or len(clips) * float(duration_per_image),
+            "preset": preset,
+            "threads": threads,
+            "workers": workers,
+        }
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
@@ -0,0 +1,275 @@
+"""
+Shared HTTP client for all LLM / Vision API calls (OpenAI, OpenRouter).
+
+- One keep-alive requests.Session with a connection pool (no TLS handshake per call)
+- Jittered exponential backoff on 429 / 5xx and connection errors (Retry-After honoured)
+- Per-provider concurrency semaphores (LLM_MAX_CONCURRENCY_<PROVIDER>, default 8)
+- Latency / retry / token metrics per provider (metrics_snapshot)
+- Server-sent-event streaming (post_stream) for incremental chat completions
+- Per-episode usage ledger + budget check (llm_usage_ledger, via the current usage scope)
+
+Env:
+    LLM_HTTP_MAX_RETRIES (3), LLM_HTTP_BACKOFF_BASE_SEC (1.0), LLM_HTTP_BACKOFF_CAP_SEC (30),
+    LLM_HTTP_POOL_SIZE (32), LLM_MAX_CONCURRENCY_<PROVIDER> (8)
+"""
+
+import os
+import json as _json
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from llm_usage_ledger import check_budget_for_current_scope, record_llm_call
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)))
+    except Exception:
+        return default
+
+
+def provider_for_url(url: str) -> str:
+    host = (urlparse(url).hostname or "").lower()
+    if host.endswith("openrouter.ai"):
+        return "openrouter"
+    if host.endswith("openai.com"):
+        return "openai"
+    return host or "unknown"
+
+
+class LLMHttpClient:
+    """Pooled, retrying, concurrency-limited POST client (thread-safe)."""
+
+    def __init__(
+        self,
+        max_retries: Optional[int] = None,
+        backoff_base_sec: Optional[float] = None,
+        backoff_cap_sec: Optional[float] = None,
+        pool_size: Optional[int] = None,
+        sleep=time.sleep,
+    ):
+        self.max_retries = int(max_retries if max_retries is not None else _env_float("LLM_HTTP_MAX_RETRIES", 3))
+        self.backoff_base_sec = float(
+            backoff_base_sec if backoff_base_sec is not None else _env_float("LLM_HTTP_BACKOFF_BASE_SEC", 1.0)
+        )
+        self.backoff_cap_sec = float(
+            backoff_cap_sec if backoff_cap_sec is not None else _env_float("LLM_HTTP_BACKOFF_CAP_SEC", 30.0)
+        )
+        pool_size = int(pool_size or _env_float("LLM_HTTP_POOL_SIZE", 32))
+        self._sleep = sleep
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=0)
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+        self._lock = threading.Lock()
+        self._semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._metrics: Dict[str, Dict[str, Any]] = {}
+
+    def _semaphore(self, provider: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            sem = self._semaphores.get(provider)
+            if sem is None:
+                limit = max(1, int(_env_float(f"LLM_MAX_CONCURRENCY_{provider.upper().replace('.', '_')}", 8)))
+                sem = threading.BoundedSemaphore(limit)
+                self._semaphores[provider] = sem
+            return sem
+
+    def _backoff_delay(self, attempt: int, response: Optional[requests.Response]) -> float:
+        """Full jitter: uniform(0, min(cap, base * 2^attempt)); Retry-After (seconds) is a lower bound."""
+        delay = random.uniform(0, min(self.backoff_cap_sec, self.backoff_base_sec * (2 ** attempt)))
+        if response is not None:
+            try:
+                retry_after = float(response.headers.get("Retry-After"))
+                delay = max(delay, min(retry_after, 60.0))
+            except (TypeError, ValueError):
+                pass
+        return delay
+
+    def _record(
+        self,
+        provider: str,
+        latency_ms: float,
+        response: Optional[requests.Response],
+        retried: bool,
+        usage: Optional[Dict[str, Any]] = None,
+        streamed: bool = False,
+        model: Optional[str] = None,
+    ) -> None:
+        if not streamed and response is not None and response.status_code == 200:
+            try:
+                body = response.json()
+                usage = body.get("usage") if isinstance(body, dict) else None
+            except Exception:
+                usage = None
+        ok = response is not None and response.status_code == 200
+        record_llm_call(provider, model, usage, latency_ms, ok, streamed=streamed)
+        with self._lock:
+            m = self._metrics.setdefault(provider, {
+                "requests": 0, "errors": 0, "retries": 0,
+                "latency_ms_total": 0.0, "latency_ms_max": 0.0,
+                "prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0,
+            })
+            m["requests"] += 1
+            m["latency_ms_total"] += latency_ms
+            m["latency_ms_max"] = max(m["latency_ms_max"], latency_ms)
+            if retried:
+                m["retries"] += 1
+            if not ok:
+                m["errors"] += 1
+            if isinstance(usage, dict):
+                for k in ("prompt_tokens", "completion_tokens", "total_tokens"):
+                    try:
+                        m[k] += int(usage.get(k) or 0)
+                    except Exception:
+                        pass
+
+    def post(
+        self,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        json: Any = None,
+        timeout: float = 120,
+        provider: Optional[str] = None,
+        verify: bool = True,
+        retry_statuses: Iterable[int] = RETRY_STATUSES,
+        max_retries: Optional[int] = None,
+    ) -> requests.Response:
+        """
+        POST with pooling, retries and the provider's concurrency limit.
+        Returns the last response (callers keep their own status handling);
+        raises the last connection error if every attempt failed to connect.
+        Read timeouts are not retried (the caller's timeout is the budget).
+        Raises LLMBudgetExceeded (before sending) when the current episode spent its budget.
+        """
+        provider = (provider or provider_for_url(url)).strip().lower()
+        model = json.get("model") if isinstance(json, dict) else None
+        check_budget_for_current_scope()
+        retries = self.max_retries if max_retries is None else int(max_retries)
+        retry_statuses = set(retry_statuses)
+        sem = self._semaphore(provider)
+        attempt = 0
+        while True:
+            response = None
+            error: Optional[Exception] = None
+            t0 = time.perf_counter()
+            with sem:
+                try:
+                    response = self._session.post(url, headers=headers, json=json, timeout=timeout, verify=verify)
+                except requests.exceptions.ConnectionError as e:
+                    error = e
+            latency_ms = (time.perf_counter() - t0) * 1000.0
+            will_retry = attempt < retries and (
+                error is not None or (response is not None and response.status_code in retry_statuses)
+            )
+            self._record(provider, latency_ms, response, retried=will_retry, model=model)
+            if not will_retry:
+                if error is not None:
+                    raise error
+                return response
+            delay = self._backoff_delay(attempt, response)
+            status = response.status_code if response is not None else type(error).__name__
+            print(f"⏳ LLM HTTP {provider}: {status} → retry {attempt + 1}/{retries} in {delay:.1f}s")
+            self._sleep(delay)
+            attempt += 1
+
+    def post_stream(
+        self,
+        url: str,
+        on_data: Callable[[Dict[str, Any]], None],
+        headers: Optional[Dict[str, str]] = None,
+        json: Any = None,
+        timeout: float = 120,
+        provider: Optional[str] = None,
+        verify: bool = True,
+        retry_statuses: Iterable[int] = RETRY_STATUSES,
+        max_retries: Optional[int] = None,
+    ) -> requests.Response:
+        """
+        POST with stream=True; calls on_data(event) for every SSE "data:" JSON event until [DONE].
+        Retries (same policy as post) only happen before the first event was delivered; a connection
+        drop after that (ChunkedEncodingError / ConnectionError) is recorded as a failed call and
+        raised, since partial output must not be replayed. Responses are closed before every retry
+        (stream=True keeps the pooled connection until the body is consumed). The concurrency slot
+        is held for the whole stream. Returns the response (non-200 bodies are read normally).
+        """
+        provider = (provider or provider_for_url(url)).strip().lower()
+        model = json.get("model") if isinstance(json, dict) else None
+        check_budget_for_current_scope()
+        retries = self.max_retries if max_retries is None else int(max_retries)
+        retry_statuses = set(retry_statuses)
+        sem = self._semaphore(provider)
+        attempt = 0
+        while True:
+            response = None
+            error: Optional[Exception] = None
+            usage: Optional[Dict[str, Any]] = None
+            delivered = False
+            t0 = time.perf_counter()
+            with sem:
+                try:
+                    response = self._session.post(
+                        url, headers=headers, json=json, timeout=timeout, verify=verify, stream=True
+                    )
+                    if response.status_code == 200:
+                        for line in response.iter_lines(decode_unicode=True):
+                            # SSE: "data: {...}"; ":" lines are keep-alive comments
+                            if not line or not line.startswith("data:"):
+                                continue
+                            data = line[5:].strip()
+                            if data == "[DONE]":
+                                break
+                            try:
+                                event = _json.loads(data)
+                            except ValueError:
+                                continue
+                            if isinstance(event, dict):
+                                if isinstance(event.get("usage"), dict):
+                                    usage = event["usage"]
+                                delivered = True
+                                on_data(event)
+                except (requests.exceptions.ConnectionError, requests.exceptions.ChunkedEncodingError) as e:
+                    error = e
+                    if response is not None:
+                        response.close()
+            latency_ms = (time.perf_counter() - t0) * 1000.0
+            will_retry = not delivered and attempt < retries and (
+                error is not None or (response is not None and response.status_code in retry_statuses)
+            )
+            # Stream broken mid-way counts as a failed call even though the status was 200.
+            self._record(
+                provider, latency_ms, None if error is not None else response,
+                retried=will_retry, usage=usage, streamed=True, model=model,
+            )
+            if not will_retry:
+                if error is not None:
+                    raise error
+                return response
+            if response is not None:
+                response.close()
+            delay = self._backoff_delay(attempt, response)
+            status = response.status_code if (response is not None and error is None) else type(error).__name__
+            print(f"⏳ LLM HTTP {provider} (stream): {status} → retry {attempt + 1}/{retries} in {delay:.1f}s")
+            self._sleep(delay)
+            attempt += 1
+
+    def metrics_snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            out = {}
+            for provider, m in self._metrics.items():
+                row = dict(m)
+                row["latency_ms_avg"] = round(m["latency_ms_total"] / m["requests"], 1) if m["requests"] else 0.0
+                row["latency_ms_total"] = round(m["latency_ms_total"], 1)
+                row["latency_ms_max"] = round(m["latency_ms_max"], 1)
+                out[provider] = row
+            return out
+
+
+llm_client = LLMHttpClient()
@@ -0,0 +1,145 @@
+"""
+Content-addressed cache of LLM chat responses (opt-in, LLM_RESPONSE_CACHE=1).
+
+- Key: sha256(provider, model, temperature, max_tokens, system prompt, full user prompt)
+- Location: podcasts/cache/llm/<xx>/<key>.json (override LLM_RESPONSE_CACHE_DIR)
+- Temperature is part of the key; non-zero temperatures are cached only for steps that allow it
+  (DEFAULT_STEP_ANY_TEMPERATURE, env LLM_RESPONSE_CACHE_ANY_TEMP_<STEP>=0/1); temperature 0 always qualifies
+- Responses are stored by the caller after the step's own validation passed (script_pipeline.commit_llm_cache);
+  explicit retries skip the lookup (bypass_cache) so a rejected answer is never replayed
+- Per-step TTL policy (DEFAULT_STEP_TTL_SEC, env LLM_RESPONSE_CACHE_TTL_<STEP>; 0 = never cache the step)
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from typing import Any, Dict, Optional
+
+# Bump při změně formátu záznamu / klíče
+LLM_CACHE_VERSION = "l1"
+
+DAY_SEC = 24 * 3600
+
+# Steps that regenerate on purpose (narrative = creative variants) are not cached by default.
+DEFAULT_STEP_TTL_SEC: Dict[str, int] = {
+    "research": 7 * DAY_SEC,
+    "narrative": 0,
+    "validation": 1 * DAY_SEC,
+    "tts_format": 7 * DAY_SEC,
+    "fda": 7 * DAY_SEC,
+    "fda_sceneplan": 7 * DAY_SEC,
+}
+DEFAULT_TTL_SEC = 1 * DAY_SEC
+
+# Steps whose (validated) answer at the default non-zero temperature is good to reuse as-is.
+DEFAULT_STEP_ANY_TEMPERATURE = {"research", "validation", "tts_format", "fda", "fda_sceneplan"}
+
+
+def llm_cache_enabled() -> bool:
+    return (os.getenv("LLM_RESPONSE_CACHE", "0") or "").strip().lower() in ("1", "true", "yes")
+
+
+def step_ttl_sec(step: Optional[str]) -> int:
+    """TTL for a pipeline step (0 = do not cache). Env LLM_RESPONSE_CACHE_TTL_<STEP> wins."""
+    name = str(step or "default").strip().lower()
+    raw = os.getenv(f"LLM_RESPONSE_CACHE_TTL_{name.upper()}")
+    if raw is not None and raw.strip() != "":
+        try:
+            return max(0, int(float(raw)))
+        except Exception:
+            pass
+    return int(DEFAULT_STEP_TTL_SEC.get(name, DEFAULT_TTL_SEC))
+
+
+def step_caches_temperature(step: Optional[str], temperature: float) -> bool:
+    """Whether a call of this step at this temperature may use the cache. Env LLM_RESPONSE_CACHE_ANY_TEMP_<STEP> wins."""
+    try:
+        if float(temperature) == 0.0:
+            return True
+    except Exception:
+        return False
+    name = str(step or "default").strip().lower()
+    raw = os.getenv(f"LLM_RESPONSE_CACHE_ANY_TEMP_{name.upper()}")
+    if raw is not None and raw.strip() != "":
+        return raw.strip().lower() in ("1", "true", "yes")
+    return name in DEFAULT_STEP_ANY_TEMPERATURE
+
+
+def llm_cache_key(
+    provider: str,
+    model: str,
+    temperature: float,
+    prompt: str,
+    system_prompt: str = "",
+    max_tokens: Optional[int] = None,
+) -> str:
+    payload = json.dumps(
+        {
+            "v": LLM_CACHE_VERSION,
+            "provider": str(provider or "").strip().lower(),
+            "model": str(model or "").strip(),
+            "temperature": round(float(temperature), 4),
+            "max_tokens": max_tokens,
+            "system": system_prompt or "",
+            "prompt": prompt or "",
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """FS-backed store of {raw_text, meta, created_at} per cache key."""
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def get(self, key: str, ttl_sec: int) -> Optional[Dict[str, Any]]:
+        """Returns the stored entry (with "age_sec") if younger than ttl_sec, else None."""
+        if ttl_sec <= 0:
+            return None
+        path = self.path_for(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(entry, dict) or not isinstance(entry.get("raw_text"), str):
+            return None
+        age = time.time() - float(entry.get("created_at") or 0)
+        if age > ttl_sec:
+            return None
+        entry["age_sec"] = round(age, 1)
+        return entry
+
+    def put(self, key: str, raw_text: str, meta: Optional[Dict[str, Any]] = None, step: Optional[str] = None) -> bool:
+        path = self.path_for(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(prefix="llm_", suffix=".json", dir=os.path.dirname(path))
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(
+                    {"created_at": time.time(), "step": step, "raw_text": raw_text, "meta": meta or {}},
+                    f,
+                    ensure_ascii=False,
+                )
+            os.replace(tmp_path, path)
+            return True
+        except Exception as e:
+            print(f"⚠️  LLM cache: store failed for {key[:12]}: {e}")
+            return False
+
+
+def default_llm_cache_dir() -> str:
+    """podcasts/cache/llm (next to projects/ and cache/motion), or LLM_RESPONSE_CACHE_DIR."""
+    env_dir = (os.getenv("LLM_RESPONSE_CACHE_DIR") or "").strip()
+    if env_dir:
+        return env_dir
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(base_dir, "cache", "llm")
@@ -0,0 +1,362 @@
+"""
+Per-episode LLM/Vision usage ledger (tokens, latency, estimated cost) + per-episode budgets.
+
+- Every call through llm_http_client.llm_client is attributed to the current usage scope
+  (episode_id + step), set by the pipeline when a step starts (set_usage_scope / usage_scope).
+- Ledger: projects/<episode_id>/llm_usage.json – totals, per step, per model.
+- Cost: estimated from token usage × price table (USD per 1M tokens, prompt/completion);
+  override or extend with LLM_PRICES_JSON='{"model": [prompt_usd, completion_usd], ...}'.
+- Budgets (0 = off): LLM_EPISODE_BUDGET_USD, LLM_EPISODE_BUDGET_TOKENS. A call that would start
+  after the episode's budget is spent raises LLMBudgetExceeded before any HTTP request.
+
+Scope is a contextvar: worker threads do not inherit it, wrap their callables with bind_scope().
+"""
+
+import contextvars
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+LEDGER_FILENAME = "llm_usage.json"
+LEDGER_VERSION = 1
+# In-memory ledgers kept for episodes that record calls in this process (LRU; the file is the source of truth)
+LEDGER_MEMORY_MAX_EPISODES = 64
+
+# USD per 1M tokens (prompt, completion). Klíč bez prefixu providera ("openai/gpt-4o" → "gpt-4o").
+DEFAULT_PRICES_USD_PER_1M: Dict[str, List[float]] = {
+    "gpt-4o": [2.50, 10.00],
+    "gpt-4o-mini": [0.15, 0.60],
+    "gpt-4.1": [2.00, 8.00],
+    "gpt-4.1-mini": [0.40, 1.60],
+    "gpt-4.1-nano": [0.10, 0.40],
+}
+
+_scope: contextvars.ContextVar = contextvars.ContextVar("llm_usage_scope", default=None)
+
+
+class LLMBudgetExceeded(RuntimeError):
+    """Episode already spent its LLM budget (LLM_EPISODE_BUDGET_USD / LLM_EPISODE_BUDGET_TOKENS)."""
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)))
+    except Exception:
+        return default
+
+
+# ---------------------------------------------------------------------------
+# Scope
+# ---------------------------------------------------------------------------
+
+def set_usage_scope(episode_id: Optional[str], step: Optional[str]) -> None:
+    """Attribute subsequent LLM calls in this thread/context to (episode_id, step)."""
+    eid = str(episode_id or "").strip()
+    _scope.set({"episode_id": eid, "step": str(step or "unknown").strip() or "unknown"} if eid else None)
+
+
+def current_usage_scope() -> Optional[Dict[str, str]]:
+    return _scope.get()
+
+
+@contextmanager
+def usage_scope(episode_id: Optional[str] = None, step: Optional[str] = None) -> Iterator[None]:
+    """
+    Temporary scope. Missing episode_id inherits the current one (e.g. a sub-step inside a step).
+    """
+    cur = _scope.get() or {}
+    eid = str(episode_id or cur.get("episode_id") or "").strip()
+    token = _scope.set({"episode_id": eid, "step": str(step or cur.get("step") or "unknown")} if eid else None)
+    try:
+        yield
+    finally:
+        _scope.reset(token)
+
+
+def bind_scope(fn: Callable) -> Callable:
+    """Wraps fn so it runs under the caller's current scope (for ThreadPoolExecutor workers)."""
+    scope = _scope.get()
+
+    def _run(*args, **kwargs):
+        token = _scope.set(scope)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _scope.reset(token)
+
+    return _run
+
+
+# ---------------------------------------------------------------------------
+# Pricing
+# ---------------------------------------------------------------------------
+
+def _price_table() -> Dict[str, List[float]]:
+    table = dict(DEFAULT_PRICES_USD_PER_1M)
+    raw = (os.getenv("LLM_PRICES_JSON") or "").strip()
+    if raw:
+        try:
+            extra = json.loads(raw)
+            if isinstance(extra, dict):
+                for k, v in extra.items():
+                    if isinstance(v, (list, tuple)) and len(v) == 2:
+                        table[str(k).strip().lower()] = [float(v[0]), float(v[1])]
+        except Exception as e:
+            print(f"⚠️ LLM_PRICES_JSON ignored: {e}")
+    return table
+
+
+def estimate_cost_usd(model: Optional[str], prompt_tokens: int, completion_tokens: int) -> Optional[float]:
+    """Estimated USD cost, None when the model has no price entry."""
+    name = str(model or "").strip().lower()
+    if not name:
+        return None
+    table = _price_table()
+    price = table.get(name) or table.get(name.split("/", 1)[-1])
+    if price is None:
+        # Dated snapshots ("gpt-4o-2024-08-06") → nejdelší odpovídající prefix
+        base = name.split("/", 1)[-1]
+        matches = [k for k in table if base.startswith(k + "-")]
+        if matches:
+            price = table[max(matches, key=len)]
+    if price is None:
+        return None
+    return (prompt_tokens * price[0] + completion_tokens * price[1]) / 1_000_000.0
+
+
+# ---------------------------------------------------------------------------
+# Ledger
+# ---------------------------------------------------------------------------
+
+def _empty_bucket() -> Dict[str, Any]:
+    return {
+        "calls": 0, "errors": 0, "streamed_calls": 0,
+        "prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0,
+        "latency_ms_total": 0.0, "latency_ms_max": 0.0,
+        "cost_usd": 0.0, "unpriced_calls": 0,
+    }
+
+
+def _add(bucket: Dict[str, Any], call: Dict[str, Any]) -> None:
+    bucket["calls"] += 1
+    bucket["errors"] += 0 if call["ok"] else 1
+    bucket["streamed_calls"] += 1 if call["streamed"] else 0
+    for k in ("prompt_tokens", "completion_tokens", "total_tokens"):
+        bucket[k] += call[k]
+    bucket["latency_ms_total"] = round(bucket["latency_ms_total"] + call["latency_ms"], 1)
+    bucket["latency_ms_max"] = round(max(bucket["latency_ms_max"], call["latency_ms"]), 1)
+    if call["cost_usd"] is None:
+        if call["total_tokens"]:
+            bucket["unpriced_calls"] += 1
+    else:
+        bucket["cost_usd"] = round(bucket["cost_usd"] + call["cost_usd"], 6)
+
+
+def _merge(dst: Dict[str, Any], src: Dict[str, Any]) -> None:
+    for k, v in (src or {}).items():
+        if k == "latency_ms_max":
+            dst[k] = max(dst.get(k, 0.0), v)
+        elif isinstance(v, (int, float)):
+            dst[k] = round(dst.get(k, 0) + v, 6) if isinstance(v, float) else dst.get(k, 0) + v
+
+
+def default_projects_dir() -> str:
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(base_dir, "projects")
+
+
+class UsageLedger:
+    """Thread-safe per-episode usage ledger persisted as projects/<episode_id>/llm_usage.json."""
+
+    def __init__(self, projects_dir: str):
+        self.projects_dir = projects_dir
+        self._lock = threading.Lock()
+        self._docs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    def path_for(self, episode_id: str) -> str:
+        return os.path.join(self.projects_dir, episode_id, LEDGER_FILENAME)
+
+    def _read(self, episode_id: str) -> Dict[str, Any]:
+        """Ledger z disku (bez cachování); chybějící/nevalidní soubor → prázdný ledger."""
+        try:
+            with open(self.path_for(episode_id), "r", encoding="utf-8") as f:
+                doc = json.load(f)
+        except Exception:
+            doc = None
+        if not isinstance(doc, dict) or doc.get("version") != LEDGER_VERSION:
+            doc = {"version": LEDGER_VERSION, "episode_id": episode_id, "totals": _empty_bucket(), "steps": {}, "models": {}}
+        return doc
+
+    def _load(self, episode_id: str) -> Dict[str, Any]:
+        """Ledger epizody, která v tomto procesu zapisuje (drží se v paměti, LRU LEDGER_MEMORY_MAX_EPISODES)."""
+        doc = self._docs.get(episode_id)
+        if doc is None:
+            doc = self._read(episode_id)
+            self._docs[episode_id] = doc
+            while len(self._docs) > LEDGER_MEMORY_MAX_EPISODES:
+                self._docs.popitem(last=False)
+        else:
+            self._docs.move_to_end(episode_id)
+        return doc
+
+    def _persist(self, episode_id: str, doc: Dict[str, Any]) -> None:
+        episode_dir = os.path.join(self.projects_dir, episode_id)
+        if not os.path.isdir(episode_dir):
+            return  # neexistující projekt → jen in-memory (nevytváříme složky pro cizí ID)
+        fd, tmp_path = tempfile.mkstemp(prefix="llm_usage_", suffix=".json", dir=episode_dir)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(doc, f, ensure_ascii=False, indent=2)
+                f.write("\n")
+            os.replace(tmp_path, self.path_for(episode_id))
+        except Exception as e:
+            print(f"⚠️ LLM usage ledger: write failed for {episode_id}: {e}")
+        finally:
+            try:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            except Exception:
+                pass
+
+    def record(
+        self,
+        episode_id: str,
+        step: str,
+        provider: str,
+        model: Optional[str],
+        usage: Optional[Dict[str, Any]],
+        latency_ms: float,
+        ok: bool,
+        streamed: bool = False,
+    ) -> Dict[str, Any]:
+        usage = usage if isinstance(usage, dict) else {}
+
+        def _tok(k: str) -> int:
+            try:
+                return int(usage.get(k) or 0)
+            except Exception:
+                return 0
+
+        prompt_tokens, completion_tokens = _tok("prompt_tokens"), _tok("completion_tokens")
+        call = {
+            "ok": bool(ok),
+            "streamed": bool(streamed),
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": _tok("total_tokens") or prompt_tokens + completion_tokens,
+            "latency_ms": float(latency_ms or 0.0),
+            "cost_usd": estimate_cost_usd(model, prompt_tokens, completion_tokens),
+        }
+        model_key = str(model or "unknown").strip() or "unknown"
+        with self._lock:
+            doc = self._load(episode_id)
+            _add(doc["totals"], call)
+            _add(doc["steps"].setdefault(step, _empty_bucket()), call)
+            _add(doc["models"].setdefault(f"{provider}:{model_key}", _empty_bucket()), call)
+            doc["updated_at"] = _now_iso()
+            self._persist(episode_id, doc)
+            return dict(doc["totals"])
+
+    def episode_usage(self, episode_id: str) -> Dict[str, Any]:
+        with self._lock:
+            doc = self._docs.get(episode_id)
+            if doc is not None:
+                return json.loads(json.dumps(doc))
+        return self._read(episode_id)
+
+    def check_budget(self, episode_id: str) -> None:
+        """Raises LLMBudgetExceeded when the episode already reached LLM_EPISODE_BUDGET_USD/_TOKENS."""
+        budget_usd = _env_float("LLM_EPISODE_BUDGET_USD", 0.0)
+        budget_tokens = _env_float("LLM_EPISODE_BUDGET_TOKENS", 0.0)
+        if budget_usd <= 0 and budget_tokens <= 0:
+            return
+        with self._lock:
+            doc = self._docs.get(episode_id)
+            totals = dict((doc if doc is not None else self._read(episode_id))["totals"])
+        if budget_usd > 0 and totals["cost_usd"] >= budget_usd:
+            raise LLMBudgetExceeded(
+                f"LLM budget exceeded for episode {episode_id}: ${totals['cost_usd']:.4f} >= ${budget_usd:.4f} (LLM_EPISODE_BUDGET_USD)"
+            )
+        if budget_tokens > 0 and totals["total_tokens"] >= budget_tokens:
+            raise LLMBudgetExceeded(
+                f"LLM budget exceeded for episode {episode_id}: {totals['total_tokens']} tokens >= {int(budget_tokens)} (LLM_EPISODE_BUDGET_TOKENS)"
+            )
+
+    def aggregate(self, limit_episodes: int = 20) -> Dict[str, Any]:
+        """Host-level totals across all persisted ledgers: totals, per step, per model, top episodes by cost."""
+        totals, steps, models = _empty_bucket(), {}, {}
+        episodes = []
+        try:
+            names = sorted(os.listdir(self.projects_dir))
+        except Exception:
+            names = []
+        for name in names:
+            if not os.path.exists(self.path_for(name)):
+                continue
+            doc = self._read(name)  # persisted po každém record(); nečteme přes _docs, aby se necachovaly
+            _merge(totals, doc.get("totals"))
+            for k, b in (doc.get("steps") or {}).items():
+                _merge(steps.setdefault(k, _empty_bucket()), b)
+            for k, b in (doc.get("models") or {}).items():
+                _merge(models.setdefault(k, _empty_bucket()), b)
+            t = doc.get("totals") or {}
+            episodes.append({
+                "episode_id": name,
+                "cost_usd": t.get("cost_usd", 0.0),
+                "total_tokens": t.get("total_tokens", 0),
+                "latency_ms_total": t.get("latency_ms_total", 0.0),
+                "updated_at": doc.get("updated_at"),
+            })
+        episodes.sort(key=lambda e: (e["cost_usd"], e["total_tokens"]), reverse=True)
+        return {
+            "totals": totals,
+            "steps": steps,
+            "models": models,
+            "episodes": len(episodes),
+            "top_episodes": episodes[:max(0, int(limit_episodes))],
+        }
+
+
+_usage_ledger: Optional[UsageLedger] = None
+_usage_ledger_guard = threading.Lock()
+
+
+def get_usage_ledger() -> UsageLedger:
+    global _usage_ledger
+    with _usage_ledger_guard:
+        if _usage_ledger is None:
+            _usage_ledger = UsageLedger(default_projects_dir())
+        return _usage_ledger
+
+
+def check_budget_for_current_scope() -> None:
+    scope = _scope.get()
+    if scope:
+        get_usage_ledger().check_budget(scope["episode_id"])
+
+
+def record_llm_call(
+    provider: str,
+    model: Optional[str],
+    usage: Optional[Dict[str, Any]],
+    latency_ms: float,
+    ok: bool,
+    streamed: bool = False,
+) -> None:
+    """Called by llm_http_client for every HTTP attempt; no-op outside an episode scope."""
+    scope = _scope.get()
+    if not scope:
+        return
+    try:
+        get_usage_ledger().record(scope["episode_id"], scope["step"], provider, model, usage, latency_ms, ok, streamed=streamed)
+    except Exception as e:
+        print(f"⚠️ LLM usage ledger: record failed: {e}")
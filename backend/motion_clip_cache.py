@@ -0,0 +1,176 @@
+import hashlib
+import math
+import os
+import shutil
+import tempfile
+import threading
+from typing import Dict, Optional, Tuple
+
+from env_utils import env_int
+
+# Bump při změně zoompan výrazů / encoding parametrů (stará cache se pak ignoruje).
+MOTION_CACHE_VERSION = "v1"
+
+
+def motion_cache_enabled() -> bool:
+    return (os.getenv("CB_MOTION_CACHE", "1") or "").strip().lower() in ("1", "true", "yes")
+
+
+def motion_cache_max_bytes() -> int:
+    """Byte budget of the motion cache (MOTION_CACHE_MAX_MB, default 20 GB; 0 = unlimited)."""
+    return env_int("MOTION_CACHE_MAX_MB", 20 * 1024, minimum=0) * 1024 * 1024
+
+
+def duration_bucket(duration_sec: float, bucket_sec: Optional[float] = None) -> float:
+    """
+    Rounds a still-image clip duration UP to the cache bucket (default CB_MOTION_CACHE_BUCKET_SEC=0.5 s).
+    The cached master is rendered at the bucket length and trimmed to the exact duration on use.
+    Trade-off: the trim cuts the end of the move, so a trimmed clip stops up to one bucket short of
+    the zoom/pan end pose (motion speed is unchanged). Smaller bucket = closer end pose, more masters.
+    """
+    if bucket_sec is None:
+        try:
+            bucket_sec = float(os.getenv("CB_MOTION_CACHE_BUCKET_SEC", "0.5"))
+        except Exception:
+            bucket_sec = 0.5
+    if not bucket_sec or bucket_sec <= 0:
+        return round(float(duration_sec), 3)
+    return round(math.ceil(float(duration_sec) / bucket_sec - 1e-6) * bucket_sec, 3)
+
+
+class MotionClipCache:
+    """
+    FS-backed cache of rendered Ken Burns (zoompan) clips for still images (shared across episodes).
+    - Location: podcasts/cache/motion/<xx>/<sha256>.mp4
+    - Key: image content hash + effect variant + duration bucket + resolution + fps (+ encoder preset)
+    - Size: LRU by mtime (hits touch the file); put_file prunes the oldest masters above
+      MOTION_CACHE_MAX_MB
+    """
+
+    def __init__(self, base_dir: str):
+        self.base_dir = base_dir
+        self.cache_dir = os.path.join(self.base_dir, "cache", "motion")
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._hash_lock = threading.Lock()
+        self._hash_memo: Dict[Tuple[str, int, int], str] = {}
+        self._size_lock = threading.Lock()
+        self._total_bytes: Optional[int] = None  # lazily scanned on first put
+
+    def image_hash(self, image_path: str) -> str:
+        """SHA-256 of the image bytes (memoized per path/size/mtime)."""
+        path = os.path.abspath(image_path)
+        st = os.stat(path)
+        memo_key = (path, st.st_size, st.st_mtime_ns)
+        with self._hash_lock:
+            cached = self._hash_memo.get(memo_key)
+        if cached:
+            return cached
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                h.update(chunk)
+        digest = h.hexdigest()
+        with self._hash_lock:
+            self._hash_memo[memo_key] = digest
+        return digest
+
+    @staticmethod
+    def key_for(image_hash: str, effect_variant: int, duration_sec: float, resolution: str, fps: int, preset: str = "") -> str:
+        payload = f"{MOTION_CACHE_VERSION}|{image_hash}|{int(effect_variant)}|{float(duration_sec):.3f}|{resolution}|{int(fps)}|{preset}"
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.mp4")
+
+    def get(self, key: str) -> Optional[str]:
+        """Returns cached clip path or None."""
+        path = self.path_for(key)
+        try:
+            if os.path.getsize(path) > 0:
+                os.utime(path)  # LRU: mtime = last use
+                return path
+        except OSError:
+            pass
+        return None
+
+    def tmp_path_for(self, key: str) -> str:
+        """Unique temp path next to the final cache entry (render target for put_file)."""
+        directory = os.path.dirname(self.path_for(key))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix="motion_", suffix=".mp4", dir=directory)
+        os.close(fd)
+        return tmp_path
+
+    def put_file(self, key: str, rendered_path: str) -> Optional[str]:
+        """Moves a freshly rendered clip into the cache (atomic). Returns the cache path."""
+        path = self.path_for(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(rendered_path, path)
+            size = os.path.getsize(path)
+        except Exception as e:
+            print(f"⚠️  Motion cache: store failed for {key[:12]}: {e}")
+            return None
+        max_bytes = motion_cache_max_bytes()
+        if max_bytes > 0:
+            with self._size_lock:
+                if self._total_bytes is None:
+                    self._total_bytes = sum(s for _p, s, _m in self._entries())
+                else:
+                    self._total_bytes += size
+                over = self._total_bytes > max_bytes
+            if over:
+                self.prune(max_bytes, keep=path)
+        return path
+
+    def _entries(self):
+        """[(path, size, mtime)] of all cached masters (temp render files excluded)."""
+        out = []
+        for root, _dirs, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith(".mp4") or name.startswith("motion_"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                out.append((path, st.st_size, st.st_mtime))
+        return out
+
+    def prune(self, max_bytes: Optional[int] = None, keep: Optional[str] = None) -> int:
+        """
+        Removes least recently used masters until the cache fits max_bytes
+        (default MOTION_CACHE_MAX_MB). Returns removed count.
+        """
+        max_bytes = motion_cache_max_bytes() if max_bytes is None else int(max_bytes)
+        with self._size_lock:
+            entries = sorted(self._entries(), key=lambda e: e[2])
+            total = sum(e[1] for e in entries)
+            removed = 0
+            for path, size, _mtime in entries:
+                if max_bytes <= 0 or total <= max_bytes:
+                    break
+                if path == keep:
+                    continue
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                removed += 1
+            self._total_bytes = total
+        if removed:
+            print(f"🧹 Motion cache: pruned {removed} clips (now {total / (1024 * 1024):.0f} MB)")
+        return removed
+
+    def copy_to(self, key: str, dest_path: str) -> bool:
+        src = self.get(key)
+        if not src:
+            return False
+        try:
+            shutil.copyfile(src, dest_path)
+            return os.path.getsize(dest_path) > 0
+        except Exception as e:
+            print(f"⚠️  Motion cache: copy failed for {key[:12]}: {e}")
+            return False
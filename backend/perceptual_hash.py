@@ -0,0 +1,248 @@
+"""
+Local perceptual-hash near-duplicate detection for pool thumbnails (Pillow + NumPy, no API).
+
+- phash (32x32 DCT, 64 bit) + dhash (9x8 gradient, 64 bit) per thumbnail
+- BK-tree over pHash (Hamming) → neighbours within a radius in ~log(n)
+- pHash <= PHASH_DUP_MAX_DIST and dHash <= DHASH_DUP_MAX_DIST  → sure duplicate (collapsed locally)
+- pHash <= PHASH_AMBIGUOUS_MAX_DIST (or unhashable thumbnail)   → ambiguous (left for the Vision LLM)
+
+Env: PHASH_DEDUP (1), PHASH_DUP_MAX_DIST (6), DHASH_DUP_MAX_DIST (10), PHASH_AMBIGUOUS_MAX_DIST (14)
+"""
+
+import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from env_utils import env_int
+from thumbnail_cache import fetch_thumbnail_bytes, thumbnail_source_pixels
+
+SOURCE_PRIORITY = {"archive_org": 3, "wikimedia": 2, "europeana": 1}
+
+
+def phash_dedup_enabled() -> bool:
+    return (os.getenv("PHASH_DEDUP", "1") or "").strip().lower() in ("1", "true", "yes")
+
+
+def _bits_to_int(bits: np.ndarray) -> int:
+    out = 0
+    for b in bits.flatten():
+        out = (out << 1) | int(bool(b))
+    return out
+
+
+_DCT_CACHE: Dict[int, np.ndarray] = {}
+
+
+def _dct_matrix(n: int) -> np.ndarray:
+    m = _DCT_CACHE.get(n)
+    if m is None:
+        k = np.arange(n).reshape(-1, 1)
+        i = np.arange(n).reshape(1, -1)
+        m = np.cos(np.pi * (2 * i + 1) * k / (2 * n))
+        _DCT_CACHE[n] = m
+    return m
+
+
+def phash(img: Image.Image) -> int:
+    """64-bit DCT hash: low 8x8 frequencies of a 32x32 grayscale, thresholded at their median (DC excluded)."""
+    px = np.asarray(img.convert("L").resize((32, 32), Image.LANCZOS), dtype=np.float64)
+    d = _dct_matrix(32)
+    low = (d @ px @ d.T)[:8, :8]
+    median = np.median(low.flatten()[1:])
+    return _bits_to_int(low > median)
+
+
+def dhash(img: Image.Image) -> int:
+    """64-bit gradient hash: is each pixel brighter than its right neighbour (9x8 grayscale)."""
+    px = np.asarray(img.convert("L").resize((9, 8), Image.LANCZOS), dtype=np.int16)
+    return _bits_to_int(px[:, 1:] > px[:, :-1])
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+class BKTree:
+    """Burkhard-Keller tree over integer hashes with Hamming distance."""
+
+    def __init__(self):
+        self._root: Optional[Tuple[int, Any, Dict[int, Any]]] = None
+
+    def add(self, h: int, item: Any) -> None:
+        if self._root is None:
+            self._root = (h, item, {})
+            return
+        node = self._root
+        while True:
+            d = hamming(h, node[0])
+            child = node[2].get(d)
+            if child is None:
+                node[2][d] = (h, item, {})
+                return
+            node = child
+
+    def query(self, h: int, radius: int) -> List[Tuple[int, Any]]:
+        """[(distance, item)] for all stored hashes within radius."""
+        out: List[Tuple[int, Any]] = []
+        stack = [self._root] if self._root is not None else []
+        while stack:
+            node = stack.pop()
+            d = hamming(h, node[0])
+            if d <= radius:
+                out.append((d, node[1]))
+            for dist, child in node[2].items():
+                if d - radius <= dist <= d + radius:
+                    stack.append(child)
+        return out
+
+
+# url -> {"phash", "dhash", "pixels"} | None (per-process memo; downloads are the slow part)
+_hash_memo: Dict[str, Optional[Dict[str, int]]] = {}
+_hash_memo_lock = threading.Lock()
+
+
+def fetch_image_bytes(url: str) -> Optional[bytes]:
+    """Thumbnail via the shared on-disk cache (thumbnail_cache.py) – no re-download across runs/stages."""
+    return fetch_thumbnail_bytes(url)
+
+
+def hash_image_bytes(data: bytes) -> Optional[Dict[str, int]]:
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            img.load()
+            return {"phash": phash(img), "dhash": dhash(img), "pixels": int(img.width * img.height)}
+    except Exception:
+        return None
+
+
+def thumbnail_hashes(
+    urls: List[str],
+    fetch: Optional[Callable[[str], Optional[bytes]]] = None,
+    max_workers: int = 8,
+) -> Dict[str, Optional[Dict[str, int]]]:
+    """
+    Hashes for each URL (None when the thumbnail can't be fetched/decoded); memoized per process.
+    "pixels" is the original image size when the thumbnail came through the shared cache
+    (its JPEG is downscaled to THUMB_MAX_SIDE, so the decoded size can't rank quality).
+    """
+    from_cache = fetch is None
+    fetch = fetch or fetch_image_bytes
+    todo = []
+    with _hash_memo_lock:
+        for u in dict.fromkeys(urls):
+            if u not in _hash_memo:
+                todo.append(u)
+
+    def _one(u: str) -> Tuple[str, Optional[Dict[str, int]]]:
+        data = fetch(u)
+        h = hash_image_bytes(data) if data else None
+        if h and from_cache:
+            h["pixels"] = thumbnail_source_pixels(u) or h["pixels"]
+        return u, h
+
+    if todo:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(todo)))) as pool:
+            for u, h in pool.map(_one, todo):
+                with _hash_memo_lock:
+                    _hash_memo[u] = h
+    with _hash_memo_lock:
+        return {u: _hash_memo.get(u) for u in urls}
+
+
+def local_near_duplicate_groups(
+    candidates: List[Dict[str, Any]],
+    fetch: Optional[Callable[[str], Optional[bytes]]] = None,
+) -> Dict[str, Any]:
+    """
+    Groups pool candidates by perceptual hash.
+
+    Args:
+        candidates: pool candidates (thumbnail_url / asset_url, archive_item_id, _source)
+        fetch: url -> image bytes (injectable for tests)
+
+    Returns:
+        {
+            "groups": [{"ids": [...], "best_id": str, "reason": str}],   # sure duplicates
+            "duplicate_of": {id: best_id},
+            "ambiguous_ids": [id...],    # need the Vision LLM (borderline distance or no hash)
+            "hashed": int, "unhashed": int,
+        }
+    """
+    dup_max = env_int("PHASH_DUP_MAX_DIST", 6)
+    dhash_max = env_int("DHASH_DUP_MAX_DIST", 10)
+    ambiguous_max = max(dup_max, env_int("PHASH_AMBIGUOUS_MAX_DIST", 14))
+
+    ids: List[str] = []
+    urls: Dict[str, str] = {}
+    for i, c in enumerate(candidates):
+        cid = str(c.get("archive_item_id") or f"asset_{i}")
+        ids.append(cid)
+        url = str(c.get("thumbnail_url") or c.get("asset_url") or "").strip()
+        if url:
+            urls[cid] = url
+    hashes_by_url = thumbnail_hashes(list(urls.values()), fetch=fetch)
+    hashes = {cid: hashes_by_url.get(u) for cid, u in urls.items()}
+
+    tree = BKTree()
+    for cid in ids:
+        if hashes.get(cid):
+            tree.add(hashes[cid]["phash"], cid)
+
+    parent = {cid: cid for cid in ids}
+
+    def find(x: str) -> str:
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    ambiguous = set(cid for cid in ids if not hashes.get(cid))
+    for cid in ids:
+        h = hashes.get(cid)
+        if not h:
+            continue
+        for d, other in tree.query(h["phash"], ambiguous_max):
+            if other == cid:
+                continue
+            if d <= dup_max and hamming(h["dhash"], hashes[other]["dhash"]) <= dhash_max:
+                parent[find(other)] = find(cid)
+            else:
+                ambiguous.update((cid, other))
+
+    by_index = {cid: i for i, cid in enumerate(ids)}
+    clusters: Dict[str, List[str]] = {}
+    for cid in ids:
+        clusters.setdefault(find(cid), []).append(cid)
+
+    groups = []
+    duplicate_of: Dict[str, str] = {}
+    for members in clusters.values():
+        if len(members) < 2:
+            continue
+
+        def _rank(cid: str) -> Tuple[int, int, int]:
+            c = candidates[by_index[cid]]
+            src = str(c.get("_source") or c.get("source") or "")
+            return ((hashes.get(cid) or {}).get("pixels", 0), SOURCE_PRIORITY.get(src, 0), -by_index[cid])
+
+        best = max(members, key=_rank)
+        groups.append({"ids": members, "best_id": best, "reason": "local perceptual hash (pHash/dHash)"})
+        for cid in members:
+            if cid != best:
+                duplicate_of[cid] = best
+
+    # A collapsed duplicate never goes to the LLM; its cluster representative (best_id) goes instead,
+    # so a borderline pair found through any member of the cluster is still checked.
+    ambiguous_ids = list(dict.fromkeys(duplicate_of.get(cid, cid) for cid in ids if cid in ambiguous))
+    return {
+        "groups": groups,
+        "duplicate_of": duplicate_of,
+        "ambiguous_ids": ambiguous_ids,
+        "hashed": sum(1 for cid in ids if hashes.get(cid)),
+        "unhashed": sum(1 for cid in ids if not hashes.get(cid)),
+    }
@@ -0,0 +1,65 @@
+import json
+import queue
+import threading
+from typing import Any, Dict, List, Optional
+
+
+class ProgressBus:
+    """
+    In-process pub/sub for pipeline progress (feeds /api/script/events/<episode_id> SSE).
+
+    Publishers: ProjectStore (step transitions / full writes, progress records) and the
+    CB progress callback. Events are serialized at publish time, so subscribers never
+    touch the filesystem or shared mutable state.
+    """
+
+    def __init__(self, max_queue: int = 256):
+        self.max_queue = max_queue
+        self._lock = threading.Lock()
+        self._subscribers: Dict[str, List[queue.Queue]] = {}
+        self._last: Dict[str, str] = {}
+
+    def publish(self, episode_id: str, event: Dict[str, Any]) -> None:
+        if not episode_id:
+            return
+        try:
+            payload = json.dumps({**event, "episode_id": episode_id}, ensure_ascii=False, default=str)
+        except Exception as e:
+            print(f"⚠️  ProgressBus: event not serializable: {e}")
+            return
+        with self._lock:
+            if event.get("type") == "state":
+                self._last[episode_id] = payload
+            subscribers = list(self._subscribers.get(episode_id) or [])
+        for q in subscribers:
+            try:
+                q.put_nowait(payload)
+            except queue.Full:
+                # Slow consumer: drop the oldest event, keep the newest.
+                try:
+                    q.get_nowait()
+                    q.put_nowait(payload)
+                except Exception:
+                    pass
+
+    def subscribe(self, episode_id: str) -> queue.Queue:
+        q: queue.Queue = queue.Queue(maxsize=self.max_queue)
+        with self._lock:
+            self._subscribers.setdefault(episode_id, []).append(q)
+        return q
+
+    def unsubscribe(self, episode_id: str, q: queue.Queue) -> None:
+        with self._lock:
+            subs = self._subscribers.get(episode_id) or []
+            if q in subs:
+                subs.remove(q)
+            if not subs:
+                self._subscribers.pop(episode_id, None)
+
+    def last_state(self, episode_id: str) -> Optional[str]:
+        """Last published "state" event (serialized), if any."""
+        with self._lock:
+            return self._last.get(episode_id)
+
+
+progress_bus = ProgressBus()
@@ -1,17 +1,202 @@
+import hashlib
 import json
 import os
 import tempfile
+import threading
+from collections import OrderedDict
 from datetime import datetime, timezone
+from typing import Iterable, Optional
+
+from env_utils import env_int
+from progress_events import progress_bus
 
 
 def _now_iso() -> str:
     return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
 
 
+# Heavy top-level keys live in their own documents: projects/<episode_id>/state/<key>.json.
+# script_state.json keeps the light keys (steps, status, configs, paths) + a digest per shard,
+# so step transitions and progress updates do not re-serialize research/drafts/shot plans.
+SHARDED_STATE_KEYS = (
+    "research_report",
+    "research_raw_output",
+    "draft_script",
+    "narrative_raw_output",
+    "validation_result",
+    "validation_raw_output",
+    "script_package",
+    "composer_raw_output",
+    "tts_ready_package",
+    "tts_format_raw_output",
+    "metadata",
+    "shot_plan",
+    "footage_director_raw_output",
+    "asset_resolver_output",
+    "compilation_builder_output",
+)
+STATE_SHARDS_DIRNAME = "state"
+PROGRESS_FILENAME = "progress.json"
+_SHARD_DIGESTS_KEY = "_shards"
+# Set on partial reads (parts=...): shards that were NOT loaded and must not be treated as deleted on write.
+UNLOADED_SHARDS_KEY = "_unloaded_shards"
+
+
+def _atomic_write_json(path: str, obj, prefix: str, indent: Optional[int] = 2) -> None:
+    directory = os.path.dirname(path)
+    fd, tmp_path = tempfile.mkstemp(prefix=prefix, suffix=".json", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(obj, f, ensure_ascii=False, indent=indent)
+            f.write("\n")
+        os.replace(tmp_path, path)
+    finally:
+        try:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        except Exception:
+            pass
+
+
+def _read_json(path: str):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class ParsedJsonCache:
+    """
+    Bounded LRU of parsed JSON documents keyed by absolute path, validated by (mtime_ns, size, inode)
+    – atomic writes (os.replace) always produce a new inode, so same-tick rewrites are detected too.
+    Shared by all ProjectStore instances (endpoints often create their own store).
+
+    Cached objects are shared: callers of the readonly APIs must not mutate them.
+    """
+
+    def __init__(self, max_entries: int = 64, max_bytes: int = 256 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # path -> (mtime_ns, size, ino, obj)
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def load(self, path: str):
+        """Returns the parsed document (shared object). Raises FileNotFoundError like _read_json."""
+        key = os.path.abspath(path)
+        st = os.stat(key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[:3] == (st.st_mtime_ns, st.st_size, st.st_ino):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[3]
+            self.misses += 1
+        obj = _read_json(key)
+        self._store(key, st, obj)
+        return obj
+
+    def put(self, path: str, obj) -> None:
+        """Records a document the caller has just written (obj must not be mutated afterwards)."""
+        key = os.path.abspath(path)
+        try:
+            st = os.stat(key)
+        except OSError:
+            self.invalidate(key)
+            return
+        self._store(key, st, obj)
+
+    def invalidate(self, path: str) -> None:
+        key = os.path.abspath(path)
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry:
+                self._bytes -= entry[1]
+
+    def _store(self, key: str, st, obj) -> None:
+        if self.max_entries <= 0 or st.st_size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old:
+                self._bytes -= old[1]
+            self._entries[key] = (st.st_mtime_ns, st.st_size, st.st_ino, obj)
+            self._bytes += st.st_size
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _k, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted[1]
+
+
+_parsed_json_cache = ParsedJsonCache(
+    max_entries=env_int("PROJECT_STORE_CACHE_ENTRIES", 64, minimum=0),
+    max_bytes=env_int("PROJECT_STORE_CACHE_MB", 256, minimum=0) * 1024 * 1024,
+)
+
+
+def _overlay_progress(state: dict, progress: dict) -> None:
+    """
+    Applies the tiny progress record on top of the core state.
+    Only while the pipeline is running: a full write (step DONE/ERROR) always supersedes progress.
+    """
+    if not str(state.get("script_status") or "").startswith("RUNNING"):
+        return
+    steps = state.get("steps") if isinstance(state.get("steps"), dict) else {}
+    for step_key, fields in (progress.get("steps") or {}).items():
+        step = steps.get(step_key)
+        if isinstance(step, dict) and step.get("status") == "RUNNING" and isinstance(fields, dict):
+            # Copy-on-write: `state` may share nested objects with the parse cache.
+            steps = state["steps"] = {**steps, step_key: {**step, **fields}}
+    for key, value in (progress.get("fields") or {}).items():
+        state[key] = value
+
+
+def load_script_state_file(path: str, parts: Optional[Iterable[str]] = None, readonly: bool = False) -> dict:
+    """
+    Reads script_state.json at `path` and merges its shards (+ progress record).
+
+    Args:
+        parts: None = everything; otherwise only these sharded keys are loaded
+               (light keys are always present).
+        readonly: Serve documents from the in-memory parse cache (validated by mtime/size).
+                  The returned dict is fresh, but nested values are shared with the cache
+                  and must not be mutated.
+    """
+    read = _parsed_json_cache.load if readonly else _read_json
+    state = read(path)
+    if not isinstance(state, dict):
+        return state
+    if readonly:
+        state = dict(state)
+    episode_dir = os.path.dirname(path)
+    digests = state.pop(_SHARD_DIGESTS_KEY, None)
+    if isinstance(digests, dict):
+        wanted = set(digests) if parts is None else set(parts) & set(digests)
+        unloaded = sorted(set(digests) - wanted)
+        for key in sorted(wanted):
+            shard_path = os.path.join(episode_dir, STATE_SHARDS_DIRNAME, f"{key}.json")
+            try:
+                state[key] = read(shard_path)
+            except FileNotFoundError:
+                unloaded.append(key)
+        if unloaded:
+            state[UNLOADED_SHARDS_KEY] = sorted(unloaded)
+
+    progress_path = os.path.join(episode_dir, PROGRESS_FILENAME)
+    if os.path.exists(progress_path):
+        try:
+            progress = _read_json(progress_path)
+            if isinstance(progress, dict):
+                _overlay_progress(state, progress)
+        except Exception:
+            pass
+    return state
+
+
 class ProjectStore:
     """
     FS-based per-episode store.
     Source of truth: podcasts/projects/<episode_id>/script_state.json
+    (+ sharded heavy keys in state/<key>.json and a tiny progress.json)
     """
 
     def __init__(self, base_projects_dir: str):
@@ -24,20 +209,45 @@ class ProjectStore:
     def script_state_path(self, episode_id: str) -> str:
         return os.path.join(self.episode_dir(episode_id), "script_state.json")
 
+    def progress_path(self, episode_id: str) -> str:
+        return os.path.join(self.episode_dir(episode_id), PROGRESS_FILENAME)
+
+    def shard_path(self, episode_id: str, key: str) -> str:
+        return os.path.join(self.episode_dir(episode_id), STATE_SHARDS_DIRNAME, f"{key}.json")
+
     def exists(self, episode_id: str) -> bool:
         return os.path.exists(self.script_state_path(episode_id))
 
-    def read_script_state(self, episode_id: str) -> dict:
+    def manifest_path(self, episode_id: str) -> str:
+        return os.path.join(self.episode_dir(episode_id), "archive_manifest.json")
+
+    def read_script_state(self, episode_id: str, parts: Optional[Iterable[str]] = None, readonly: bool = False) -> dict:
+        """
+        Args:
+            parts: Optional list of sharded keys to load (e.g. ["shot_plan"]). Light keys
+                   (steps, status, configs, paths) are always loaded. None = full state.
+            readonly: Hot read path for UI endpoints – parsed documents come from the in-memory
+                      cache; nested values must not be mutated (see ParsedJsonCache).
+        """
         path = self.script_state_path(episode_id)
         if not os.path.exists(path):
             raise FileNotFoundError(path)
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
+        return load_script_state_file(path, parts=parts, readonly=readonly)
+
+    def read_manifest(self, episode_id: str) -> dict:
+        """
+        Parsed archive_manifest.json from the in-memory cache (read-only, do not mutate).
+        Raises FileNotFoundError when the manifest does not exist.
+        """
+        return _parsed_json_cache.load(self.manifest_path(episode_id))
 
     def write_script_state(self, episode_id: str, state: dict) -> None:
         """
         Atomic write: write to temp file in same dir, then replace.
         Always updates updated_at (UTC ISO) unless caller already set it.
+
+        Heavy keys are written to their shard only when their content changed; the
+        progress record is cleared (a full write supersedes it).
         """
         episode_dir = self.episode_dir(episode_id)
         os.makedirs(episode_dir, exist_ok=True)
@@ -46,20 +256,91 @@ class ProjectStore:
             state["updated_at"] = _now_iso()
 
         path = self.script_state_path(episode_id)
-        fd, tmp_path = tempfile.mkstemp(prefix="script_state_", suffix=".json", dir=episode_dir)
+        previous_digests = {}
         try:
-            with os.fdopen(fd, "w", encoding="utf-8") as f:
-                json.dump(state, f, ensure_ascii=False, indent=2)
-                f.write("\n")
-            os.replace(tmp_path, path)
-        finally:
+            previous_digests = (_parsed_json_cache.load(path) or {}).get(_SHARD_DIGESTS_KEY) or {}
+        except Exception:
+            previous_digests = {}
+
+        unloaded = set(state.get(UNLOADED_SHARDS_KEY) or [])
+        core = {k: v for k, v in state.items() if k not in SHARDED_STATE_KEYS and k != UNLOADED_SHARDS_KEY}
+        digests = {}
+        shards_dir = os.path.join(episode_dir, STATE_SHARDS_DIRNAME)
+        for key in SHARDED_STATE_KEYS:
+            if key in state:
+                payload = json.dumps(state[key], ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+                digest = hashlib.sha1(payload.encode("utf-8")).hexdigest()
+                digests[key] = digest
+                shard_file = os.path.join(shards_dir, f"{key}.json")
+                if previous_digests.get(key) != digest or not os.path.exists(shard_file):
+                    os.makedirs(shards_dir, exist_ok=True)
+                    _atomic_write_json(shard_file, state[key], prefix=f"{key}_")
+            elif key in unloaded and key in previous_digests:
+                # Partial read: keep the shard untouched.
+                digests[key] = previous_digests[key]
+        core[_SHARD_DIGESTS_KEY] = digests
+
+        _atomic_write_json(path, core, prefix="script_state_")
+        _parsed_json_cache.put(path, json.loads(json.dumps(core, ensure_ascii=False)))
+
+        # Shards removed from state (key deleted by caller)
+        for key in set(previous_digests) - set(digests):
+            _parsed_json_cache.invalidate(os.path.join(shards_dir, f"{key}.json"))
             try:
-                if os.path.exists(tmp_path):
-                    os.remove(tmp_path)
+                os.remove(os.path.join(shards_dir, f"{key}.json"))
+            except FileNotFoundError:
+                pass
             except Exception:
                 pass
 
+        try:
+            os.remove(self.progress_path(episode_id))
+        except FileNotFoundError:
+            pass
+        except Exception:
+            pass
 
+        # SSE subscribers get the light state (step transitions) without re-reading the file.
+        progress_bus.publish(episode_id, {
+            "type": "state",
+            "state": {k: v for k, v in core.items() if k != _SHARD_DIGESTS_KEY},
+        })
 
+    def write_progress(
+        self,
+        episode_id: str,
+        step: Optional[str] = None,
+        step_fields: Optional[dict] = None,
+        fields: Optional[dict] = None,
+    ) -> None:
+        """
+        Lightweight progress channel (projects/<episode_id>/progress.json, a few hundred bytes).
+        Merged into read_script_state() while the step is RUNNING; cleared by the next full write.
 
-
+        Args:
+            step: Step key whose fields to update (e.g. "asset_resolver")
+            step_fields: e.g. {"progress": 40, "message": "..."}
+            fields: Top-level state keys (e.g. {"compilation_progress": {...}})
+        """
+        episode_dir = self.episode_dir(episode_id)
+        os.makedirs(episode_dir, exist_ok=True)
+        path = self.progress_path(episode_id)
+        try:
+            progress = _read_json(path) if os.path.exists(path) else {}
+        except Exception:
+            progress = {}
+        if not isinstance(progress, dict):
+            progress = {}
+        if step and step_fields:
+            progress.setdefault("steps", {}).setdefault(step, {}).update(step_fields)
+        if fields:
+            progress.setdefault("fields", {}).update(fields)
+        progress["updated_at"] = _now_iso()
+        _atomic_write_json(path, progress, prefix="progress_", indent=None)
+        progress_bus.publish(episode_id, {
+            "type": "progress",
+            "step": step,
+            "step_fields": step_fields or {},
+            "fields": fields or {},
+            "updated_at": progress["updated_at"],
+        })
@@ -6,7 +6,7 @@ import time
 import uuid
 import glob
 from datetime import datetime, timezone
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Callable, Dict, Optional, Tuple
 
 # Cross-process lock support (macOS/Linux).
 try:
@@ -16,12 +16,26 @@ except Exception:
     fcntl = None  # type: ignore
     _FCNTL_AVAILABLE = False
 
-import requests
 
 from project_store import ProjectStore
+from progress_events import progress_bus
 from footage_director import run_fda_llm
-from archive_asset_resolver import resolve_shot_plan_assets
-from compilation_builder import build_episode_compilation
+from archive_asset_resolver import prefetch_episode_pool_searches, resolve_shot_plan_assets
+from compilation_builder import AssetPrefetcher, build_episode_compilation
+from motion_clip_cache import MotionClipCache, motion_cache_enabled
+from incremental_json import IncrementalArrayParser
+from llm_http_client import llm_client
+from llm_usage_ledger import LLMBudgetExceeded, set_usage_scope
+from llm_response_cache import (
+    LLMResponseCache,
+    default_llm_cache_dir,
+    llm_cache_enabled,
+    llm_cache_key,
+    step_caches_temperature,
+    step_ttl_sec,
+)
+from voiceover_assembly import voiceover_timeline, write_srt
+from tts_synthesis import TTSPrewarmer
 
 
 def _now_iso() -> str:
@@ -109,17 +123,58 @@ def _llm_chat_json_raw(
     model: str = "gpt-4o",
     temperature: float = 0.4,
     timeout_s: int = 600,
+    cache_step: Optional[str] = None,
+    on_partial: Optional[Callable[[dict, int, str], None]] = None,
+    bypass_cache: bool = False,
 ) -> Tuple[str, Optional[dict], dict]:
     """
     Calls provider Chat Completions.
     For maximum compatibility (OpenRouter multi-provider), we DO NOT rely on response_format,
     and instead parse JSON from returned text. (Still stored as raw output for debugging.)
+    cache_step: pipeline step name for the opt-in response cache (LLM_RESPONSE_CACHE=1, per-step TTL,
+                see llm_response_cache.py). Non-zero temperatures only for steps that allow it
+                (step_caches_temperature); an inactive cache is logged once per step.
+                meta["cache"] = {"hit": bool, "key", ...} when the cache is used. A fresh response is NOT
+                stored here: the caller stores it with commit_llm_cache() once the step's validation passed.
+    on_partial: optional callback(item, index, key) for each completed item of the first
+                tts_segments / narration_blocks / scenes array. With LLM_STREAMING enabled (default)
+                the response is streamed (SSE) and items arrive while the LLM is still generating;
+                otherwise (and on cache hits) they are replayed from the final text. Each item is
+                delivered exactly once; callback errors are logged and ignored.
+    bypass_cache: skip the cache lookup (explicit retries must get a new answer); the fresh
+                  response can still be committed and replaces the old entry.
     Returns: (raw_text, parsed_json_or_none)
     """
     provider = (provider or "").strip().lower()
     if provider not in ("openai", "openrouter"):
         raise ValueError(f"Nepodporovaný provider: {provider}")
 
+    system_prompt = "Return ONLY valid JSON (object) matching the requested schema. Do not include markdown."
+    max_tokens = 16000
+
+    cache_key: Optional[str] = None
+    cacheable = bool(cache_step) and llm_cache_enabled()
+    cache_ttl = 0
+    if cacheable:
+        if not step_caches_temperature(cache_step, temperature):
+            _log_llm_cache_inactive(cache_step, f"temperature={temperature} not allowed (LLM_RESPONSE_CACHE_ANY_TEMP_{str(cache_step).upper()}=1)")
+        else:
+            cache_ttl = step_ttl_sec(cache_step)
+            if cache_ttl <= 0:
+                _log_llm_cache_inactive(cache_step, "TTL 0")
+    if cache_ttl > 0:
+        cache_key = llm_cache_key(provider, model, temperature, prompt, system_prompt, max_tokens)
+        hit = None if bypass_cache else _get_llm_response_cache().get(cache_key, cache_ttl)
+        if hit:
+            parsed_hit = _parse_json_from_text(hit["raw_text"])
+            if parsed_hit is not None:
+                meta_hit = dict(hit.get("meta") or {})
+                meta_hit["cache"] = {"hit": True, "key": cache_key, "step": cache_step, "age_sec": hit.get("age_sec")}
+                print(f"♻️  LLM cache hit: step={cache_step} model={model} age={hit.get('age_sec')}s (0 tokens)")
+                if on_partial is not None:
+                    _replay_partials(on_partial, hit["raw_text"])
+                return hit["raw_text"], parsed_hit, meta_hit
+
     if provider == "openai":
         url = "https://api.openai.com/v1/chat/completions"
         headers = {"Content-Type": "application/json", "Authorization": f"Bearer {api_key}"}
@@ -138,44 +193,102 @@ def _llm_chat_json_raw(
         "messages": [
             {
                 "role": "system",
-                "content": "Return ONLY valid JSON (object) matching the requested schema. Do not include markdown.",
+                "content": system_prompt,
             },
             {"role": "user", "content": prompt},
         ],
         "temperature": temperature,
-        "max_tokens": 16000,
+        "max_tokens": max_tokens,
     }
-    resp = requests.post(url, headers=headers, json=payload, timeout=timeout_s)
+    streamed_items = [0]
+    parser = IncrementalArrayParser() if on_partial is not None else None
 
-    meta: dict = {
-        "provider": provider,
-        "url": url,
-        "http_status": resp.status_code,
-    }
+    def _emit(items: list) -> None:
+        for item in items:
+            try:
+                on_partial(item, streamed_items[0], parser.key or "")
+            except Exception as e:
+                print(f"⚠️  LLM stream: on_partial callback failed: {e}")
+            streamed_items[0] += 1
+
+    meta: dict
+    if on_partial is not None and llm_streaming_enabled():
+        payload["stream"] = True
+        if provider == "openai":
+            payload["stream_options"] = {"include_usage": True}
+        else:
+            payload["usage"] = {"include": True}
+        acc: dict = {"content": [], "reasoning": [], "finish_reason": None, "native_finish_reason": None, "head": {}}
+
+        def _on_data(event: dict) -> None:
+            for k in ("id", "model", "provider"):
+                if event.get(k) and k not in acc["head"]:
+                    acc["head"][k] = event.get(k)
+            if isinstance(event.get("usage"), dict):
+                acc["head"]["usage"] = event["usage"]
+            for ch in event.get("choices") or []:
+                if not isinstance(ch, dict):
+                    continue
+                delta = ch.get("delta") or {}
+                piece = delta.get("content")
+                if isinstance(piece, str) and piece:
+                    acc["content"].append(piece)
+                    _emit(parser.feed(piece))
+                piece = delta.get("reasoning")
+                if isinstance(piece, str) and piece:
+                    acc["reasoning"].append(piece)
+                if ch.get("finish_reason"):
+                    acc["finish_reason"] = ch.get("finish_reason")
+                if ch.get("native_finish_reason"):
+                    acc["native_finish_reason"] = ch.get("native_finish_reason")
+
+        resp = llm_client.post_stream(url, _on_data, headers=headers, json=payload, timeout=timeout_s, provider=provider)
+        meta = {
+            "provider": provider,
+            "url": url,
+            "http_status": resp.status_code,
+            "streamed": True,
+        }
+        if resp.status_code != 200:
+            raise RuntimeError(f"{provider} API error {resp.status_code}: {_safe_str(resp.text)[:2000]}")
+        meta["provider_response"] = {k: acc["head"].get(k) for k in ("id", "model", "provider", "usage")}
+        c0 = {"finish_reason": acc["finish_reason"], "native_finish_reason": acc["native_finish_reason"]}
+        msg = {
+            "content": "".join(acc["content"]) if acc["content"] else None,
+            "reasoning": "".join(acc["reasoning"]) if acc["reasoning"] else None,
+        }
+    else:
+        resp = llm_client.post(url, headers=headers, json=payload, timeout=timeout_s, provider=provider)
 
-    # Always try to capture provider JSON response (helps debugging cases where content is empty).
-    # Store only a compact/safe subset to avoid bloating script_state.json.
-    resp_json: Optional[dict] = None
-    try:
-        resp_json = resp.json()
-    except Exception:
-        meta["provider_response_text_head"] = _safe_str(resp.text)[:1500]
-
-    if resp.status_code != 200:
-        raise RuntimeError(f"{provider} API error {resp.status_code}: {_safe_str(resp.text)[:2000]}")
-
-    # Compact provider response snapshot (for raw-output debugging)
-    if isinstance(resp_json, dict):
-        meta["provider_response"] = {
-            "id": resp_json.get("id"),
-            "model": resp_json.get("model"),
-            "provider": resp_json.get("provider"),
-            "usage": resp_json.get("usage"),
+        meta = {
+            "provider": provider,
+            "url": url,
+            "http_status": resp.status_code,
         }
 
-    choices = (resp_json or {}).get("choices") if isinstance(resp_json, dict) else None
-    c0 = choices[0] if isinstance(choices, list) and choices else {}
-    msg = (c0.get("message") or {}) if isinstance(c0, dict) else {}
+        # Always try to capture provider JSON response (helps debugging cases where content is empty).
+        # Store only a compact/safe subset to avoid bloating script_state.json.
+        resp_json: Optional[dict] = None
+        try:
+            resp_json = resp.json()
+        except Exception:
+            meta["provider_response_text_head"] = _safe_str(resp.text)[:1500]
+
+        if resp.status_code != 200:
+            raise RuntimeError(f"{provider} API error {resp.status_code}: {_safe_str(resp.text)[:2000]}")
+
+        # Compact provider response snapshot (for raw-output debugging)
+        if isinstance(resp_json, dict):
+            meta["provider_response"] = {
+                "id": resp_json.get("id"),
+                "model": resp_json.get("model"),
+                "provider": resp_json.get("provider"),
+                "usage": resp_json.get("usage"),
+            }
+
+        choices = (resp_json or {}).get("choices") if isinstance(resp_json, dict) else None
+        c0 = choices[0] if isinstance(choices, list) and choices else {}
+        msg = (c0.get("message") or {}) if isinstance(c0, dict) else {}
 
     meta["finish_reason"] = c0.get("finish_reason") if isinstance(c0, dict) else None
     meta["native_finish_reason"] = c0.get("native_finish_reason") if isinstance(c0, dict) else None
@@ -206,9 +319,65 @@ def _llm_chat_json_raw(
     meta["response_text_source"] = text_source
 
     parsed = _parse_json_from_text(text_for_parse)
+    if parser is not None:
+        if streamed_items[0] == 0 and parsed is not None:
+            # Non-streamed call (or JSON only in reasoning): deliver the items now.
+            _replay_partials(on_partial, text_for_parse)
+        else:
+            meta["streamed_items"] = streamed_items[0]
+    if cache_key and parsed is not None:
+        meta["cache"] = {"hit": False, "key": cache_key, "step": cache_step, "stored": False}
     return text_for_parse, parsed, meta
 
 
+def commit_llm_cache(raw_text: str, meta: Optional[dict]) -> bool:
+    """
+    Stores a fresh _llm_chat_json_raw response in the response cache. Call only after the
+    step's validation passed, so a rejected answer is never replayed to a retry.
+    No-op for cache hits, already stored responses and calls without a cache key.
+    """
+    info = (meta or {}).get("cache")
+    if not isinstance(info, dict) or info.get("hit") or info.get("stored") or not info.get("key"):
+        return False
+    stored_meta = {k: v for k, v in meta.items() if k != "cache"}
+    ok = _get_llm_response_cache().put(info["key"], raw_text, stored_meta, step=info.get("step"))
+    info["stored"] = ok
+    return ok
+
+
+def llm_streaming_enabled() -> bool:
+    """SSE streaming for _llm_chat_json_raw calls with on_partial (LLM_STREAMING, default on)."""
+    return (os.getenv("LLM_STREAMING", "1") or "").strip().lower() in ("1", "true", "yes")
+
+
+def _replay_partials(on_partial: Callable[[dict, int, str], None], text: str) -> None:
+    parser = IncrementalArrayParser()
+    for i, item in enumerate(parser.feed(text or "")):
+        try:
+            on_partial(item, i, parser.key or "")
+        except Exception as e:
+            print(f"⚠️  LLM stream: on_partial callback failed: {e}")
+
+
+_llm_response_cache: Optional[LLMResponseCache] = None
+_llm_cache_inactive_logged: set = set()
+
+
+def _log_llm_cache_inactive(step: str, reason: str) -> None:
+    """LLM_RESPONSE_CACHE=1, ale pro tento step se cache nepoužije – zalogovat jednou za proces."""
+    if step in _llm_cache_inactive_logged:
+        return
+    _llm_cache_inactive_logged.add(step)
+    print(f"ℹ️  LLM cache inactive for step={step}: {reason}")
+
+
+def _get_llm_response_cache() -> LLMResponseCache:
+    global _llm_response_cache
+    if _llm_response_cache is None:
+        _llm_response_cache = LLMResponseCache(default_llm_cache_dir())
+    return _llm_response_cache
+
+
 def _safe_format_template(template: str, values: dict) -> str:
     """
     Safe, explicit placeholder formatting using regex:
@@ -316,6 +485,8 @@ def _mark_step_running(state: dict, step_key: str, script_status: str) -> None:
     step["finished_at"] = None
     step["error"] = None
     state["updated_at"] = _now_iso()
+    # LLM calls from here on are attributed to this step in projects/<episode_id>/llm_usage.json
+    set_usage_scope(state.get("episode_id"), step_key)
 
 
 def _mark_step_done(state: dict, step_key: str) -> None:
@@ -1003,6 +1174,7 @@ def _run_tts_formatting(
     """Helper to run TTS formatting step (used in multiple places)."""
     _mark_step_running(state, "tts_format", "RUNNING_TTS_FORMAT")
     store.write_script_state(episode_id, state)
+    prewarmer = None
     try:
         cfg = _step_config_for(state, "tts_format")
         provider = _safe_str(cfg.get("provider")).strip().lower()
@@ -1015,12 +1187,37 @@ def _run_tts_formatting(
         if not api_key:
             raise RuntimeError(f"Chybí API key pro provider '{provider}' (TTS Format)")
         prompt_template, prompt_used = _apply_step_prompt("tts_format", state, topic, language, target_minutes, channel_profile, None)
+
+        # Early-start TTS: finalized segments jdou do TTS cache ještě během formátování
+        # (TTS_EARLY_START, default on; vyžaduje GCP credentials + GCP_TTS_CACHE)
+        try:
+            prewarmer = TTSPrewarmer.create_if_enabled(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        except Exception as e:
+            print(f"⚠️  TTS early start disabled: {e}")
+
+        def _on_partial_segment(item: dict, index: int, key: str) -> None:
+            # Streamed segment → progress channel (UI/SSE) before the LLM finishes
+            progress_bus.publish(episode_id, {"type": "partial", "step": "tts_format", "key": key, "index": index, "item": item})
+            if prewarmer is not None:
+                prewarmer.submit(
+                    _safe_str(item.get("block_id") or item.get("segment_id")).strip(),
+                    item.get("text_tts") or item.get("tts_formatted_text"),
+                )
+            store.write_progress(
+                episode_id,
+                step="tts_format",
+                step_fields={"partial_items": index + 1, "message": f"TTS formát: {index + 1} segmentů hotovo"},
+                fields={"updated_at": _now_iso()},
+            )
+
         raw_text, parsed, meta = _llm_chat_json_raw(
             provider,
             prompt_used,
             api_key,
             model=model,
             temperature=float(cfg.get("temperature", 0.4)),
+            cache_step="tts_format",
+            on_partial=_on_partial_segment,
         )
         _write_raw_output(state, "tts_format", raw_text, parsed, prompt_template, prompt_used, meta=meta)
         store.write_script_state(episode_id, state)
@@ -1079,11 +1276,22 @@ def _run_tts_formatting(
         if isinstance(state.get("tts_ready_package"), dict):
             md["tts_ready_package"] = state["tts_ready_package"]
 
+        # Early-start TTS: bloky změněné po prewarmu (kanonizace) se syntetizují znovu pod novým klíčem
+        if prewarmer is not None:
+            try:
+                md["tts_early_start"] = prewarmer.reconcile((state.get("tts_ready_package") or {}).get("narration_blocks") or [])
+            except Exception as e:
+                print(f"⚠️  TTS early start reconcile failed: {e}")
+            prewarmer.shutdown()
+
+        commit_llm_cache(raw_text, meta)
         _mark_step_done(state, "tts_format")
         state["script_status"] = "DONE"
         state["updated_at"] = _now_iso()
         store.write_script_state(episode_id, state)
     except Exception as e:
+        if prewarmer is not None:
+            prewarmer.shutdown()
         _mark_step_error(state, "tts_format", f"TTS Format krok selhal: {str(e)}")
         store.write_script_state(episode_id, state)
         raise
@@ -1098,8 +1306,13 @@ def _run_footage_director(
     channel_profile: Optional[str],
     provider_api_keys: dict,
     store: 'ProjectStore',
+    bypass_llm_cache: bool = False,
 ) -> None:
-    """Helper to run Footage Director Assistant (FDA) step - LLM-assisted shot planning."""
+    """
+    Helper to run Footage Director Assistant (FDA) step - LLM-assisted shot planning.
+    bypass_llm_cache: explicit retry → never reuse a cached FDA response. Fresh responses are
+    stored in the LLM response cache only after the shot plan passed the hard gate.
+    """
     _mark_step_running(state, "footage_director", "RUNNING_FOOTAGE_DIRECTOR")
     store.write_script_state(episode_id, state)
     try:
@@ -1161,6 +1374,7 @@ def _run_footage_director(
             pass
 
         fda_warnings = []
+        llm_cache_commits: list = []
         
         # ============================================================================
         # v2.7 MODE: Full deterministic generation with guardrails
@@ -1244,13 +1458,16 @@ def _run_footage_director(
             # Try fresh LLM call (best-effort)
             elif api_key:
                 try:
-                    print(f"FDA_LLM_SOURCE episode_id={episode_id} source=fresh_llm")
+                    # FDA_LLM_SOURCE (fresh_llm | llm_response_cache) is logged by run_fda_llm
                     raw_llm_draft, raw_text, llm_meta = run_fda_llm(
                         state,
                         provider_api_keys,
-                        config={**cfg, "provider": provider, "model": model},
+                        config={**cfg, "provider": provider, "model": model, "bypass_llm_cache": bypass_llm_cache},
+                        cache_commits=llm_cache_commits,
                     )
                     print(f"📝 FDA v2.7: Got LLM draft (will be post-processed)")
+                except LLMBudgetExceeded:
+                    raise
                 except Exception as e:
                     fda_warnings.append({"code": "FDA_LLM_FAILED", "message": str(e)})
                     print(f"⚠️  FDA v2.7: LLM call failed, using deterministic fallback")
@@ -1316,8 +1533,11 @@ def _run_footage_director(
                     raw_sceneplan, raw_text, llm_meta = run_sceneplan_llm(
                         state,
                         provider_api_keys,
-                        config={**cfg, "provider": provider, "model": model},
+                        config={**cfg, "provider": provider, "model": model, "bypass_llm_cache": bypass_llm_cache},
+                        cache_commits=llm_cache_commits,
                     )
+                except LLMBudgetExceeded:
+                    raise
                 except Exception as e:
                     fda_warnings.append({"code": "FDA_LLM_FAILED", "message": str(e)})
             else:
@@ -1333,6 +1553,10 @@ def _run_footage_director(
             # Minimal hard gate (should always pass unless there's an internal bug).
             validate_shotplan_v3_minimal(fixed_wrapper, tts_pkg, episode_id=episode_id)
 
+        # Plán prošel hard gate → teprve teď smí LLM odpovědi do response cache
+        for cached_text, cached_meta in llm_cache_commits:
+            commit_llm_cache(cached_text, cached_meta)
+
         # ============================================================================
         # HARD ASSERTION (FAIL-STOP) before saving
         # ============================================================================
@@ -1584,6 +1808,9 @@ def _run_footage_director(
         except Exception as e:
             print(f"⚠️ Failed to auto-generate AAR queries: {e}")
             # Non-fatal: user can still run Preview to generate them
+
+        # Warm AAR search cache while FDA validation / user review happen.
+        _start_aar_search_prefetch(state, episode_id, store)
         
         # ============================================================================
         store.write_script_state(episode_id, state)
@@ -1648,18 +1875,78 @@ def _run_fda_output_validator(
         raise
 
 
+def _aar_episode_topic(state: dict) -> Optional[str]:
+    """
+    Episode topic used by AAR for search queries + LLM topic relevance (v14).
+    IMPORTANT: User "topic" can be sloppy / lowercased / too generic. Prefer a strong title when available.
+    """
+    episode_input = state.get("episode_input") if isinstance(state.get("episode_input"), dict) else {}
+    raw_topic = str(episode_input.get("topic") or "").strip()
+    selected_title = str(state.get("selected_title") or "").strip()
+    # Some states also store topic variants; prefer the most descriptive one.
+    alt_topic = str(episode_input.get("title") or "").strip()
+
+    episode_topic = raw_topic or None
+    if episode_topic:
+        # Heuristic: if topic is all-lowercase or very short, replace with selected_title (better anchor for LLM + search).
+        if selected_title and (episode_topic == episode_topic.lower() or len(episode_topic.split()) < 3):
+            episode_topic = selected_title
+        elif alt_topic and (len(alt_topic.split()) >= len(episode_topic.split()) + 2):
+            episode_topic = alt_topic
+    elif selected_title:
+        episode_topic = selected_title
+    elif alt_topic:
+        episode_topic = alt_topic
+    return episode_topic
+
+
+def _start_aar_search_prefetch(state: dict, episode_id: str, store: 'ProjectStore') -> Optional[threading.Thread]:
+    """
+    Speculative AAR warm-up right after FDA: runs the episode-pool searches in a daemon
+    thread so the later AAR step (after validation / user review) is mostly cache hits.
+    Best-effort only; disable with AAR_SPECULATIVE_PREFETCH=0.
+    """
+    if str(os.getenv("AAR_SPECULATIVE_PREFETCH", "1")).strip().lower() not in ("1", "true", "yes"):
+        return None
+    md = state.get("metadata") if isinstance(state.get("metadata"), dict) else {}
+    shot_plan_wrapper = md.get("shot_plan") or state.get("shot_plan")
+    if not isinstance(shot_plan_wrapper, dict):
+        return None
+    # Same cache dir as _run_asset_resolver_then_compilation / compile_video.
+    cache_dir = os.path.join(store.episode_dir(episode_id), "archive_cache")
+    episode_topic = _aar_episode_topic(state)
+
+    def _worker() -> None:
+        try:
+            t0 = time.time()
+            stats = prefetch_episode_pool_searches(shot_plan_wrapper, cache_dir, episode_topic=episode_topic)
+            print(
+                f"🔥 AAR prefetch: warmed {stats.get('video_searches', 0)} video + {stats.get('image_searches', 0)} image "
+                f"searches for {episode_id} in {time.time() - t0:.1f}s (cache hits: {stats.get('cache_hits', 0)})"
+            )
+        except Exception as e:
+            print(f"⚠️  AAR prefetch failed for {episode_id}: {e}")
+
+    th = threading.Thread(target=_worker, name=f"aar_prefetch_{episode_id}", daemon=True)
+    th.start()
+    return th
+
+
 def _run_asset_resolver(
     state: dict,
     episode_id: str,
     store: 'ProjectStore',
     cache_dir: str,
     skip_validation: bool = False,
+    prefetcher: Optional[AssetPrefetcher] = None,
 ) -> None:
     """
     Helper to run Archive Asset Resolver (AAR) step.
     
     Args:
         skip_validation: If True, skips FDA hard gate validation (for preview mode).
+        prefetcher: Optional CB AssetPrefetcher; AAR feeds it scene by scene so downloads
+                    start before the manifest is complete.
     """
     _ensure_step_exists(state, "asset_resolver")
     try:
@@ -1883,40 +2170,21 @@ def _run_asset_resolver(
                     pct = max(0, min(100, int(round((si / st) * 100))))
                 sid = str(payload.get("scene_id") or "").strip()
 
-                latest = store.read_script_state(episode_id)
-                steps = latest.get("steps")
-                if not isinstance(steps, dict):
-                    return
-                ar = steps.get("asset_resolver")
-                if not isinstance(ar, dict):
-                    return
-                ar["progress"] = pct
-                ar["message"] = f"Hledám kandidáty pro scénu {si}/{st} ({sid})"
-                latest["updated_at"] = _now_iso()
-                store.write_script_state(episode_id, latest)
+                # Tiny progress record instead of rewriting the whole script_state
+                store.write_progress(
+                    episode_id,
+                    step="asset_resolver",
+                    step_fields={"progress": pct, "message": f"Hledám kandidáty pro scénu {si}/{st} ({sid})"},
+                    fields={"updated_at": _now_iso()},
+                )
             except Exception:
                 # best-effort; never break AAR
                 return
 
         # Extract episode topic for LLM-based topic relevance validation (v14)
-        # IMPORTANT: User "topic" can be sloppy / lowercased / too generic. Prefer a strong title when available.
         episode_input = state.get("episode_input") if isinstance(state.get("episode_input"), dict) else {}
-        raw_topic = str(episode_input.get("topic") or "").strip()
         selected_title = str(state.get("selected_title") or "").strip()
-        # Some states also store topic variants; prefer the most descriptive one.
-        alt_topic = str(episode_input.get("title") or "").strip()
-
-        episode_topic = raw_topic or None
-        if episode_topic:
-            # Heuristic: if topic is all-lowercase or very short, replace with selected_title (better anchor for LLM + search).
-            if selected_title and (episode_topic == episode_topic.lower() or len(episode_topic.split()) < 3):
-                episode_topic = selected_title
-            elif alt_topic and (len(alt_topic.split()) >= len(episode_topic.split()) + 2):
-                episode_topic = alt_topic
-        elif selected_title:
-            episode_topic = selected_title
-        elif alt_topic:
-            episode_topic = alt_topic
+        episode_topic = _aar_episode_topic(state)
 
         if episode_topic:
             print(f"🎯 AAR: Episode topic for relevance validation: '{episode_topic}'")
@@ -1958,6 +2226,7 @@ def _run_asset_resolver(
                 progress_callback=_progress_cb,
                 preview_mode=bool(skip_validation),
                 episode_topic=episode_topic,  # v14: LLM topic relevance validation
+                scene_callback=prefetcher.submit_scene if prefetcher else None,
             )
         except Exception as e:
             aar_warnings.append({"code": "AAR_FAILED", "message": str(e)})
@@ -2169,8 +2438,15 @@ def _run_compilation_builder(
     store: 'ProjectStore',
     storage_dir: str,
     output_dir: str,
+    prefetcher: Optional[AssetPrefetcher] = None,
+    music_only: bool = False,
+    encoder_profile: Optional[str] = None,
 ) -> None:
-    """Helper to run Compilation Builder (CB) step."""
+    """
+    Helper to run Compilation Builder (CB) step.
+    music_only=True (cb_only remix) re-muxes only the audio onto the existing video master when possible.
+    encoder_profile: "draft" | "preview" | "final" (None = CB_ENCODER_PROFILE env, default "final").
+    """
     _ensure_step_exists(state, "compilation_builder")
     _mark_step_running(state, "compilation_builder", "RUNNING_COMPILATION_BUILDER")
     store.write_script_state(episode_id, state)
@@ -2181,23 +2457,30 @@ def _run_compilation_builder(
     def progress_callback(update: dict):
         """Callback pro real-time progress updates od CB."""
         import time as _time
-        now = _time.time()
-        # Rate-limit writes to every 1 second to avoid disk thrashing
-        if now - last_progress_write[0] < 1.0:
-            return
-        last_progress_write[0] = now
-        
-        # Update state with progress
-        state["compilation_progress"] = {
+        compilation_progress = {
             "phase": update.get("phase", "unknown"),
             "message": update.get("message", ""),
             "percent": update.get("percent", 0),
             "details": update.get("details", {}),
             "updated_at": _now_iso(),
         }
+        # SSE subscribers get every CB update (no disk I/O, not rate-limited)
+        progress_bus.publish(episode_id, {"type": "progress", "fields": {"compilation_progress": compilation_progress}})
+
+        now = _time.time()
+        # Rate-limit writes to every 1 second to avoid disk thrashing
+        if now - last_progress_write[0] < 1.0:
+            return
+        last_progress_write[0] = now
+        
+        # Update state with progress (in-memory for the next full write + tiny progress record for polling)
+        state["compilation_progress"] = compilation_progress
         state["updated_at"] = _now_iso()
         try:
-            store.write_script_state(episode_id, state)
+            store.write_progress(
+                episode_id,
+                fields={"compilation_progress": state["compilation_progress"], "updated_at": state["updated_at"]},
+            )
         except Exception as e:
             print(f"⚠️  Progress write failed: {e}")
     
@@ -2219,7 +2502,12 @@ def _run_compilation_builder(
             storage_dir=storage_dir,
             output_dir=output_dir,
             target_duration_sec=None,  # Vezme z scenes
-            progress_callback=progress_callback
+            progress_callback=progress_callback,
+            prefetcher=prefetcher,
+            # podcasts/cache/motion (sdíleno napříč epizodami, vedle projects/)
+            motion_cache=MotionClipCache(os.path.dirname(store.base_projects_dir)) if motion_cache_enabled() else None,
+            music_only=music_only,
+            encoder_profile=encoder_profile,
         )
         
         if output_video is None:
@@ -2232,6 +2520,19 @@ def _run_compilation_builder(
         # Ulož výsledky
         state["compilation_video_path"] = output_video
         state["compilation_builder_output"] = metadata
+
+        # Subtitles from the (cached) voiceover timeline - per-block offsets, no re-decode.
+        try:
+            md = state.get("metadata") if isinstance(state.get("metadata"), dict) else {}
+            tts_pkg = md.get("tts_ready_package") if isinstance(md.get("tts_ready_package"), dict) else state.get("tts_ready_package")
+            narration_blocks = (tts_pkg or {}).get("narration_blocks") if isinstance(tts_pkg, dict) else None
+            vo_timeline = voiceover_timeline(os.path.join(store.episode_dir(episode_id), "voiceover"))
+            if vo_timeline and isinstance(narration_blocks, list):
+                srt_path = write_srt(vo_timeline, narration_blocks, os.path.join(store.episode_dir(episode_id), "voiceover.srt"))
+                if srt_path:
+                    state["voiceover_srt_path"] = srt_path
+        except Exception as e:
+            print(f"⚠️  CB: Failed to write voiceover SRT: {e}")
         
         _mark_step_done(state, "compilation_builder")
         state["script_status"] = "DONE"
@@ -2256,6 +2557,29 @@ def _run_compilation_builder(
         raise
 
 
+def _run_asset_resolver_then_compilation(state: dict, episode_id: str, store: 'ProjectStore') -> None:
+    """
+    Runs AAR followed by CB for the episode's standard directories.
+    AAR hands resolved scenes to a shared AssetPrefetcher so CB downloads overlap
+    with AAR and with CB's own encoding. Raises on failure (errors already persisted).
+    """
+    cache_dir = os.path.join(store.episode_dir(episode_id), "archive_cache")
+    storage_dir = os.path.join(store.episode_dir(episode_id), "assets")
+    output_dir = os.path.join(store.base_projects_dir, "..", "output")
+    prefetcher = AssetPrefetcher(storage_dir) if _pipelined_prefetch_enabled() else None
+    try:
+        _run_asset_resolver(state, episode_id, store, cache_dir, prefetcher=prefetcher)
+        _run_compilation_builder(state, episode_id, store, storage_dir, output_dir, prefetcher=prefetcher)
+    finally:
+        if prefetcher:
+            prefetcher.shutdown(wait=False)
+
+
+def _pipelined_prefetch_enabled() -> bool:
+    """AAR → CB pipelined downloads (default on; CB_PIPELINED_PREFETCH=0 restores strictly sequential steps)."""
+    return str(os.getenv("CB_PIPELINED_PREFETCH", "1")).strip().lower() in ("1", "true", "yes")
+
+
 def _step_config_for(state: dict, step_key: str) -> dict:
     if step_key == "research":
         return state.get("research_config") or _default_step_config("research")
@@ -2602,6 +2926,7 @@ class ScriptPipelineService:
                 api_key,
                 model=model,
                 temperature=float(cfg.get("temperature", 0.4)),
+                cache_step="research",
             )
             _write_raw_output(state, "research", raw_text, parsed, prompt_template, prompt_used, meta=meta)
             self.store.write_script_state(episode_id, state)
@@ -2611,6 +2936,7 @@ class ScriptPipelineService:
                 raise RuntimeError(f"Research: LLM vrátil nevalidní JSON (source={src}, finish_reason={fr})")
             research = _normalize_research_report(parsed)
             state["research_report"] = research
+            commit_llm_cache(raw_text, meta)
             _mark_step_done(state, "research")
             self.store.write_script_state(episode_id, state)
         except Exception as e:
@@ -2644,6 +2970,7 @@ class ScriptPipelineService:
                     api_key,
                     model=model,
                     temperature=float(cfg.get("temperature", 0.4)),
+                    cache_step="narrative",
                 )
                 _write_raw_output(state, "narrative", raw_text, parsed, prompt_template, prompt_used, meta=meta)
                 self.store.write_script_state(episode_id, state)
@@ -2657,6 +2984,7 @@ class ScriptPipelineService:
                 state["draft_script"] = draft
                 # attempts.narrative counts completed narrative runs (starts at 0)
                 state["attempts"]["narrative"] = int(state["attempts"].get("narrative", 0)) + 1
+                commit_llm_cache(raw_text, meta)
                 _mark_step_done(state, "narrative")
                 self.store.write_script_state(episode_id, state)
             except Exception as e:
@@ -2685,6 +3013,7 @@ class ScriptPipelineService:
                     api_key,
                     model=model,
                     temperature=float(cfg.get("temperature", 0.4)),
+                    cache_step="validation",
                 )
                 _write_raw_output(state, "validation", raw_text, parsed, prompt_template, prompt_used, meta=meta)
                 self.store.write_script_state(episode_id, state)
@@ -2694,6 +3023,8 @@ class ScriptPipelineService:
                     raise RuntimeError(f"Validation: LLM vrátil nevalidní JSON (source={src}, finish_reason={fr})")
                 validation = _normalize_validation_result(parsed)
                 state["validation_result"] = validation
+                if validation.get("status") == "PASS":  # FAIL verdict se nikdy nepřehrává z cache
+                    commit_llm_cache(raw_text, meta)
                 _mark_step_done(state, "validation")
                 self.store.write_script_state(episode_id, state)
             except Exception as e:
@@ -2764,19 +3095,9 @@ class ScriptPipelineService:
             # Error already written by helper
             return
         
-        # 7) Archive Asset Resolver (AAR) - resolve archive.org assets
+        # 7) Archive Asset Resolver (AAR) + 8) Compilation Builder (CB) - pipelined downloads
         try:
-            cache_dir = os.path.join(self.store.episode_dir(episode_id), "archive_cache")
-            _run_asset_resolver(state, episode_id, self.store, cache_dir)
-        except Exception:
-            # Error already written by helper
-            return
-        
-        # 8) Compilation Builder (CB) - download + compile video
-        try:
-            storage_dir = os.path.join(self.store.episode_dir(episode_id), "assets")
-            output_dir = os.path.join(self.store.base_projects_dir, "..", "output")
-            _run_compilation_builder(state, episode_id, self.store, storage_dir, output_dir)
+            _run_asset_resolver_then_compilation(state, episode_id, self.store)
         except Exception:
             # Error already written by helper
             return
@@ -3151,6 +3472,8 @@ class ScriptPipelineService:
                 api_key,
                 model=model,
                 temperature=float(cfg.get("temperature", 0.4)),
+                cache_step="narrative",
+                bypass_cache=True,
             )
             _write_raw_output(state, "narrative", raw_text, parsed, prompt_template, prompt_used, meta)
             self.store.write_script_state(episode_id, state)
@@ -3161,6 +3484,7 @@ class ScriptPipelineService:
             draft = _sanitize_narrative_preface_and_hook(draft, state.get("research_report") or {})
             state["draft_script"] = draft
             state["attempts"]["narrative"] = int(state["attempts"].get("narrative", 0)) + 1
+            commit_llm_cache(raw_text, meta)
             _mark_step_done(state, "narrative")
             self.store.write_script_state(episode_id, state)
         except Exception as e:
@@ -3189,6 +3513,7 @@ class ScriptPipelineService:
                 api_key,
                 model=model,
                 temperature=float(cfg.get("temperature", 0.4)),
+                cache_step="validation",
             )
             _write_raw_output(state, "validation", raw_text, parsed, prompt_template, prompt_used, meta)
             self.store.write_script_state(episode_id, state)
@@ -3196,6 +3521,8 @@ class ScriptPipelineService:
                 raise RuntimeError("Validation: LLM vrátil nevalidní JSON")
             validation = _normalize_validation_result(parsed)
             state["validation_result"] = validation
+            if validation.get("status") == "PASS":  # FAIL verdict se nikdy nepřehrává z cache
+                commit_llm_cache(raw_text, meta)
             _mark_step_done(state, "validation")
             self.store.write_script_state(episode_id, state)
         except Exception as e:
@@ -3244,18 +3571,9 @@ class ScriptPipelineService:
             # Error already persisted by helper
             return
         
-        # Archive Asset Resolver (step 7)
-        try:
-            cache_dir = os.path.join(self.store.episode_dir(episode_id), "archive_cache")
-            _run_asset_resolver(state, episode_id, self.store, cache_dir)
-        except Exception:
-            return
-        
-        # Compilation Builder (step 8)
+        # Archive Asset Resolver + Compilation Builder (pipelined downloads)
         try:
-            storage_dir = os.path.join(self.store.episode_dir(episode_id), "assets")
-            output_dir = os.path.join(self.store.base_projects_dir, "..", "output")
-            _run_compilation_builder(state, episode_id, self.store, storage_dir, output_dir)
+            _run_asset_resolver_then_compilation(state, episode_id, self.store)
         except Exception:
             return
 
@@ -3307,6 +3625,8 @@ class ScriptPipelineService:
                         api_key,
                         model=model,
                         temperature=float(cfg.get("temperature", 0.4)),
+                        cache_step="narrative",
+                        bypass_cache=True,
                     )
                     _write_raw_output(state, "narrative", raw_text, parsed, prompt_template, prompt_used, meta)
                     self.store.write_script_state(episode_id, state)
@@ -3317,6 +3637,7 @@ class ScriptPipelineService:
                     draft = _sanitize_narrative_preface_and_hook(draft, state.get("research_report") or {})
                     state["draft_script"] = draft
                     state["attempts"]["narrative"] = int(state["attempts"].get("narrative", 0)) + 1
+                    commit_llm_cache(raw_text, meta)
                     _mark_step_done(state, "narrative")
                     self.store.write_script_state(episode_id, state)
                 except Exception as e:
@@ -3345,6 +3666,7 @@ class ScriptPipelineService:
                         api_key,
                         model=model,
                         temperature=float(cfg.get("temperature", 0.4)),
+                        cache_step="validation",
                     )
                     _write_raw_output(state, "validation", raw_text, parsed, prompt_template, prompt_used, meta)
                     self.store.write_script_state(episode_id, state)
@@ -3352,6 +3674,8 @@ class ScriptPipelineService:
                         raise RuntimeError("Validation: LLM vrátil nevalidní JSON")
                     validation = _normalize_validation_result(parsed)
                     state["validation_result"] = validation
+                    if validation.get("status") == "PASS":  # FAIL verdict se nikdy nepřehrává z cache
+                        commit_llm_cache(raw_text, meta)
                     _mark_step_done(state, "validation")
                     self.store.write_script_state(episode_id, state)
                 except Exception as e:
@@ -3407,18 +3731,9 @@ class ScriptPipelineService:
             except Exception:
                 return
             
-            # Archive Asset Resolver
-            try:
-                cache_dir = os.path.join(self.store.episode_dir(episode_id), "archive_cache")
-                _run_asset_resolver(state, episode_id, self.store, cache_dir)
-            except Exception:
-                return
-            
-            # Compilation Builder
+            # Archive Asset Resolver + Compilation Builder (pipelined downloads)
             try:
-                storage_dir = os.path.join(self.store.episode_dir(episode_id), "assets")
-                output_dir = os.path.join(self.store.base_projects_dir, "..", "output")
-                _run_compilation_builder(state, episode_id, self.store, storage_dir, output_dir)
+                _run_asset_resolver_then_compilation(state, episode_id, self.store)
             except Exception:
                 return
             return
@@ -3450,6 +3765,8 @@ class ScriptPipelineService:
                     api_key,
                     model=model,
                     temperature=float(cfg.get("temperature", 0.4)),
+                    cache_step="validation",
+                    bypass_cache=True,
                 )
                 _write_raw_output(state, "validation", raw_text, parsed, prompt_template, prompt_used, meta)
                 self.store.write_script_state(episode_id, state)
@@ -3457,6 +3774,8 @@ class ScriptPipelineService:
                     raise RuntimeError("Validation: LLM vrátil nevalidní JSON")
                 validation = _normalize_validation_result(parsed)
                 state["validation_result"] = validation
+                if validation.get("status") == "PASS":  # FAIL verdict se nikdy nepřehrává z cache
+                    commit_llm_cache(raw_text, meta)
                 _mark_step_done(state, "validation")
                 self.store.write_script_state(episode_id, state)
             except Exception as e:
@@ -3504,18 +3823,9 @@ class ScriptPipelineService:
             except Exception:
                 return
             
-            # Archive Asset Resolver
+            # Archive Asset Resolver + Compilation Builder (pipelined downloads)
             try:
-                cache_dir = os.path.join(self.store.episode_dir(episode_id), "archive_cache")
-                _run_asset_resolver(state, episode_id, self.store, cache_dir)
-            except Exception:
-                return
-            
-            # Compilation Builder
-            try:
-                storage_dir = os.path.join(self.store.episode_dir(episode_id), "assets")
-                output_dir = os.path.join(self.store.base_projects_dir, "..", "output")
-                _run_compilation_builder(state, episode_id, self.store, storage_dir, output_dir)
+                _run_asset_resolver_then_compilation(state, episode_id, self.store)
             except Exception:
                 return
 
@@ -3584,7 +3894,10 @@ class ScriptPipelineService:
                 return
 
             try:
-                _run_footage_director(state, episode_id, topic, language, target_minutes, channel_profile, provider_api_keys, self.store)
+                _run_footage_director(
+                    state, episode_id, topic, language, target_minutes, channel_profile, provider_api_keys, self.store,
+                    bypass_llm_cache=True,
+                )
             except Exception:
                 return
 
@@ -3593,17 +3906,9 @@ class ScriptPipelineService:
 
         # If retrying asset_resolver directly
         if start_step == "asset_resolver":
-            cache_dir = os.path.join(self.store.episode_dir(episode_id), "archive_cache")
-            try:
-                _run_asset_resolver(state, episode_id, self.store, cache_dir)
-            except Exception:
-                return
-
-            # Compilation Builder (after AAR)
+            # AAR + Compilation Builder (pipelined downloads)
             try:
-                storage_dir = os.path.join(self.store.episode_dir(episode_id), "assets")
-                output_dir = os.path.join(self.store.base_projects_dir, "..", "output")
-                _run_compilation_builder(state, episode_id, self.store, storage_dir, output_dir)
+                _run_asset_resolver_then_compilation(state, episode_id, self.store)
             except Exception:
                 return
             return
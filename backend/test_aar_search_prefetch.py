@@ -0,0 +1,126 @@
+import tempfile
+
+
+def test_image_multi_source_search_is_disk_cached(monkeypatch):
+    from archive_asset_resolver import ArchiveAssetResolver
+
+    calls = []
+
+    def fake_archive(self, query, max_results=10, **_kw):
+        calls.append(("archive", query))
+        return [{"archive_item_id": "archive_org:abc", "title": "Abc"}]
+
+    def fake_wiki(self, query, max_results=10):
+        calls.append(("wiki", query))
+        return [{"archive_item_id": "wikimedia:File:X.jpg", "title": "X", "mediatype": "image"}]
+
+    monkeypatch.setattr(ArchiveAssetResolver, "search_archive_org", fake_archive)
+    monkeypatch.setattr(ArchiveAssetResolver, "search_wikimedia_images", fake_wiki)
+
+    with tempfile.TemporaryDirectory() as td:
+        first = ArchiveAssetResolver(td).search_images_multi_source("Nikola Tesla laboratory", max_results=10)
+        second_resolver = ArchiveAssetResolver(td)
+        second = second_resolver.search_images_multi_source("Nikola Tesla laboratory", max_results=10)
+
+    assert [x["archive_item_id"] for x in first] == [x["archive_item_id"] for x in second]
+    assert len(calls) == 2  # second resolver served from disk cache
+    assert second_resolver.cache_hit_count == 1
+
+
+def test_prefetch_runs_same_queries_as_episode_pool(monkeypatch):
+    import archive_asset_resolver as aar
+
+    seen = {"video": [], "image": []}
+    monkeypatch.setattr(aar.ArchiveAssetResolver, "search_multi_source",
+                        lambda self, q, max_results=10: seen["video"].append(q) or [])
+    monkeypatch.setattr(aar.ArchiveAssetResolver, "search_images_multi_source",
+                        lambda self, q, max_results=10: seen["image"].append(q) or [])
+
+    scenes = [
+        {"scene_id": "sc_0001", "search_queries": ["Nikola Tesla Colorado Springs", "Tesla coil 1899"]},
+        {"scene_id": "sc_0002", "search_queries": ["Wardenclyffe Tower", "Nikola Tesla laboratory"]},
+    ]
+    with tempfile.TemporaryDirectory() as td:
+        stats = aar.prefetch_episode_pool_searches({"shot_plan": {"scenes": scenes}}, td, episode_topic="Nikola Tesla")
+
+    _forced, expected = aar._episode_pool_queries(scenes, "Nikola Tesla")
+    assert stats["queries"] == expected
+    assert seen["video"] == expected
+    assert seen["image"] == expected[: aar.EPISODE_POOL_IMAGE_QUERIES]
+
+
+def test_partial_and_stale_multi_source_results_are_not_replayed(monkeypatch):
+    import json
+    import os
+
+    from archive_asset_resolver import ArchiveAssetResolver
+
+    calls = []
+    wiki_down = {"on": True}
+
+    def fake_archive(self, query, max_results=10, **_kw):
+        calls.append("archive")
+        return [{"archive_item_id": "archive_org:abc", "title": "Abc"}]
+
+    def fake_wiki(self, query, max_results=10):
+        calls.append("wiki")
+        if wiki_down["on"]:
+            self.network_error_count += 1  # what the real method does on a swallowed error
+            return []
+        return [{"archive_item_id": "wikimedia:File:X.jpg", "title": "X", "mediatype": "image"}]
+
+    monkeypatch.setattr(ArchiveAssetResolver, "search_archive_org", fake_archive)
+    monkeypatch.setattr(ArchiveAssetResolver, "search_wikimedia_images", fake_wiki)
+
+    with tempfile.TemporaryDirectory() as td:
+        partial = ArchiveAssetResolver(td).search_images_multi_source("Tesla", max_results=10)
+        assert len(partial) == 1 and not [f for f in os.listdir(td) if "multi_source_image" in f]
+
+        wiki_down["on"] = False
+        assert len(ArchiveAssetResolver(td).search_images_multi_source("Tesla", max_results=10)) == 2
+        (cache_file,) = [os.path.join(td, f) for f in os.listdir(td) if "multi_source_image" in f]
+
+        # Expired entry (older than AAR_SEARCH_CACHE_TTL_SEC) is a miss
+        with open(cache_file, encoding="utf-8") as f:
+            data = json.load(f)
+        data["cached_at"] = "2020-01-01T00:00:00Z"
+        with open(cache_file, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        calls.clear()
+        fresh_resolver = ArchiveAssetResolver(td)
+        fresh_resolver.search_images_multi_source("Tesla", max_results=10)
+        assert calls == ["archive", "wiki"] and fresh_resolver.cache_hit_count == 0
+
+
+def test_video_cache_key_tracks_mode_and_sources():
+    from archive_asset_resolver import ArchiveAssetResolver
+
+    class _Source:
+        def __init__(self, name):
+            self.source_name = name
+            self.last_http_status = 200
+            self.calls = 0
+
+        def search(self, query, max_results=10):
+            self.calls += 1
+            return [{
+                "item_id": f"{self.source_name}:1", "title": f"{self.source_name} film", "description": "",
+                "url": f"https://x/{self.source_name}", "source": self.source_name,
+            }]
+
+    with tempfile.TemporaryDirectory() as td:
+        r = ArchiveAssetResolver(td)
+        r.enable_multi_source = True
+        r.multi_source_mode = "all"
+        r.video_sources = [_Source("archive_org")]
+        r.search_multi_source("Tesla", max_results=5)
+        r.search_multi_source("Tesla", max_results=5)
+        assert r.video_sources[0].calls == 1  # second call from disk cache
+
+        r.video_sources.append(_Source("europeana"))
+        r.search_multi_source("Tesla", max_results=5)
+        assert [s.calls for s in r.video_sources] == [2, 1]  # new source set → new cache entry
+
+        r.multi_source_mode = "cascade"
+        r.search_multi_source("Tesla", max_results=5)
+        assert r.video_sources[0].calls == 3
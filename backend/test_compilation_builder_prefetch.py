@@ -0,0 +1,32 @@
+import tempfile
+
+
+def test_prefetcher_downloads_each_asset_once_and_gates_images(monkeypatch):
+    """
+    AAR → CB hand-off: the same asset submitted from several beats/scenes is downloaded
+    once, and result() returns the finished (path, technical_ok) tuple for CB.
+    """
+    import compilation_builder as cb
+
+    calls = []
+
+    def fake_download(self, asset):
+        calls.append(asset.get("asset_url"))
+        return "/tmp/" + asset["asset_url"].rsplit("/", 1)[-1]
+
+    monkeypatch.setattr(cb.CompilationBuilder, "download_asset", fake_download)
+
+    with tempfile.TemporaryDirectory() as td:
+        pf = cb.AssetPrefetcher(td, max_workers=2)
+        img = {"asset_url": "https://example.org/a/photo.jpg"}
+        scene = {"visual_beats": [{"asset_candidates": [img, {"archive_item_id": "fallback_black"}]},
+                                  {"asset_candidates": [dict(img)]}]}
+        pf.submit_scene(scene)
+        pf.submit(img)
+
+        assert pf.result(img, timeout=5) == ("/tmp/photo.jpg", True)
+        assert pf.result({"archive_item_id": "fallback_black"}) is None
+        assert pf.result({"asset_url": "https://example.org/never.mp4"}) is None
+        pf.shutdown(wait=True)
+
+    assert calls == ["https://example.org/a/photo.jpg"]
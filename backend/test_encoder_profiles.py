@@ -0,0 +1,57 @@
+import os
+import tempfile
+
+
+def test_profiles_cap_resolution_and_fps(monkeypatch):
+    from encoder_profiles import profile_fps, profile_resolution, resolve_encoder_profile
+
+    monkeypatch.delenv("CB_ENCODER_PROFILE", raising=False)
+    assert resolve_encoder_profile()["name"] == "final"
+    assert resolve_encoder_profile("nonsense")["name"] == "final"
+
+    draft = resolve_encoder_profile("draft")
+    assert profile_resolution(draft, "1920x1080") == "852x480"
+    assert profile_fps(draft, 30) == 24
+    preview = resolve_encoder_profile("preview")
+    assert profile_resolution(preview, "1920x1080") == "1280x720"
+    assert profile_resolution(preview, "640x360") == "640x360"  # never upscale
+
+    final = resolve_encoder_profile("final")
+    assert profile_resolution(final, "1920x1080") == "1920x1080" and profile_fps(final, 30) == 30
+
+    monkeypatch.setenv("CB_ENCODER_PROFILE", "preview")
+    assert resolve_encoder_profile()["name"] == "preview"
+
+
+def test_subclip_and_assembly_use_profile_phases(monkeypatch):
+    import compilation_builder as cb
+
+    calls = []
+
+    class _Result:
+        returncode = 0
+        stderr = ""
+
+    def fake_run(cmd, **kwargs):
+        calls.append(cmd)
+        with open(cmd[-1], "wb") as f:
+            f.write(b"x")
+        return _Result()
+
+    monkeypatch.setattr(cb.subprocess, "run", fake_run)
+    monkeypatch.setattr(cb, "has_video_stream", lambda p: True)
+    with tempfile.TemporaryDirectory() as td:
+        builder = cb.CompilationBuilder(td, td, encoder_profile="draft")
+        clip = os.path.join(td, "clip.mp4")
+        assert builder.create_subclip("src.mp4", 30.0, 35.0, clip)
+        assert builder.concatenate_clips([clip], os.path.join(td, "out.mp4"))
+
+        final = cb.CompilationBuilder(td, td, encoder_profile="final")
+        assert final.render_plan_entry("src.mp4", "a", 30.0, 35.0, 30, "1920x1080")["clip_key"] != \
+            builder.render_plan_entry("src.mp4", "a", 30.0, 35.0, 30, "1920x1080")["clip_key"]
+        assert builder._video_master_paths()[0].endswith("video_master_draft.mp4")
+        assert final._video_master_paths()[0].endswith("video_master.mp4")
+
+    sub, concat = calls
+    assert sub[sub.index("-preset") + 1] == "ultrafast" and sub[sub.index("-crf") + 1] == "32"
+    assert concat[concat.index("-preset") + 1] == "ultrafast"
@@ -0,0 +1,139 @@
+import json
+import threading
+import time
+
+import pytest
+
+import footage_director as fd
+import script_pipeline as sp
+
+
+def _script_state(n_blocks):
+    blocks = [
+        {"block_id": f"b_{i:04d}", "text_tts": f"Napoleon marched on Moscow in 1812 with army column {i}.", "claim_ids": []}
+        for i in range(1, n_blocks + 1)
+    ]
+    return {"episode_id": "ep_chunk", "tts_ready_package": {"episode_id": "ep_chunk", "narration_blocks": blocks}}
+
+
+def _expected_ids(prompt):
+    line = next(l for l in prompt.splitlines() if l.startswith("EXPECTED_BLOCK_IDS"))
+    return json.loads(line.split(":", 1)[1].strip())
+
+
+def _plan_for(ids):
+    scenes = []
+    for i in range(0, len(ids), 2):
+        scenes.append({
+            "scene_id": f"sc_{i // 2 + 1:04d}",
+            "start_sec": 0,
+            "end_sec": 5,
+            "narration_block_ids": ids[i:i + 2],
+            "narrative_summary": "Napoleon army marches toward Moscow.",
+            "emotion": "neutral",
+            "keywords": ["Napoleon", "Moscow", "army", "1812", "column"],
+            "search_queries": ["Napoleon Moscow 1812", "Napoleon army march", "Moscow 1812 map"],
+        })
+    return {"shot_plan": {"version": "fda_v2.7", "source": "tts_ready_package", "scenes": scenes}}
+
+
+def test_split_fda_chunks_balanced_and_ordered():
+    blocks = [{"block_id": f"b_{i:04d}"} for i in range(33)]
+    chunks = fd.split_fda_chunks(blocks, 16)
+    assert [len(c) for c in chunks] == [11, 11, 11]
+    assert [b for c in chunks for b in c] == blocks
+    assert fd.split_fda_chunks(blocks, 0) == [blocks]
+    assert fd.split_fda_chunks(blocks[:10], 16) == [blocks[:10]]
+
+
+def test_chunked_fda_runs_in_parallel_and_merges_in_order(monkeypatch):
+    monkeypatch.setenv("FDA_CHUNK_WORKERS", "4")
+    lock = threading.Lock()
+    state = {"active": 0, "max_active": 0}
+
+    def fake_llm(provider, prompt, api_key, model, temperature, timeout_s=120, cache_step=None, **kw):
+        with lock:
+            state["active"] += 1
+            state["max_active"] = max(state["max_active"], state["active"])
+        time.sleep(0.05)
+        with lock:
+            state["active"] -= 1
+        parsed = _plan_for(_expected_ids(prompt))
+        return json.dumps(parsed), parsed, {"cache": {"hit": False}}
+
+    monkeypatch.setattr(sp, "_llm_chat_json_raw", fake_llm)
+    _, _, metadata = fd.run_fda_llm(_script_state(24), {"openrouter": "k"}, config={"chunk_blocks": 8})
+
+    assert state["max_active"] > 1
+    chunking = metadata["chunking"]
+    assert [c["first_block_id"] for c in chunking["chunks"]] == ["b_0001", "b_0009", "b_0017"]
+    assert chunking["repairs"] == 0
+
+
+def test_chunked_fda_merged_plan_covers_all_blocks(monkeypatch):
+    def fake_llm(provider, prompt, api_key, model, temperature, timeout_s=120, cache_step=None, **kw):
+        parsed = _plan_for(_expected_ids(prompt))
+        return json.dumps(parsed), parsed, {}
+
+    monkeypatch.setattr(sp, "_llm_chat_json_raw", fake_llm)
+    chunks = fd.split_fda_chunks(_script_state(20)["tts_ready_package"]["narration_blocks"], 8)
+    merged, _, meta, _ = fd._run_fda_llm_chunked(chunks, {"provider": "openrouter", "model": "m"}, "k")
+
+    scenes = merged["shot_plan"]["scenes"]
+    assert [b for sc in scenes for b in sc["narration_block_ids"]] == [f"b_{i:04d}" for i in range(1, 21)]
+    assert [sc["scene_id"] for sc in scenes] == [f"sc_{i:04d}" for i in range(1, len(scenes) + 1)]
+    assert len(meta["chunks"]) == 3
+
+
+def test_chunk_repair_recalls_only_failed_chunk(monkeypatch):
+    monkeypatch.setenv("FDA_CHUNK_REPAIR_ATTEMPTS", "1")
+    calls = []
+
+    def fake_llm(provider, prompt, api_key, model, temperature, timeout_s=120, cache_step=None, **kw):
+        ids = _expected_ids(prompt)
+        repair = "REPAIR_HINT" in prompt
+        calls.append((ids[0], repair))
+        if ids[0] == "b_0009" and not repair:
+            ids = ids[:-1]  # vynechaný blok → coverage chyba jen v tomto chunku
+        parsed = _plan_for(ids)
+        return json.dumps(parsed), parsed, {}
+
+    monkeypatch.setattr(sp, "_llm_chat_json_raw", fake_llm)
+    chunks = fd.split_fda_chunks(_script_state(24)["tts_ready_package"]["narration_blocks"], 8)
+    merged, _, meta, _ = fd._run_fda_llm_chunked(chunks, {"provider": "openrouter", "model": "m"}, "k")
+
+    assert sorted(calls) == [("b_0001", False), ("b_0009", False), ("b_0009", True), ("b_0017", False)]
+    assert meta["repairs"] == 1
+    assert [c["attempts"] for c in meta["chunks"]] == [1, 2, 1]
+    assert all(c["coverage_ok"] for c in meta["chunks"])
+    assert len([b for sc in merged["shot_plan"]["scenes"] for b in sc["narration_block_ids"]]) == 24
+
+
+def test_invalid_json_in_one_chunk_retries_only_that_chunk(monkeypatch):
+    monkeypatch.setenv("FDA_CHUNK_REPAIR_ATTEMPTS", "1")
+    calls = []
+
+    def fake_llm(provider, prompt, api_key, model, temperature, timeout_s=120, cache_step=None, **kw):
+        ids = _expected_ids(prompt)
+        repair = "REPAIR_HINT" in prompt
+        calls.append((ids[0], repair))
+        if ids[0] == "b_0009" and not repair:
+            return "{not json", None, {"finish_reason": "length", "response_text_source": "content"}
+        parsed = _plan_for(ids)
+        return json.dumps(parsed), parsed, {}
+
+    monkeypatch.setattr(sp, "_llm_chat_json_raw", fake_llm)
+    chunks = fd.split_fda_chunks(_script_state(24)["tts_ready_package"]["narration_blocks"], 8)
+    merged, _, meta, _ = fd._run_fda_llm_chunked(chunks, {"provider": "openrouter", "model": "m"}, "k")
+
+    assert sorted(calls) == [("b_0001", False), ("b_0009", False), ("b_0009", True), ("b_0017", False)]
+    assert [c["attempts"] for c in meta["chunks"]] == [1, 2, 1]
+    assert len([b for sc in merged["shot_plan"]["scenes"] for b in sc["narration_block_ids"]]) == 24
+
+
+def test_chunk_that_never_returns_json_fails_the_step(monkeypatch):
+    monkeypatch.setenv("FDA_CHUNK_REPAIR_ATTEMPTS", "1")
+    monkeypatch.setattr(sp, "_llm_chat_json_raw", lambda *a, **kw: ("", None, {}))
+    chunks = fd.split_fda_chunks(_script_state(8)["tts_ready_package"]["narration_blocks"], 8)
+    with pytest.raises(RuntimeError, match="failed after 2 attempts"):
+        fd._run_fda_llm_chunked(chunks, {"provider": "openrouter", "model": "m"}, "k")
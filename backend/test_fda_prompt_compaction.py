@@ -0,0 +1,57 @@
+import footage_director as fd
+
+
+def _blocks(start, n):
+    return [
+        {
+            "block_id": f"b_{i:04d}",
+            "text_tts": (
+                f"In 1812 Napoleon entered Moscow and found the Kremlin empty, column {i}. "
+                "Governor Rostopchin had ordered the fire brigades out of the city, and the fires spread through wooden streets for days."
+            ),
+        }
+        for i in range(start, start + n)
+    ]
+
+
+def test_compact_prompt_is_smaller_and_covers_every_block():
+    blocks = _blocks(1, 16)
+    legacy = fd._build_fda_prompt(blocks, episode_id="ep", compact=False)
+    compact = fd._build_fda_prompt(blocks, episode_id="ep", compact=True)
+
+    stats = fd.fda_prompt_compaction_stats([blocks], episode_id="ep")
+    assert stats["chars_before"] == len(legacy) and stats["chars_after"] == len(compact)
+    assert stats["reduction_pct"] >= 15
+
+    # Legacy narration preview stops at 10 blocks; the compact index lists all of them
+    assert "b_0016 (~" not in legacy
+    index = compact.split("NARRATION_INDEX", 1)[1]
+    assert all(f"b_{i:04d} ~" in index for i in range(1, 17))
+    assert "QUERY GENERATOR" in legacy and "QUERY GENERATOR" not in compact
+    # Anchor terms listed once: the pool references them instead of repeating them
+    assert "b_0001: " in compact and "every term in ANCHOR_TERMS_PER_BLOCK_ID, plus:" in compact
+    pool_line = next(l for l in compact.splitlines() if l.startswith("ALLOWED_KEYWORD_POOL"))
+    assert "Rostopchin" not in pool_line
+
+
+def test_compact_prompts_share_static_prefix_across_chunks_and_repairs():
+    a = fd._build_fda_prompt(_blocks(1, 8), episode_id="ep", compact=True)
+    b = fd._build_fda_prompt(_blocks(9, 8), episode_id="ep", compact=True, repair_hint="missing b_0012")
+    prefix = a.split("HARD COVERAGE GUARD", 1)[0]
+    assert len(prefix) > 4000 and b.startswith(prefix)
+    assert b.rstrip().endswith("REPAIR_HINT: missing b_0012")
+
+
+def test_env_switch_and_sceneplan(monkeypatch):
+    blocks = _blocks(1, 4)
+    monkeypatch.setenv("FDA_PROMPT_COMPACT", "0")
+    assert fd._build_fda_prompt(blocks).startswith("HARD COVERAGE GUARD")
+    long_sceneplan = fd._prompt_sceneplan_v3(blocks)
+
+    monkeypatch.setenv("FDA_PROMPT_COMPACT", "1")
+    assert not fd._build_fda_prompt(blocks).startswith("HARD COVERAGE GUARD")
+    short_sceneplan = fd._prompt_sceneplan_v3(blocks)
+    assert len(short_sceneplan) < len(long_sceneplan)
+    assert "- b_0001: In 1812 Napoleon entered Moscow and found the Kremlin empty, column 1." in short_sceneplan
+
+    assert fd._compact_block_summary("word " * 40, max_chars=20) == "word word word word…"
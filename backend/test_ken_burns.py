@@ -0,0 +1,51 @@
+import os
+import tempfile
+
+import numpy as np
+from PIL import Image
+
+
+def test_crop_schedule_effects():
+    from ken_burns import crop_schedule
+
+    zoom_in = crop_schedule(25, 130, 65, effect_type=0, scale_factor=1.3)
+    assert zoom_in.shape == (25, 4)
+    widths = zoom_in[:, 2] - zoom_in[:, 0]
+    assert np.isclose(widths[0], 130) and np.isclose(widths[-1], 100)
+    assert np.all(np.diff(widths) <= 1e-9)  # monotonic zoom, no jitter
+
+    zoom_out = crop_schedule(25, 130, 65, effect_type=1, scale_factor=1.3)
+    assert np.allclose(zoom_out[::-1], zoom_in)
+
+    pan_left = crop_schedule(25, 130, 65, effect_type=2, scale_factor=1.3)
+    assert np.allclose(pan_left[:, 2] - pan_left[:, 0], 100)
+    assert np.isclose(pan_left[0, 0], 0) and np.isclose(pan_left[-1, 2], 130)
+    pan_right = crop_schedule(25, 130, 65, effect_type=3, scale_factor=1.3)
+    assert np.allclose(pan_right[::-1], pan_left)
+
+    # Every box stays inside the source
+    for boxes in (zoom_in, zoom_out, pan_left, pan_right):
+        assert boxes[:, 0].min() >= 0 and boxes[:, 1].min() >= 0
+        assert boxes[:, 2].max() <= 130 + 1e-9 and boxes[:, 3].max() <= 65 + 1e-9
+
+
+def test_renderer_outputs_full_resolution_frames():
+    from ken_burns import KenBurnsRenderer
+
+    with tempfile.TemporaryDirectory() as td:
+        path = os.path.join(td, "img.png")
+        # Non-16:9 source → cover-fit, no distortion
+        arr = np.zeros((300, 300, 3), dtype=np.uint8)
+        arr[:, 150:] = 255
+        Image.fromarray(arr).save(path)
+
+        r = KenBurnsRenderer(path, 2.0, 64, 36, effect_type=0, fps=10)
+        assert r.n_frames == 20
+        assert r.prepared.size == (83, 47)
+        first = r.frame_at(0.0)
+        assert r.frame_at(0.0) is first  # repeated get_frame(t) is free
+        last = r.frame_at(2.0)  # clamped to the last frame
+        assert first.shape == (36, 64, 3) and first.dtype == np.uint8
+        assert last.shape == (36, 64, 3)
+        # Left half dark, right half bright in every frame
+        assert first[:, :20].mean() < 30 and first[:, -20:].mean() > 225
@@ -0,0 +1,87 @@
+import os
+import tempfile
+
+
+def test_create_subclip_uses_effect_variant_preset_and_threads(monkeypatch):
+    import compilation_builder as cb_module
+
+    calls = []
+
+    class _Result:
+        returncode = 0
+        stderr = ""
+
+    def fake_run(cmd, **kwargs):
+        calls.append(cmd)
+        with open(cmd[-1], "wb") as f:
+            f.write(b"x")
+        return _Result()
+
+    monkeypatch.setattr(cb_module.subprocess, "run", fake_run)
+    with tempfile.TemporaryDirectory() as td:
+        builder = cb_module.CompilationBuilder(storage_dir=td, output_dir=td)
+        out = os.path.join(td, "clip.mp4")
+        assert builder.create_subclip("img.jpg", 0, 2.0, out, target_fps=24, resolution="1280x720",
+                                      effect_variant=3, preset="veryfast", threads=2)
+
+    cmd = calls[0]
+    vf = cmd[cmd.index("-vf") + 1]
+    assert "zoompan" in vf and "(1-on/" in vf and "s=1280x720" in vf  # pan right→left
+    assert cmd[cmd.index("-preset") + 1] == "veryfast"
+    assert cmd[cmd.index("-threads") + 1] == "2"
+
+
+def test_render_kenburns_slideshow_renders_in_order_and_muxes(monkeypatch):
+    import kenburns_slideshow as ks
+
+    rendered = []
+
+    def fake_subclip(self, source_file, in_sec, out_sec, output_file, target_fps=30, resolution="1920x1080",
+                     effect_variant=None, preset="fast", threads=None):
+        rendered.append((source_file, effect_variant, preset, threads, target_fps, resolution))
+        if source_file.endswith("broken.jpg"):
+            return False
+        with open(output_file, "wb") as f:
+            f.write(b"clip")
+        return True
+
+    mux = {}
+
+    class _Result:
+        returncode = 0
+        stderr = ""
+        stdout = ""
+
+    def fake_run(cmd, **kwargs):
+        if cmd[0] == "ffmpeg":
+            mux["cmd"] = cmd
+            lists = [cmd[i + 1] for i, a in enumerate(cmd) if a == "-i"]
+            mux["lists"] = [open(p, encoding="utf-8").read() for p in lists]
+            with open(cmd[-1], "wb") as f:
+                f.write(b"video")
+        return _Result()
+
+    monkeypatch.setattr(ks.CompilationBuilder, "create_subclip", fake_subclip)
+    monkeypatch.setattr(ks.subprocess, "run", fake_run)
+
+    with tempfile.TemporaryDirectory() as td:
+        audio = os.path.join(td, "Narrator_0001.mp3")
+        with open(audio, "wb") as f:
+            f.write(b"a")
+        out = os.path.join(td, "out", "final.mp4")
+        items = [("a.jpg", 0), ("broken.jpg", 1), ("c.jpg", 2)]
+        result = ks.render_kenburns_slideshow(items, 3.0, [audio], out, width=1280, height=720, fps=15,
+                                              workers=2, threads=3, preset="ultrafast")
+
+        assert os.path.exists(out)
+        # temp clips are cleaned up, only the output remains
+        assert os.listdir(os.path.dirname(out)) == ["final.mp4"]
+
+    assert sorted(r[:2] for r in rendered) == [("a.jpg", 0), ("broken.jpg", 1), ("c.jpg", 2)]
+    assert all(r[2:] == ("ultrafast", 3, 15, "1280x720") for r in rendered)
+    assert result["successful_clips"] == 2 and result["failed_clips"] == 1
+    video_list, audio_list = mux["lists"]
+    assert video_list.index("clip_00000.mp4") < video_list.index("clip_00002.mp4")
+    assert "clip_00001.mp4" not in video_list
+    assert "Narrator_0001.mp3" in audio_list
+    assert mux["cmd"][mux["cmd"].index("-c:v") + 1] == "copy"
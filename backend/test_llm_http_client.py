@@ -0,0 +1,141 @@
+import threading
+import time
+
+import pytest
+import requests
+
+
+class _Resp:
+    def __init__(self, status, body=None, headers=None):
+        self.status_code = status
+        self._body = body or {}
+        self.headers = headers or {}
+        self.text = str(self._body)
+
+    def json(self):
+        return self._body
+
+
+def test_retries_429_and_5xx_with_backoff_then_records_tokens():
+    from llm_http_client import LLMHttpClient
+
+    sleeps = []
+    client = LLMHttpClient(max_retries=3, backoff_base_sec=0.5, backoff_cap_sec=4, sleep=sleeps.append)
+    responses = [
+        _Resp(429, headers={"Retry-After": "2"}),
+        _Resp(503),
+        _Resp(200, {"usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15}}),
+    ]
+    client._session.post = lambda *a, **k: responses.pop(0)
+
+    resp = client.post("https://openrouter.ai/api/v1/chat/completions", json={})
+    assert resp.status_code == 200
+    assert len(sleeps) == 2 and sleeps[0] >= 2.0 and 0 <= sleeps[1] <= 1.0
+
+    m = client.metrics_snapshot()["openrouter"]
+    assert m["requests"] == 3 and m["retries"] == 2 and m["errors"] == 2
+    assert m["total_tokens"] == 15 and m["prompt_tokens"] == 10
+
+
+def test_gives_up_after_max_retries_and_does_not_retry_4xx():
+    from llm_http_client import LLMHttpClient
+
+    client = LLMHttpClient(max_retries=2, sleep=lambda s: None)
+    calls = []
+
+    def always_500(*a, **k):
+        calls.append(1)
+        return _Resp(500)
+
+    client._session.post = always_500
+    assert client.post("https://api.openai.com/v1/chat/completions", json={}).status_code == 500
+    assert len(calls) == 3
+
+    client._session.post = lambda *a, **k: calls.append(1) or _Resp(400)
+    assert client.post("https://api.openai.com/v1/chat/completions", json={}).status_code == 400
+    assert len(calls) == 4
+
+    def refuse(*a, **k):
+        raise requests.exceptions.ConnectionError("refused")
+
+    client._session.post = refuse
+    with pytest.raises(requests.exceptions.ConnectionError):
+        client.post("https://api.openai.com/v1/chat/completions", json={})
+
+
+def test_per_provider_concurrency_limit(monkeypatch):
+    from llm_http_client import LLMHttpClient
+
+    monkeypatch.setenv("LLM_MAX_CONCURRENCY_OPENAI", "2")
+    client = LLMHttpClient(max_retries=0)
+    active = []
+    peak = [0]
+    lock = threading.Lock()
+
+    def slow(*a, **k):
+        with lock:
+            active.append(1)
+            peak[0] = max(peak[0], len(active))
+        time.sleep(0.05)
+        with lock:
+            active.pop()
+        return _Resp(200)
+
+    client._session.post = slow
+    threads = [threading.Thread(target=client.post, args=("https://api.openai.com/x",)) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert peak[0] == 2
+
+
+class _StreamResp(_Resp):
+    def __init__(self, status, lines=(), break_after=None, headers=None):
+        super().__init__(status, headers=headers)
+        self._lines = list(lines)
+        self._break_after = break_after
+        self.closed = False
+
+    def iter_lines(self, decode_unicode=False):
+        for i, line in enumerate(self._lines):
+            if i == self._break_after:
+                raise requests.exceptions.ChunkedEncodingError("connection reset mid-stream")
+            yield line
+
+    def close(self):
+        self.closed = True
+
+
+def test_stream_retries_before_first_event_and_closes_responses():
+    from llm_http_client import LLMHttpClient
+
+    client = LLMHttpClient(max_retries=3, sleep=lambda s: None)
+    events = ['data: {"choices": [{"delta": {"content": "a"}}]}', 'data: {"usage": {"total_tokens": 7}}', "data: [DONE]"]
+    responses = [_StreamResp(503), _StreamResp(200, events, break_after=0), _StreamResp(200, events)]
+    sent = list(responses)
+    client._session.post = lambda *a, **k: responses.pop(0)
+    got = []
+
+    resp = client.post_stream("https://api.openai.com/v1/chat/completions", got.append, json={})
+    assert resp is sent[2] and len(got) == 2
+    assert sent[0].closed and sent[1].closed  # connections go back to the pool before each retry
+    m = client.metrics_snapshot()["openai"]
+    assert m["requests"] == 3 and m["retries"] == 2 and m["errors"] == 2 and m["total_tokens"] == 7
+
+
+def test_stream_broken_after_data_is_recorded_and_not_replayed():
+    from llm_http_client import LLMHttpClient
+
+    client = LLMHttpClient(max_retries=3, sleep=lambda s: None)
+    events = ['data: {"choices": [{"delta": {"content": "a"}}]}', 'data: {"choices": [{"delta": {"content": "b"}}]}']
+    broken = _StreamResp(200, events, break_after=1)
+    calls = []
+    client._session.post = lambda *a, **k: calls.append(1) or broken
+    got = []
+
+    with pytest.raises(requests.exceptions.ChunkedEncodingError):
+        client.post_stream("https://api.openai.com/v1/chat/completions", got.append, json={})
+    assert len(calls) == 1 and len(got) == 1 and broken.closed
+    m = client.metrics_snapshot()["openai"]
+    assert m["requests"] == 1 and m["errors"] == 1 and m["retries"] == 0
@@ -0,0 +1,108 @@
+import json
+import tempfile
+
+
+class _Resp:
+    def __init__(self, content):
+        self.status_code = 200
+        self.headers = {}
+        self._json = {"id": "x", "model": "m", "choices": [{"message": {"content": content}, "finish_reason": "stop"}]}
+        self.text = json.dumps(self._json)
+
+    def json(self):
+        return self._json
+
+
+def _setup(monkeypatch, td, contents):
+    import script_pipeline as sp
+
+    posts = []
+
+    def fake_post(url, headers=None, json=None, timeout=None, verify=True):
+        posts.append(json)
+        return _Resp(contents[min(len(posts), len(contents)) - 1])
+
+    monkeypatch.setattr(sp.llm_client._session, "post", fake_post)
+    monkeypatch.setattr(sp, "_llm_response_cache", None)
+    monkeypatch.setenv("LLM_RESPONSE_CACHE", "1")
+    monkeypatch.setenv("LLM_RESPONSE_CACHE_DIR", td)
+    return sp, posts
+
+
+def _call(sp, prompt="PROMPT", model="m", temperature=0.0, step="research", **kw):
+    raw, parsed, meta = sp._llm_chat_json_raw("openrouter", prompt, "k", model=model, temperature=temperature, cache_step=step, **kw)
+    sp.commit_llm_cache(raw, meta)  # step validation passed
+    return raw, parsed, meta
+
+
+def test_repeated_prompt_is_served_from_cache(monkeypatch):
+    with tempfile.TemporaryDirectory() as td:
+        sp, posts = _setup(monkeypatch, td, ['{"a": 1}'])
+
+        raw, parsed, meta = _call(sp)
+        assert parsed == {"a": 1} and meta["cache"]["hit"] is False and meta["cache"]["stored"] is True
+        raw2, parsed2, meta2 = _call(sp)
+        assert parsed2 == parsed and raw2 == raw and meta2["cache"]["hit"] is True
+        assert len(posts) == 1
+
+        # Any key component change → fresh call
+        _call(sp, prompt="PROMPT 2")
+        _call(sp, model="m2")
+        assert len(posts) == 3
+
+        # Temperature is part of the key; the step policy decides whether non-zero temperatures are cached
+        _call(sp, temperature=0.2)
+        _call(sp, temperature=0.2)
+        assert len(posts) == 4
+        monkeypatch.setenv("LLM_RESPONSE_CACHE_ANY_TEMP_RESEARCH", "0")
+        _call(sp, temperature=0.3)
+        _call(sp, temperature=0.3)
+        assert len(posts) == 6
+        monkeypatch.delenv("LLM_RESPONSE_CACHE_ANY_TEMP_RESEARCH")
+
+        # Narrative off by default; no step → no cache
+        _call(sp, prompt="N", step="narrative")
+        _call(sp, prompt="N", step="narrative")
+        _call(sp, step=None)
+        assert len(posts) == 9
+
+        # Per-step TTL override (0 = disabled)
+        monkeypatch.setenv("LLM_RESPONSE_CACHE_TTL_RESEARCH", "0")
+        _call(sp)
+        assert len(posts) == 10
+
+
+def test_invalid_json_is_not_cached_and_cache_is_opt_in(monkeypatch):
+    with tempfile.TemporaryDirectory() as td:
+        sp, posts = _setup(monkeypatch, td, ["not json", '{"ok": true}'])
+        _, parsed, _ = _call(sp, prompt="P", step="tts_format")
+        assert parsed is None
+        _, parsed, _ = _call(sp, prompt="P", step="tts_format")
+        assert parsed == {"ok": True} and len(posts) == 2
+
+        monkeypatch.setenv("LLM_RESPONSE_CACHE", "0")
+        _, _, meta = _call(sp, prompt="P", step="tts_format")
+        assert "cache" not in meta and len(posts) == 3
+
+
+def test_response_rejected_by_step_validation_is_not_replayed(monkeypatch):
+    with tempfile.TemporaryDirectory() as td:
+        sp, posts = _setup(monkeypatch, td, ['{"status": "FAIL"}', '{"status": "PASS"}', '{"status": "PASS", "v": 2}'])
+        args = ("openrouter", "VALIDATE", "k")
+
+        # Parsed but rejected → never committed, the next run asks the LLM again
+        _, parsed, meta = sp._llm_chat_json_raw(*args, model="m", temperature=0, cache_step="validation")
+        assert parsed == {"status": "FAIL"} and meta["cache"]["stored"] is False
+        raw, parsed, meta = sp._llm_chat_json_raw(*args, model="m", temperature=0, cache_step="validation")
+        assert parsed == {"status": "PASS"} and len(posts) == 2
+        assert sp.commit_llm_cache(raw, meta) and not sp.commit_llm_cache(raw, meta)
+
+        _, parsed, meta = sp._llm_chat_json_raw(*args, model="m", temperature=0, cache_step="validation")
+        assert meta["cache"]["hit"] is True and len(posts) == 2
+
+        # Explicit retry skips the lookup; its committed answer replaces the entry
+        raw, parsed, meta = sp._llm_chat_json_raw(*args, model="m", temperature=0, cache_step="validation", bypass_cache=True)
+        assert parsed == {"status": "PASS", "v": 2} and len(posts) == 3
+        sp.commit_llm_cache(raw, meta)
+        _, parsed, _ = sp._llm_chat_json_raw(*args, model="m", temperature=0, cache_step="validation")
+        assert parsed == {"status": "PASS", "v": 2} and len(posts) == 3
@@ -0,0 +1,97 @@
+import json
+
+from incremental_json import IncrementalArrayParser, iter_array_items
+
+
+DOC = {
+    "episode_metadata": {"topic": "Napoleon {1812}"},
+    "tts_segments": [
+        {"block_id": "b_0001", "tts_formatted_text": "He said: \"{not a brace}\" ]", "tags": ["a", "b"]},
+        {"block_id": "b_0002", "tts_formatted_text": "Moscow burned.", "nested": {"x": [1, {"y": 2}]}},
+        {"block_id": "b_0003", "tts_formatted_text": "Retreat\\n"},
+    ],
+    "scenes": [{"scene_id": "sc_0001"}],
+}
+
+
+def test_parser_emits_items_as_they_complete_for_any_split():
+    text = "```json\n" + json.dumps(DOC, ensure_ascii=False) + "\n```"
+    for step in (1, 3, 7, 64, len(text)):
+        parser = IncrementalArrayParser()
+        got = []
+        for i in range(0, len(text), step):
+            got.extend(parser.feed(text[i:i + step]))
+        assert got == DOC["tts_segments"]
+        assert parser.key == "tts_segments" and parser.done
+
+    # First item is available before the document is complete
+    text = json.dumps(DOC)
+    cut = text.index('{"block_id": "b_0002"')
+    parser = IncrementalArrayParser()
+    assert parser.feed(text[:cut]) == DOC["tts_segments"][:1]
+    assert iter_array_items(text, keys=("scenes",)) == DOC["scenes"]
+
+
+class _StreamResp:
+    status_code = 200
+    headers = {}
+    text = ""
+
+    def __init__(self, content):
+        self._content = content
+
+    def iter_lines(self, decode_unicode=False):
+        yield ": OPENROUTER PROCESSING"
+        for i in range(0, len(self._content), 5):
+            yield "data: " + json.dumps({"id": "gen-1", "model": "m", "choices": [{"delta": {"content": self._content[i:i + 5]}}]})
+            yield ""
+        yield "data: " + json.dumps({"choices": [{"delta": {}, "finish_reason": "stop"}], "usage": {"total_tokens": 42}})
+        yield "data: [DONE]"
+
+
+def test_streamed_chat_surfaces_partial_items(monkeypatch):
+    import script_pipeline as sp
+
+    content = json.dumps(DOC)
+    sent = []
+
+    def fake_post(url, headers=None, json=None, timeout=None, verify=True, stream=False):
+        sent.append((json, stream))
+        return _StreamResp(content)
+
+    monkeypatch.setattr(sp.llm_client._session, "post", fake_post)
+    monkeypatch.setenv("LLM_RESPONSE_CACHE", "0")
+    seen = []
+    raw, parsed, meta = sp._llm_chat_json_raw(
+        "openrouter", "P", "k", model="m", on_partial=lambda item, i, key: seen.append((i, key, item["block_id"]))
+    )
+
+    assert sent[0][1] is True and sent[0][0]["stream"] is True
+    assert raw == content and parsed == DOC
+    assert seen == [(0, "tts_segments", "b_0001"), (1, "tts_segments", "b_0002"), (2, "tts_segments", "b_0003")]
+    assert meta["streamed"] is True and meta["streamed_items"] == 3
+    assert meta["finish_reason"] == "stop" and meta["provider_response"]["usage"] == {"total_tokens": 42}
+
+
+def test_streaming_disabled_replays_items_once(monkeypatch):
+    import script_pipeline as sp
+
+    class _Resp:
+        status_code = 200
+        headers = {}
+
+        def __init__(self):
+            self._json = {"choices": [{"message": {"content": json.dumps(DOC)}, "finish_reason": "stop"}]}
+            self.text = json.dumps(self._json)
+
+        def json(self):
+            return self._json
+
+    monkeypatch.setattr(sp.llm_client._session, "post", lambda url, **kw: _Resp())
+    monkeypatch.setenv("LLM_STREAMING", "0")
+    monkeypatch.setenv("LLM_RESPONSE_CACHE", "0")
+    seen = []
+    _, parsed, meta = sp._llm_chat_json_raw("openai", "P", "k", model="m", on_partial=lambda item, i, key: seen.append(i))
+
+    assert parsed == DOC and seen == [0, 1, 2]
+    assert "streamed" not in meta
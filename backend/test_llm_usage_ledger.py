@@ -0,0 +1,138 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import llm_usage_ledger as lul
+from llm_http_client import LLMHttpClient
+
+
+class _Resp:
+    status_code = 200
+    headers = {}
+
+    def __init__(self, prompt_tokens, completion_tokens):
+        self._json = {"usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }}
+        self.text = json.dumps(self._json)
+
+    def json(self):
+        return self._json
+
+
+@pytest.fixture
+def ledger(tmp_path, monkeypatch):
+    for ep in ("ep_a", "ep_b"):
+        os.makedirs(tmp_path / ep)
+    led = lul.UsageLedger(str(tmp_path))
+    monkeypatch.setattr(lul, "_usage_ledger", led)
+    token = lul._scope.set(None)  # pipeline tests mark steps running in this thread
+    yield led
+    lul._scope.reset(token)
+
+
+def _client(monkeypatch, calls, prompt_tokens=1000, completion_tokens=500):
+    client = LLMHttpClient(max_retries=0)
+
+    def fake_post(url, **kw):
+        calls.append(kw["json"]["model"])
+        return _Resp(prompt_tokens, completion_tokens)
+
+    monkeypatch.setattr(client._session, "post", fake_post)
+    return client
+
+
+def test_calls_are_attributed_to_episode_step_and_persisted(ledger, monkeypatch, tmp_path):
+    calls = []
+    client = _client(monkeypatch, calls)
+    url = "https://api.openai.com/v1/chat/completions"
+
+    client.post(url, json={"model": "gpt-4o-mini"})  # outside any scope → not in a ledger
+    with lul.usage_scope("ep_a", "footage_director"):
+        client.post(url, json={"model": "openai/gpt-4o-mini"}, provider="openrouter")
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            list(pool.map(lul.bind_scope(lambda _: client.post(url, json={"model": "gpt-4o-2024-08-06"})), range(2)))
+        with lul.usage_scope(step="visual_assistant"):
+            client.post(url, json={"model": "some-unpriced-model"})
+    assert lul.current_usage_scope() is None and len(calls) == 5
+
+    with open(tmp_path / "ep_a" / lul.LEDGER_FILENAME, encoding="utf-8") as f:
+        doc = json.load(f)
+    fda = doc["steps"]["footage_director"]
+    assert fda["calls"] == 3 and fda["prompt_tokens"] == 3000 and fda["total_tokens"] == 4500
+    # gpt-4o-mini: 1000×0.15/1M + 500×0.60/1M; gpt-4o snapshot: 1000×2.5/1M + 500×10/1M (×2)
+    assert fda["cost_usd"] == pytest.approx(0.00045 + 2 * 0.0075)
+    assert doc["steps"]["visual_assistant"]["unpriced_calls"] == 1
+    assert doc["totals"]["calls"] == 4
+    assert set(doc["models"]) == {"openrouter:openai/gpt-4o-mini", "openai:gpt-4o-2024-08-06", "openai:some-unpriced-model"}
+
+
+def test_budget_fails_fast_before_sending(ledger, monkeypatch):
+    monkeypatch.setenv("LLM_EPISODE_BUDGET_TOKENS", "2000")
+    calls = []
+    client = _client(monkeypatch, calls)
+    url = "https://api.openai.com/v1/chat/completions"
+
+    with lul.usage_scope("ep_b", "research"):
+        client.post(url, json={"model": "gpt-4o"})
+        client.post(url, json={"model": "gpt-4o"})  # 1500 < 2000 → still allowed
+        with pytest.raises(lul.LLMBudgetExceeded):
+            client.post(url, json={"model": "gpt-4o"})
+    assert len(calls) == 2
+
+    with lul.usage_scope("ep_a", "research"):  # other episodes are unaffected
+        client.post(url, json={"model": "gpt-4o"})
+    assert len(calls) == 3
+
+
+def test_aggregate_endpoint_ranks_episodes_and_steps(ledger, monkeypatch):
+    import app as app_module
+
+    ledger.record("ep_a", "narrative", "openai", "gpt-4o", {"prompt_tokens": 100, "completion_tokens": 100}, 1200.0, True)
+    ledger.record("ep_b", "narrative", "openai", "gpt-4o", {"prompt_tokens": 4000, "completion_tokens": 2000}, 900.0, True)
+    ledger.record("ep_b", "footage_director", "openai", "gpt-4o-mini", {"prompt_tokens": 10, "completion_tokens": 0}, 300.0, False)
+
+    data = app_module.app.test_client().get("/api/llm/usage").get_json()
+    assert data["success"] and data["episodes"] == 2
+    assert [e["episode_id"] for e in data["top_episodes"]] == ["ep_b", "ep_a"]
+    assert data["steps"]["narrative"]["calls"] == 2 and data["steps"]["narrative"]["latency_ms_max"] == 1200.0
+    assert data["totals"]["errors"] == 1 and data["totals"]["total_tokens"] == 6210
+
+
+def test_spent_budget_stops_vision_fallbacks(ledger, monkeypatch):
+    from visual_assistant import VisualAssistant
+
+    monkeypatch.setenv("LLM_EPISODE_BUDGET_TOKENS", "1000")
+    ledger.record("ep_a", "visual_assistant", "openai", "gpt-4o", {"prompt_tokens": 900, "completion_tokens": 200}, 10.0, True)
+    import llm_http_client
+
+    calls = []
+    monkeypatch.setattr(llm_http_client.llm_client._session, "post", lambda *a, **k: calls.append(a))
+    va = VisualAssistant(api_key="k", provider="openai")
+    prepared = [{"candidates": [{"thumbnail_url": "https://t/1.jpg"}], "beat_text": "beat", "shot_types": []}]
+
+    with lul.usage_scope("ep_a", "visual_assistant"):
+        with pytest.raises(lul.LLMBudgetExceeded):
+            va.batch_analyze_beats(prepared)
+        with pytest.raises(lul.LLMBudgetExceeded):
+            va.analyze_candidate("https://t/1.jpg", "beat", [], {"title": "x"})
+    assert calls == []  # no batch call and no single-thumbnail fallback was sent
+
+
+def test_aggregate_does_not_pin_other_episodes_in_memory(ledger, monkeypatch):
+    ledger.record("ep_a", "narrative", "openai", "gpt-4o", {"prompt_tokens": 10, "completion_tokens": 0}, 1.0, True)
+    other = lul.UsageLedger(ledger.projects_dir)
+    other.record("ep_b", "narrative", "openai", "gpt-4o", {"prompt_tokens": 20, "completion_tokens": 0}, 1.0, True)
+
+    assert ledger.aggregate()["totals"]["prompt_tokens"] == 30
+    assert ledger.episode_usage("ep_b")["totals"]["prompt_tokens"] == 20
+    assert list(ledger._docs) == ["ep_a"]
+
+    monkeypatch.setattr(lul, "LEDGER_MEMORY_MAX_EPISODES", 1)
+    ledger.record("ep_b", "narrative", "openai", "gpt-4o", {"prompt_tokens": 5, "completion_tokens": 0}, 1.0, True)
+    assert list(ledger._docs) == ["ep_b"]
+    assert ledger.episode_usage("ep_b")["totals"]["prompt_tokens"] == 25
@@ -0,0 +1,92 @@
+import os
+import tempfile
+
+
+def test_duration_bucket():
+    from motion_clip_cache import duration_bucket
+
+    assert duration_bucket(2.0, 0.5) == 2.0
+    assert duration_bucket(1.8, 0.5) == 2.0
+    assert duration_bucket(2.01, 0.5) == 2.5
+    assert duration_bucket(1.234, 0) == 1.234
+
+
+def test_repeated_still_is_rendered_once(monkeypatch):
+    import compilation_builder as cb_module
+    from motion_clip_cache import MotionClipCache
+
+    calls = []
+
+    class _Result:
+        returncode = 0
+        stderr = ""
+
+    def fake_run(cmd, **kwargs):
+        calls.append(cmd)
+        with open(cmd[-1], "wb") as f:
+            f.write(b"rendered" if "-vf" in cmd else b"trimmed")
+        return _Result()
+
+    monkeypatch.setattr(cb_module.subprocess, "run", fake_run)
+    monkeypatch.setenv("CB_MOTION_CACHE_BUCKET_SEC", "0.5")
+
+    with tempfile.TemporaryDirectory() as td:
+        image = os.path.join(td, "photo.jpg")
+        with open(image, "wb") as f:
+            f.write(b"jpeg-bytes")
+        cache = MotionClipCache(td)
+        builder = cb_module.CompilationBuilder(storage_dir=td, output_dir=td, motion_cache=cache)
+
+        out1 = os.path.join(td, "beat1.mp4")
+        out2 = os.path.join(td, "beat2.mp4")
+        assert builder.create_subclip(image, 0, 2.0, out1, target_fps=30, effect_variant=2)
+        assert builder.create_subclip(image, 0, 2.0, out2, target_fps=30, effect_variant=2)
+        renders = [c for c in calls if "-vf" in c]
+        assert len(renders) == 1
+        assert renders[0][renders[0].index("-t") + 1] == "2.0"
+        assert open(out2, "rb").read() == b"rendered"  # plain copy from cache
+
+        # Same bucket, shorter beat → stream-copy trim of the cached master, no re-encode
+        out3 = os.path.join(td, "beat3.mp4")
+        assert builder.create_subclip(image, 0, 1.8, out3, target_fps=30, effect_variant=2)
+        assert len([c for c in calls if "-vf" in c]) == 1
+        trim = calls[-1]
+        assert trim[trim.index("-t") + 1] == "1.800" and trim[trim.index("-c") + 1] == "copy"
+
+        # Different effect / resolution → new render
+        assert builder.create_subclip(image, 0, 2.0, os.path.join(td, "b4.mp4"), target_fps=30, effect_variant=0)
+        assert builder.create_subclip(image, 0, 2.0, os.path.join(td, "b5.mp4"), target_fps=30,
+                                      resolution="1280x720", effect_variant=2)
+        assert len([c for c in calls if "-vf" in c]) == 3
+
+        # Changed image content → new key
+        with open(image, "wb") as f:
+            f.write(b"other-jpeg-bytes!")
+        assert builder.create_subclip(image, 0, 2.0, os.path.join(td, "b6.mp4"), target_fps=30, effect_variant=2)
+        assert len([c for c in calls if "-vf" in c]) == 4
+
+
+def test_cache_is_pruned_lru_to_byte_budget(monkeypatch):
+    from motion_clip_cache import MotionClipCache
+
+    monkeypatch.setenv("MOTION_CACHE_MAX_MB", "1")
+    with tempfile.TemporaryDirectory() as td:
+        cache = MotionClipCache(td)
+        keys = [MotionClipCache.key_for(f"img{i}", 0, 2.0, "1920x1080", 30) for i in range(4)]
+
+        def _store(i, mtime):
+            tmp = cache.tmp_path_for(keys[i])
+            with open(tmp, "wb") as f:
+                f.write(b"x" * 400 * 1024)
+            path = cache.put_file(keys[i], tmp)
+            os.utime(path, (mtime, mtime))
+
+        _store(0, 1000)
+        _store(1, 2000)
+        assert cache.get(keys[0])  # hit → most recently used
+        _store(2, 3000)  # 1.2 MB > 1 MB → evict the LRU master (keys[1])
+        assert cache.get(keys[1]) is None and cache.get(keys[0]) and cache.get(keys[2])
+
+        monkeypatch.setenv("MOTION_CACHE_MAX_MB", "0")  # unlimited
+        _store(3, 4000)
+        assert all(cache.get(k) for k in (keys[0], keys[2], keys[3]))
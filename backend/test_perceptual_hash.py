@@ -0,0 +1,132 @@
+import io
+import json
+
+import numpy as np
+from PIL import Image
+
+import perceptual_hash as ph
+from visual_assistant import VisualAssistant
+
+
+def _img(seed, size=(320, 240)):
+    rng = np.random.default_rng(seed)
+    a = (rng.random((12, 16)) * 255).astype("uint8")
+    return Image.fromarray(a).resize(size, Image.BICUBIC)
+
+
+def _bytes(img, fmt="PNG"):
+    buf = io.BytesIO()
+    img.save(buf, fmt)
+    return buf.getvalue()
+
+
+def _images():
+    base = _img(1)
+    return {
+        "https://t/base.png": _bytes(base),
+        "https://t/base_big.png": _bytes(_img(1, (640, 480))),
+        "https://t/base.jpg": _bytes(base, "JPEG"),
+        "https://t/base_crop.png": _bytes(base.crop((12, 0, 320, 240))),
+        "https://t/other.png": _bytes(_img(2)),
+    }
+
+
+def _candidates(prefix):
+    return [
+        {"archive_item_id": f"{prefix}a", "thumbnail_url": "https://t/base.png", "_source": "archive_org"},
+        {"archive_item_id": f"{prefix}b", "thumbnail_url": "https://t/base_big.png", "_source": "wikimedia"},
+        {"archive_item_id": f"{prefix}c", "thumbnail_url": "https://t/base.jpg", "_source": "europeana"},
+        {"archive_item_id": f"{prefix}d", "thumbnail_url": "https://t/base_crop.png", "_source": "archive_org"},
+        {"archive_item_id": f"{prefix}e", "thumbnail_url": "https://t/other.png", "_source": "archive_org"},
+        {"archive_item_id": f"{prefix}f", "thumbnail_url": "https://t/missing.png", "_source": "archive_org"},
+    ]
+
+
+def test_hashes_and_bk_tree():
+    base = _img(1)
+    assert ph.hamming(ph.phash(base), ph.phash(base.resize((160, 120)))) <= 2
+    assert ph.hamming(ph.phash(base), ph.phash(_img(2))) > 20
+
+    tree = ph.BKTree()
+    for i, h in enumerate([0b0000, 0b0001, 0b0111, 0b1111_0000]):
+        tree.add(h, i)
+    assert sorted(item for _, item in tree.query(0b0000, 1)) == [0, 1]
+    assert sorted(item for _, item in tree.query(0b0011, 1)) == [1, 2]
+
+
+def test_local_groups_collapse_sure_duplicates_and_flag_borderline(monkeypatch):
+    images = _images()
+    monkeypatch.setattr(ph, "_hash_memo", {})
+    local = ph.local_near_duplicate_groups(_candidates("x_"), fetch=images.get)
+
+    assert len(local["groups"]) == 1
+    group = local["groups"][0]
+    assert sorted(group["ids"]) == ["x_a", "x_b", "x_c"] and group["best_id"] == "x_b"  # largest thumbnail wins
+    assert local["duplicate_of"] == {"x_a": "x_b", "x_c": "x_b"}
+    assert "x_d" in local["ambiguous_ids"] and "x_f" in local["ambiguous_ids"]
+    assert "x_e" not in local["ambiguous_ids"]
+    assert local["hashed"] == 5 and local["unhashed"] == 1
+
+
+def test_visual_assistant_sends_only_ambiguous_candidates_to_llm(monkeypatch):
+    images = _images()
+    monkeypatch.setattr(ph, "_hash_memo", {})
+    monkeypatch.setattr(ph, "fetch_image_bytes", images.get)
+    va = VisualAssistant(api_key="k")
+    sent = []
+
+    def fake_multi(system_prompt, user_text, image_urls):
+        sent.append(sorted(image_urls))
+        return json.dumps({"groups": [], "unique_ids": ["y_b", "y_d", "y_f"]})
+
+    monkeypatch.setattr(va, "_call_vision_api_multi", fake_multi)
+    result = va._deduplicate_pool_candidates(_candidates("y_"), "Napoleon")
+
+    # y_b (cluster representative, borderline to y_d) + y_d + unhashable y_f; not y_a/y_c/y_e
+    assert sent == [["https://t/base_big.png", "https://t/base_crop.png", "https://t/missing.png"]]
+    assert [c["archive_item_id"] for c in result["unique_candidates"]] == ["y_b", "y_d", "y_e", "y_f"]
+
+
+def test_no_llm_call_when_nothing_is_ambiguous(monkeypatch):
+    images = _images()
+    monkeypatch.setattr(ph, "_hash_memo", {})
+    monkeypatch.setattr(ph, "fetch_image_bytes", images.get)
+    va = VisualAssistant(api_key="k")
+    monkeypatch.setattr(va, "_call_vision_api_multi", lambda **kw: (_ for _ in ()).throw(AssertionError("LLM called")))
+
+    cands = [c for c in _candidates("z_") if c["archive_item_id"] in ("z_a", "z_b", "z_e")]
+    result = va._deduplicate_pool_candidates(cands, "Napoleon")
+    assert [c["archive_item_id"] for c in result["unique_candidates"]] == ["z_b", "z_e"]
+
+
+def test_borderline_pair_through_collapsed_member_sends_representative(monkeypatch):
+    # a ~ b (distance 6 → same cluster, b has more pixels → best); d is borderline to a only (9), far from b (15)
+    bits = lambda lo, hi: sum(1 << i for i in range(lo, hi))
+    hashes = {
+        "https://t/a.png": {"phash": 0, "dhash": 0, "pixels": 100},
+        "https://t/b.png": {"phash": bits(0, 6), "dhash": 0, "pixels": 400},
+        "https://t/d.png": {"phash": bits(6, 15), "dhash": 0, "pixels": 100},
+    }
+    monkeypatch.setattr(ph, "thumbnail_hashes", lambda urls, fetch=None: {u: hashes.get(u) for u in urls})
+    cands = [{"archive_item_id": k, "thumbnail_url": f"https://t/{k}.png"} for k in ("a", "b", "d")]
+
+    local = ph.local_near_duplicate_groups(cands)
+    assert local["duplicate_of"] == {"a": "b"}
+    assert local["ambiguous_ids"] == ["b", "d"]
+
+
+def test_ranking_uses_original_size_from_thumbnail_cache(tmp_path, monkeypatch):
+    import thumbnail_cache as tc
+
+    # Both normalize to the same 64×48 thumbnail; only the sidecar knows y_big was 1280×960
+    images = {"https://t/small.png": _bytes(_img(1, (320, 240))), "https://t/big.png": _bytes(_img(1, (1280, 960)))}
+    monkeypatch.setattr(tc, "_thumbnail_cache", tc.ThumbnailCache(str(tmp_path), max_side=64, fetch=images.get))
+    monkeypatch.setattr(ph, "_hash_memo", {})
+    cands = [
+        {"archive_item_id": "y_small", "thumbnail_url": "https://t/small.png", "_source": "archive_org"},
+        {"archive_item_id": "y_big", "thumbnail_url": "https://t/big.png", "_source": "europeana"},
+    ]
+
+    local = ph.local_near_duplicate_groups(cands)
+    assert local["groups"][0]["best_id"] == "y_big"
+    assert ph._hash_memo["https://t/big.png"]["pixels"] == 1280 * 960
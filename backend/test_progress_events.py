@@ -0,0 +1,55 @@
+import json
+import queue
+import tempfile
+
+
+def test_store_writes_publish_state_and_progress_events():
+    from progress_events import progress_bus
+    from project_store import ProjectStore
+
+    with tempfile.TemporaryDirectory() as td:
+        store = ProjectStore(td)
+        q = progress_bus.subscribe("ep_sse")
+        try:
+            store.write_script_state("ep_sse", {
+                "script_status": "RUNNING_ASSET_RESOLVER",
+                "steps": {"asset_resolver": {"status": "RUNNING"}},
+                "shot_plan": {"scenes": [{"scene_id": "sc_0001"}]},
+            })
+            store.write_progress("ep_sse", step="asset_resolver", step_fields={"progress": 40})
+
+            state_evt = json.loads(q.get_nowait())
+            assert state_evt["type"] == "state"
+            assert state_evt["episode_id"] == "ep_sse"
+            assert state_evt["state"]["script_status"] == "RUNNING_ASSET_RESOLVER"
+            # Heavy shards are not pushed over the stream
+            assert "shot_plan" not in state_evt["state"] and "_shards" not in state_evt["state"]
+
+            progress_evt = json.loads(q.get_nowait())
+            assert progress_evt["type"] == "progress"
+            assert progress_evt["step"] == "asset_resolver"
+            assert progress_evt["step_fields"] == {"progress": 40}
+
+            assert json.loads(progress_bus.last_state("ep_sse"))["type"] == "state"
+        finally:
+            progress_bus.unsubscribe("ep_sse", q)
+
+
+def test_slow_subscriber_keeps_newest_events():
+    from progress_events import ProgressBus
+
+    bus = ProgressBus(max_queue=2)
+    q = bus.subscribe("ep")
+    for i in range(5):
+        bus.publish("ep", {"type": "progress", "fields": {"i": i}})
+    got = [json.loads(q.get_nowait())["fields"]["i"] for _ in range(2)]
+    assert got == [3, 4]
+    try:
+        q.get_nowait()
+        assert False, "queue should be drained"
+    except queue.Empty:
+        pass
+
+    bus.unsubscribe("ep", q)
+    bus.publish("ep", {"type": "progress"})
+    assert q.empty()
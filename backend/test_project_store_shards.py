@@ -0,0 +1,129 @@
+import json
+import os
+import tempfile
+
+
+def _state():
+    return {
+        "episode_id": "ep_test",
+        "script_status": "RUNNING_COMPILATION_BUILDER",
+        "steps": {"compilation_builder": {"status": "RUNNING", "progress": 0}},
+        "research_report": {"facts": ["x" * 1000]},
+        "metadata": {"shot_plan": {"shot_plan": {"scenes": [{"scene_id": "sc_0001"}]}}},
+    }
+
+
+def test_heavy_keys_are_sharded_and_rewritten_only_when_changed():
+    from project_store import ProjectStore
+
+    with tempfile.TemporaryDirectory() as td:
+        store = ProjectStore(td)
+        store.write_script_state("ep_test", _state())
+
+        with open(store.script_state_path("ep_test"), "r", encoding="utf-8") as f:
+            core = json.load(f)
+        assert "research_report" not in core and "metadata" not in core
+        assert store.read_script_state("ep_test") == {**_state(), "updated_at": core["updated_at"]}
+
+        shard = store.shard_path("ep_test", "research_report")
+        mtime = os.stat(shard).st_mtime_ns
+        state = store.read_script_state("ep_test")
+        state["steps"]["compilation_builder"]["status"] = "DONE"
+        os.utime(shard, ns=(mtime - 10_000_000, mtime - 10_000_000))
+        store.write_script_state("ep_test", state)
+        assert os.stat(shard).st_mtime_ns == mtime - 10_000_000  # unchanged shard not rewritten
+
+
+def test_partial_read_and_write_keeps_unloaded_shards():
+    from project_store import ProjectStore
+
+    with tempfile.TemporaryDirectory() as td:
+        store = ProjectStore(td)
+        store.write_script_state("ep_test", _state())
+
+        light = store.read_script_state("ep_test", parts=[])
+        assert "research_report" not in light and light["steps"]
+        light["selected_global_music"] = "track.mp3"
+        store.write_script_state("ep_test", light)
+
+        full = store.read_script_state("ep_test")
+        assert full["research_report"] == _state()["research_report"]
+        assert full["selected_global_music"] == "track.mp3"
+
+        del full["research_report"]
+        store.write_script_state("ep_test", full)
+        assert "research_report" not in store.read_script_state("ep_test")
+        assert not os.path.exists(store.shard_path("ep_test", "research_report"))
+
+
+def test_progress_record_overlays_running_step_until_next_full_write():
+    from project_store import ProjectStore
+
+    with tempfile.TemporaryDirectory() as td:
+        store = ProjectStore(td)
+        state = _state()
+        store.write_script_state("ep_test", state)
+
+        store.write_progress("ep_test", step="compilation_builder", step_fields={"progress": 40},
+                             fields={"compilation_progress": {"percent": 40}})
+        assert os.path.getsize(store.progress_path("ep_test")) < 512
+        polled = store.read_script_state("ep_test", parts=[])
+        assert polled["steps"]["compilation_builder"]["progress"] == 40
+        assert polled["compilation_progress"] == {"percent": 40}
+
+        state["steps"]["compilation_builder"]["status"] = "DONE"
+        state["script_status"] = "DONE"
+        store.write_script_state("ep_test", state)
+        store.write_progress("ep_test", fields={"compilation_progress": {"percent": 99}})  # late callback
+        done = store.read_script_state("ep_test")
+        assert done["steps"]["compilation_builder"]["status"] == "DONE"
+        assert "compilation_progress" not in done
+
+
+def test_readonly_reads_are_served_from_cache_and_revalidated():
+    from project_store import ProjectStore, _parsed_json_cache
+
+    with tempfile.TemporaryDirectory() as td:
+        store = ProjectStore(td)
+        store.write_script_state("ep_test", _state())
+
+        first = store.read_script_state("ep_test", readonly=True)
+        hits = _parsed_json_cache.hits
+        second = store.read_script_state("ep_test", readonly=True)
+        assert _parsed_json_cache.hits >= hits + 2  # core + shards without touching the parser
+        assert second["research_report"] is first["research_report"]
+        assert second is not first
+
+        # Progress overlay must not leak into the cached documents
+        store.write_progress("ep_test", step="compilation_builder", step_fields={"progress": 50})
+        assert store.read_script_state("ep_test", readonly=True)["steps"]["compilation_builder"]["progress"] == 50
+        os.remove(store.progress_path("ep_test"))
+        assert store.read_script_state("ep_test", readonly=True)["steps"]["compilation_builder"]["progress"] == 0
+
+        # External rewrite (other process / direct writer) is detected via stat
+        shard = store.shard_path("ep_test", "research_report")
+        with open(shard, "w", encoding="utf-8") as f:
+            json.dump({"facts": ["changed"]}, f)
+        assert store.read_script_state("ep_test", readonly=True)["research_report"] == {"facts": ["changed"]}
+
+
+def test_read_manifest_cache_tracks_file_changes():
+    from project_store import ProjectStore
+
+    with tempfile.TemporaryDirectory() as td:
+        store = ProjectStore(td)
+        try:
+            store.read_manifest("ep_test")
+            assert False, "missing manifest must raise"
+        except FileNotFoundError:
+            pass
+        os.makedirs(store.episode_dir("ep_test"), exist_ok=True)
+        with open(store.manifest_path("ep_test"), "w", encoding="utf-8") as f:
+            json.dump({"scenes": []}, f)
+        assert store.read_manifest("ep_test") is store.read_manifest("ep_test")
+
+        tmp = store.manifest_path("ep_test") + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"scenes": [1]}, f)
+        os.replace(tmp, store.manifest_path("ep_test"))
+        assert store.read_manifest("ep_test") == {"scenes": [1]}
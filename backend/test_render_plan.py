@@ -0,0 +1,104 @@
+import json
+import os
+import tempfile
+
+import pytest
+
+
+def test_stable_effect_variant_is_deterministic():
+    from compilation_builder import KEN_BURNS_VARIANTS, kenburns_zoompan_filter, stable_effect_variant
+
+    v = stable_effect_variant("asset_1", "b_0003", 1)
+    assert v == stable_effect_variant("asset_1", "b_0003", 1)
+    assert 0 <= v < KEN_BURNS_VARIANTS
+    # Variants actually spread across beats
+    assert len({stable_effect_variant("asset_1", f"b_{i:04d}", 1) for i in range(40)}) > 1
+
+    filters = {kenburns_zoompan_filter(3.0, 30, 1920, 1080, i) for i in range(KEN_BURNS_VARIANTS)}
+    assert len(filters) == KEN_BURNS_VARIANTS
+
+
+def test_create_subclip_default_variant_does_not_depend_on_hash_seed(monkeypatch):
+    import compilation_builder as cb_module
+
+    calls = []
+
+    class _Result:
+        returncode = 0
+        stderr = ""
+
+    def fake_run(cmd, **kwargs):
+        calls.append(cmd)
+        with open(cmd[-1], "wb") as f:
+            f.write(b"x")
+        return _Result()
+
+    monkeypatch.setattr(cb_module.subprocess, "run", fake_run)
+    with tempfile.TemporaryDirectory() as td:
+        builder = cb_module.CompilationBuilder(storage_dir=td, output_dir=td)
+        out = os.path.join(td, "beat_00001_sc_0001_b_0001_sub1.mp4")
+        assert builder.create_subclip("img.jpg", 0, 2.0, out, target_fps=30)
+        expected = cb_module.kenburns_zoompan_filter(
+            2.0, 30, 1920, 1080, cb_module.stable_effect_variant(os.path.basename(out))
+        )
+    assert calls[0][calls[0].index("-vf") + 1] == expected
+
+
+def test_render_plan_entry_key_and_file():
+    from compilation_builder import CompilationBuilder
+
+    with tempfile.TemporaryDirectory() as td:
+        image = os.path.join(td, "photo.jpg")
+        with open(image, "wb") as f:
+            f.write(b"jpeg")
+        builder = CompilationBuilder(storage_dir=td, output_dir=td)
+
+        a = builder.render_plan_entry(image, "asset_1", 0, 2.5, 30, "1920x1080", effect_variant=2)
+        b = builder.render_plan_entry(image, "asset_1", 0, 2.5, 30, "1920x1080", effect_variant=2)
+        assert a == b
+        assert a["media_type"] == "image" and a["effect_variant"] == 2 and "zoompan" in a["filter"]
+        assert builder.render_plan_entry(image, "asset_1", 0, 2.5, 30, "1920x1080", effect_variant=3)["clip_key"] != a["clip_key"]
+        assert builder.render_plan_entry(image, "asset_1", 0, 3.0, 30, "1920x1080", effect_variant=2)["clip_key"] != a["clip_key"]
+
+        video = builder.render_plan_entry(os.path.join(td, "clip.mp4"), "asset_2", 4.0, 7.0, 30, "1920x1080")
+        assert video["media_type"] == "video" and video["effect_variant"] is None
+
+        # create_subclip's fallback variant depends on the output name → the plan cannot describe it
+        with pytest.raises(ValueError):
+            builder.render_plan_entry(image, "asset_1", 0, 2.5, 30, "1920x1080")
+
+        path = builder.write_render_plan("ep_test", 30, "1920x1080", [a, video])
+        first = open(path, encoding="utf-8").read()
+        assert builder.write_render_plan("ep_test", 30, "1920x1080", [a, video]) == path
+        assert open(path, encoding="utf-8").read() == first  # byte-identical → diffable
+        plan = json.loads(first)
+        assert [e["clip_key"] for e in plan["beats"]] == [a["clip_key"], video["clip_key"]]
+        assert plan["plan_digest"]
+
+
+def test_beat_cache_store_restore_and_prune():
+    from compilation_builder import CompilationBuilder
+
+    with tempfile.TemporaryDirectory() as td:
+        builder = CompilationBuilder(storage_dir=td, output_dir=td)
+        clip = os.path.join(td, "beat_00001_sc_0001_b_0001_sub1.mp4")
+        with open(clip, "wb") as f:
+            f.write(b"encoded")
+
+        assert builder.beat_cache_lookup("k1") is None
+        assert builder.beat_cache_store("k1", clip, 31.0, 36.5)
+
+        # Next build: the beat file is rewritten from scratch → restored from the cache, resolved in/out kept
+        os.remove(clip)
+        meta = builder.beat_cache_restore("k1", clip)
+        assert meta["in_sec"] == 31.0 and meta["out_sec"] == 36.5
+        assert open(clip, "rb").read() == b"encoded"
+
+        # A clip without its sidecar is not a hit
+        with open(os.path.join(builder.beat_cache_dir, "k2.mp4"), "wb") as f:
+            f.write(b"partial")
+        assert builder.beat_cache_lookup("k2") is None
+
+        assert builder.prune_beat_cache(["k1"]) == 1
+        assert sorted(os.listdir(builder.beat_cache_dir)) == ["k1.json", "k1.mp4"]
+        assert open(clip, "rb").read() == b"encoded"  # pruning never touches the timeline clip
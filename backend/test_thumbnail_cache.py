@@ -0,0 +1,70 @@
+import io
+import threading
+import time
+
+from PIL import Image
+
+import thumbnail_cache as tc
+
+
+def _png(size, mode="RGB"):
+    buf = io.BytesIO()
+    Image.new(mode, size, (200, 10, 10, 128) if mode == "RGBA" else (200, 10, 10)).save(buf, "PNG")
+    return buf.getvalue()
+
+
+def test_fetches_once_normalizes_and_remembers_failures(tmp_path):
+    images = {"https://t/big.png": _png((2000, 1000)), "https://t/alpha.png": _png((100, 80), "RGBA")}
+    calls = []
+    lock = threading.Lock()
+
+    def fetch(url):
+        with lock:
+            calls.append(url)
+        time.sleep(0.05)
+        return images.get(url)
+
+    cache = tc.ThumbnailCache(str(tmp_path), max_side=256, fetch=fetch)
+    report = cache.prefetch(["https://t/big.png"] * 6 + ["https://t/alpha.png", "https://t/dead.png", ""])
+
+    assert report == {"requested": 3, "available": 2, "missing": ["https://t/dead.png"]}
+    assert sorted(calls) == ["https://t/alpha.png", "https://t/big.png", "https://t/dead.png"]
+
+    with Image.open(cache.get_path("https://t/big.png")) as img:
+        assert img.format == "JPEG" and img.size == (256, 128)
+    with Image.open(cache.get_path("https://t/alpha.png")) as img:
+        assert img.mode == "RGB" and img.size == (100, 80)  # never upscaled
+    meta = cache.read_meta(cache.key_for("https://t/big.png"))
+    assert meta["source_width"] == 2000 and meta["width"] == 256
+    assert cache.source_pixels("https://t/big.png") == 2000 * 1000 and cache.source_pixels("https://t/dead.png") is None
+
+    # Second round: everything served from disk, dead URL not retried within the negative TTL
+    assert cache.get_bytes("https://t/dead.png") is None
+    assert cache.get_bytes("https://t/big.png")
+    assert len(calls) == 3
+
+
+def test_endpoint_serves_registered_thumbnail_with_cache_headers(tmp_path, monkeypatch):
+    import app as app_module
+
+    cache = tc.ThumbnailCache(str(tmp_path), fetch=lambda url: _png((40, 30)))
+    monkeypatch.setattr(tc, "_thumbnail_cache", cache)
+    proxy = tc.thumbnail_proxy_url("https://t/lazy.png")
+    key = cache.key_for("https://t/lazy.png")
+    assert proxy == f"/api/thumbnails/{key}.jpg"
+
+    client = app_module.app.test_client()
+    resp = client.get(proxy)
+    assert resp.status_code == 200 and resp.mimetype == "image/jpeg"
+    assert "max-age" in resp.headers["Cache-Control"] and resp.headers["ETag"] == f'"{key}"'
+    assert client.get(proxy, headers={"If-None-Match": f'"{key}"'}).status_code == 304
+    assert client.get("/api/thumbnails/" + "0" * 64 + ".jpg").status_code == 404
+    assert client.get("/api/thumbnails/nope.jpg").status_code == 400
+
+
+def test_download_locks_are_a_fixed_pool(tmp_path):
+    cache = tc.ThumbnailCache(str(tmp_path), fetch=lambda url: _png((40, 30)))
+    cache.prefetch([f"https://t/{i}.png" for i in range(200)])
+    assert len(cache._locks) == tc.LOCK_STRIPES
+    key = cache.key_for("https://t/7.png")
+    assert cache._lock_for(key) is cache._lock_for(key)
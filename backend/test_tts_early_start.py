@@ -0,0 +1,121 @@
+import base64
+import os
+import tempfile
+import threading
+import time
+
+
+class _FakeResponse:
+    status_code = 200
+    text = ""
+
+    def __init__(self, payload):
+        self._payload = payload
+
+    def json(self):
+        return self._payload
+
+
+class _FakeCredentials:
+    token = "tok"
+    expiry = None
+
+    def refresh(self, _req):
+        return None
+
+
+def _setup(monkeypatch, td):
+    import requests
+    from google.oauth2 import service_account
+
+    posts = []
+    post_times = []
+    lock = threading.Lock()
+
+    def fake_post(url, headers=None, json=None, timeout=None):
+        text = (json.get("input") or {}).get("text") or ""
+        with lock:
+            posts.append(text)
+            post_times.append(time.monotonic())
+        return _FakeResponse({"audioContent": base64.b64encode(text.encode("utf-8")).decode("ascii")})
+
+    creds = os.path.join(td, "sa.json")
+    open(creds, "w").write("{}")
+    monkeypatch.setenv("GOOGLE_APPLICATION_CREDENTIALS", creds)
+    monkeypatch.setenv("GCP_TTS_USE_SSML", "false")
+    monkeypatch.setenv("GCP_TTS_MAX_QPS", "0")
+    monkeypatch.setattr(service_account.Credentials, "from_service_account_file",
+                        classmethod(lambda cls, *a, **k: _FakeCredentials()))
+    monkeypatch.setattr(requests, "post", fake_post)
+    return posts, post_times
+
+
+def test_prewarm_fills_cache_and_reconcile_invalidates_changed_blocks(monkeypatch):
+    from tts_synthesis import TTSPrewarmer
+
+    with tempfile.TemporaryDirectory() as td:
+        posts, _ = _setup(monkeypatch, td)
+        pw = TTSPrewarmer.create_if_enabled(td)
+        assert pw is not None
+
+        pw.submit("b_0001", "first block")
+        pw.submit("b_0002", "second block")
+        pw.submit("b_0002", "second block")  # duplicate submit → no extra synthesis
+        final = [
+            {"block_id": "b_0001", "text_tts": "first block"},
+            {"block_id": "b_0002", "text_tts": "second block, corrected"},
+            {"block_id": "b_0003", "text_tts": "third block"},
+        ]
+        report = pw.reconcile(final)
+        pw._executor.shutdown(wait=True)
+
+        assert report["reused"] == 1
+        assert report["invalidated"] == ["b_0002"] and report["late"] == ["b_0003"]
+        assert sorted(posts) == ["first block", "second block", "second block, corrected", "third block"]
+        assert pw.stats["synthesized"] == 4 and pw.stats["failed"] == 0
+
+    monkeypatch.setenv("TTS_EARLY_START", "0")
+    assert TTSPrewarmer.create_if_enabled(td) is None
+
+
+def test_generate_tts_uses_prewarmed_audio(monkeypatch):
+    import app as app_module
+    from tts_synthesis import TTSPrewarmer
+
+    with tempfile.TemporaryDirectory() as td:
+        posts, _ = _setup(monkeypatch, td)
+        monkeypatch.setattr(app_module, "UPLOAD_FOLDER", td)
+        monkeypatch.setattr(app_module, "tts_cache", app_module.TTSCache(td))
+
+        blocks = [{"block_id": f"b_{i:04d}", "text_tts": f"block number {i}"} for i in range(1, 5)]
+        pw = TTSPrewarmer.create_if_enabled(td)
+        for b in blocks:
+            pw.submit(b["block_id"], b["text_tts"])
+        pw._executor.shutdown(wait=True)
+        assert len(posts) == 4
+
+        data = app_module.app.test_client().post("/api/tts/generate", json={"narration_blocks": blocks}).get_json()
+        assert data["generated_blocks"] == 4 and data["cached_blocks"] == 4
+        assert len(posts) == 4
+        with open(os.path.join(td, "Narrator_0002.mp3"), "rb") as f:
+            assert f.read() == b"block number 2"
+
+
+def test_prewarm_and_generate_share_the_qps_limiter(monkeypatch):
+    import app as app_module
+    import tts_synthesis
+
+    assert app_module.wait_for_qps_slot is tts_synthesis.wait_for_qps_slot
+    with tempfile.TemporaryDirectory() as td:
+        _, post_times = _setup(monkeypatch, td)
+        monkeypatch.setenv("GCP_TTS_MAX_QPS", "40")  # one request start per 25 ms across all workers
+        monkeypatch.setattr(tts_synthesis, "_qps_next_slot", 0.0)
+
+        pw = tts_synthesis.TTSPrewarmer.create_if_enabled(td)
+        for i in range(1, 6):
+            pw.submit(f"b_{i:04d}", f"block number {i}")
+        pw._executor.shutdown(wait=True)
+
+        starts = sorted(post_times)
+        assert len(starts) == 5
+        assert all(b - a >= 0.02 for a, b in zip(starts, starts[1:]))
@@ -0,0 +1,119 @@
+import base64
+import os
+import tempfile
+import threading
+import time
+
+
+class _FakeResponse:
+    status_code = 200
+
+    def __init__(self, payload):
+        self._payload = payload
+        self.text = ""
+
+    def json(self):
+        return self._payload
+
+
+class _FakeCredentials:
+    token = "tok"
+    expiry = None
+
+    def refresh(self, _req):
+        return None
+
+
+def test_generate_tts_parallel_ordered_and_cached(monkeypatch):
+    import app as app_module
+    from google.oauth2 import service_account
+
+    in_flight = {"now": 0, "max": 0}
+    lock = threading.Lock()
+
+    post_calls = {"n": 0}
+
+    def fake_post(url, headers=None, json=None, timeout=None):
+        with lock:
+            post_calls["n"] += 1
+            in_flight["now"] += 1
+            in_flight["max"] = max(in_flight["max"], in_flight["now"])
+        time.sleep(0.05)
+        with lock:
+            in_flight["now"] -= 1
+        text = (json.get("input") or {}).get("text") or ""
+        return _FakeResponse({"audioContent": base64.b64encode(text.encode("utf-8")).decode("ascii")})
+
+    with tempfile.TemporaryDirectory() as td:
+        creds = os.path.join(td, "sa.json")
+        open(creds, "w").write("{}")
+        monkeypatch.setenv("GOOGLE_APPLICATION_CREDENTIALS", creds)
+        monkeypatch.setenv("GCP_TTS_USE_SSML", "false")
+        monkeypatch.setenv("GCP_TTS_MAX_CONCURRENCY", "4")
+        monkeypatch.setenv("GCP_TTS_MAX_QPS", "0")
+        monkeypatch.setattr(service_account.Credentials, "from_service_account_file",
+                            classmethod(lambda cls, *a, **k: _FakeCredentials()))
+        monkeypatch.setattr(app_module.requests, "post", fake_post)
+        monkeypatch.setattr(app_module, "UPLOAD_FOLDER", td)
+        monkeypatch.setattr(app_module, "tts_cache", app_module.TTSCache(td))
+
+        blocks = [{"block_id": f"b_{i:04d}", "text_tts": f"block number {i}"} for i in range(1, 9)]
+        blocks[2]["text_tts"] = ""
+        client = app_module.app.test_client()
+        res = client.post("/api/tts/generate", json={"narration_blocks": blocks})
+        data = res.get_json()
+
+        assert data["generated_blocks"] == 7
+        assert [b["block_id"] for b in data["failed_blocks"]] == ["b_0003"]
+        assert data["generated_files"] == [f"Narrator_{i:04d}.mp3" for i in range(1, 9) if i != 3]
+        with open(os.path.join(td, "Narrator_0005.mp3"), "rb") as f:
+            assert f.read() == b"block number 5"
+
+        progress = client.get("/api/tts/progress/_uploads").get_json()
+        assert progress["status"] == "done" and progress["done"] == 7 and progress["failed"] == 1
+
+        # Second run with one edited block: only that block hits the API, the rest comes from TTS cache.
+        calls_before = post_calls["n"]
+        blocks[4]["text_tts"] = "block number 5, patched"
+        data2 = client.post("/api/tts/generate", json={"narration_blocks": blocks}).get_json()
+        assert data2["generated_blocks"] == 7 and data2["cached_blocks"] == 6
+        assert post_calls["n"] - calls_before == 1
+        with open(os.path.join(td, "Narrator_0005.mp3"), "rb") as f:
+            assert f.read() == b"block number 5, patched"
+
+    assert in_flight["max"] > 1
+
+
+def test_tts_progress_marks_crash_as_failed_and_ages_out(monkeypatch):
+    import concurrent.futures
+
+    import app as app_module
+    from google.oauth2 import service_account
+
+    def broken_executor(*a, **k):
+        raise RuntimeError("executor down")
+
+    with tempfile.TemporaryDirectory() as td:
+        creds = os.path.join(td, "sa.json")
+        open(creds, "w").write("{}")
+        monkeypatch.setenv("GOOGLE_APPLICATION_CREDENTIALS", creds)
+        monkeypatch.setattr(service_account.Credentials, "from_service_account_file",
+                            classmethod(lambda cls, *a, **k: _FakeCredentials()))
+        monkeypatch.setattr(app_module, "UPLOAD_FOLDER", td)
+        monkeypatch.setattr(concurrent.futures, "ThreadPoolExecutor", broken_executor)
+        monkeypatch.setitem(app_module.app.config, "_tts_progress", {})
+
+        client = app_module.app.test_client()
+        res = client.post("/api/tts/generate", json={"narration_blocks": [{"block_id": "b_0001", "text_tts": "hi"}]})
+        assert res.status_code == 500
+        progress = client.get("/api/tts/progress/_uploads").get_json()
+        assert progress["status"] == "failed" and "executor down" in progress["error"]
+
+    # Finished runs are dropped after TTS_PROGRESS_KEEP_SEC; running ones stay
+    store = app_module.app.config["_tts_progress"]
+    store["ep_old"] = {"status": "done", "updated_at": time.time() - app_module.TTS_PROGRESS_KEEP_SEC - 1}
+    store["ep_busy"] = {"status": "running", "updated_at": 0}
+    app_module._tts_progress_update("ep_new", status="running", total=1)
+    assert set(store) == {"_uploads", "ep_busy", "ep_new"}
+    app_module._tts_progress_update("_uploads", status="running", total=3)
+    assert "error" not in store["_uploads"]  # new run starts a fresh entry
@@ -0,0 +1,104 @@
+import json
+import os
+import tempfile
+
+
+def _setup_episode(td):
+    storage = os.path.join(td, "projects", "ep_1", "assets")
+    os.makedirs(storage)
+    os.makedirs(os.path.join(td, "output"))
+    manifest = os.path.join(td, "projects", "ep_1", "archive_manifest.json")
+    with open(manifest, "w", encoding="utf-8") as f:
+        json.dump({"scenes": []}, f)
+    return storage, manifest
+
+
+def test_music_only_remix_reuses_video_master(monkeypatch):
+    import compilation_builder as cb
+
+    calls = []
+
+    class _Result:
+        returncode = 0
+        stderr = ""
+
+    def fake_run(cmd, **kwargs):
+        calls.append(cmd)
+        with open(cmd[-1], "wb") as f:
+            f.write(b"muxed")
+        return _Result()
+
+    blocks = {"blocks": [{"sha1": "aaa"}, {"sha1": "bbb"}]}
+    monkeypatch.setattr(cb.subprocess, "run", fake_run)
+    monkeypatch.setattr(cb, "voiceover_timeline", lambda d: blocks)
+
+    def fake_mix(self, audio, scenes, dur):
+        with open(audio + ".mixed", "wb") as f:
+            f.write(b"mix")
+        return audio + ".mixed", {"enabled": True, "gain_db": -30.0}
+
+    monkeypatch.setattr(cb.CompilationBuilder, "mix_background_music", fake_mix)
+
+    with tempfile.TemporaryDirectory() as td:
+        storage, manifest = _setup_episode(td)
+        builder = cb.CompilationBuilder(storage, os.path.join(td, "output"))
+
+        out, meta = builder.remix_music(manifest, "ep_1")
+        assert out is None and meta["error"] == "video_master_missing"
+
+        master, _ = builder._video_master_paths()
+        narration = os.path.join(storage, "combined_voiceover.wav")
+        for p in (master, narration):
+            with open(p, "wb") as f:
+                f.write(b"data")
+        builder.write_video_master_sidecar({
+            "master_key": "k",
+            "narration_fingerprint": cb._narration_fingerprint(blocks),
+            "narration_audio": narration,
+            "manifest_sha1": cb._file_sha1(manifest),
+            "duration_sec": 600.0,
+            "metadata": {"clips_used": 42, "compilation_report": {"music": {"enabled": False}}},
+        })
+
+        out, meta = builder.remix_music(manifest, "ep_1")
+        assert out and os.path.exists(out)
+        assert meta["clips_used"] == 42 and meta["remix"] == "music_only"
+        assert meta["compilation_report"]["music"]["gain_db"] == -30.0
+        assert len(calls) == 1
+        cmd = calls[0]
+        assert cmd[cmd.index("-c:v") + 1] == "copy"
+        assert narration + ".mixed" in cmd and master in cmd
+
+        # Swapped asset (manifest changed) → master is stale, caller must run the full build
+        with open(manifest, "w", encoding="utf-8") as f:
+            json.dump({"scenes": [{"scene_id": "sc_0001"}]}, f)
+        out, meta = builder.remix_music(manifest, "ep_1")
+        assert out is None and meta["error"] == "manifest_changed"
+
+
+def test_silent_master_is_cut_to_narration_length(monkeypatch):
+    import compilation_builder as cb
+
+    calls = []
+
+    class _Result:
+        returncode = 0
+        stderr = ""
+
+    def fake_run(cmd, **kwargs):
+        calls.append(cmd)
+        with open(cmd[-1], "wb") as f:
+            f.write(b"video")
+        return _Result()
+
+    monkeypatch.setattr(cb.subprocess, "run", fake_run)
+    monkeypatch.setattr(cb, "has_video_stream", lambda p: True)
+    with tempfile.TemporaryDirectory() as td:
+        clip = os.path.join(td, "beat_00001.mp4")
+        with open(clip, "wb") as f:
+            f.write(b"clip")
+        builder = cb.CompilationBuilder(td, td)
+        assert builder.concatenate_clips([clip], os.path.join(td, "video_master.mp4"), 30, "1920x1080",
+                                         None, max_duration_sec=612.5)
+    cmd = calls[-1]
+    assert "-an" in cmd and cmd[cmd.index("-t") + 1] == "612.500"
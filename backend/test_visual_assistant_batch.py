@@ -0,0 +1,119 @@
+import json
+import os
+import tempfile
+
+from visual_assistant import VisualAssistant
+
+
+def _manifest(n_beats, n_candidates):
+    beats = []
+    for b in range(n_beats):
+        beats.append({
+            "block_id": f"b_{b:04d}",
+            "narration_text": f"Napoleon crosses the river, beat {b}",
+            "keywords": ["Napoleon", "river"],
+            "asset_candidates": [
+                {"archive_item_id": f"archive_org:item_{b}_{c}", "title": f"Item {b}/{c}"} for c in range(n_candidates)
+            ],
+        })
+    return {"scenes": [{"scene_id": "sc_0001", "visual_beats": beats}]}
+
+
+def _fake_batch(calls):
+    def fake(system_prompt, user_text, image_urls):
+        calls.append(len(image_urls))
+        # Prefer the last thumbnail of every beat ("..._2") so reranking is observable.
+        results = [
+            {
+                "index": i,
+                "relevance_score": 0.9 if url.endswith("_2") else 0.3,
+                "recommendation": "use" if url.endswith("_2") else "skip",
+                "reasoning": "ok",
+            }
+            for i, url in enumerate(image_urls)
+        ]
+        return json.dumps({"results": results})
+    return fake
+
+
+def test_process_manifest_batches_beats_and_caches_verdicts(monkeypatch):
+    monkeypatch.setenv("VA_BATCH_IMAGES", "8")
+    va = VisualAssistant(api_key="k", provider="openai")
+    calls = []
+    monkeypatch.setattr(va, "_call_vision_api_batch", _fake_batch(calls))
+    monkeypatch.setattr(va, "_call_vision_api", lambda **kw: (_ for _ in ()).throw(AssertionError("single call")))
+
+    with tempfile.TemporaryDirectory() as td:
+        path = os.path.join(td, "archive_manifest.json")
+        with open(path, "w") as f:
+            json.dump(_manifest(10, 3), f)
+
+        out = va.process_manifest(path, max_analyze_per_beat=3)
+
+        # 30 thumbnails → 4 batch requests instead of 30 single calls
+        assert sorted(calls) == [6, 8, 8, 8]
+        beats = out["scenes"][0]["visual_beats"]
+        assert all(b["asset_candidates"][0]["archive_item_id"].endswith("_2") for b in beats)
+        assert all(b["selected_asset_id"].endswith("_2") for b in beats)
+        stats = out["_visual_assistant_metadata"]["batch_rerank"]
+        assert stats["analyzed"] == 30 and stats["batches"] == 4 and stats["cache_hits"] == 0
+
+        # Re-run: every (thumbnail, beat) verdict comes from cache → no Vision calls
+        calls.clear()
+        with open(path, "w") as f:
+            json.dump(_manifest(10, 3), f)
+        out2 = va.process_manifest(path, max_analyze_per_beat=3)
+        assert calls == []
+        assert out2["_visual_assistant_metadata"]["batch_rerank"]["cache_hits"] == 30
+
+
+def test_items_missing_from_batch_fall_back_to_single_call(monkeypatch):
+    va = VisualAssistant(api_key="k", provider="openai")
+    singles = []
+
+    def partial_batch(system_prompt, user_text, image_urls):
+        return json.dumps({"results": [{"index": 0, "relevance_score": 0.8, "recommendation": "use"}]})
+
+    def single(system_prompt, user_text, image_url):
+        singles.append(image_url)
+        return json.dumps({"relevance_score": 0.1, "recommendation": "skip", "reasoning": "x"})
+
+    monkeypatch.setattr(va, "_call_vision_api_batch", partial_batch)
+    monkeypatch.setattr(va, "_call_vision_api", single)
+
+    with tempfile.TemporaryDirectory() as td:
+        path = os.path.join(td, "archive_manifest.json")
+        with open(path, "w") as f:
+            json.dump(_manifest(1, 3), f)
+        out = va.process_manifest(path, max_analyze_per_beat=3)
+
+    assert len(singles) == 2
+    cands = out["scenes"][0]["visual_beats"][0]["asset_candidates"]
+    assert cands[0]["_visual_analysis"]["relevance_score"] == 0.8
+
+
+def test_verdict_cache_is_capped_and_keeps_recently_used(monkeypatch):
+    monkeypatch.setenv("VA_VERDICT_CACHE_MAX", "4")
+    va = VisualAssistant(api_key="k", provider="openai")
+    calls = []
+    monkeypatch.setattr(va, "_call_vision_api_batch", _fake_batch(calls))
+
+    def prepared(beats):
+        return [
+            {"candidates": [{"thumbnail_url": f"https://t/{b}.jpg"}], "beat_text": f"beat {b}", "shot_types": []}
+            for b in beats
+        ]
+
+    with tempfile.TemporaryDirectory() as td:
+        cache_path = os.path.join(td, "verdicts.json")
+        va.batch_analyze_beats(prepared([0, 1, 2, 3]), cache_path=cache_path)
+        va.batch_analyze_beats(prepared([0]), cache_path=cache_path)  # hit → beat 0 most recently used
+        _, stats = va.batch_analyze_beats(prepared([4, 5]), cache_path=cache_path)
+        assert stats["analyzed"] == 2
+        with open(cache_path) as f:
+            assert len(json.load(f)) == 4
+
+        _, stats = va.batch_analyze_beats(prepared([0, 3, 4, 5]), cache_path=cache_path)
+        assert stats["cache_hits"] == 4  # beats 1 and 2 were evicted, not 0
+        _, stats = va.batch_analyze_beats(prepared([1]), cache_path=cache_path)
+        assert stats["cache_hits"] == 0
@@ -0,0 +1,96 @@
+import os
+import tempfile
+import wave
+
+
+def _fake_decoder(calls):
+    # "Decode" = PCM payload derived from the MP3 bytes (deterministic, no ffmpeg needed).
+    def _decode(mp3_path, pcm_path):
+        calls.append(os.path.basename(mp3_path))
+        with open(mp3_path, "rb") as f:
+            data = f.read()
+        with open(pcm_path, "wb") as f:
+            f.write(data * 2)
+        return True
+    return _decode
+
+
+def _write(path, data):
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def _wav_frames(path):
+    with wave.open(path, "rb") as w:
+        return w.readframes(w.getnframes())
+
+
+def test_incremental_assembly_decodes_only_changed_blocks(monkeypatch):
+    import voiceover_assembly as va
+
+    calls = []
+    monkeypatch.setattr(va, "_decode_to_pcm", _fake_decoder(calls))
+
+    with tempfile.TemporaryDirectory() as td:
+        vo_dir = os.path.join(td, "voiceover")
+        os.makedirs(vo_dir)
+        _write(os.path.join(vo_dir, "Narrator_0001.mp3"), b"AAAA")
+        _write(os.path.join(vo_dir, "Narrator_0002.mp3"), b"BBBBBB")
+        _write(os.path.join(vo_dir, "Narrator_0003.mp3"), b"CC")
+        out = os.path.join(td, "combined_voiceover.wav")
+
+        first = va.assemble_voiceover(vo_dir, out)
+        assert first["mode"] == "spliced" and first["decoded"] == 3
+        assert _wav_frames(out) == b"AAAA" * 2 + b"BBBBBB" * 2 + b"CC" * 2
+        assert [b["offset_bytes"] for b in first["blocks"]] == [0, 8, 20]
+
+        # Unchanged → no decode, no rewrite
+        calls.clear()
+        assert va.assemble_voiceover(vo_dir, out)["mode"] == "unchanged"
+        assert calls == []
+
+        # Same-length edit → only that block decoded, patched in place
+        _write(os.path.join(vo_dir, "Narrator_0002.mp3"), b"XXXXXX")
+        patched = va.assemble_voiceover(vo_dir, out)
+        assert patched["mode"] == "patched" and calls == ["Narrator_0002.mp3"]
+        assert _wav_frames(out) == b"AAAA" * 2 + b"XXXXXX" * 2 + b"CC" * 2
+
+        # Length change → re-spliced from cached PCM, downstream offsets shift
+        calls.clear()
+        _write(os.path.join(vo_dir, "Narrator_0001.mp3"), b"A")
+        spliced = va.assemble_voiceover(vo_dir, out)
+        assert spliced["mode"] == "spliced" and calls == ["Narrator_0001.mp3"]
+        assert _wav_frames(out) == b"AA" + b"XXXXXX" * 2 + b"CC" * 2
+        assert [b["offset_bytes"] for b in spliced["blocks"]] == [0, 2, 14]
+
+        blocks = [{"block_id": "b_0001", "text_tts": "One."}, {"block_id": "b_0002", "text_tts": "Two."},
+                  {"block_id": "b_0003", "text_tts": "Three."}]
+        durs = va.block_durations_by_id(spliced, blocks)
+        assert set(durs) == {"b_0001", "b_0002", "b_0003"}
+        srt = va.write_srt(spliced, blocks, os.path.join(td, "voiceover.srt"))
+        with open(srt, "r", encoding="utf-8") as f:
+            text = f.read()
+        assert text.startswith("1\n00:00:00,000 --> ") and "Three." in text
+
+
+def test_srt_and_durations_match_blocks_by_filename_when_one_is_missing(monkeypatch):
+    import voiceover_assembly as va
+
+    monkeypatch.setattr(va, "_decode_to_pcm", _fake_decoder([]))
+    with tempfile.TemporaryDirectory() as td:
+        vo_dir = os.path.join(td, "voiceover")
+        os.makedirs(vo_dir)
+        _write(os.path.join(vo_dir, "Narrator_0001.mp3"), b"A" * 4)
+        _write(os.path.join(vo_dir, "Narrator_0003.mp3"), b"C" * 8)  # Narrator_0002 failed in TTS
+        timeline = va.voiceover_timeline(vo_dir)
+
+        blocks = [{"block_id": "b_0001", "text_tts": "One."}, {"block_id": "b_0002", "text_tts": "Two."},
+                  {"block_id": "b_0003", "text_tts": "Three."}]
+        durs = va.block_durations_by_id(timeline, blocks)
+        assert set(durs) == {"b_0001", "b_0003"} and durs["b_0003"] == timeline["blocks"][1]["duration_sec"]
+
+        srt = va.write_srt(timeline, blocks, os.path.join(td, "voiceover.srt"))
+        with open(srt, "r", encoding="utf-8") as f:
+            entries = f.read().strip().split("\n\n")
+        assert [e.splitlines()[-1] for e in entries] == ["One.", "Three."]
+        assert entries[1].splitlines()[1].startswith(va._srt_time(timeline["blocks"][1]["start_sec"]))
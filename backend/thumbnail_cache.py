@@ -0,0 +1,274 @@
+"""
+Shared on-disk cache of normalized candidate thumbnails (UI grid, Visual Assistant dedup, pHash).
+
+- Key: sha256(version, normalization settings, source URL)
+- Location: podcasts/cache/thumbnails/<xx>/<key>.jpg + <key>.json (override THUMB_CACHE_DIR)
+- Normalization: RGB JPEG, longest side <= THUMB_MAX_SIDE (512, never upscaled), quality THUMB_JPEG_QUALITY (80)
+- Failed downloads are remembered for THUMB_NEGATIVE_TTL_SEC (1h) so a dead URL isn't retried per request
+- Concurrent requests for the same URL share one download (fixed pool of striped per-key locks)
+- Sidecar JSON keeps the original image size (source_width/source_height) for quality ranking
+
+Env: THUMB_CACHE (1), THUMB_CACHE_DIR, THUMB_MAX_SIDE, THUMB_JPEG_QUALITY, THUMB_FETCH_WORKERS (8)
+"""
+
+import hashlib
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import requests
+from PIL import Image
+
+from env_utils import env_int
+
+# Bump při změně normalizace (stará cache se pak ignoruje).
+THUMB_CACHE_VERSION = "t1"
+
+USER_AGENT = "PodcastVideoBot/1.0 (thumbnail cache)"
+
+# Počet zámků pro stahování (klíč → zámek podle hashe); pevný, takže pool neroste s počtem URL.
+LOCK_STRIPES = 64
+
+
+def thumbnail_cache_enabled() -> bool:
+    return (os.getenv("THUMB_CACHE", "1") or "").strip().lower() in ("1", "true", "yes")
+
+
+def default_thumbnail_cache_dir() -> str:
+    """podcasts/cache/thumbnails (next to cache/tts and cache/llm), or THUMB_CACHE_DIR."""
+    env_dir = (os.getenv("THUMB_CACHE_DIR") or "").strip()
+    if env_dir:
+        return env_dir
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(base_dir, "cache", "thumbnails")
+
+
+def download_image(url: str, timeout: float = 10.0) -> Optional[bytes]:
+    try:
+        r = requests.get(url, timeout=timeout, verify=False, headers={"User-Agent": USER_AGENT})
+        if r.status_code != 200 or not r.content:
+            return None
+        return r.content
+    except Exception:
+        return None
+
+
+def normalize_thumbnail(data: bytes, max_side: int, quality: int) -> Optional[Dict[str, Any]]:
+    """Decodes image bytes → small RGB JPEG. Returns {"bytes", "width", "height", "source_width", "source_height"}."""
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            img.load()
+            source_size = img.size
+            if img.mode in ("RGBA", "LA", "P"):
+                # Transparent PNG/GIF → white background (JPEG has no alpha)
+                rgba = img.convert("RGBA")
+                img = Image.new("RGB", rgba.size, (255, 255, 255))
+                img.paste(rgba, mask=rgba.split()[-1])
+            else:
+                img = img.convert("RGB")
+            img.thumbnail((max_side, max_side), Image.LANCZOS)
+            buf = io.BytesIO()
+            img.save(buf, "JPEG", quality=quality, optimize=True)
+            return {
+                "bytes": buf.getvalue(),
+                "width": img.width,
+                "height": img.height,
+                "source_width": source_size[0],
+                "source_height": source_size[1],
+            }
+    except Exception:
+        return None
+
+
+class ThumbnailCache:
+    """
+    FS-backed cache of normalized thumbnails keyed by source URL (shared across episodes).
+    """
+
+    def __init__(
+        self,
+        cache_dir: str,
+        max_side: Optional[int] = None,
+        quality: Optional[int] = None,
+        fetch: Optional[Callable[[str], Optional[bytes]]] = None,
+    ):
+        self.cache_dir = cache_dir
+        self.max_side = max(32, int(max_side or env_int("THUMB_MAX_SIDE", 512)))
+        self.quality = min(95, max(30, int(quality or env_int("THUMB_JPEG_QUALITY", 80))))
+        self.negative_ttl_sec = max(0, env_int("THUMB_NEGATIVE_TTL_SEC", 3600))
+        self._fetch = fetch
+        self._locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+        self._locks_guard = threading.Lock()
+        self.stats = {"hits": 0, "fetched": 0, "failed": 0}
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def key_for(self, url: str) -> str:
+        payload = f"{THUMB_CACHE_VERSION}|{self.max_side}|{self.quality}|{str(url or '').strip()}"
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.jpg")
+
+    def _meta_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _lock_for(self, key: str) -> threading.Lock:
+        # Různé klíče můžou sdílet zámek (jen se serializují); stejný klíč má vždy stejný zámek.
+        try:
+            return self._locks[int(key[:8], 16) % len(self._locks)]
+        except ValueError:
+            return self._locks[hash(key) % len(self._locks)]
+
+    def _bump(self, name: str) -> None:
+        with self._locks_guard:
+            self.stats[name] = self.stats.get(name, 0) + 1
+
+    def read_meta(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._meta_path(key), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            return meta if isinstance(meta, dict) else None
+        except Exception:
+            return None
+
+    def _write_atomic(self, path: str, data: bytes) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix="thumb_", suffix=".tmp", dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        finally:
+            try:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            except Exception:
+                pass
+
+    def _write_meta(self, key: str, meta: Dict[str, Any]) -> None:
+        try:
+            self._write_atomic(self._meta_path(key), json.dumps(meta, ensure_ascii=False).encode("utf-8"))
+        except Exception as e:
+            print(f"⚠️ Thumbnail cache: meta write failed for {key[:12]}: {e}")
+
+    def register(self, url: str) -> Optional[str]:
+        """
+        Records key → URL without downloading (so /api/thumbnails/<key>.jpg can fetch lazily).
+        Returns the key, or None for a non-http(s) URL.
+        """
+        u = str(url or "").strip()
+        if not u.lower().startswith(("http://", "https://")):
+            return None
+        key = self.key_for(u)
+        if self.read_meta(key) is None:
+            self._write_meta(key, {"url": u, "status": "registered", "registered_at": time.time()})
+        return key
+
+    def get_path(self, url: str) -> Optional[str]:
+        """Cached thumbnail path for URL (downloads + normalizes on miss). None when unavailable."""
+        key = self.register(url)
+        return self.get_path_by_key(key) if key else None
+
+    def get_path_by_key(self, key: str) -> Optional[str]:
+        if not key:
+            return None
+        path = self.path_for(key)
+        if os.path.exists(path):
+            self._bump("hits")
+            return path
+
+        with self._lock_for(key):
+            if os.path.exists(path):  # another thread finished the download meanwhile
+                self._bump("hits")
+                return path
+            meta = self.read_meta(key) or {}
+            url = str(meta.get("url") or "").strip()
+            if not url:
+                return None
+            failed_at = meta.get("failed_at")
+            if failed_at and (time.time() - float(failed_at)) < self.negative_ttl_sec:
+                return None
+
+            data = (self._fetch or download_image)(url)
+            thumb = normalize_thumbnail(data, self.max_side, self.quality) if data else None
+            if not thumb:
+                self._bump("failed")
+                self._write_meta(key, {"url": url, "status": "failed", "failed_at": time.time()})
+                return None
+            try:
+                self._write_atomic(path, thumb.pop("bytes"))
+            except Exception as e:
+                print(f"⚠️ Thumbnail cache: write failed for {key[:12]}: {e}")
+                return None
+            self._write_meta(key, {"url": url, "status": "ok", "fetched_at": time.time(), **thumb})
+            self._bump("fetched")
+            return path
+
+    def source_pixels(self, url: str) -> Optional[int]:
+        """Original (pre-normalization) pixel count of a cached thumbnail, from the sidecar JSON."""
+        meta = self.read_meta(self.key_for(str(url or "").strip())) or {}
+        try:
+            pixels = int(meta.get("source_width") or 0) * int(meta.get("source_height") or 0)
+        except (TypeError, ValueError):
+            return None
+        return pixels or None
+
+    def get_bytes(self, url: str) -> Optional[bytes]:
+        path = self.get_path(url)
+        if not path:
+            return None
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except Exception:
+            return None
+
+    def prefetch(self, urls: Iterable[str], max_workers: Optional[int] = None) -> Dict[str, Any]:
+        """Downloads missing thumbnails in parallel. Returns {"requested", "available", "missing": [url...]}."""
+        unique: List[str] = [u for u in dict.fromkeys(str(u or "").strip() for u in urls) if u]
+        if not unique:
+            return {"requested": 0, "available": 0, "missing": []}
+        workers = max(1, min(int(max_workers or env_int("THUMB_FETCH_WORKERS", 8)), len(unique)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            paths = list(pool.map(self.get_path, unique))
+        missing = [u for u, p in zip(unique, paths) if not p]
+        return {"requested": len(unique), "available": len(unique) - len(missing), "missing": missing}
+
+
+_thumbnail_cache: Optional[ThumbnailCache] = None
+_thumbnail_cache_guard = threading.Lock()
+
+
+def get_thumbnail_cache() -> ThumbnailCache:
+    global _thumbnail_cache
+    with _thumbnail_cache_guard:
+        if _thumbnail_cache is None:
+            _thumbnail_cache = ThumbnailCache(default_thumbnail_cache_dir())
+        return _thumbnail_cache
+
+
+def fetch_thumbnail_bytes(url: str) -> Optional[bytes]:
+    """Normalized thumbnail through the shared cache (direct download when THUMB_CACHE=0)."""
+    if not thumbnail_cache_enabled():
+        return download_image(url)
+    return get_thumbnail_cache().get_bytes(url)
+
+
+def thumbnail_source_pixels(url: str) -> Optional[int]:
+    """Original image size (width*height) of a thumbnail fetched through the shared cache, else None."""
+    if not thumbnail_cache_enabled():
+        return None
+    return get_thumbnail_cache().source_pixels(url)
+
+
+def thumbnail_proxy_url(url: str) -> str:
+    """Backend URL serving the cached thumbnail for url ('' when it can't be proxied)."""
+    if not thumbnail_cache_enabled():
+        return ""
+    key = get_thumbnail_cache().register(url)
+    return f"/api/thumbnails/{key}.jpg" if key else ""
@@ -15,13 +15,13 @@ import os
 import json
 import time
 import uuid
-import requests
 import re
 from datetime import datetime, timezone
 from typing import Dict, Any, List, Optional
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from gpt_utils import call_openai
+from llm_http_client import llm_client
 from topic_intel_providers import (
     GoogleTrendsProvider,
     WikipediaPageviewsProvider,
@@ -70,7 +70,7 @@ def call_openai_openrouter(prompt: str, model: str = "openai/gpt-4o", temperatur
             "temperature": temperature
         }
         
-        response = requests.post(url, headers=headers, json=data, timeout=120)
+        response = llm_client.post(url, headers=headers, json=data, timeout=120, provider="openrouter")
         response.raise_for_status()
         
         result = response.json()
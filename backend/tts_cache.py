@@ -0,0 +1,73 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from typing import Any, Dict, Optional
+
+
+# Bump při změně post-processingu audia (stará cache se pak ignoruje).
+TTS_CACHE_VERSION = "v1"
+
+
+class TTSCache:
+    """
+    FS-backed content-hash cache for synthesized TTS audio (shared across episodes).
+    - Location: podcasts/cache/tts/<xx>/<sha256>.mp3
+    - Key: exact Google TTS request body (text/SSML + voice + language + rate + pitch + effects),
+      so any change in text or voice settings produces a new entry.
+    """
+
+    def __init__(self, base_dir: str):
+        self.base_dir = base_dir
+        self.cache_dir = os.path.join(self.base_dir, "cache", "tts")
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def key_for(request_body: Dict[str, Any]) -> str:
+        payload = json.dumps(request_body, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+        return hashlib.sha256(f"{TTS_CACHE_VERSION}|{payload}".encode("utf-8")).hexdigest()
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.mp3")
+
+    def get(self, key: str) -> Optional[str]:
+        """Returns cached MP3 path or None."""
+        path = self.path_for(key)
+        try:
+            if os.path.getsize(path) > 0:
+                return path
+        except OSError:
+            pass
+        return None
+
+    def copy_to(self, key: str, dest_path: str) -> Optional[int]:
+        """Copies cached audio to dest_path. Returns size in bytes, or None on miss."""
+        src = self.get(key)
+        if not src:
+            return None
+        try:
+            shutil.copyfile(src, dest_path)
+            return os.path.getsize(dest_path)
+        except Exception as e:
+            print(f"⚠️ TTS cache: copy failed for {key[:12]}: {e}")
+            return None
+
+    def put(self, key: str, audio_bytes: bytes) -> None:
+        if not audio_bytes:
+            return
+        path = self.path_for(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix="tts_", suffix=".mp3.tmp", dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(audio_bytes)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"⚠️ TTS cache: write failed for {key[:12]}: {e}")
+        finally:
+            try:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            except Exception:
+                pass
@@ -0,0 +1,467 @@
+"""
+Google Cloud TTS request building + early-start synthesis (shared by /api/tts/generate and the script pipeline).
+
+- tts_settings_from_env(): voice / language / rate / pitch / SSML / effects / cache (GCP_TTS_* env)
+- build_tts_request_body(): deterministic request body (also the TTSCache key)
+- wait_for_qps_slot(): process-wide GCP_TTS_MAX_QPS limiter shared by /api/tts/generate and TTSPrewarmer
+- TTSPrewarmer: synthesizes narration blocks into TTSCache while tts_format is still streaming,
+  so /api/tts/generate later copies them from cache. Keys are content-addressed, so a block whose
+  text changes after prewarm simply misses the cache (reconcile() re-submits and reports it).
+"""
+
+import base64
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import requests
+
+from tts_cache import TTSCache
+
+TTS_API_URL = "https://texttospeech.googleapis.com/v1/text:synthesize"
+
+# Jeden limiter pro celý proces: early start a /api/tts/generate sdílí stejnou kvótu Google TTS.
+_qps_lock = threading.Lock()
+_qps_next_slot = 0.0
+
+
+def tts_max_qps() -> float:
+    """GCP_TTS_MAX_QPS (default 8; 0 = bez limitu)."""
+    try:
+        return float(os.getenv('GCP_TTS_MAX_QPS', '8'))
+    except Exception:
+        return 8.0
+
+
+def wait_for_qps_slot() -> float:
+    """
+    Rozloží starty Google TTS requestů tak, aby všechny v procesu nepřekročily GCP_TTS_MAX_QPS.
+    Returns: how long the caller waited (seconds).
+    """
+    global _qps_next_slot
+    max_qps = tts_max_qps()
+    if max_qps <= 0:
+        return 0.0
+    with _qps_lock:
+        now = time.monotonic()
+        slot = max(now, _qps_next_slot)
+        _qps_next_slot = slot + 1.0 / max_qps
+    delay = slot - time.monotonic()
+    if delay > 0:
+        time.sleep(delay)
+    return max(0.0, delay)
+
+
+def tts_settings_from_env() -> Dict[str, Any]:
+    return {
+        "voice_name": os.getenv('GCP_TTS_VOICE_NAME', 'en-US-Neural2-D'),
+        "language_code": os.getenv('GCP_TTS_LANGUAGE_CODE', 'en-US'),
+        "speaking_rate": float(os.getenv('GCP_TTS_SPEAKING_RATE', '1.0')),
+        "pitch": float(os.getenv('GCP_TTS_PITCH', '0.0')),
+        # SSML enhancement settings (pro přirozenější výstup)
+        "use_ssml": os.getenv('GCP_TTS_USE_SSML', 'true').lower() == 'true',
+        # Audio effects profile pro lepší kvalitu (headphone-class-device, large-home-entertainment-class-device, etc.)
+        "effects_profile": os.getenv('GCP_TTS_EFFECTS_PROFILE', 'headphone-class-device'),
+        # Content-hash cache (sdílená napříč epizodami); vypnout GCP_TTS_CACHE=false
+        "use_tts_cache": os.getenv('GCP_TTS_CACHE', 'true').lower() == 'true',
+        "credentials_path": os.getenv('GOOGLE_APPLICATION_CREDENTIALS'),
+    }
+
+
+# ============================================================
+# SSML Pre-processing pro přirozenější TTS výstup
+# ============================================================
+def normalize_text_for_tts(text: str, lang_code: str) -> str:
+    """
+    Normalizuje text pro lepší TTS výslovnost:
+    - Expanduje běžné zkratky
+    - Formátuje čísla pro správnou výslovnost
+    - Odstraňuje problematické znaky
+    """
+    import re
+
+    if not text:
+        return text
+
+    result = text.strip()
+
+    # Odstranění více mezer za sebou
+    result = re.sub(r'\s+', ' ', result)
+
+    # Expandování běžných zkratek (case-insensitive)
+    abbreviations_en = {
+        r'\bDr\.': 'Doctor',
+        r'\bMr\.': 'Mister',
+        r'\bMrs\.': 'Missus',
+        r'\bMs\.': 'Miss',
+        r'\bSt\.': 'Saint',
+        r'\bvs\.': 'versus',
+        r'\betc\.': 'etcetera',
+        r'\be\.g\.': 'for example',
+        r'\bi\.e\.': 'that is',
+        r'\bU\.S\.A\.': 'United States of America',
+        r'\bU\.S\.': 'United States',
+        r'\bU\.K\.': 'United Kingdom',
+        r'\bWWII': 'World War Two',
+        r'\bWWI': 'World War One',
+        r'\bSSR': 'Soviet Socialist Republic',
+        r'\bUSSR': 'U S S R',
+        r'\bNATO': 'NATO',  # already readable
+        r'\bCEO': 'C E O',
+        r'\bFBI': 'F B I',
+        r'\bCIA': 'C I A',
+        r'\bNASA': 'NASA',  # already readable
+    }
+
+    if lang_code.startswith('en'):
+        for pattern, replacement in abbreviations_en.items():
+            result = re.sub(pattern, replacement, result, flags=re.IGNORECASE)
+
+    # Formátování roků pro lepší výslovnost (1945 → nineteen forty-five)
+    # Pouze 4-místná čísla začínající 1 nebo 2 (pravděpodobně roky)
+    def year_to_words(match):
+        year = int(match.group(0))
+        if 1000 <= year <= 2099:
+            if year < 2000:
+                century = year // 100
+                decade = year % 100
+                century_words = {10: 'ten', 11: 'eleven', 12: 'twelve', 13: 'thirteen',
+                                 14: 'fourteen', 15: 'fifteen', 16: 'sixteen', 17: 'seventeen',
+                                 18: 'eighteen', 19: 'nineteen'}
+                decade_words = {0: 'hundred', 1: 'oh one', 2: 'oh two', 3: 'oh three',
+                                4: 'oh four', 5: 'oh five', 6: 'oh six', 7: 'oh seven',
+                                8: 'oh eight', 9: 'oh nine', 10: 'ten', 11: 'eleven',
+                                12: 'twelve', 13: 'thirteen', 14: 'fourteen', 15: 'fifteen',
+                                16: 'sixteen', 17: 'seventeen', 18: 'eighteen', 19: 'nineteen',
+                                20: 'twenty', 21: 'twenty-one', 22: 'twenty-two', 23: 'twenty-three',
+                                24: 'twenty-four', 25: 'twenty-five', 26: 'twenty-six', 27: 'twenty-seven',
+                                28: 'twenty-eight', 29: 'twenty-nine', 30: 'thirty', 31: 'thirty-one',
+                                32: 'thirty-two', 33: 'thirty-three', 34: 'thirty-four', 35: 'thirty-five',
+                                36: 'thirty-six', 37: 'thirty-seven', 38: 'thirty-eight', 39: 'thirty-nine',
+                                40: 'forty', 41: 'forty-one', 42: 'forty-two', 43: 'forty-three',
+                                44: 'forty-four', 45: 'forty-five', 46: 'forty-six', 47: 'forty-seven',
+                                48: 'forty-eight', 49: 'forty-nine', 50: 'fifty', 51: 'fifty-one',
+                                52: 'fifty-two', 53: 'fifty-three', 54: 'fifty-four', 55: 'fifty-five',
+                                56: 'fifty-six', 57: 'fifty-seven', 58: 'fifty-eight', 59: 'fifty-nine',
+                                60: 'sixty', 61: 'sixty-one', 62: 'sixty-two', 63: 'sixty-three',
+                                64: 'sixty-four', 65: 'sixty-five', 66: 'sixty-six', 67: 'sixty-seven',
+                                68: 'sixty-eight', 69: 'sixty-nine', 70: 'seventy', 71: 'seventy-one',
+                                72: 'seventy-two', 73: 'seventy-three', 74: 'seventy-four', 75: 'seventy-five',
+                                76: 'seventy-six', 77: 'seventy-seven', 78: 'seventy-eight', 79: 'seventy-nine',
+                                80: 'eighty', 81: 'eighty-one', 82: 'eighty-two', 83: 'eighty-three',
+                                84: 'eighty-four', 85: 'eighty-five', 86: 'eighty-six', 87: 'eighty-seven',
+                                88: 'eighty-eight', 89: 'eighty-nine', 90: 'ninety', 91: 'ninety-one',
+                                92: 'ninety-two', 93: 'ninety-three', 94: 'ninety-four', 95: 'ninety-five',
+                                96: 'ninety-six', 97: 'ninety-seven', 98: 'ninety-eight', 99: 'ninety-nine'}
+                if century in century_words and decade in decade_words:
+                    return f"{century_words[century]} {decade_words[decade]}"
+            elif 2000 <= year <= 2009:
+                ones = ['', 'one', 'two', 'three', 'four', 'five', 'six', 'seven', 'eight', 'nine']
+                return f"two thousand {ones[year - 2000]}".strip()
+            elif 2010 <= year <= 2099:
+                decade = year - 2000
+                decade_words = {10: 'ten', 11: 'eleven', 12: 'twelve', 13: 'thirteen',
+                                14: 'fourteen', 15: 'fifteen', 16: 'sixteen', 17: 'seventeen',
+                                18: 'eighteen', 19: 'nineteen', 20: 'twenty', 21: 'twenty-one',
+                                22: 'twenty-two', 23: 'twenty-three', 24: 'twenty-four', 25: 'twenty-five'}
+                if decade in decade_words:
+                    return f"twenty {decade_words[decade]}"
+        return match.group(0)  # fallback - keep original
+
+    # Pouze roky v kontextu (ne všechna 4-místná čísla)
+    result = re.sub(r'\b(1[0-9]{3}|20[0-2][0-9])\b', year_to_words, result)
+
+    # Odstranění markdown formátování
+    result = re.sub(r'\*\*([^*]+)\*\*', r'\1', result)  # **bold**
+    result = re.sub(r'\*([^*]+)\*', r'\1', result)      # *italic*
+    result = re.sub(r'__([^_]+)__', r'\1', result)      # __bold__
+    result = re.sub(r'_([^_]+)_', r'\1', result)        # _italic_
+
+    # Nahrazení problematických znaků
+    result = result.replace('—', ', ')  # em-dash → čárka s pauzou
+    result = result.replace('–', ', ')  # en-dash → čárka s pauzou
+    result = result.replace('…', '.')    # ellipsis → tečka
+    result = result.replace('"', '')     # smart quotes
+    result = result.replace('"', '')
+    result = result.replace(''', "'")
+    result = result.replace(''', "'")
+
+    return result.strip()
+
+def text_to_ssml(text: str, lang_code: str) -> str:
+    """
+    Konvertuje plain text na SSML pro Google TTS.
+    Přidává přirozené pauzy a prosodické značky.
+    """
+    import re
+
+    if not text:
+        return '<speak></speak>'
+
+    # Nejdřív normalizuj text
+    normalized = normalize_text_for_tts(text, lang_code)
+
+    # Escape XML special characters
+    normalized = normalized.replace('&', '&amp;')
+    normalized = normalized.replace('<', '&lt;')
+    normalized = normalized.replace('>', '&gt;')
+
+    # Přidej pauzy po větách (. ! ?)
+    # Krátká pauza po běžné větě
+    normalized = re.sub(r'\.(\s+)', r'.<break time="400ms"/>\1', normalized)
+    # Delší pauza po otázce/vykřičníku
+    normalized = re.sub(r'\?(\s+)', r'?<break time="500ms"/>\1', normalized)
+    normalized = re.sub(r'!(\s+)', r'!<break time="450ms"/>\1', normalized)
+
+    # Kratší pauza po čárce
+    normalized = re.sub(r',(\s+)', r',<break time="200ms"/>\1', normalized)
+
+    # Pauza po středníku a dvojtečce
+    normalized = re.sub(r';(\s+)', r';<break time="350ms"/>\1', normalized)
+    normalized = re.sub(r':(\s+)', r':<break time="300ms"/>\1', normalized)
+
+    # Obal do <speak> tagu
+    ssml = f'<speak>{normalized}</speak>'
+
+    return ssml
+
+
+def build_tts_request_body(text_tts: str, settings: Dict[str, Any]) -> Dict[str, Any]:
+    """Google TTS request body (deterministický → zároveň klíč TTS cache)."""
+    language_code = settings["language_code"]
+    # Použij SSML pro přirozenější výstup (pokud je povoleno)
+    if settings["use_ssml"]:
+        input_payload = {"ssml": text_to_ssml(text_tts, language_code)}
+    else:
+        # Fallback na plain text (s normalizací)
+        input_payload = {"text": normalize_text_for_tts(text_tts, language_code)}
+
+    # Audio config s effects profile pro lepší kvalitu
+    audio_config = {
+        "audioEncoding": "MP3",
+        "speakingRate": settings["speaking_rate"],
+        "pitch": settings["pitch"],
+    }
+    # Přidej effects profile pokud je nastaven (optimalizuje audio)
+    if settings.get("effects_profile"):
+        audio_config["effectsProfileId"] = [settings["effects_profile"]]
+
+    return {
+        "input": input_payload,
+        "voice": {
+            "languageCode": language_code,
+            "name": settings["voice_name"],
+        },
+        "audioConfig": audio_config,
+    }
+
+
+def get_access_token_with_refresh(credentials_path: str):
+    """
+    Získej a refreshni access token z service account JSON.
+    Returns: (token_string, error_message_or_none)
+    """
+    try:
+        from google.oauth2 import service_account
+        import google.auth.transport.requests
+
+        # Load credentials
+        credentials = service_account.Credentials.from_service_account_file(
+            credentials_path,
+            scopes=['https://www.googleapis.com/auth/cloud-platform']
+        )
+
+        # CRITICAL: Explicitně refreshni token před použitím
+        auth_req = google.auth.transport.requests.Request()
+        credentials.refresh(auth_req)
+
+        # Teď token existuje a není None
+        if not credentials.token:
+            return None, "Token refresh proběhl, ale token je stále None"
+
+        print(f"🔑 Access token úspěšně vygenerován (expires: {credentials.expiry})")
+        return credentials.token, None
+
+    except FileNotFoundError:
+        return None, f"TTS_AUTH_REFRESH_FAILED: Service account soubor nenalezen: {credentials_path}"
+    except ValueError as e:
+        return None, f"TTS_AUTH_REFRESH_FAILED: Neplatný JSON v service account: {str(e)}"
+    except Exception as e:
+        error_str = str(e)
+        if "Permission denied" in error_str or "forbidden" in error_str.lower():
+            return None, f"TTS_AUTH_REFRESH_FAILED: Permissions chyba - zkontrolujte service account role: {error_str}"
+        else:
+            return None, f"TTS_AUTH_REFRESH_FAILED: {error_str}"
+
+
+# ============================================================
+# Early-start TTS (prewarm TTSCache during tts_format)
+# ============================================================
+
+# cache_key -> Future of a running prewarm (so /api/tts/generate waits instead of synthesizing twice)
+_inflight: Dict[str, Future] = {}
+_inflight_lock = threading.Lock()
+
+
+def tts_early_start_enabled() -> bool:
+    return (os.getenv("TTS_EARLY_START", "1") or "").strip().lower() in ("1", "true", "yes")
+
+
+def wait_for_prewarm(cache_key: Optional[str], timeout_sec: float = 90.0) -> None:
+    """Blocks until a running prewarm of cache_key finishes (no-op if none)."""
+    if not cache_key:
+        return
+    with _inflight_lock:
+        fut = _inflight.get(cache_key)
+    if fut is None:
+        return
+    try:
+        fut.result(timeout=timeout_sec)
+    except Exception:
+        pass
+
+
+class TTSPrewarmer:
+    """
+    Synthesizes finalized narration blocks into TTSCache in the background.
+
+    submit() is called per block as soon as the block is final (streamed tts_segments item);
+    reconcile() runs on the canonical narration_blocks once tts_format is done and re-submits
+    blocks whose text changed (the stale audio stays unused under its old key).
+    """
+
+    def __init__(self, cache: TTSCache, settings: Optional[Dict[str, Any]] = None, max_workers: Optional[int] = None):
+        self.cache = cache
+        self.settings = settings or tts_settings_from_env()
+        try:
+            workers = max_workers or max(1, int(os.getenv('GCP_TTS_MAX_CONCURRENCY', '4')))
+        except Exception:
+            workers = 4
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tts_prewarm")
+        self._lock = threading.Lock()
+        self._token: Optional[str] = None
+        self.submitted: Dict[str, str] = {}  # block_id -> cache_key
+        self.stats = {"submitted": 0, "already_cached": 0, "synthesized": 0, "failed": 0}
+
+    @classmethod
+    def create_if_enabled(cls, cache_base_dir: str) -> Optional["TTSPrewarmer"]:
+        """None when early start is off, the TTS cache is off, or GCP credentials are missing."""
+        if not tts_early_start_enabled():
+            return None
+        settings = tts_settings_from_env()
+        creds = settings.get("credentials_path")
+        if not settings["use_tts_cache"] or not creds or not os.path.exists(creds):
+            return None
+        return cls(TTSCache(cache_base_dir), settings=settings)
+
+    def submit(self, block_id: str, text_tts: str) -> Optional[str]:
+        """Queues synthesis of one block. Returns the cache key (None for empty text)."""
+        if not block_id or not isinstance(text_tts, str) or not text_tts.strip():
+            return None
+        key = TTSCache.key_for(build_tts_request_body(text_tts, self.settings))
+        with self._lock:
+            if self.submitted.get(block_id) == key:
+                return key
+            self.submitted[block_id] = key
+            self.stats["submitted"] += 1
+        if self.cache.get(key):
+            with self._lock:
+                self.stats["already_cached"] += 1
+            return key
+        with _inflight_lock:
+            if key in _inflight:
+                return key
+            fut = self._executor.submit(self._synthesize, key, text_tts)
+            _inflight[key] = fut
+        fut.add_done_callback(lambda _f, k=key: _forget_inflight(k))
+        return key
+
+    def reconcile(self, narration_blocks: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Compares final narration_blocks with what was prewarmed.
+
+        Returns:
+            {"blocks", "reused", "invalidated": [block_id...], "late": [block_id...], **stats}
+        """
+        reused, invalidated, late = 0, [], []
+        for b in narration_blocks or []:
+            if not isinstance(b, dict):
+                continue
+            bid = str(b.get("block_id") or "").strip()
+            text = b.get("text_tts")
+            if not bid or not isinstance(text, str) or not text.strip():
+                continue
+            key = TTSCache.key_for(build_tts_request_body(text, self.settings))
+            prev = self.submitted.get(bid)
+            if prev == key:
+                reused += 1
+                continue
+            (invalidated if prev else late).append(bid)
+            self.submit(bid, text)
+        if invalidated:
+            print(f"♻️  TTS early start: {len(invalidated)} block(s) changed after prewarm → re-synth: {invalidated[:5]}")
+        with self._lock:
+            stats = dict(self.stats)
+        return {"blocks": len(narration_blocks or []), "reused": reused, "invalidated": invalidated, "late": late, **stats}
+
+    def shutdown(self) -> None:
+        """Stops accepting work; queued blocks still finish in the background."""
+        self._executor.shutdown(wait=False)
+
+    def _access_token(self, refresh: bool = False) -> Optional[str]:
+        with self._lock:
+            if self._token and not refresh:
+                return self._token
+        token, err = get_access_token_with_refresh(self.settings["credentials_path"])
+        if err:
+            print(f"⚠️  TTS early start: {err}")
+        with self._lock:
+            self._token = token
+        return token
+
+    def _synthesize(self, key: str, text_tts: str) -> bool:
+        request_body = build_tts_request_body(text_tts, self.settings)
+        refreshed = False
+        for attempt in range(1, 4):
+            token = self._access_token()
+            if not token:
+                break
+            try:
+                wait_for_qps_slot()
+                response = requests.post(
+                    TTS_API_URL,
+                    headers={'Authorization': f'Bearer {token}', 'Content-Type': 'application/json'},
+                    json=request_body,
+                    timeout=30,
+                )
+            except requests.exceptions.RequestException as e:
+                print(f"⚠️  TTS early start: {key[:12]} attempt {attempt}: {e}")
+                time.sleep(attempt)
+                continue
+            if response.status_code == 401 and not refreshed:
+                self._access_token(refresh=True)
+                refreshed = True
+                continue
+            if response.status_code == 429 or response.status_code >= 500:
+                time.sleep(attempt)
+                continue
+            if response.status_code != 200:
+                break
+            audio_b64 = (response.json() or {}).get('audioContent')
+            if not audio_b64:
+                break
+            self.cache.put(key, base64.b64decode(audio_b64))
+            with self._lock:
+                self.stats["synthesized"] += 1
+            return True
+        # /api/tts/generate synthesizes the block itself on a cache miss
+        with self._lock:
+            self.stats["failed"] += 1
+        return False
+
+
+def _forget_inflight(key: str) -> None:
+    with _inflight_lock:
+        _inflight.pop(key, None)
@@ -5,11 +5,32 @@ Analyzuje thumbnaily kandidátů z archive_manifest.json pomocí OpenAI Vision A
 a vybírá nejlepší shodu pro každou scénu.
 """
 
+import hashlib
 import json
 import os
 import re
-from typing import Dict, List, Optional, Any
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Any, Tuple
 import requests
+from env_utils import env_int
+from llm_http_client import llm_client
+from llm_usage_ledger import LLMBudgetExceeded, bind_scope, usage_scope
+from perceptual_hash import local_near_duplicate_groups, phash_dedup_enabled
+
+# Per-(thumbnail, beat) Vision verdicts, uložené vedle archive_manifest.json (bump verze při změně promptu/schématu)
+VERDICT_CACHE_FILENAME = "visual_assistant_verdicts.json"
+VERDICT_CACHE_VERSION = "vv1"
+
+
+def verdict_cache_max_entries() -> int:
+    """Max verdiktů v cache souboru (VA_VERDICT_CACHE_MAX, default 5000); nejdéle nepoužité se zahodí (LRU)."""
+    return env_int("VA_VERDICT_CACHE_MAX", 5000, minimum=1)
+
+
+def batch_rerank_enabled() -> bool:
+    """Batch beat reranking (VA_BATCH_RERANK, default on; off = one Vision call per thumbnail)."""
+    return (os.getenv("VA_BATCH_RERANK", "1") or "").strip().lower() in ("1", "true", "yes")
 
 
 class VisualAssistant:
@@ -173,6 +194,56 @@ class VisualAssistant:
         self,
         candidates: List[Dict[str, Any]],
         episode_topic: str
+    ) -> Dict[str, Any]:
+        """
+        Visual Deduplication - nejdřív lokálně (pHash/dHash, bez API), LLM jen pro nejednoznačné clustery.
+        PHASH_DEDUP=0 → vše posílá LLM (původní chování).
+        """
+        if not phash_dedup_enabled():
+            return self._llm_deduplicate_pool_candidates(candidates, episode_topic)
+        try:
+            local = local_near_duplicate_groups(candidates)
+        except Exception as e:
+            print(f"   ⚠️ Local pHash dedup failed: {e}, falling back to LLM dedup")
+            return self._llm_deduplicate_pool_candidates(candidates, episode_topic)
+
+        ids = [str(c.get('archive_item_id') or f'asset_{i}') for i, c in enumerate(candidates)]
+        duplicate_of = local["duplicate_of"]
+        ambiguous = set(local["ambiguous_ids"])
+        llm_pool = [c for cid, c in zip(ids, candidates) if cid in ambiguous]
+
+        llm_unique_ids = None
+        llm_groups: List[Dict[str, Any]] = []
+        if len(llm_pool) >= 2:
+            llm_result = self._llm_deduplicate_pool_candidates(llm_pool, episode_topic)
+            llm_unique_ids = {id(c) for c in llm_result.get("unique_candidates", [])}
+            llm_groups = llm_result.get("groups", [])
+
+        unique_candidates = []
+        for cid, c in zip(ids, candidates):
+            if cid in duplicate_of:
+                c['_is_duplicate'] = True
+                c['_duplicate_of'] = duplicate_of[cid]
+                continue
+            if llm_unique_ids is not None and cid in ambiguous and id(c) not in llm_unique_ids:
+                continue  # LLM označilo jako duplikát (flag nastaven v LLM fázi)
+            c['_is_duplicate'] = False
+            unique_candidates.append(c)
+
+        print(
+            f"   🧬 Local pHash dedup: {local['hashed']} hashed, {len(duplicate_of)} collapsed, "
+            f"{len(llm_pool) if len(llm_pool) >= 2 else 0} ambiguous → LLM"
+        )
+        return {
+            "unique_candidates": unique_candidates,
+            "groups": local["groups"] + llm_groups,
+            "local_dedup": {k: local[k] for k in ("hashed", "unhashed")},
+        }
+
+    def _llm_deduplicate_pool_candidates(
+        self,
+        candidates: List[Dict[str, Any]],
+        episode_topic: str
     ) -> Dict[str, Any]:
         """
         LLM Visual Deduplication - groupuje podobné thumbnaily.
@@ -268,6 +339,8 @@ Thumbnails:
                 "groups": groups
             }
         
+        except LLMBudgetExceeded:
+            raise
         except Exception as e:
             print(f"   ⚠️ Deduplication failed: {e}, using all candidates")
             return {"unique_candidates": candidates, "groups": []}
@@ -388,6 +461,8 @@ Thumbnails:
             if self.verbose:
                 print(f"   ✅ Rated {len(batch)} thumbnails in ONE API call")
         
+        except LLMBudgetExceeded:
+            raise
         except Exception as e:
             if self.verbose:
                 print(f"   ⚠️ Batch ranking failed: {e}, using defaults")
@@ -437,7 +512,7 @@ Thumbnails:
             "max_tokens": 2000
         }
         
-        response = requests.post(endpoint, headers=headers, json=payload, timeout=120, verify=False)
+        response = llm_client.post(endpoint, headers=headers, json=payload, timeout=120, verify=False, provider=self.provider)
         response.raise_for_status()
         data = response.json()
         
@@ -464,6 +539,10 @@ Thumbnails:
             "Authorization": f"Bearer {self.api_key}"
         }
         
+        model = self.model
+        if self.provider == "openrouter" and "/" not in model:
+            model = f"openai/{model}"
+        
         # Build content with ALL images (up to 500)
         content = [{"type": "text", "text": user_text}]
         for url in image_urls[:500]:  # API hard limit: 500 images
@@ -473,7 +552,7 @@ Thumbnails:
             })
         
         payload = {
-            "model": self.model,
+            "model": model,
             "messages": [
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": content}
@@ -487,7 +566,7 @@ Thumbnails:
         if payload["response_format"] is None:
             del payload["response_format"]
         
-        response = requests.post(endpoint, headers=headers, json=payload, timeout=300, verify=False)  # 5 min timeout
+        response = llm_client.post(endpoint, headers=headers, json=payload, timeout=300, verify=False, provider=self.provider)  # 5 min timeout
         response.raise_for_status()
         data = response.json()
         
@@ -542,6 +621,8 @@ Thumbnails:
             
             return result
         
+        except LLMBudgetExceeded:
+            raise
         except Exception as e:
             if self.verbose:
                 print(f"⚠️ Visual analysis failed: {e}")
@@ -560,7 +641,8 @@ Thumbnails:
         candidates: List[Dict[str, Any]],
         beat_text: str,
         shot_types: List[str],
-        max_analyze: int = 5
+        max_analyze: int = 5,
+        precomputed: Optional[Dict[int, Dict[str, Any]]] = None
     ) -> List[Dict[str, Any]]:
         """
         Analyzuje a rerank kandidáty pro jeden beat.
@@ -570,6 +652,7 @@ Thumbnails:
             beat_text: Text narrace
             shot_types: Shot types
             max_analyze: Max počet kandidátů k analýze (top N)
+            precomputed: candidate index -> analysis (z batch rerankingu); chybějící se analyzují jednotlivě
         
         Returns:
             Reranked seznam kandidátů (s přidaným "_visual_analysis" fieldem)
@@ -598,12 +681,14 @@ Thumbnails:
                 "archive_item_id": candidate.get('archive_item_id', '')
             }
             
-            analysis = self.analyze_candidate(
-                thumbnail_url=thumbnail_url,
-                beat_text=beat_text,
-                shot_types=shot_types,
-                candidate_metadata=metadata
-            )
+            analysis = (precomputed or {}).get(i)
+            if analysis is None:
+                analysis = self.analyze_candidate(
+                    thumbnail_url=thumbnail_url,
+                    beat_text=beat_text,
+                    shot_types=shot_types,
+                    candidate_metadata=metadata
+                )
             
             candidate['_visual_analysis'] = analysis
             analyzed.append(candidate)
@@ -641,6 +726,17 @@ Thumbnails:
         Returns:
             Upravený manifest dict (s reranked candidates)
         """
+        # Vision spotřeba se účtuje epizodě (projects/<episode_id>/archive_manifest.json) jako krok visual_assistant
+        episode_id = os.path.basename(os.path.dirname(os.path.abspath(manifest_path)))
+        with usage_scope(episode_id=episode_id, step="visual_assistant"):
+            return self._process_manifest(manifest_path, output_path, max_analyze_per_beat)
+
+    def _process_manifest(
+        self,
+        manifest_path: str,
+        output_path: Optional[str],
+        max_analyze_per_beat: int
+    ) -> Dict[str, Any]:
         if not os.path.exists(manifest_path):
             raise FileNotFoundError(f"Manifest not found: {manifest_path}")
         
@@ -659,8 +755,8 @@ Thumbnails:
         state: Dict[str, Any] = {}
         if os.path.exists(state_path):
             try:
-                with open(state_path, "r", encoding="utf-8") as sf:
-                    state = json.load(sf) or {}
+                from project_store import load_script_state_file
+                state = load_script_state_file(state_path, parts=["metadata", "tts_ready_package"]) or {}
             except Exception:
                 state = {}
 
@@ -780,6 +876,8 @@ Thumbnails:
         total_beats = 0
         total_analyzed = 0
         
+        # Pass 1: kontext beatů + obohacení kandidátů o thumbnaily/metadata
+        prepared: List[Dict[str, Any]] = []
         for scene in manifest.get('scenes', []):
             # Map scene assets by id for metadata join
             assets = scene.get("assets") if isinstance(scene, dict) and isinstance(scene.get("assets"), list) else []
@@ -835,47 +933,65 @@ Thumbnails:
                             c["title"] = ainfo.get("title")
                         if not str(c.get("description") or "").strip() and ainfo.get("description"):
                             c["description"] = ainfo.get("description")
+
+                prepared.append({"beat": beat, "candidates": candidates, "beat_text": beat_text, "shot_types": shot_types})
+
+        # Pass 2: verdikty pro top-N kandidátů všech beatů najednou (batch Vision + cache)
+        verdicts: Dict[int, Dict[int, Dict[str, Any]]] = {}
+        batch_stats: Dict[str, Any] = {}
+        if batch_rerank_enabled():
+            verdicts, batch_stats = self.batch_analyze_beats(
+                prepared,
+                max_analyze_per_beat=max_analyze_per_beat,
+                cache_path=os.path.join(episode_dir, VERDICT_CACHE_FILENAME),
+            )
+
+        # Pass 3: rerank + auto-pick per beat (chybějící verdikty → jednotlivý Vision call)
+        for bi, item in enumerate(prepared):
+            beat = item["beat"]
+            candidates = item["candidates"]
                 
-                if self.verbose:
-                    print(f"\n📊 Analyzing beat {beat.get('block_id', '?')} ({len(candidates)} candidates)")
-                
-                reranked = self.rerank_candidates(
-                    candidates=candidates,
-                    beat_text=beat_text,
-                    shot_types=shot_types,
-                    max_analyze=max_analyze_per_beat
-                )
-                
-                beat['asset_candidates'] = reranked
-                # Auto-pick: if no manual selection exists, set selected_asset_id to the best candidate.
-                # This ensures CompilationBuilder uses the same choice as LLM reranking.
-                try:
-                    existing_sel = str((beat or {}).get("selected_asset_id") or "").strip()
-                    if not existing_sel and reranked:
-                        # Prefer candidates explicitly recommended for use; otherwise fall back to top reranked.
-                        best = None
-                        for c in reranked:
-                            if not isinstance(c, dict):
-                                continue
-                            va = c.get("_visual_analysis") if isinstance(c.get("_visual_analysis"), dict) else {}
-                            rec = str(va.get("recommendation") or "").strip().lower()
-                            score = va.get("relevance_score", None)
-                            try:
-                                score_f = float(score)
-                            except Exception:
-                                score_f = None
-                            # Only auto-pick when the model is confident enough.
-                            if rec == "use" and (score_f is None or score_f >= 0.6):
-                                best = c
-                                break
-                        # If there is no strong "use" candidate, do NOT force a selection.
-                        # (CB will still use the reranked order, but we avoid pinning a bad choice.)
-                        if best and best.get("archive_item_id"):
-                            beat["selected_asset_id"] = str(best.get("archive_item_id"))
-                except Exception:
-                    # Non-fatal: keep reranked list even if auto-pick fails
-                    pass
-                total_analyzed += min(len(candidates), max_analyze_per_beat)
+            if self.verbose:
+                print(f"\n📊 Analyzing beat {beat.get('block_id', '?')} ({len(candidates)} candidates)")
+            
+            reranked = self.rerank_candidates(
+                candidates=candidates,
+                beat_text=item["beat_text"],
+                shot_types=item["shot_types"],
+                max_analyze=max_analyze_per_beat,
+                precomputed=verdicts.get(bi)
+            )
+            
+            beat['asset_candidates'] = reranked
+            # Auto-pick: if no manual selection exists, set selected_asset_id to the best candidate.
+            # This ensures CompilationBuilder uses the same choice as LLM reranking.
+            try:
+                existing_sel = str((beat or {}).get("selected_asset_id") or "").strip()
+                if not existing_sel and reranked:
+                    # Prefer candidates explicitly recommended for use; otherwise fall back to top reranked.
+                    best = None
+                    for c in reranked:
+                        if not isinstance(c, dict):
+                            continue
+                        va = c.get("_visual_analysis") if isinstance(c.get("_visual_analysis"), dict) else {}
+                        rec = str(va.get("recommendation") or "").strip().lower()
+                        score = va.get("relevance_score", None)
+                        try:
+                            score_f = float(score)
+                        except Exception:
+                            score_f = None
+                        # Only auto-pick when the model is confident enough.
+                        if rec == "use" and (score_f is None or score_f >= 0.6):
+                            best = c
+                            break
+                    # If there is no strong "use" candidate, do NOT force a selection.
+                    # (CB will still use the reranked order, but we avoid pinning a bad choice.)
+                    if best and best.get("archive_item_id"):
+                        beat["selected_asset_id"] = str(best.get("archive_item_id"))
+            except Exception:
+                # Non-fatal: keep reranked list even if auto-pick fails
+                pass
+            total_analyzed += min(len(candidates), max_analyze_per_beat)
         
         # Metadata
         manifest['_visual_assistant_metadata'] = {
@@ -883,7 +999,8 @@ Thumbnails:
             "temperature": self.temperature,
             "total_beats": total_beats,
             "total_candidates_analyzed": total_analyzed,
-            "max_analyze_per_beat": max_analyze_per_beat
+            "max_analyze_per_beat": max_analyze_per_beat,
+            "batch_rerank": batch_stats or None
         }
         
         # Save
@@ -898,6 +1015,225 @@ Thumbnails:
         
         return manifest
     
+    def batch_analyze_beats(
+        self,
+        prepared: List[Dict[str, Any]],
+        max_analyze_per_beat: int = 5,
+        cache_path: Optional[str] = None
+    ) -> Tuple[Dict[int, Dict[int, Dict[str, Any]]], Dict[str, Any]]:
+        """
+        Vision verdikty pro top-N kandidátů VŠECH beatů v několika batch requestech.
+
+        - Kandidáti napříč beaty se balí do batchů (VA_BATCH_IMAGES obrázků, default 16),
+          každý obrázek má index a svůj beat; batche běží paralelně (VA_BATCH_WORKERS, default 4).
+        - Verdikty se cachují per (thumbnail_url, beat text, shot types, model, prompt) v cache_path
+          (LRU, max VA_VERDICT_CACHE_MAX položek; pořadí v JSON souboru = pořadí použití).
+        - Položky, které batch nevrátil, zůstanou bez verdiktu → rerank_candidates je analyzuje jednotlivě.
+
+        Args:
+            prepared: [{"candidates": [...], "beat_text": str, "shot_types": [...]}, ...]
+            max_analyze_per_beat: top N kandidátů per beat
+            cache_path: JSON soubor s cache verdiktů (None = bez cache)
+
+        Returns:
+            ({beat_index: {candidate_index: analysis}}, stats)
+        """
+        cache = self._load_verdict_cache(cache_path)
+        out: Dict[int, Dict[int, Dict[str, Any]]] = {}
+        pending: Dict[str, Dict[str, Any]] = {}  # cache key -> item (+ všechny (beat, candidate) pozice)
+        hits = 0
+        for bi, p in enumerate(prepared):
+            for ci, c in enumerate((p.get("candidates") or [])[:max_analyze_per_beat]):
+                if not isinstance(c, dict):
+                    continue
+                thumb = str(c.get("thumbnail_url") or "").strip()
+                if not thumb:
+                    continue
+                key = self._verdict_key(thumb, p.get("beat_text") or "", p.get("shot_types") or [])
+                if key in cache:
+                    cache.move_to_end(key)
+                    out.setdefault(bi, {})[ci] = dict(cache[key])
+                    hits += 1
+                    continue
+                item = pending.get(key)
+                if item is None:
+                    pending[key] = {
+                        "key": key,
+                        "thumbnail_url": thumb,
+                        "beat_index": bi,
+                        "beat_text": p.get("beat_text") or "",
+                        "shot_types": p.get("shot_types") or [],
+                        "title": str(c.get("title") or "Unknown")[:100],
+                        "source": c.get("_source", "unknown"),
+                        "targets": [(bi, ci)],
+                    }
+                else:
+                    item["targets"].append((bi, ci))
+
+        items = list(pending.values())
+        size = max(1, env_int("VA_BATCH_IMAGES", 16))
+        batches = [items[i:i + size] for i in range(0, len(items), size)]
+        workers = max(1, min(len(batches) or 1, env_int("VA_BATCH_WORKERS", 4)))
+        results: List[Dict[int, Dict[str, Any]]] = []
+        if batches:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(bind_scope(self._analyze_beat_batch), batches))
+
+        missing = 0
+        for batch, res in zip(batches, results):
+            for idx, item in enumerate(batch):
+                verdict = res.get(idx)
+                if verdict is None:
+                    missing += 1
+                    continue
+                cache[item["key"]] = verdict
+                cache.move_to_end(item["key"])
+                for bi, ci in item["targets"]:
+                    out.setdefault(bi, {})[ci] = dict(verdict)
+
+        if cache_path and (items or hits):
+            self._save_verdict_cache(cache_path, cache)
+
+        stats = {
+            "cache_hits": hits,
+            "analyzed": len(items),
+            "batches": len(batches),
+            "batch_size": size,
+            "missing_fallback": missing,
+        }
+        if self.verbose:
+            print(f"🧮 Vision batch rerank: {len(items)} thumbnails in {len(batches)} calls, {hits} from cache, {missing} → single fallback")
+        return out, stats
+
+    def _analyze_beat_batch(self, batch: List[Dict[str, Any]]) -> Dict[int, Dict[str, Any]]:
+        """Jeden batch Vision request; returns {index: verdict} (prázdné při chybě)."""
+        beat_labels: Dict[int, str] = {}
+        beat_lines: List[str] = []
+        for item in batch:
+            bi = item["beat_index"]
+            if bi in beat_labels:
+                continue
+            label = f"B{len(beat_labels) + 1}"
+            beat_labels[bi] = label
+            beat_lines.append(
+                f"{label}: Narration: \"{str(item['beat_text'])[:600]}\" | Desired shot types: {', '.join(item['shot_types'])}"
+            )
+        item_lines = [
+            f"{i}. beat {beat_labels[item['beat_index']]} | Title: {item['title']} | Source: {item['source']}"
+            for i, item in enumerate(batch)
+        ]
+        user_message = (
+            f"Evaluate these {len(batch)} thumbnails (images in the same order as ITEMS).\n\n"
+            "BEATS:\n" + "\n".join(beat_lines) + "\n\nITEMS:\n" + "\n".join(item_lines) +
+            "\n\nRespond ONLY with JSON."
+        )
+        try:
+            response = self._call_vision_api_batch(
+                system_prompt=self._batch_system_prompt(),
+                user_text=user_message,
+                image_urls=[item["thumbnail_url"] for item in batch]
+            )
+            try:
+                obj = self._parse_json_object(response)
+                rows = obj.get("results") if isinstance(obj, dict) else None
+            except ValueError:
+                rows = None
+            if not isinstance(rows, list):
+                rows = self._parse_json_array(response)
+        except LLMBudgetExceeded:
+            # Rozpočet epizody vyčerpán → žádný fallback na další Vision cally
+            raise
+        except Exception as e:
+            if self.verbose:
+                print(f"⚠️ Vision batch ({len(batch)} images) failed: {e}")
+            return {}
+
+        out: Dict[int, Dict[str, Any]] = {}
+        for r in rows:
+            if not isinstance(r, dict):
+                continue
+            try:
+                idx = int(r.get("index"))
+            except (TypeError, ValueError):
+                continue
+            if 0 <= idx < len(batch):
+                out[idx] = self._normalize_verdict(r)
+        return out
+
+    def _normalize_verdict(self, r: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            score = max(0.0, min(1.0, float(r.get("relevance_score", 0.0))))
+        except (TypeError, ValueError):
+            score = 0.0
+        issues = r.get("quality_issues")
+        rec = str(r.get("recommendation") or "skip").strip().lower()
+        return {
+            "relevance_score": score,
+            "has_text_overlay": bool(r.get("has_text_overlay", False)),
+            "quality_issues": issues if isinstance(issues, list) else [],
+            "recommendation": rec if rec in ("use", "skip", "fallback") else "skip",
+            "reasoning": str(r.get("reasoning") or ""),
+        }
+
+    def _verdict_key(self, thumbnail_url: str, beat_text: str, shot_types: List[str]) -> str:
+        payload = json.dumps(
+            [VERDICT_CACHE_VERSION, self.model, self.custom_prompt or "", thumbnail_url, beat_text, list(shot_types)],
+            ensure_ascii=False,
+        )
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    def _load_verdict_cache(self, cache_path: Optional[str]) -> "OrderedDict[str, Dict[str, Any]]":
+        if not cache_path or not os.path.exists(cache_path):
+            return OrderedDict()
+        try:
+            with open(cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return OrderedDict(data) if isinstance(data, dict) else OrderedDict()
+        except Exception:
+            return OrderedDict()
+
+    def _save_verdict_cache(self, cache_path: str, cache: "OrderedDict[str, Dict[str, Any]]") -> None:
+        max_entries = verdict_cache_max_entries()
+        while len(cache) > max_entries:
+            cache.popitem(last=False)  # nejdéle nepoužitý verdikt
+        try:
+            tmp_path = cache_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(cache, f, ensure_ascii=False)
+            os.replace(tmp_path, cache_path)
+        except Exception as e:
+            print(f"⚠️ Visual Assistant: verdict cache write failed: {e}")
+
+    def _batch_system_prompt(self) -> str:
+        """System prompt pro batch beat reranking (jeden verdikt per indexovaný obrázek)."""
+        prompt = """You are a strict Vision Thumbnail Evaluator for documentary editing.
+
+TASK
+- You get several candidate thumbnails (images in the same order as ITEMS, index 0..N-1).
+- Each item belongs to ONE narration beat (BEATS). Evaluate each image ONLY against its own beat.
+
+NON-NEGOTIABLE OUTPUT
+- Output MUST be a single valid JSON object: {"results": [...]}, exactly one entry per item index.
+- Do NOT output markdown, prose, or code fences.
+- "reasoning" MUST be in Czech (cs). Keep it 1 short sentence.
+
+ENTRY SCHEMA (EXACT KEYS)
+{"index": 0, "relevance_score": 0.0, "has_text_overlay": false, "quality_issues": [], "recommendation": "use", "reasoning": ""}
+
+SCORING
+- relevance_score (0.0–1.0): Relevance to the item's beat context is #1 priority.
+
+QUALITY / SAFETY
+- Penalize strongly: subtitles/captions, UI overlays, watermarks/logos, wrong era/event, too modern look for historical beats.
+
+recommendation
+- "use": relevant + usable
+- "skip": mismatch or heavy overlays
+- "fallback": ONLY if image is not interpretable / analysis uncertain (otherwise prefer 'skip')"""
+        if self.custom_prompt:
+            prompt += "\n\nADDITIONAL EVALUATION CRITERIA (apply per item):\n" + self.custom_prompt
+        return prompt
+
     def _call_vision_api(
         self,
         system_prompt: str,
@@ -960,7 +1296,7 @@ Thumbnails:
         # - OpenRouter: often supported for OpenAI-routed models; if it errors, we retry without it.
         payload["response_format"] = {"type": "json_object"}
         
-        response = requests.post(api_url, headers=headers, json=payload, timeout=60)
+        response = llm_client.post(api_url, headers=headers, json=payload, timeout=60, provider=self.provider)
 
         # OpenRouter compatibility: retry once without response_format if server rejects it.
         if self.provider == "openrouter" and response.status_code == 400 and "response_format" in payload:
@@ -968,7 +1304,7 @@ Thumbnails:
                 payload.pop("response_format", None)
             except Exception:
                 pass
-            response = requests.post(api_url, headers=headers, json=payload, timeout=60)
+            response = llm_client.post(api_url, headers=headers, json=payload, timeout=60, provider=self.provider)
         
         response.raise_for_status()
         data = response.json() or {}
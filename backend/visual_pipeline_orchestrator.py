@@ -29,6 +29,8 @@ def _mark_step_running(state: dict, step_name: str, message: str = "") -> None:
         state["steps"][step_name]["status"] = "RUNNING"
         state["steps"][step_name]["message"] = message or f"Running {step_name}..."
         state["steps"][step_name]["started_at"] = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+        from llm_usage_ledger import set_usage_scope
+        set_usage_scope(state.get("episode_id"), step_name)
     except Exception:
         pass
 
@@ -0,0 +1,315 @@
+"""
+Incremental voiceover assembly (Narrator_*.mp3 → one WAV + block timeline).
+
+Each MP3 block is decoded to raw PCM once and cached next to the MP3s
+(voiceover/.pcm_cache/<sha1>.pcm), keyed by the MP3 content hash. Re-assembly
+after a narrative patch therefore decodes only changed blocks:
+- same block lengths → changed segments are overwritten in place in the existing WAV
+- different lengths → the WAV is re-spliced from cached PCM (plain byte copy, no decode)
+
+The timeline (block offsets/durations) is persisted as voiceover/.pcm_cache/timeline.json
+and reused by AAR (beat timing) and the SRT writer, so nobody has to ffprobe every block.
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import wave
+from typing import Any, Dict, List, Optional, Tuple
+
+# Google TTS MP3 = 24 kHz mono; decode everything to the same PCM layout so blocks splice cleanly.
+PCM_SAMPLE_RATE = 24000
+PCM_CHANNELS = 1
+PCM_SAMPLE_WIDTH = 2  # s16le
+
+_CACHE_DIRNAME = ".pcm_cache"
+_INDEX_FILENAME = "index.json"
+_TIMELINE_FILENAME = "timeline.json"
+_COPY_CHUNK = 1024 * 1024
+
+
+def _cache_dir(voiceover_dir: str) -> str:
+    return os.path.join(voiceover_dir, _CACHE_DIRNAME)
+
+
+def _list_blocks(voiceover_dir: str) -> List[str]:
+    try:
+        return sorted(f for f in os.listdir(voiceover_dir) if f.lower().endswith(".mp3"))
+    except Exception:
+        return []
+
+
+def _read_json(path: str) -> Any:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+
+def _write_json_atomic(path: str, obj: Any) -> None:
+    fd, tmp_path = tempfile.mkstemp(prefix="vo_", suffix=".json.tmp", dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(obj, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+    finally:
+        try:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        except Exception:
+            pass
+
+
+def _file_sha1(path: str) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_COPY_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _decode_to_pcm(mp3_path: str, pcm_path: str) -> bool:
+    """Decode one MP3 to raw s16le PCM (PCM_SAMPLE_RATE / PCM_CHANNELS)."""
+    tmp_path = pcm_path + ".part"
+    cmd = [
+        "ffmpeg", "-y", "-v", "error",
+        "-i", mp3_path,
+        "-f", "s16le", "-acodec", "pcm_s16le",
+        "-ac", str(PCM_CHANNELS), "-ar", str(PCM_SAMPLE_RATE),
+        tmp_path,
+    ]
+    try:
+        r = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
+        if r.returncode != 0 or not os.path.exists(tmp_path):
+            print(f"⚠️  VO: decode failed for {os.path.basename(mp3_path)}: {(r.stderr or '')[-300:]}")
+            return False
+        os.replace(tmp_path, pcm_path)
+        return True
+    except Exception as e:
+        print(f"⚠️  VO: decode error for {os.path.basename(mp3_path)}: {e}")
+        return False
+    finally:
+        try:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        except Exception:
+            pass
+
+
+def voiceover_timeline(voiceover_dir: str) -> Optional[Dict[str, Any]]:
+    """
+    Ensures every MP3 block has cached PCM and returns the block timeline:
+        {"blocks": [{"filename", "sha1", "start_sec", "duration_sec", "bytes"}], "total_duration_sec": float,
+         "decoded": int, "reused": int}
+    Returns None when there are no blocks or a block cannot be decoded.
+    """
+    files = _list_blocks(voiceover_dir)
+    if not files:
+        return None
+    cache_dir = _cache_dir(voiceover_dir)
+    os.makedirs(cache_dir, exist_ok=True)
+
+    # index: filename -> {size, mtime_ns, sha1}; avoids re-hashing untouched MP3s
+    index_path = os.path.join(cache_dir, _INDEX_FILENAME)
+    index = _read_json(index_path)
+    index = index if isinstance(index, dict) else {}
+    new_index: Dict[str, Any] = {}
+
+    bytes_per_sec = float(PCM_SAMPLE_RATE * PCM_CHANNELS * PCM_SAMPLE_WIDTH)
+    blocks: List[Dict[str, Any]] = []
+    decoded = 0
+    offset = 0
+    for fn in files:
+        mp3_path = os.path.join(voiceover_dir, fn)
+        try:
+            st = os.stat(mp3_path)
+        except OSError:
+            return None
+        prev = index.get(fn) if isinstance(index.get(fn), dict) else {}
+        if prev.get("size") == st.st_size and prev.get("mtime_ns") == st.st_mtime_ns and prev.get("sha1"):
+            sha1 = str(prev["sha1"])
+        else:
+            sha1 = _file_sha1(mp3_path)
+        new_index[fn] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha1": sha1}
+
+        pcm_path = os.path.join(cache_dir, f"{sha1}.pcm")
+        if not os.path.exists(pcm_path):
+            if not _decode_to_pcm(mp3_path, pcm_path):
+                return None
+            decoded += 1
+        size = os.path.getsize(pcm_path)
+        blocks.append({
+            "filename": fn,
+            "sha1": sha1,
+            "offset_bytes": offset,
+            "bytes": size,
+            "start_sec": offset / bytes_per_sec,
+            "duration_sec": size / bytes_per_sec,
+        })
+        offset += size
+
+    try:
+        _write_json_atomic(index_path, new_index)
+    except Exception as e:
+        print(f"⚠️  VO: failed to persist PCM index: {e}")
+
+    return {
+        "blocks": blocks,
+        "total_duration_sec": offset / bytes_per_sec,
+        "decoded": decoded,
+        "reused": len(blocks) - decoded,
+    }
+
+
+def assemble_voiceover(voiceover_dir: str, output_path: str) -> Optional[Dict[str, Any]]:
+    """
+    Builds/updates the combined voiceover WAV at output_path.
+
+    Returns the timeline (see voiceover_timeline) extended with "audio_path" and
+    "mode" ("unchanged" | "patched" | "spliced"), or None on failure.
+    """
+    timeline = voiceover_timeline(voiceover_dir)
+    if not timeline:
+        return None
+    cache_dir = _cache_dir(voiceover_dir)
+    timeline_path = os.path.join(cache_dir, _TIMELINE_FILENAME)
+    blocks = timeline["blocks"]
+
+    prev = _read_json(timeline_path)
+    prev_blocks = prev.get("blocks") if isinstance(prev, dict) and prev.get("audio_path") == output_path else None
+    total_bytes = sum(int(b["bytes"]) for b in blocks)
+
+    mode = "spliced"
+    if isinstance(prev_blocks, list) and os.path.exists(output_path) and len(prev_blocks) == len(blocks) and all(
+        int(p.get("bytes") or -1) == int(b["bytes"]) for p, b in zip(prev_blocks, blocks)
+    ):
+        changed = [b for p, b in zip(prev_blocks, blocks) if p.get("sha1") != b["sha1"]]
+        header_bytes = os.path.getsize(output_path) - total_bytes
+        if header_bytes < 0:
+            pass  # truncated/foreign file → re-splice
+        elif not changed:
+            mode = "unchanged"
+        else:
+            # Same layout: overwrite only the changed segments in place.
+            try:
+                with open(output_path, "r+b") as out:
+                    for b in changed:
+                        out.seek(header_bytes + int(b["offset_bytes"]))
+                        with open(os.path.join(cache_dir, f"{b['sha1']}.pcm"), "rb") as src:
+                            shutil.copyfileobj(src, out, _COPY_CHUNK)
+                mode = "patched"
+            except Exception as e:
+                print(f"⚠️  VO: in-place patch failed, re-splicing: {e}")
+
+    if mode == "spliced":
+        tmp_path = output_path + ".part"
+        try:
+            with wave.open(tmp_path, "wb") as w:
+                w.setnchannels(PCM_CHANNELS)
+                w.setsampwidth(PCM_SAMPLE_WIDTH)
+                w.setframerate(PCM_SAMPLE_RATE)
+                for b in blocks:
+                    with open(os.path.join(cache_dir, f"{b['sha1']}.pcm"), "rb") as src:
+                        for chunk in iter(lambda: src.read(_COPY_CHUNK), b""):
+                            w.writeframesraw(chunk)
+            os.replace(tmp_path, output_path)
+        except Exception as e:
+            print(f"⚠️  VO: splice failed: {e}")
+            try:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            except Exception:
+                pass
+            return None
+
+    # Drop PCM of blocks that are no longer part of the voiceover (bounded cache size).
+    live = {f"{b['sha1']}.pcm" for b in blocks}
+    for fn in os.listdir(cache_dir):
+        if fn.endswith(".pcm") and fn not in live:
+            try:
+                os.remove(os.path.join(cache_dir, fn))
+            except Exception:
+                pass
+
+    result = {**timeline, "audio_path": output_path, "mode": mode}
+    try:
+        _write_json_atomic(timeline_path, {"audio_path": output_path, "blocks": blocks,
+                                           "total_duration_sec": timeline["total_duration_sec"]})
+    except Exception as e:
+        print(f"⚠️  VO: failed to persist timeline: {e}")
+    print(
+        f"🎤 VO: {len(blocks)} blocks, {timeline['total_duration_sec']:.1f}s "
+        f"({mode}; decoded {timeline['decoded']}, reused {timeline['reused']})"
+    )
+    return result
+
+
+def _match_timeline_blocks(
+    timeline: Dict[str, Any], narration_blocks: List[Dict[str, Any]]
+) -> List[Tuple[Dict[str, Any], Optional[Dict[str, Any]]]]:
+    """
+    Pairs narration_blocks[i-1] with Narrator_{i:04d}.mp3 by name (TTS endpoint naming), so a
+    missing/failed block does not shift later ones. Positional order only when the timeline has
+    no Narrator_NNNN.mp3 files at all.
+    """
+    blocks = (timeline or {}).get("blocks") or []
+    by_name = {b.get("filename"): b for b in blocks}
+    named = any(re.fullmatch(r"Narrator_\d{4}\.mp3", str(fn or "")) for fn in by_name)
+    out = []
+    for i, nb in enumerate(narration_blocks or [], start=1):
+        if not isinstance(nb, dict):
+            continue
+        if named:
+            b = by_name.get(f"Narrator_{i:04d}.mp3")
+        else:
+            b = blocks[i - 1] if i - 1 < len(blocks) else None
+        out.append((nb, b))
+    return out
+
+
+def block_durations_by_id(timeline: Dict[str, Any], narration_blocks: List[Dict[str, Any]]) -> Dict[str, float]:
+    """
+    Maps narration block_id → measured duration (blocks without an MP3 are omitted).
+    """
+    out: Dict[str, float] = {}
+    for nb, b in _match_timeline_blocks(timeline, narration_blocks):
+        bid = str(nb.get("block_id") or "").strip()
+        if bid and b and float(b.get("duration_sec") or 0) > 0:
+            out[bid] = float(b["duration_sec"])
+    return out
+
+
+def _srt_time(seconds: float) -> str:
+    ms = int(round(max(0.0, seconds) * 1000))
+    hours, ms = divmod(ms, 3600000)
+    minutes, ms = divmod(ms, 60000)
+    secs, ms = divmod(ms, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d},{ms:03d}"
+
+
+def write_srt(timeline: Dict[str, Any], narration_blocks: List[Dict[str, Any]], srt_path: str) -> Optional[str]:
+    """
+    Writes one subtitle per narration block using the measured block offsets.
+    Blocks are matched to their MP3 by name; a block without audio gets no subtitle.
+    """
+    if not (timeline or {}).get("blocks"):
+        return None
+    entries = []
+    for nb, b in _match_timeline_blocks(timeline, narration_blocks):
+        text = str(nb.get("text_tts") or nb.get("text") or "").strip()
+        if not text or not b:
+            continue
+        start = float(b.get("start_sec") or 0.0)
+        end = start + float(b.get("duration_sec") or 0.0)
+        entries.append(f"{len(entries) + 1}\n{_srt_time(start)} --> {_srt_time(end)}\n{text}\n")
+    if not entries:
+        return None
+    os.makedirs(os.path.dirname(srt_path) or ".", exist_ok=True)
+    with open(srt_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(entries))
+    return srt_path
@@ -113,6 +113,7 @@ const VideoProductionPipeline = ({
   const [error, setError] = useState('');
   const [showTtsPreview, setShowTtsPreview] = useState(false);
   const pollRef = useRef(null);
+  const eventSourceRef = useRef(null);
   const videoPollRef = useRef(null);
   const videoPollTimeoutRef = useRef(null);
 
@@ -422,6 +423,10 @@ const VideoProductionPipeline = ({
   const [showBeforeAfter, setShowBeforeAfter] = useState(false);
 
   const stopPolling = () => {
+    if (eventSourceRef.current) {
+      eventSourceRef.current.close();
+      eventSourceRef.current = null;
+    }
     if (pollRef.current) {
       clearInterval(pollRef.current);
       pollRef.current = null;
@@ -559,7 +564,7 @@ const VideoProductionPipeline = ({
       // Poll script state for updates
       videoPollRef.current = setInterval(async () => {
         try {
-          const stateRes = await axios.get(`/api/script/state/${episodeId}`);
+          const stateRes = await axios.get(`/api/script/state/${episodeId}?parts=asset_resolver_output`);
           const state = stateRes.data.data;
           
           const aarStep = state?.steps?.asset_resolver;
@@ -660,7 +665,7 @@ const VideoProductionPipeline = ({
         // Start the same polling logic as the success path
         videoPollRef.current = setInterval(async () => {
           try {
-            const stateRes = await axios.get(`/api/script/state/${episodeId}`);
+            const stateRes = await axios.get(`/api/script/state/${episodeId}?parts=asset_resolver_output`);
             const state = stateRes.data.data;
             
             const aarStep = state?.steps?.asset_resolver;
@@ -923,7 +928,7 @@ const VideoProductionPipeline = ({
       // Poll script state for AAR completion
       videoPollRef.current = setInterval(async () => {
         try {
-          const stateRes = await axios.get(`/api/script/state/${episodeId}`);
+          const stateRes = await axios.get(`/api/script/state/${episodeId}?parts=`);
           const state = stateRes.data.data;
           
           const aarStep = state?.steps?.asset_resolver;
@@ -1220,6 +1225,24 @@ const VideoProductionPipeline = ({
     });
     setError('');
 
+    // Backend syntetizuje bloky paralelně – průběh čteme z /api/tts/progress během běhu requestu
+    const progressTimer = setInterval(async () => {
+      try {
+        const p = await axios.get(`/api/tts/progress/${episodeId}`, { timeout: 5000 });
+        if (p.data?.success && p.data.status === 'running' && p.data.total) {
+          const finished = (p.data.done || 0) + (p.data.failed || 0);
+          setTtsState(prev => (prev.status !== 'generating' ? prev : {
+            ...prev,
+            currentBlock: finished,
+            totalBlocks: p.data.total,
+            progress: Math.round((finished / p.data.total) * 100)
+          }));
+        }
+      } catch (e) {
+        // ignore; progress is best-effort
+      }
+    }, 1000);
+
     try {
       console.log('🎙️ Starting TTS generation...');
       
@@ -1260,6 +1283,8 @@ const VideoProductionPipeline = ({
         error: errorMsg
       }));
       setError(errorMsg);
+    } finally {
+      clearInterval(progressTimer);
     }
   };
 
@@ -1347,38 +1372,95 @@ const VideoProductionPipeline = ({
     return state;
   };
 
+  // Merge SSE progress event (AAR/CB) into the current scriptState without refetching.
+  const applyProgressEvent = (evt) => {
+    setScriptState((prev) => {
+      if (!prev) return prev;
+      const next = { ...prev, ...(evt.fields || {}) };
+      if (evt.step && evt.step_fields && prev.steps?.[evt.step]) {
+        next.steps = { ...prev.steps, [evt.step]: { ...prev.steps[evt.step], ...evt.step_fields } };
+      }
+      return next;
+    });
+  };
+
   const startPolling = (epId) => {
     stopPolling();
     // Throttle expensive query reloads while pipeline is running.
     let lastQueriesReloadAt = 0;
-    pollRef.current = setInterval(async () => {
-      try {
-        const state = await fetchState(epId);
-        setScriptState(state);
-
-        // IMPORTANT: While pipeline is RUNNING, queries may appear later (after FDA or after AAR writes manifest).
-        // Refreshing script_state alone is not enough — we must reload /api/video/search-queries to update UI.
-        const fdaDone =
-          (state?.steps?.footage_director?.status || '').toString().toUpperCase() === 'DONE';
-        const hasEpisodePoolQueries = Array.isArray(episodePoolQueries) && episodePoolQueries.length > 0;
-        const now = Date.now();
-        if (!hasEpisodePoolQueries && fdaDone && now - lastQueriesReloadAt > 4000) {
-          lastQueriesReloadAt = now;
-          try {
-            await loadSearchQueries(epId);
-          } catch (e) {
-            // handled inside loadSearchQueries
-          }
+
+    const handleState = async (state) => {
+      setScriptState(state);
+
+      // IMPORTANT: While pipeline is RUNNING, queries may appear later (after FDA or after AAR writes manifest).
+      // Refreshing script_state alone is not enough — we must reload /api/video/search-queries to update UI.
+      const fdaDone =
+        (state?.steps?.footage_director?.status || '').toString().toUpperCase() === 'DONE';
+      const hasEpisodePoolQueries = Array.isArray(episodePoolQueries) && episodePoolQueries.length > 0;
+      const now = Date.now();
+      if (!hasEpisodePoolQueries && fdaDone && now - lastQueriesReloadAt > 4000) {
+        lastQueriesReloadAt = now;
+        try {
+          await loadSearchQueries(epId);
+        } catch (e) {
+          // handled inside loadSearchQueries
         }
+      }
+
+      if (state?.script_status === 'DONE' || state?.script_status === 'ERROR') {
+        stopPolling();
+      }
+    };
 
-        if (state?.script_status === 'DONE' || state?.script_status === 'ERROR') {
-          stopPolling();
+    const startIntervalPolling = () => {
+      pollRef.current = setInterval(async () => {
+        try {
+          await handleState(await fetchState(epId));
+        } catch (e) {
+          // keep polling; show last error
+          setError(e.message || 'Chyba při polling script state');
         }
+      }, 1200);
+    };
+
+    // Preferred: SSE push (/api/script/events). Full state is fetched only on step transitions;
+    // progress events are merged in place. Fallback: interval polling.
+    if (typeof window === 'undefined' || typeof window.EventSource === 'undefined') {
+      startIntervalPolling();
+      return;
+    }
+    const es = new window.EventSource(`/api/script/events/${epId}`);
+    eventSourceRef.current = es;
+    let lastStateKey = null;
+    es.onmessage = async (msg) => {
+      let evt;
+      try {
+        evt = JSON.parse(msg.data);
       } catch (e) {
-        // keep polling; show last error
-        setError(e.message || 'Chyba při polling script state');
+        return;
+      }
+      if (evt?.type === 'progress') {
+        applyProgressEvent(evt);
+        return;
       }
-    }, 1200);
+      if (evt?.type !== 'state') return;
+      const stateKey = `${evt.state?.updated_at || ''}|${evt.state?.script_status || ''}`;
+      if (stateKey === lastStateKey) return;
+      lastStateKey = stateKey;
+      try {
+        await handleState(await fetchState(epId));
+      } catch (e) {
+        setError(e.message || 'Chyba při načítání script state');
+      }
+    };
+    es.onerror = () => {
+      // Stream dropped (server restart / proxy) → fall back to polling.
+      if (eventSourceRef.current === es) {
+        es.close();
+        eventSourceRef.current = null;
+        if (!pollRef.current) startIntervalPolling();
+      }
+    };
   };
 
   // Reload-safe hydration
@@ -4266,9 +4348,9 @@ const VideoProductionPipeline = ({
                                               }`}
                                             >
                                               <div className="aspect-video bg-gray-100 relative">
-                                                {c.thumbnail_url ? (
+                                                {(c.thumbnail_proxy_url || c.thumbnail_url) ? (
                                                   <img
-                                                    src={c.thumbnail_url}
+                                                    src={c.thumbnail_proxy_url || c.thumbnail_url}
                                                     alt={c.title || c.archive_item_id}
                                                     className="w-full h-full object-cover"
                                                     loading="lazy"
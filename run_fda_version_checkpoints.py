@@ -8,7 +8,6 @@ Reads a real episode script_state.json and prints EXACT checkpoint tags:
 This uses the same validators/postprocessors from backend/, but avoids any LLM call.
 """
 
-import json
 import os
 import sys
 from typing import Any, Dict, Optional
@@ -37,8 +36,8 @@ def main() -> int:
         print(f"ERROR: script_state.json not found: {state_path}")
         return 2
 
-    with open(state_path, "r", encoding="utf-8") as f:
-        state: Dict[str, Any] = json.load(f)
+    from project_store import load_script_state_file  # noqa
+    state: Dict[str, Any] = load_script_state_file(state_path, parts=["footage_director_raw_output"])
 
     fdr = state.get("footage_director_raw_output") if isinstance(state.get("footage_director_raw_output"), dict) else {}
     raw_wrapper = fdr.get("response_json")